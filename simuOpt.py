@@ -91,6 +91,7 @@ simuOptions = {
     'GUI': True,
     'Plotter': None,
     'NumThreads': 1,
+    'GenoStorage': None,
 }
 
 # Optimized: command line option --optimized or environmental variable SIMUOPTIMIZED
@@ -114,6 +115,10 @@ if os.getenv('OMP_NUM_THREADS') is not None:
     except:
         print('Ignoring invalid value for environmental variable OMP_NUM_THREADS')
 
+# directory for memory-mapped genotype storage
+if os.getenv('SIMUGENOSTORAGE') is not None:
+    simuOptions['GenoStorage'] = os.getenv('SIMUGENOSTORAGE')
+
 # GUI: from environmental variable SIMUGUI
 if os.getenv('SIMUGUI') is not None:
     _gui = os.getenv('SIMUGUI')
@@ -136,7 +141,8 @@ elif _gui is not None:
     print("Invalid value '%s' for environmental variable SIMUGUI or commandline option --gui." % _gui)
 
 def setOptions(alleleType=None, optimized=None, gui=None, quiet=None,
-        debug=None, version=None, revision=None, numThreads=None, plotter=None):
+        debug=None, version=None, revision=None, numThreads=None, plotter=None,
+        genoStorage=None):
     '''Set options before simuPOP is loaded to control which simuPOP module to
     load, and how the module should be loaded.
 
@@ -202,6 +208,14 @@ def setOptions(alleleType=None, optimized=None, gui=None, quiet=None,
         ``OMP_NUM_THREADS``). If this parameter is not set, the number of
         threads will be set to 1, or a value set by environmental variable
         ``OMP_NUM_THREADS``.
+
+    genoStorage
+        A directory in which large genotype arrays will be stored as
+        memory-mapped temporary files, so that populations larger than
+        available memory can be simulated. Genotypes are stored in memory
+        if this parameter is not set, unless a directory is specified by
+        environmental variable ``SIMUGENOSTORAGE``. This option is not
+        supported under windows and by the binary and mutant modules.
     '''
     # if the module has already been imported, check which module
     # was imported
@@ -272,6 +286,11 @@ def setOptions(alleleType=None, optimized=None, gui=None, quiet=None,
         simuOptions['NumThreads'] = numThreads
     elif numThreads is not None:
         raise TypeError('An integer number is expected for parameter numThreads.')
+    # GenoStorage
+    if type(genoStorage) == str:
+        simuOptions['GenoStorage'] = genoStorage
+    elif genoStorage is not None:
+        raise TypeError('A directory is expected for parameter genoStorage.')
     if plotter is not None:
         sys.stderr.write('WARNING: plotter option is deprecated because of the removal of rpy/rpy2 support\n')
 
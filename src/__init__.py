@@ -332,6 +332,10 @@ else:
     else:
         from simuPOP.simuPOP_std import *
 
+# C++ exception classes exported by the wrapper module should not shadow
+# Python exceptions raised by functions defined in this module
+del Exception, IndexError, RuntimeError, StopIteration, SystemError, ValueError
+
 __version__ = moduleInfo()['version']
 
 if simuOptions['Version'] is not None:
@@ -356,6 +360,10 @@ if simuOptions['Revision'] is not None:
 if simuOptions['NumThreads'] is not None:
     setOptions(numThreads=simuOptions['NumThreads'])
 
+# store genotypes in memory-mapped files
+if simuOptions['GenoStorage'] is not None:
+    setOptions(genoStorage=simuOptions['GenoStorage'])
+
 if not simuOptions['Quiet']:
     info = moduleInfo()
     print("simuPOP Version %s : Copyright (c) 2004-2016 Bo Peng" % (__version__))
@@ -386,7 +394,7 @@ ALL_AVAIL = True
 UNSPECIFIED = False
 
 def evolve_pop(self, initOps=[], preOps=[], matingScheme=MatingScheme(), postOps=[],
-    finalOps=[], gen=-1, dryrun=False):
+    finalOps=[], gen=-1, dryrun=False, profile=False):
     '''Evolve the current population *gen* generations using mating scheme
     *matingScheme* and operators *initOps* (applied before evolution), *preOps*
     (applied to the parental population at the beginning of each life cycle),
@@ -397,20 +405,114 @@ def evolve_pop(self, initOps=[], preOps=[], matingScheme=MatingScheme(), postOps
     population with the evolved population. Please refer to function 
     ``Simulator.evolve`` for more details about each parameter.'''
     if dryrun:
-        print(describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gen, 1))
+        print(describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gen, 1, profile))
         return (0,)
     if isinstance(self, Pedigree):
         raise ValueError("Evolving a pedigree object directly is not allowed.")
     # create a simulator with self
     simu = Simulator(self)
     # evolve
-    gen = simu.evolve(initOps, preOps, matingScheme, postOps, finalOps, gen)
+    gen = simu.evolve(initOps, preOps, matingScheme, postOps, finalOps, gen,
+        profile=profile)
     # get the evolved population
     self.swap(simu.population(0))
     return gen[0]
 
 Population.evolve = evolve_pop
 
+_evolve_simu = Simulator.evolve
+
+# simulator and parameters of Simulator.evolve that are passed to forked
+# worker processes
+_parallelEvolveParams = None
+
+def _evolve_replicate(task):
+    '''Evolve a replicate of the simulator in a forked worker process, save
+    the evolved population to a file and return the number of evolved
+    generations.'''
+    import random
+    rep, seed, filename = task
+    simu, params, profile = _parallelEvolveParams
+    # reseed random number generators of simuPOP and Python, which are
+    # otherwise duplicated from the parent process.
+    setOptions(seed=seed)
+    random.seed(seed)
+    gen = _evolve_simu(simu, *params, reps=[rep], profile=profile)
+    simu.population(rep).save(filename, format='binary')
+    return gen[rep]
+
+def evolve_simu(self, initOps=[], preOps=[], matingScheme=MatingScheme(), postOps=[],
+    finalOps=[], gen=-1, dryrun=False, reps=ALL_AVAIL, parallel=None, workers=0,
+    profile=False):
+    '''Evolve all populations *gen* generations using mating scheme
+    *matingScheme* and operators *initOps*, *preOps*, *postOps* and
+    *finalOps*. If a list of replicates is specified by parameter *reps*,
+    only these replicates will be evolved. If *profile* is set to ``True``,
+    wall time, number of individuals and number of calls to Python functions
+    of each application of an operator or the mating scheme are saved to
+    variable ``profile`` of each evolved population. These parameters are
+    explained in detail in the simuPOP reference manual.
+
+    If *parallel* is set to ``'processes'``, replicates are evolved
+    concurrently in *workers* forked processes (default to the number of
+    cores of the computer). Each replicate is evolved with its own random
+    seed, drawn from the random number generator of the current process, so
+    results do not depend on the number of workers. Evolved populations,
+    along with variables in their local namespaces that can be pickled, are
+    brought back to the simulator. Because replicates are evolved
+    independently, a terminator that stops all replicates only stops
+    replicates evolved by the same process, and outputs of replicates to
+    the same file might be interleaved. This feature is not available under
+    windows.'''
+    if parallel is None or dryrun:
+        return _evolve_simu(self, initOps, preOps, matingScheme, postOps,
+            finalOps, gen, dryrun, reps, profile)
+    if parallel != 'processes':
+        raise ValueError("Parameter parallel can only be None or 'processes'.")
+    if not hasattr(os, 'fork'):
+        raise ValueError('Evolving replicates in worker processes is not supported under this platform.')
+    import multiprocessing, tempfile, shutil
+    if reps is ALL_AVAIL:
+        reps = list(range(self.numRep()))
+    elif isinstance(reps, int):
+        reps = [reps]
+    for rep in reps:
+        if rep >= self.numRep():
+            raise IndexError('Replicate index %d out of range of 0 ~ %d' % (rep, self.numRep() - 1))
+    if workers == 0:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(reps)))
+    # draw seeds for all replicates so that the seed of a replicate does not
+    # depend on the replicates that are evolved.
+    seeds = [1 + getRNG().randInt(0x7fffffff) for rep in range(self.numRep())]
+    global _parallelEvolveParams
+    _parallelEvolveParams = (self, (initOps, preOps, matingScheme, postOps,
+        finalOps, gen, False), profile)
+    tmpdir = tempfile.mkdtemp(prefix='simuPOP_')
+    try:
+        try:
+            context = multiprocessing.get_context('fork')
+        except AttributeError:
+            # Python 2 always forks worker processes
+            context = multiprocessing
+        tasks = [(rep, seeds[rep], os.path.join(tmpdir, 'rep_%d.pop' % rep)) for rep in reps]
+        pool = context.Pool(workers)
+        try:
+            evolved = pool.map(_evolve_replicate, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        res = [0] * self.numRep()
+        for (rep, seed, filename), g in zip(tasks, evolved):
+            self.population(rep).swap(loadPopulation(filename))
+            res[rep] = g
+    finally:
+        _parallelEvolveParams = None
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return tuple(res)
+
+Simulator.evolve = evolve_simu
+
 def all_individuals(self, subPops=ALL_AVAIL, ancGens=ALL_AVAIL):
     '''Return an iterator that iterat through all (virtual) subpopulations in
     all ancestral generations. A list of (virtual) subpopulations (*subPops*)
@@ -1488,6 +1488,65 @@ getarrayitem_template<GenoIterator>(PyObject * op, Py_ssize_t i)
 }
 
 
+/// CPPONLY
+template <typename T>
+int fill_carray_buffer_template(struct arrayobject_template<T> * self, Py_buffer * view,
+                                int flags, const char * format)
+{
+	typedef typename std::iterator_traits<T>::value_type ValueType;
+
+	// the array does not own its memory, so the buffer holds a reference
+	// to the array object, which is valid as long as the population is not
+	// changed, the same as the array itself.
+	view->buf = Py_SIZE(self) == 0 ? NULL : (void *)&*(self->ob_iter);
+	view->obj = (PyObject *)self;
+	Py_INCREF(self);
+	view->len = Py_SIZE(self) * sizeof(ValueType);
+	view->readonly = 0;
+	view->itemsize = sizeof(ValueType);
+	view->format = (flags & PyBUF_FORMAT) ? const_cast<char *>(format) : NULL;
+	view->ndim = 1;
+	view->shape = (flags & PyBUF_ND) ? &(((PyVarObject *)self)->ob_size) : NULL;
+	view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ? &view->itemsize : NULL;
+	view->suboffsets = NULL;
+	view->internal = NULL;
+	return 0;
+}
+
+
+/// CPPONLY
+template <typename T>
+int array_getbuffer_template(struct arrayobject_template<T> * /* self */, Py_buffer * view, int /* flags */)
+{
+	view->obj = NULL;
+	PyErr_SetString(PyExc_BufferError,
+		"Genotypes of binary and mutant modules are not stored as an array of alleles "
+		"and cannot be exposed through the buffer protocol.");
+	return -1;
+}
+
+
+#  if !defined(BINARYALLELE) && !defined(MUTANTALLELE)
+/// CPPONLY
+template <>
+int array_getbuffer_template<GenoIterator>(struct arrayobject_template<GenoIterator> * self,
+                                           Py_buffer * view, int flags)
+{
+	return fill_carray_buffer_template<GenoIterator>(self, view, flags, ALLELE_BUFFER_FORMAT);
+}
+
+
+#  endif
+
+/// CPPONLY
+template <>
+int array_getbuffer_template<LineageIterator>(struct arrayobject_template<LineageIterator> * self,
+                                              Py_buffer * view, int flags)
+{
+	return fill_carray_buffer_template<LineageIterator>(self, view, flags, LINEAGE_BUFFER_FORMAT);
+}
+
+
 /// CPPONLY
 template <typename T>
 PyObject * newcarrayobject_template(T begin, T end)
@@ -971,6 +971,18 @@ PyMappingMethods array_as_mapping = {
 	(objobjargproc)array_ass_subscr
 };
 
+int
+array_getbuffer(arrayobject * self, Py_buffer * view, int flags)
+{
+	return array_getbuffer_template<GenoIterator>(self, view, flags);
+}
+
+
+PyBufferProcs array_as_buffer = {
+	(getbufferproc)array_getbuffer,         /*bf_getbuffer*/
+	0                                       /*bf_releasebuffer*/
+};
+
 PyObject * array_new(PyTypeObject * type, PyObject * args, PyObject * kwds)
 {
 	return array_new_template<GenoIterator>(type, args, kwds);
@@ -1023,7 +1035,7 @@ PyTypeObject Arraytype = {
 	0,                                          /* tp_str */
 	PyObject_GenericGetAttr,                    /* tp_getattro */
 	0,                                          /* tp_setattro */
-	0,                                          /* tp_as_buffer*/
+	&array_as_buffer,                           /* tp_as_buffer*/
 	Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,   /* tp_flags */
 	arraytype_doc,                              /* tp_doc */
 	0,                                          /* tp_traverse */
@@ -1221,6 +1233,18 @@ PyMappingMethods array_as_mapping_lineage = {
 	(objobjargproc)array_ass_subscr_lineage
 };
 
+int
+array_getbuffer_lineage(arrayobject_lineage * self, Py_buffer * view, int flags)
+{
+	return array_getbuffer_template<LineageIterator>(self, view, flags);
+}
+
+
+PyBufferProcs array_as_buffer_lineage = {
+	(getbufferproc)array_getbuffer_lineage, /*bf_getbuffer*/
+	0                                       /*bf_releasebuffer*/
+};
+
 PyObject * array_new_lineage(PyTypeObject * type, PyObject * args, PyObject * kwds)
 {
 	return array_new_template<LineageIterator>(type, args, kwds);
@@ -1273,7 +1297,7 @@ PyTypeObject LineageArraytype = {
 	0,                                          /* tp_str */
 	PyObject_GenericGetAttr,                    /* tp_getattro */
 	0,                                          /* tp_setattro */
-	0,                                          /* tp_as_buffer*/
+	&array_as_buffer_lineage,                   /* tp_as_buffer*/
 	Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,   /* tp_flags */
 	arraytype_doc_lineage,                              /* tp_doc */
 	0,                                          /* tp_traverse */
@@ -1514,7 +1538,8 @@ PyObject * PyDefDict_New()
 int initCustomizedTypes(PyObject * m)
 {
 	Py_TYPE(&Arraytype) = &PyType_Type;
-	if (PyType_Ready(&Arraytype) < 0)
+	Py_TYPE(&LineageArraytype) = &PyType_Type;
+	if (PyType_Ready(&Arraytype) < 0 || PyType_Ready(&LineageArraytype) < 0)
 		return -1;
 	//
 	Py_TYPE(&defdict_type) = &PyType_Type;
@@ -45,6 +45,9 @@ string InitSex::describe(bool /* format */) const
 
 bool InitSex::apply(Population & pop) const
 {
+	// alleles on sex chromosomes are counted by sex
+	pop.alleleTracker().invalidate();
+
 	const subPopList subPops = applicableSubPops(pop);
 
 	size_t idx = 0;
@@ -69,18 +72,27 @@ bool InitSex::apply(Population & pop) const
 			for (; ind.valid(); ++ind, ++idx)
 				ind->setSex(m_sex[idx % sexSz] == 1 ? MALE : FEMALE);
 		else {
+			// individuals draw from keyed streams if a counter-based RNG is used
+			ULONG streamKey = getRNG().newStreamKey();
 			if (numThreads() > 1) {
 #ifdef _OPENMP
 #  pragma omp parallel private(ind)
 				{
 					ind = pop.indIterator(sp->subPop(), omp_get_thread_num());
-					for (; ind.valid(); ++ind)
+					for (; ind.valid(); ++ind) {
+						getRNG().setStream(streamKey, pop.gen(), &*ind - &*pop.rawIndBegin());
 						ind->setSex(ws.draw() == 0 ? MALE : FEMALE);
+					}
+					getRNG().resetStream();
 				}
 #endif
-			} else
-				for (; ind.valid(); ++ind)
+			} else {
+				for (; ind.valid(); ++ind) {
+					getRNG().setStream(streamKey, pop.gen(), &*ind - &*pop.rawIndBegin());
 					ind->setSex(ws.draw() == 0 ? MALE : FEMALE);
+				}
+				getRNG().resetStream();
+			}
 		}
 		pop.deactivateVirtualSubPop(sp->subPop());
 	}
@@ -252,6 +264,8 @@ vectorf InitGenotype::getFreqOrProp(size_t locus, const vspID & vsp) const
 
 bool InitGenotype::apply(Population & pop) const
 {
+	pop.alleleTracker().invalidate();
+
 	const subPopList subPops = applicableSubPops(pop);
 
 	const vectoru & loci = m_loci.elems(&pop);
@@ -0,0 +1,119 @@
+/**
+ *  $File: mapped_allocator.h $
+ *  $LastChangedDate$
+ *  $Rev$
+ *
+ *  This file is part of simuPOP, a forward-time population genetics
+ *  simulation environment. Please visit http://simupop.sourceforge.net
+ *  for details.
+ *
+ *  Copyright (C) 2004 - 2010 Bo Peng (bpeng@mdanderson.org)
+ *
+ *  This program is free software: you can redistribute it and/or modify
+ *  it under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  (at your option) any later version.
+ *
+ *  This program is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *
+ *  You should have received a copy of the GNU General Public License
+ *  along with this program. If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#ifndef _MAPPED_ALLOCATOR_H
+#define _MAPPED_ALLOCATOR_H
+
+#include <cstddef>
+#include <memory>
+
+namespace simuPOP {
+
+/** CPPONLY Allocate \e bytes bytes from a memory-mapped temporary file if
+ *  file-backed genotype storage is enabled (see \c setOptions) and the
+ *  block is large enough. Return \c NULL if the block should be allocated
+ *  from the heap.
+ */
+void * mappedAllocate(size_t bytes);
+
+/** CPPONLY Release a block allocated by \c mappedAllocate. Return \c false
+ *  if \e ptr was not allocated from a memory-mapped file so that it should
+ *  be released to the heap.
+ */
+bool mappedDeallocate(void * ptr, size_t bytes);
+
+/** CPPONLY A stateless allocator that stores large blocks in memory-mapped
+ *  temporary files, and small blocks on the heap. Because the allocator
+ *  holds no state, vectors using it can be swapped and copied freely, and
+ *  iterators to their elements behave exactly as iterators to vectors
+ *  using the standard allocator.
+ */
+template <class T>
+class MappedAllocator : public std::allocator<T>
+{
+public:
+	typedef T value_type;
+	typedef T * pointer;
+	typedef const T * const_pointer;
+	typedef T & reference;
+	typedef const T & const_reference;
+	typedef size_t size_type;
+	typedef std::ptrdiff_t difference_type;
+
+	template <class U>
+	struct rebind
+	{
+		typedef MappedAllocator<U> other;
+	};
+
+	MappedAllocator() throw()
+	{
+	}
+
+
+	MappedAllocator(const MappedAllocator &) throw() : std::allocator<T>()
+	{
+	}
+
+
+	template <class U>
+	MappedAllocator(const MappedAllocator<U> &) throw() : std::allocator<T>()
+	{
+	}
+
+
+	T * allocate(size_type n, const void * = 0)
+	{
+		void * ptr = mappedAllocate(n * sizeof(T));
+
+		return ptr == NULL ? std::allocator<T>::allocate(n) : static_cast<T *>(ptr);
+	}
+
+
+	void deallocate(T * ptr, size_type n)
+	{
+		if (!mappedDeallocate(ptr, n * sizeof(T)))
+			std::allocator<T>::deallocate(ptr, n);
+	}
+
+
+};
+
+template <class T, class U>
+bool operator==(const MappedAllocator<T> &, const MappedAllocator<U> &)
+{
+	return true;
+}
+
+
+template <class T, class U>
+bool operator!=(const MappedAllocator<T> &, const MappedAllocator<U> &)
+{
+	return false;
+}
+
+
+}
+#endif
@@ -1122,7 +1122,7 @@ void CombinedParentsChooser::finalize()
 
 PyParentsChooser::PyParentsChooser(PyObject * pc)
 	: ParentChooser(), m_func(pc), m_popObj(NULL),
-	m_generator(NULL)
+	m_generator(NULL), m_batch(), m_batchIdx(0)
 {
 }
 
@@ -1163,11 +1163,65 @@ void PyParentsChooser::initialize(Population & pop, size_t sp)
 }
 
 
+template <typename T>
+static long readIndex(const char * ptr)
+{
+	T value;
+
+	memcpy(&value, ptr, sizeof(T));
+	return static_cast<long>(value);
+}
+
+
+/* Read items of a buffer of integers of up to two dimensions, in row-major
+   order. Return false if the items are not integers in native byte order. */
+static bool readIndexes(const Py_buffer & view, vector<long> & indexes)
+{
+	const char * fmt = view.format == NULL ? "B" : view.format;
+
+	if (*fmt == '@' || *fmt == '=')
+		++fmt;
+	if (fmt[0] == '\0' || fmt[1] != '\0' || view.ndim > 2)
+		return false;
+	long (* read)(const char *) = NULL;
+	switch (*fmt) {
+	case 'b': read = readIndex<signed char>; break;
+	case 'B': read = readIndex<unsigned char>; break;
+	case 'h': read = readIndex<short>; break;
+	case 'H': read = readIndex<unsigned short>; break;
+	case 'i': read = readIndex<int>; break;
+	case 'I': read = readIndex<unsigned int>; break;
+	case 'l': read = readIndex<long>; break;
+	case 'L': read = readIndex<unsigned long>; break;
+	case 'q': read = readIndex<long long>; break;
+	case 'Q': read = readIndex<unsigned long long>; break;
+	case 'n': read = readIndex<Py_ssize_t>; break;
+	case 'N': read = readIndex<size_t>; break;
+	default:
+		return false;
+	}
+	const char * buf = static_cast<const char *>(view.buf);
+	Py_ssize_t rows = view.ndim == 0 ? 1 : view.shape[0];
+	Py_ssize_t cols = view.ndim < 2 ? 1 : view.shape[1];
+	Py_ssize_t rowStride = view.ndim == 0 ? 0 : (view.strides ? view.strides[0] : cols * view.itemsize);
+	Py_ssize_t colStride = view.ndim < 2 ? 0 : (view.strides ? view.strides[1] : view.itemsize);
+	indexes.resize(rows * cols);
+	for (Py_ssize_t i = 0; i < rows; ++i)
+		for (Py_ssize_t j = 0; j < cols; ++j)
+			indexes[i * cols + j] = read(buf + i * rowStride + j * colStride);
+	return true;
+}
+
+
 ParentChooser::IndividualPair PyParentsChooser::chooseParents()
 {
 	DBG_ASSERT(initialized(), SystemError,
 		"Please initialize this parent chooser before using it");
 
+	// parents from a batch returned earlier
+	if (m_batchIdx < m_batch.size())
+		return m_batch[m_batchIdx++];
+
 	PyObject * item = m_generator.next();
 
 #ifndef OPTIMIZED
@@ -1189,6 +1243,38 @@ ParentChooser::IndividualPair PyParentsChooser::chooseParents()
 #endif
 		Py_DECREF(item);
 		return ParentChooser::IndividualPair(&*(m_begin + parent), (Individual *)(0));
+	} else if (PyObject_CheckBuffer(item) && !PyBytes_Check(item)) {
+		// a batch of parents, or pairs of parents, as an array of indexes
+		Py_buffer view;
+		if (PyObject_GetBuffer(item, &view, PyBUF_STRIDES | PyBUF_FORMAT) != 0) {
+			PyErr_Clear();
+			Py_DECREF(item);
+			throw ValueError("Failed to read parents from returned buffer.");
+		}
+		vector<long> indexes;
+		bool valid = readIndexes(view, indexes);
+		size_t numCols = view.ndim == 2 ? view.shape[1] : 1;
+		PyBuffer_Release(&view);
+		Py_DECREF(item);
+		PARAM_FAILIF(!valid, ValueError,
+			"Parents should be returned as an array of integer indexes.");
+		PARAM_FAILIF(numCols > 2, ValueError,
+			"Pairs of parents should be returned as an array of shape (n, 2).");
+		PARAM_FAILIF(indexes.empty(), ValueError,
+			"An empty array of parents is returned.");
+		m_batch.resize(indexes.size() / numCols);
+		for (size_t i = 0; i < m_batch.size(); ++i) {
+			Individual * parents[2] = { NULL, NULL };
+			for (size_t j = 0; j < numCols; ++j) {
+				long idx = indexes[i * numCols + j];
+				DBG_ASSERT(static_cast<ULONG>(idx) < m_size, ValueError,
+					(boost::format("Returned parent index (%1%) is greater than subpopulation size %2%") % idx % m_size).str());
+				parents[j] = &*(m_begin + idx);
+			}
+			m_batch[i] = ParentChooser::IndividualPair(parents[0], parents[1]);
+		}
+		m_batchIdx = 1;
+		return m_batch[0];
 	} else if (PySequence_Check(item)) {
 		DBG_ASSERT(PySequence_Size(item) == 2, RuntimeError,
 			"Parents should be returned in the form of a sequence of two elements");
@@ -1227,6 +1313,8 @@ void PyParentsChooser::finalize()
 	Py_DECREF(m_popObj);
 	m_generator.set(NULL);
 	m_popObj = NULL;
+	m_batch.clear();
+	m_batchIdx = 0;
 	m_initialized = false;
 }
 
@@ -1286,13 +1374,18 @@ bool MatingScheme::prepareScratchPop(Population & pop, Population & scratch)
 	// The numbers might be used by during mating operator
 	scratch.setGen(pop.gen());
 	scratch.setRep(pop.rep());
-	scratch.clearInfo();
+	// information fields have been cleared by fitSubPopStru
 #ifdef MUTANTALLELE
 	// for mutant allele, clearing all existing genotype will make subsequent
 	// copyChromosomes much faster ...
 	scratch.setGenotype(vectoru(1, 0));
 #endif
 	DBG_DO(DBG_SIMULATOR, cerr << "New subpop size " << scratch.subPopSizes() << endl);
+	// alleles of offspring are counted as they are produced if the parental
+	// population tracks alleles
+	scratch.alleleTracker().track(pop.alleleTracker().loci());
+	if (pop.alleleTracker().tracking())
+		scratch.alleleTracker().reset(scratch);
 
 	DBG_FAILIF(scratch.numSubPop() != pop.numSubPop(),
 		ValueError, (boost::format("number of subPopulaitons must agree.\n Pre: %1% now: %2%") % pop.numSubPop() % scratch.numSubPop()).str());
@@ -1315,6 +1408,14 @@ bool MatingScheme::mate(Population & pop, Population & scratch)
 
 void MatingScheme::submitScratch(Population & pop, Population & scratch)
 {
+	// count alleles if they are not counted during mating
+	AlleleTracker & tracker = scratch.alleleTracker();
+	if (!pop.alleleTracker().tracking())
+		tracker.track(lociList(vectoru()));
+	else if (!tracker.valid(scratch)) {
+		tracker.track(pop.alleleTracker().loci());
+		tracker.recount(scratch);
+	}
 	// use scratch population,
 	pop.push(scratch);
 	scratch.validate("after push and discard");
@@ -1342,6 +1443,9 @@ string HomoMating::describe(bool format) const
 }
 
 
+// number of chunks of offspring per thread when offspring are generated in parallel
+#define MATING_CHUNKS_PER_THREAD 16
+
 bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop,
                             RawIndIterator offBegin, RawIndIterator offEnd)
 {
@@ -1349,6 +1453,19 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 	if (offBegin == offEnd)
 		return true;
 
+	// key of the streams from which families draw random numbers if a
+	// counter-based RNG is used. 0 otherwise.
+	return mateSubPop(pop, offPop, subPop, offBegin, offEnd, getRNG().newStreamKey());
+}
+
+
+bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop,
+                            RawIndIterator offBegin, RawIndIterator offEnd, ULONG streamKey)
+{
+	// nothing to do.
+	if (offBegin == offEnd)
+		return true;
+
 	if (!m_ParentChooser->initialized())
 		m_ParentChooser->initialize(pop, subPop);
 
@@ -1357,44 +1474,139 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 
 	// generate scratch.subPopSize(sp) individuals.
 	RawIndIterator it = offBegin;
-	// If the parent chooser is not parallelizable, or if openMP is not supported
+	// alleles of offspring are counted when they are produced
+	AlleleTracker & tracker = offPop.alleleTracker();
+	bool countAlleles = tracker.counting();
+	// If this subpopulation is mated concurrently with others, offspring
+	// are generated in the current thread and their alleles are counted
+	// separately.
+	bool concurrent = false;
+#ifdef _OPENMP
+	concurrent = omp_in_parallel() != 0;
+#endif
+	AlleleTracker localTracker;
+	if (countAlleles && concurrent) {
+		localTracker = tracker;
+		localTracker.clearCounts();
+	}
+	AlleleTracker & counter = concurrent ? localTracker : tracker;
+	// If the offspring generator is not parallelizable, or if openMP is not supported
 	// or if number of thread is set to 1, use the sequential method.
-	if (!m_ParentChooser->parallelizable() || numThreads() == 1 || !m_OffspringGenerator->parallelizable()) {
+	if (concurrent || numThreads() == 1 || !m_OffspringGenerator->parallelizable()) {
 		DBG_DO(DBG_MATING, cerr << "Mating is done in single-thread mode" << endl);
+		// offspring at which the current stream starts
+		RawIndIterator streamStart = offEnd;
 		while (it != offEnd) {
 			Individual * dad = NULL;
 			Individual * mom = NULL;
+			// each family draws from its own stream if a counter-based RNG is used.
+			// If a family is rejected, it does not move and the next attempt
+			// continues the stream instead of repeating the rejected family.
+			if (it != streamStart) {
+				getRNG().setStream(streamKey, pop.gen(), it - offPop.rawIndBegin());
+				streamStart = it;
+			}
 			ParentChooser::IndividualPair const parents = m_ParentChooser->chooseParents();
 			dad = parents.first;
 			mom = parents.second;
 
+			RawIndIterator first = it;
 			m_OffspringGenerator->generateOffspring(pop, offPop, dad, mom, it, offEnd);
+			if (countAlleles)
+				counter.addIndividuals(first, it);
+		}
+		getRNG().resetStream();
+		if (countAlleles && concurrent) {
+#pragma omp critical
+			tracker.addCounts(localTracker);
 		}
 	} else {
 		DBG_DO(DBG_MATING, cerr << "Mating is done in " << numThreads() << " threads" << endl);
 		// in this case, openMP must have been supported with numThreads() > 1
 #ifdef _OPENMP
 		size_t offPopSize = offEnd - offBegin;
-		ssize_t nBlocks = numThreads() * 2;
-		ssize_t numOffspring = m_OffspringGenerator->numOffspring(pop.gen());
+		size_t numOffspring = m_OffspringGenerator->numOffspring(pop.gen());
+		// If the parent chooser cannot be used in parallel (e.g. a Python parents
+		// chooser), parents of all families are chosen in advance by this thread.
+		vector<ParentChooser::IndividualPair> chosenParents;
+		if (!m_ParentChooser->parallelizable()) {
+			DBG_DO(DBG_MATING, cerr << "Choosing parents of all families before mating" << endl);
+			chosenParents.resize((offPopSize + numOffspring - 1) / numOffspring);
+			for (size_t i = 0; i < chosenParents.size(); ++i) {
+				getRNG().setStream(streamKey, pop.gen(), offBegin + i * numOffspring - offPop.rawIndBegin());
+				chosenParents[i] = m_ParentChooser->chooseParents();
+			}
+			getRNG().resetStream();
+		}
+		// Offspring are generated in chunks of whole families that are
+		// handed to threads as they become available so that threads that
+		// happen to produce cheap offspring do not idle.
+		size_t numFamilies = std::max(offPopSize / numOffspring, static_cast<size_t>(1));
+		size_t chunkSize = std::max(numFamilies / (numThreads() * MATING_CHUNKS_PER_THREAD),
+			static_cast<size_t>(1)) * numOffspring;
+		ssize_t nChunks = (offPopSize + chunkSize - 1) / chunkSize;
+		// Parents chosen in advance are assigned to families counted from the
+		// first family of each chunk. Rejected families use up their parents
+		// so a chunk can run out of parents before it is filled, in which case
+		// the position at which it stopped is recorded and the chunk is
+		// completed by this thread afterwards.
+		size_t chunkFamilies = chunkSize / numOffspring;
+		vector<RawIndIterator> unfinished(chosenParents.empty() ? 0 : nChunks, offEnd);
 		int except = 0;
 		string msg;
-#  pragma omp parallel for
-		for (int i = 0; i < nBlocks; i++) {
+		// threads count alleles of their offspring separately
+		vector<AlleleTracker> threadTrackers;
+		if (countAlleles) {
+			AlleleTracker emptyTracker(tracker);
+			emptyTracker.clearCounts();
+			threadTrackers.resize(numThreads(), emptyTracker);
+		}
+		// offspring produced and time spent by each thread
+		vectoru threadOffspring(numThreads(), 0);
+		vectorf threadTime(numThreads(), 0);
+		DBG_DO_(double startTime = omp_get_wtime());
+#  pragma omp parallel for schedule(dynamic)
+		for (ssize_t i = 0; i < nChunks; i++) {
+			if (except)
+				continue;
 			try {
-				RawIndIterator local_it = offBegin + i * (offPopSize / nBlocks / numOffspring) * numOffspring;
-				RawIndIterator local_offEnd = i == nBlocks - 1 ? offEnd : local_it + (offPopSize / nBlocks / numOffspring) * numOffspring ;
-
+				int threadID = omp_get_thread_num();
+				DBG_DO(DBG_MATING, threadTime[threadID] -= omp_get_wtime());
+				RawIndIterator local_it = offBegin + i * chunkSize;
+				RawIndIterator local_offEnd = i == nChunks - 1 ? offEnd : local_it + chunkSize;
+				DBG_DO(DBG_MATING, threadOffspring[threadID] += local_offEnd - local_it);
+
+				RawIndIterator streamStart = local_offEnd;
+				size_t family = i * chunkFamilies;
+				size_t endFamily = i == nChunks - 1 ? chosenParents.size() : family + chunkFamilies;
 				while (local_it != local_offEnd) {
 					if (except)
 						break;
+					if (!chosenParents.empty() && family == endFamily) {
+						unfinished[i] = local_it;
+						break;
+					}
 					Individual * dad = NULL;
 					Individual * mom = NULL;
-					ParentChooser::IndividualPair const parents = m_ParentChooser->chooseParents();
+					// families start at the same offspring as in single-thread mode
+					// because the number of offspring is fixed in parallel mode.
+					// Rejected families continue their streams.
+					if (local_it != streamStart) {
+						getRNG().setStream(streamKey, pop.gen(), local_it - offPop.rawIndBegin());
+						streamStart = local_it;
+					}
+					ParentChooser::IndividualPair const parents = chosenParents.empty() ?
+					                                              m_ParentChooser->chooseParents() :
+					                                              chosenParents[family++];
 					dad = parents.first;
 					mom = parents.second;
+					RawIndIterator first = local_it;
 					m_OffspringGenerator->generateOffspring(pop, offPop, dad, mom, local_it, local_offEnd);
+					if (countAlleles)
+						threadTrackers[threadID].addIndividuals(first, local_it);
 				}
+				getRNG().resetStream();
+				DBG_DO(DBG_MATING, threadTime[threadID] += omp_get_wtime());
 			} catch (StopEvolution e) {
 				if (!except) {
 					except = 1;
@@ -1432,6 +1644,39 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 			throw Exception(msg);
 		else if (except == -1)
 			throw Exception("Unexpected error from openMP parallel region");
+
+		for (size_t i = 0; i < unfinished.size(); ++i) {
+			if (unfinished[i] == offEnd)
+				continue;
+			RawIndIterator local_it = unfinished[i];
+			RawIndIterator local_offEnd = i + 1 == unfinished.size() ? offEnd : offBegin + (i + 1) * chunkSize;
+			DBG_DO(DBG_MATING, cerr << "Completing " << local_offEnd - local_it << " offspring of chunk " << i << endl);
+			// the stream of the first offspring has been used by the rejected
+			// family so the first attempt draws from the regular sequence
+			RawIndIterator streamStart = local_it;
+			while (local_it != local_offEnd) {
+				if (local_it != streamStart) {
+					getRNG().setStream(streamKey, pop.gen(), local_it - offPop.rawIndBegin());
+					streamStart = local_it;
+				}
+				ParentChooser::IndividualPair const parents = m_ParentChooser->chooseParents();
+				RawIndIterator first = local_it;
+				m_OffspringGenerator->generateOffspring(pop, offPop, parents.first, parents.second, local_it, local_offEnd);
+				if (countAlleles)
+					tracker.addIndividuals(first, local_it);
+			}
+			getRNG().resetStream();
+		}
+
+		for (size_t t = 0; t < threadTrackers.size(); ++t)
+			tracker.addCounts(threadTrackers[t]);
+
+		DBG_DO(DBG_MATING, cerr << offPopSize << " offspring generated in " << nChunks
+			                    << " chunks of " << chunkSize << " offspring" << endl);
+		DBG_DO(DBG_MATING, double elapsed = omp_get_wtime() - startTime;
+			for (size_t t = 0; t < threadTime.size(); ++t)
+				cerr << "Thread " << t << ": " << threadOffspring[t] << " offspring, "
+				     << (elapsed > 0 ? 100. * threadTime[t] / elapsed : 100.) << "% utilisation" << endl);
 #endif
 	}
 	m_ParentChooser->finalize();
@@ -1440,6 +1685,162 @@ bool HomoMating::mateSubPop(Population & pop, Population & offPop, size_t subPop
 }
 
 
+/* Whether or not subpopulations of pop should be mated concurrently, which
+   is the case if there are at least as many subpopulations as threads. */
+static bool concurrentMating(const Population & pop)
+{
+	return numThreads() > 1 && pop.numSubPop() > 1 && pop.numSubPop() >= numThreads();
+}
+
+
+/* Mate (non-virtual) subpopulations concurrently. matings[i] is a copy of
+   a homogeneous mating scheme that populates [offBegin[i], offEnd[i]) of the
+   offspring population from subpopulation subPops[i], using keyed streams
+   streamKeys[i] that are drawn by the calling thread so that results do not
+   depend on which thread mates which subpopulation. Copies of the mating
+   schemes are deleted afterwards. */
+static bool mateConcurrently(Population & pop, Population & scratch,
+                             const vector<HomoMating *> & matings, const vectoru & subPops,
+                             const vector<RawIndIterator> & offBegin, const vector<RawIndIterator> & offEnd,
+                             const vector<ULONG> & streamKeys)
+{
+	int except = 0;
+	string msg;
+	bool success = true;
+
+#pragma omp parallel for schedule(dynamic)
+	for (ssize_t i = 0; i < static_cast<ssize_t>(matings.size()); ++i) {
+		if (except || !success)
+			continue;
+		try {
+			if (!matings[i]->mateSubPop(pop, scratch, subPops[i], offBegin[i], offEnd[i], streamKeys[i])) {
+#pragma omp critical
+				success = false;
+			}
+		} catch (StopEvolution e) {
+#pragma omp critical
+			if (!except) {
+				except = 1;
+				msg = e.message();
+			}
+		} catch (ValueError e) {
+#pragma omp critical
+			if (!except) {
+				except = 2;
+				msg = e.message();
+			}
+		} catch (RuntimeError e) {
+#pragma omp critical
+			if (!except) {
+				except = 3;
+				msg = e.message();
+			}
+		} catch (Exception e) {
+#pragma omp critical
+			if (!except) {
+				except = 4;
+				msg = e.message();
+			}
+		} catch (...) {
+#pragma omp critical
+			if (!except)
+				except = -1;
+		}
+	}
+	for (size_t i = 0; i < matings.size(); ++i)
+		delete matings[i];
+
+	if (except == 1)
+		throw  StopEvolution(msg);
+	else if (except == 2)
+		throw ValueError(msg);
+	else if (except == 3)
+		throw RuntimeError(msg);
+	else if (except == 4)
+		throw Exception(msg);
+	else if (except == -1)
+		throw Exception("Unexpected error from openMP parallel region");
+	return success;
+}
+
+
+bool HomoMating::mate(Population & pop, Population & scratch)
+{
+	if (!concurrentMating(pop) || !parallelizable())
+		return MatingScheme::mate(pop, scratch);
+
+	// scrtach will have the right structure.
+	if (!prepareScratchPop(pop, scratch))
+		return false;
+
+	DBG_DO(DBG_MATING, cerr << "Mating " << pop.numSubPop() << " subpopulations in "
+		                    << numThreads() << " threads" << endl);
+	vector<HomoMating *> matings;
+	vectoru subPops;
+	vector<RawIndIterator> offBegin;
+	vector<RawIndIterator> offEnd;
+	// keys are drawn in the same order as they are drawn in sequential mating
+	vector<ULONG> streamKeys;
+	for (size_t sp = 0; sp < static_cast<size_t>(pop.numSubPop()); ++sp) {
+		if (scratch.subPopSize(sp) == 0)
+			continue;
+		matings.push_back(static_cast<HomoMating *>(clone()));
+		subPops.push_back(sp);
+		offBegin.push_back(scratch.rawIndBegin(sp));
+		offEnd.push_back(scratch.rawIndEnd(sp));
+		streamKeys.push_back(getRNG().newStreamKey());
+	}
+	if (!mateConcurrently(pop, scratch, matings, subPops, offBegin, offEnd, streamKeys))
+		return false;
+	submitScratch(pop, scratch);
+	return true;
+}
+
+
+/* Index individuals of pop by their IDs stored in information field idIdx.
+   IDs assigned by IdTagger are consecutive so a dense table idIndex from
+   ID - minID to individuals is used unless IDs are sparse, in which case
+   individuals are indexed by idMap. */
+static void indexByID(Population & pop, size_t idIdx, vector<Individual *> & idIndex,
+                      size_t & minID, IdMap & idMap)
+{
+	RawIndIterator it = pop.rawIndBegin();
+	RawIndIterator it_end = pop.rawIndEnd();
+	if (it == it_end)
+		return;
+	size_t popSize = it_end - it;
+	minID = toID(it->info(idIdx));
+	size_t maxID = minID;
+	for (; it != it_end; ++it) {
+		size_t id = toID(it->info(idIdx));
+		if (id < minID)
+			minID = id;
+		else if (id > maxID)
+			maxID = id;
+	}
+	if (maxID - minID < 4 * popSize + 1024) {
+		idIndex.assign(maxID - minID + 1, NULL);
+		for (it = pop.rawIndBegin(); it != it_end; ++it)
+			idIndex[toID(it->info(idIdx)) - minID] = &*it;
+	} else {
+		for (it = pop.rawIndBegin(); it != it_end; ++it)
+			idMap[toID(it->info(idIdx))] = &*it;
+	}
+}
+
+
+/* Return the individual with ID id from an index built by indexByID, NULL
+   if no such individual exists. */
+static Individual * findByID(size_t id, const vector<Individual *> & idIndex,
+                             size_t minID, const IdMap & idMap)
+{
+	if (!idIndex.empty())
+		return id < minID || id - minID >= idIndex.size() ? NULL : idIndex[id - minID];
+	IdMap::const_iterator it = idMap.find(id);
+	return it == idMap.end() ? NULL : it->second;
+}
+
+
 bool PedigreeMating::mate(Population & pop, Population & scratch)
 {
 	if (m_gen == -1)
@@ -1453,17 +1854,15 @@ bool PedigreeMating::mate(Population & pop, Population & scratch)
 	const_cast<Pedigree &>(m_ped).useAncestralGen(m_gen);
 	DBG_DO(DBG_MATING, cerr << "Producing offspring generation of size " << m_ped.subPopSizes() <<
 		" using generation " << m_gen << " of the pedigree." << endl);
+	// information fields are cleared by fitSubPopStru
 	scratch.fitSubPopStru(m_ped.subPopSizes(), m_ped.subPopNames());
 	scratch.setVirtualSplitter(pop.virtualSplitter());
-	scratch.clearInfo();
 
 	// build an index for parents
+	vector<Individual *> idIndex;
+	size_t minID = 0;
 	IdMap idMap;
-	size_t idIdx = pop.infoIdx(m_idField);
-	RawIndIterator it = pop.rawIndBegin();
-	RawIndIterator it_end = pop.rawIndEnd();
-	for (; it != it_end; ++it)
-		idMap[toID(it->info(idIdx))] = &*it;
+	indexByID(pop, pop.infoIdx(m_idField), idIndex, minID, idMap);
 
 	// initialize operator before entering parallel region in order to avoid race condition
 	opList::const_iterator iop = m_transmitters.begin();
@@ -1471,58 +1870,104 @@ bool PedigreeMating::mate(Population & pop, Population & scratch)
 	for (; iop != iopEnd; ++iop)
 		(*iop)->initializeIfNeeded(*pop.rawIndBegin());
 
-#pragma omp parallel private(it, it_end) if (numThreads() > 1 && parallelizable())
+	int fatherIdx = m_ped.fatherIdx();
+	int motherIdx = m_ped.motherIdx();
+	size_t offPopSize = scratch.rawIndEnd() - scratch.rawIndBegin();
+	// offspring are handed to threads in chunks as threads become available
+	size_t chunkSize = std::max(offPopSize / (numThreads() * MATING_CHUNKS_PER_THREAD),
+		static_cast<size_t>(1));
+	int except = 0;
+	string msg;
+	// offspring draw from keyed streams if a counter-based RNG is used
+	ULONG streamKey = getRNG().newStreamKey();
+#pragma omp parallel if (numThreads() > 1 && parallelizable())
 	{
-#ifdef _OPENMP
-		size_t id = omp_get_thread_num();
-		size_t offPopSize = scratch.rawIndEnd() - scratch.rawIndBegin();
-		it = scratch.rawIndBegin() + id * (offPopSize / numThreads());
-		it_end = id == numThreads() - 1 ? scratch.rawIndEnd() : it + (offPopSize / numThreads());
-		size_t i = id * (offPopSize / numThreads());
-#else
-		it = scratch.rawIndBegin();
-		it_end = scratch.rawIndEnd();
-		size_t i = 0;
-#endif
-		for (; it != it_end; ++it, ++i) {
-			const Individual & pedInd = m_ped.individual(static_cast<double>(i));
-
-			size_t my_id = toID(pedInd.info(m_ped.idIdx()));
-			size_t father_id = m_ped.fatherOf(my_id);
-			size_t mother_id = m_ped.motherOf(my_id);
-			Individual * dad = NULL;
-			Individual * mom = NULL;
-
-			if (father_id) {
-				IdMap::iterator dad_it = idMap.find(father_id);
-				DBG_FAILIF(dad_it == idMap.end(), RuntimeError,
-					(boost::format("Could not locate individual with ID %1%") % father_id).str());
-				dad = &*(dad_it->second);
-			}
-			if (mother_id) {
-				IdMap::iterator mom_it = idMap.find(mother_id);
-				DBG_FAILIF(mom_it == idMap.end(), RuntimeError,
-					(boost::format("Could not locate individual with ID %1%") % mother_id).str());
-				mom = &*(mom_it->second);
-			}
-			DBG_DO(DBG_MATING, cerr << "Choosing parents " << father_id << " and "
-				                    << mother_id << " for offspring " << my_id << endl);
-
-			// copy sex
-			it->setSex(pedInd.sex());
-			// copy id
-			it->setInfo(static_cast<double>(my_id), m_idField);
-			//
-			opList::const_iterator iop = m_transmitters.begin();
-			opList::const_iterator iopEnd = m_transmitters.end();
-			for (; iop != iopEnd; ++iop) {
-				if ((*iop)->isActive(pop.rep(), pop.gen()))
-					(*iop)->applyDuringMating(pop, scratch, it, dad, mom);
+#pragma omp for schedule(dynamic, chunkSize)
+		for (ssize_t i = 0; i < static_cast<ssize_t>(offPopSize); ++i) {
+			if (except)
+				continue;
+			try {
+				RawIndIterator it = scratch.rawIndBegin() + i;
+				const Individual & pedInd = m_ped.individual(static_cast<double>(i));
+
+				size_t my_id = toID(pedInd.info(m_ped.idIdx()));
+				size_t father_id = my_id == 0 || fatherIdx == -1 ? 0 : toID(pedInd.info(fatherIdx));
+				size_t mother_id = my_id == 0 || motherIdx == -1 ? 0 : toID(pedInd.info(motherIdx));
+				Individual * dad = NULL;
+				Individual * mom = NULL;
+
+				if (father_id) {
+					dad = findByID(father_id, idIndex, minID, idMap);
+					DBG_FAILIF(dad == NULL, RuntimeError,
+						(boost::format("Could not locate individual with ID %1%") % father_id).str());
+				}
+				if (mother_id) {
+					mom = findByID(mother_id, idIndex, minID, idMap);
+					DBG_FAILIF(mom == NULL, RuntimeError,
+						(boost::format("Could not locate individual with ID %1%") % mother_id).str());
+				}
+				DBG_DO(DBG_MATING, cerr << "Choosing parents " << father_id << " and "
+					                    << mother_id << " for offspring " << my_id << endl);
+
+				// copy sex
+				it->setSex(pedInd.sex());
+				// copy id
+				it->setInfo(static_cast<double>(my_id), m_idField);
+				//
+				getRNG().setStream(streamKey, pop.gen(), i);
+				opList::const_iterator iop = m_transmitters.begin();
+				opList::const_iterator iopEnd = m_transmitters.end();
+				for (; iop != iopEnd; ++iop) {
+					if ((*iop)->isActive(pop.rep(), pop.gen()))
+						(*iop)->applyDuringMating(pop, scratch, it, dad, mom);
+				}
+				// copy individual ID again, just to make sure that even if during mating operators
+				// changes ID, pedigree mating could proceed normally.
+				it->setInfo(static_cast<double>(my_id), m_idField);
+			} catch (StopEvolution e) {
+#pragma omp critical
+				if (!except) {
+					except = 1;
+					msg = e.message();
+				}
+			} catch (ValueError e) {
+#pragma omp critical
+				if (!except) {
+					except = 2;
+					msg = e.message();
+				}
+			} catch (RuntimeError e) {
+#pragma omp critical
+				if (!except) {
+					except = 3;
+					msg = e.message();
+				}
+			} catch (Exception e) {
+#pragma omp critical
+				if (!except) {
+					except = 4;
+					msg = e.message();
+				}
+			} catch (...) {
+#pragma omp critical
+				if (!except)
+					except = -1;
 			}
-			// copy individual ID again, just to make sure that even if during mating operators
-			// changes ID, pedigree mating could proceed normally.
-			it->setInfo(static_cast<double>(my_id), m_idField);
 		}
+		getRNG().resetStream();
+	}
+	if (except) {
+		const_cast<Pedigree &>(m_ped).useAncestralGen(oldGen);
+		if (except == 1)
+			throw StopEvolution(msg);
+		else if (except == 2)
+			throw ValueError(msg);
+		else if (except == 3)
+			throw RuntimeError(msg);
+		else if (except == 4)
+			throw Exception(msg);
+		else
+			throw Exception("Unexpected error from openMP parallel region");
 	}
 	const_cast<Pedigree &>(m_ped).useAncestralGen(oldGen);
 	submitScratch(pop, scratch);
@@ -1635,6 +2080,15 @@ bool HeteroMating::mate(Population & pop, Population & scratch)
 	if (!prepareScratchPop(pop, scratch))
 		return false;
 
+	// copies of mating schemes that are applied to subpopulations concurrently
+	bool concurrent = concurrentMating(pop);
+	vector<HomoMating *> matings;
+	vectoru matingSubPops;
+	vector<RawIndIterator> offBegin;
+	vector<RawIndIterator> offEnd;
+	vector<ULONG> streamKeys;
+	// subpopulations that are mated concurrently and need to be shuffled
+	vectoru shuffleSubPops;
 	for (size_t sp = 0; sp < static_cast<size_t>(pop.numSubPop()); ++sp) {
 		vectormating m;
 		vectorf w_pos;                          // positive weights
@@ -1741,6 +2195,29 @@ bool HeteroMating::mate(Population & pop, Population & scratch)
 
 		DBG_ASSERT(vspSize.size() == m.size() && m.size() == sps.size(),
 			SystemError, "Failed to determine subpopulation size");
+		// mate this subpopulation with others if its mating schemes are not
+		// applied to virtual subpopulations and can be used in parallel
+		bool concurrentSP = concurrent;
+		for (size_t idx = 0; idx < m.size() && concurrentSP; ++idx)
+			concurrentSP = !sps[idx].isVirtual() && m[idx]->parallelizable();
+		if (concurrentSP) {
+			RawIndIterator ind = scratch.rawIndBegin(sp);
+			for (size_t idx = 0; idx < m.size(); ++idx) {
+				if (vspSize[idx] == 0)
+					continue;
+				matings.push_back(static_cast<HomoMating *>(m[idx]->clone()));
+				matingSubPops.push_back(sp);
+				offBegin.push_back(ind);
+				offEnd.push_back(ind + vspSize[idx]);
+				streamKeys.push_back(getRNG().newStreamKey());
+				ind += vspSize[idx];
+			}
+			DBG_ASSERT(ind == scratch.rawIndEnd(sp), SystemError,
+				"Mating scheme somehow does not fill the whole offspring population.");
+			if (m.size() > 1 && m_shuffleOffspring)
+				shuffleSubPops.push_back(sp);
+			continue;
+		}
 		// it points to the first mating scheme.
 		vectoru::iterator itSize = vspSize.begin();
 		RawIndIterator ind = scratch.rawIndBegin(sp);
@@ -1786,6 +2263,16 @@ bool HeteroMating::mate(Population & pop, Population & scratch)
 			scratch.setIndOrdered(false);
 		}
 	}                         // each subpopulation.
+	if (!matings.empty()) {
+		DBG_DO(DBG_MATING, cerr << "Applying " << matings.size() << " mating schemes concurrently in "
+			                    << numThreads() << " threads" << endl);
+		if (!mateConcurrently(pop, scratch, matings, matingSubPops, offBegin, offEnd, streamKeys))
+			return false;
+		for (size_t i = 0; i < shuffleSubPops.size(); ++i) {
+			getRNG().randomShuffle(scratch.rawIndBegin(shuffleSubPops[i]), scratch.rawIndEnd(shuffleSubPops[i]));
+			scratch.setIndOrdered(false);
+		}
+	}
 	submitScratch(pop, scratch);
 	return true;
 }
@@ -1349,14 +1349,20 @@ public:
 	 *  parameters \e pop (the parental population) and \e subPop (index
 	 *  of subpopulation) and return the reference or index (relative to
 	 *  subpopulation) of a parent or a pair of parents repeatedly using
-	 *  the iterator interface of the generator function.
+	 *  the iterator interface of the generator function. To avoid calling
+	 *  the generator for each offspring, it can also return parents of many
+	 *  families at once as an array of integer indexes (e.g. a \c numpy array,
+	 *  an \c array.array or a \c memoryview), with one dimension for single
+	 *  parents or of shape <tt>(n, 2)</tt> for pairs of parents. Parents in
+	 *  such a batch that are not used when the subpopulation is populated are
+	 *  discarded.
 	 */
 	PyParentsChooser(PyObject * generator);
 
 	/// CPPONLY
 	PyParentsChooser(const PyParentsChooser & rhs)
 		: ParentChooser(rhs), m_func(rhs.m_func),
-		m_popObj(NULL), m_generator(NULL)
+		m_popObj(NULL), m_generator(NULL), m_batch(), m_batchIdx(0)
 	{
 		m_initialized = false;
 	}
@@ -1414,6 +1420,11 @@ private:
 	pyFunc m_func;
 	PyObject * m_popObj;
 	pyGenerator m_generator;
+
+	/// parents returned by the generator in a batch
+	vector<IndividualPair> m_batch;
+	/// index of the next parents in m_batch
+	size_t m_batchIdx;
 };
 
 
@@ -1534,6 +1545,17 @@ public:
 	 *  subpopulations this mating scheme will be applied to, and how many
 	 *  offspring this mating scheme will produce. Please refer to mating scheme
 	 *  \c HeteroMating for the use of these two parameters.
+	 *
+	 *  If simuPOP is running with multiple threads and there are at least
+	 *  as many subpopulations as threads, subpopulations are mated
+	 *  concurrently by copies of this mating scheme, each populating its
+	 *  own offspring subpopulation. Otherwise, offspring of a subpopulation
+	 *  are generated by multiple threads, each taking small chunks of
+	 *  families as it becomes available. Neither is possible if the
+	 *  offspring generator cannot be used in parallel. If the parent chooser
+	 *  cannot be used in parallel (e.g. a Python parents chooser),
+	 *  subpopulations are mated one by one and parents of all families of a
+	 *  subpopulation are chosen before offspring are generated.
 	 */
 	HomoMating(ParentChooser & chooser,
 		OffspringGenerator & generator,
@@ -1587,6 +1609,28 @@ public:
 	virtual bool mateSubPop(Population & pop, Population & offPop, size_t subPop,
 		RawIndIterator offBegin, RawIndIterator offEnd);
 
+	/** CPPONLY Mate a subpopulation. If a counter-based RNG is used, families
+	 *  draw random numbers from streams identified by \e streamKey, which
+	 *  should be drawn by the calling thread if subpopulations are mated
+	 *  concurrently.
+	 */
+	bool mateSubPop(Population & pop, Population & offPop, size_t subPop,
+		RawIndIterator offBegin, RawIndIterator offEnd, ULONG streamKey);
+
+	/** CPPONLY Populate offspring generation, mating subpopulations
+	 *  concurrently if possible.
+	 */
+	virtual bool mate(Population & pop, Population & scratch);
+
+	/** CPPONLY Whether or not offspring can be generated by multiple threads,
+	 *  or by copies of this mating scheme in different threads.
+	 */
+	bool parallelizable() const
+	{
+		return m_ParentChooser->parallelizable() && m_OffspringGenerator->parallelizable();
+	}
+
+
 private:
 	ParentChooser * m_ParentChooser;
 	OffspringGenerator * m_OffspringGenerator;
@@ -1613,7 +1657,8 @@ private:
  *  parents of each offspring using their IDs in the pedigree object. A list of
  *  during mating operators are then used to transmit parental genotype to
  *  the offspring. The population being evolved must have an information field
- *  \c 'ind_id'.
+ *  \c 'ind_id'. Offspring are generated by multiple threads if all operators
+ *  can be applied in parallel.
  */
 class PedigreeMating : public MatingScheme
 {
@@ -1724,6 +1769,14 @@ public:
 	 *  offspring produced by these mating schemes are shuffled randomly. If this
 	 *  is not desired, you can turn off offspring shuffling by setting parameter
 	 *  \e shuffleOffspring to \c False.
+	 *
+	 *  If simuPOP is running with multiple threads and there are at least as
+	 *  many subpopulations as threads, subpopulations are mated concurrently,
+	 *  each by copies of its mating schemes that populate disjoint ranges of
+	 *  the offspring subpopulation. Because only one virtual subpopulation
+	 *  can be activated at a time, subpopulations with mating schemes that
+	 *  are applied to virtual subpopulations, or that cannot be used in
+	 *  parallel, are mated one by one.
 	 */
 	HeteroMating(const vectormating & matingSchemes,
 		const uintListFunc & subPopSize = uintListFunc(),
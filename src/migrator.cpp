@@ -180,6 +180,8 @@ bool Migrator::apply(Population & pop) const
 			}
 		} else if (m_mode == BY_PROBABILITY) {
 			WeightedSampler ws(migrationRate[from]);
+			// individuals draw from keyed streams if a counter-based RNG is used
+			ULONG streamKey = getRNG().newStreamKey();
 
 			// for each individual, migrate according to migration probability
 			if (numThreads() > 1) {
@@ -187,16 +189,19 @@ bool Migrator::apply(Population & pop) const
 #  pragma omp parallel private(toIndex)
 				{
 					for (IndIterator ind = pop.indIterator(spFrom, omp_get_thread_num()); ind.valid(); ++ind) {
+						getRNG().setStream(streamKey, pop.gen(), &*ind - &*pop.rawIndBegin());
 						toIndex = ws.draw();
 						DBG_ASSERT(toIndex < migrationRate[from].size(), ValueError,
 							"Return index out of range.");
 						if (toIndex < toSize && toSubPops[toIndex] != spFrom)
 							ind->setInfo(static_cast<double>(toSubPops[toIndex]), info);
 					}
+					getRNG().resetStream();
 				}
 #endif
 			} else {
 				for (IndIterator ind = pop.indIterator(spFrom); ind.valid(); ++ind) {
+					getRNG().setStream(streamKey, pop.gen(), &*ind - &*pop.rawIndBegin());
 					//toIndex = getRNG().randIntByFreq( rateSize, &migrationRate[from][0] ) ;
 					toIndex = ws.draw();
 
@@ -210,6 +215,7 @@ bool Migrator::apply(Population & pop) const
 					if (toIndex < toSize && toSubPops[toIndex] != spFrom)
 						ind->setInfo(static_cast<double>(toSubPops[toIndex]), info);
 				}
+				getRNG().resetStream();
 			}
 		} else {
 			// 2nd, or 3rd method
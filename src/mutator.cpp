@@ -125,6 +125,9 @@ bool BaseMutator::apply(Population & pop) const
 	vectoru const & mapOutList = m_mapOut.elems();
 	size_t numMapOutAllele = mapOutList.size();
 	pyFunc mapOutFunc = m_mapOut.func();
+	// allele counts tracked by the population are updated with mutations
+	AlleleTracker & tracker = pop.alleleTracker();
+	bool trackAlleles = tracker.counting();
 	// mutate each mutable locus
 
 	subPopList subPops = applicableSubPops(pop);
@@ -232,6 +235,8 @@ bool BaseMutator::apply(Population & pop) const
 					}
 					if (oldAllele != newAllele) {
 						REF_ASSIGN_ALLELE(ptr, newAllele);
+						if (trackAlleles)
+							tracker.changeAllele(locus, oldAllele, newAllele);
 						if (hasOutput) {
 							out << pop.gen() << '\t' << locus << '\t' << ptr.currentPloidy() << '\t' << int(oldAllele)
 							    << '\t' << int(newAllele);
@@ -501,6 +506,8 @@ Allele ContextMutator::mutate(Allele allele, size_t locus) const
 
 bool PointMutator::apply(Population & pop) const
 {
+	// allele counts are not updated by this operator
+	pop.alleleTracker().invalidate();
 	subPopList subPops = applicableSubPops(pop);
 
 	subPopList::const_iterator sp = subPops.begin();
@@ -571,6 +578,7 @@ bool PointMutator::apply(Population & pop) const
 
 bool RevertFixedSites::apply(Population & pop) const
 {
+	pop.alleleTracker().invalidate();
 	if (pop.popSize() == 0 || pop.totNumLoci() == 0)
 		return true;
 
@@ -678,6 +686,7 @@ size_t FiniteSitesMutator::locateVacantLocus(Population & /* pop */, size_t beg,
 
 bool FiniteSitesMutator::apply(Population & pop) const
 {
+	pop.alleleTracker().invalidate();
 	// FIXME:
 	//
 	const matrixi & ranges = m_ranges.elems();
@@ -799,6 +808,7 @@ bool FiniteSitesMutator::apply(Population & pop) const
 
 bool MutSpaceRevertFixedSites::apply(Population & pop) const
 {
+	pop.alleleTracker().invalidate();
 	if (pop.popSize() == 0 || pop.totNumLoci() == 0)
 		return true;
 
@@ -890,6 +900,7 @@ size_t MutSpaceMutator::locateVacantLocus(Population & /* pop */, size_t beg, si
 
 bool MutSpaceMutator::apply(Population & pop) const
 {
+	pop.alleleTracker().invalidate();
 	const matrixi & ranges = m_ranges.elems();
 	vectoru width(ranges.size());
 
@@ -1114,6 +1114,9 @@ string PyOperator::describe(bool /* format */) const
 
 bool PyOperator::apply(Population & pop) const
 {
+	// genotypes could be changed by the Python function
+	pop.alleleTracker().invalidate();
+
 	PyObject * args = PyTuple_New(m_func.numArgs());
 
 	DBG_ASSERT(args, RuntimeError, "Failed to create a parameter tuple");
@@ -1234,6 +1237,9 @@ void applyDuringMatingOperator(const BaseOperator & op,
 {
 	BaseOperator * opPtr = op.clone();
 
+	pop->alleleTracker().invalidate();
+	offPop->alleleTracker().invalidate();
+
 	opPtr->initializeIfNeeded(*pop->rawIndBegin());
 	// NOTE: putting d and m in the applyDuringMating function will cause
 	// compiling error gor gcc/llvm under mac.
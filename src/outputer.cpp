@@ -188,7 +188,7 @@ bool SavePopulation::apply(Population & pop) const
 		filename = filenameParser.valueAsString();
 	}
 	DBG_DO(DBG_POPULATION, cerr << "Save to file " << filename << endl);
-	pop.save(filename);
+	pop.save(filename, m_format);
 	return true;
 }
 
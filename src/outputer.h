@@ -178,17 +178,22 @@ public:
 	 *  specifications (\c '', \c 'filename', \c 'filename' prefixed by one
 	 *  or more '>' characters, and \c '!expr') but output from different
 	 *  operators will always replace existing files (effectively ignore
-	 *  '>' specification). Parameter \e subPops is ignored. Please refer to
-	 *  class \c BaseOperator for a detailed description about common operator
-	 *  parameters such as \e stage and \e begin.
+	 *  '>' specification). Parameter \e format can be \c 'text' (default)
+	 *  or \c 'binary' (see <tt>Population.save()</tt> for details).
+	 *  Parameter \e subPops is ignored. Please refer to class \c BaseOperator
+	 *  for a detailed description about common operator parameters such as
+	 *  \e stage and \e begin.
 	 */
-	SavePopulation(const stringFunc & output = "", int begin = 0, int end = -1,
+	SavePopulation(const stringFunc & output = "", const string & format = "text",
+		int begin = 0, int end = -1,
 		int step = 1, const intList & at = vectori(), const intList & reps = intList(),
 		const subPopList & subPops = subPopList(), const stringList & infoFields = vectorstr()) :
 		BaseOperator("", begin, end, step, at, reps, subPops, infoFields),
-		m_filename(output.value())
+		m_filename(output.value()), m_format(format)
 	{
 		DBG_WARNIF(output.empty(), "An empty output string is passed to operator SavePopulation. No file will be saved.");
+		DBG_FAILIF(m_format != "text" && m_format != "binary", ValueError,
+			"Unsupported population file format " + m_format + ". Please use 'text' or 'binary'.");
 	}
 
 
@@ -214,6 +219,9 @@ public:
 private:
 	/// filename,
 	const string m_filename;
+
+	/// file format, text or binary
+	const string m_format;
 };
 
 }
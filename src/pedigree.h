@@ -88,6 +88,20 @@ public:
 	}
 
 
+	/// CPPONLY index of the information field for father ID, -1 if unavailable.
+	int fatherIdx() const
+	{
+		return m_fatherIdx;
+	}
+
+
+	/// CPPONLY index of the information field for mother ID, -1 if unavailable.
+	int motherIdx() const
+	{
+		return m_motherIdx;
+	}
+
+
 	/// CPPONLY Return the ID of the father of individual id.
 	/// return 0 if id is zero or invalid, or father_idx is -1.
 	size_t fatherOf(size_t id) const
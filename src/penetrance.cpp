@@ -63,12 +63,15 @@ bool BasePenetrance::apply(Population & pop) const
 			if (sp->isVirtual())
 				pop.activateVirtualSubPop(*sp);
 
+			// individuals draw from keyed streams if a counter-based RNG is used
+			ULONG streamKey = getRNG().newStreamKey();
 			if (numThreads() > 1 && parallelizable()) {
 #pragma omp parallel
 				{
 #ifdef _OPENMP
 					IndIterator ind = pop.indIterator(sp->subPop(), omp_get_thread_num());
 					for (; ind.valid(); ++ind) {
+						getRNG().setStream(streamKey, pop.gen(), ind.rawIter() - pop.rawIndBegin());
 						double p = penet(&pop, ind.rawIter());
 
 						if (savePene)
@@ -79,11 +82,13 @@ bool BasePenetrance::apply(Population & pop) const
 						else
 							ind->setAffected(false);
 					}
+					getRNG().resetStream();
 #endif
 				}
 			} else {
 				IndIterator ind = pop.indIterator(sp->subPop());
 				for (; ind.valid(); ++ind) {
+					getRNG().setStream(streamKey, pop.gen(), ind.rawIter() - pop.rawIndBegin());
 					double p = penet(&pop, ind.rawIter());
 
 					if (savePene)
@@ -94,6 +99,7 @@ bool BasePenetrance::apply(Population & pop) const
 					else
 						ind->setAffected(false);
 				}
+				getRNG().resetStream();
 			}
 			if (sp->isVirtual())
 				pop.deactivateVirtualSubPop(sp->subPop());
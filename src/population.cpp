@@ -28,6 +28,9 @@
 
 // for file compression
 #include "boost_pch.hpp"
+#include <fstream>
+#include <sstream>
+#include <set>
 
 #if PY_VERSION_HEX >= 0x03000000
 #  define PyInt_FromLong(x) PyLong_FromLong(x)
@@ -35,6 +38,7 @@
 
 using std::max;
 using std::max_element;
+using std::min;
 
 namespace simuPOP {
 
@@ -68,7 +72,11 @@ Population::Population(const uintList & size,
 	m_curAncestralGen(0),
 	m_indOrdered(true),
 	m_gen(0),
-	m_rep(0)
+	m_rep(0),
+	m_sampledGen(-1),
+	m_unsampledInds(),
+	m_unsampledSubPopSize(),
+	m_unsampledIndOrdered(true)
 {
 	DBG_DO(DBG_POPULATION, cerr << "Constructor of population is called\n");
 
@@ -127,7 +135,12 @@ Population::Population(const Population & rhs) :
 	m_curAncestralGen(rhs.m_curAncestralGen),
 	m_indOrdered(true),
 	m_gen(rhs.m_gen),
-	m_rep(rhs.m_rep)
+	m_rep(rhs.m_rep),
+	m_alleleTracker(rhs.m_alleleTracker),
+	m_sampledGen(-1),
+	m_unsampledInds(),
+	m_unsampledSubPopSize(),
+	m_unsampledIndOrdered(true)
 {
 	DBG_DO(DBG_POPULATION,
 		cerr << "Copy constructor of population is called" << endl);
@@ -347,6 +360,49 @@ void Population::deactivateVirtualSubPop(size_t subPop) const
 }
 
 
+void Population::activateSample(const vectoru & indexes)
+{
+	DBG_FAILIF(hasActivatedVirtualSubPop(), RuntimeError,
+		"Cannot activate a sample when a virtual subpopulation is activated.");
+	DBG_FAILIF(hasActivatedSample(), RuntimeError, "A sample has already been activated.");
+	// shallow copies of sampled individuals share genotypes and information
+	// fields with the population so only O(n) time is needed.
+	vector<Individual> inds(indexes.size());
+	vectoru sizes(numSubPop(), 0);
+	size_t sp = 0;
+	for (size_t i = 0; i < indexes.size(); ++i) {
+		DBG_FAILIF(indexes[i] >= m_popSize || (i > 0 && indexes[i] <= indexes[i - 1]), ValueError,
+			"Indexes of sampled individuals should be unique and in ascending order.");
+		while (indexes[i] >= m_subPopIndex[sp + 1])
+			++sp;
+		++sizes[sp];
+		inds[i] = m_inds[indexes[i]];
+	}
+	m_inds.swap(inds);
+	m_unsampledInds.swap(inds);
+	m_unsampledSubPopSize = m_subPopSize;
+	m_unsampledIndOrdered = m_indOrdered;
+	m_popSize = m_inds.size();
+	setSubPopStru(sizes, m_subPopNames);
+	// genotypes of sampled individuals are not in order
+	m_indOrdered = false;
+	m_sampledGen = m_curAncestralGen;
+}
+
+
+void Population::deactivateSample()
+{
+	if (!hasActivatedSample())
+		return;
+	m_inds.swap(m_unsampledInds);
+	m_unsampledInds.clear();
+	m_popSize = m_inds.size();
+	setSubPopStru(m_unsampledSubPopSize, m_subPopNames);
+	m_indOrdered = m_unsampledIndOrdered;
+	m_sampledGen = -1;
+}
+
+
 int Population::__cmp__(const Population & rhs) const
 {
 	if (genoStruIdx() != rhs.genoStruIdx()) {
@@ -572,6 +628,29 @@ IndAlleleIterator Population::alleleIterator(size_t locus, size_t subPop)
 }
 
 
+#ifdef _OPENMP
+IndAlleleIterator Population::alleleIterator(size_t locus, size_t subPop, size_t threadID)
+{
+	CHECKRANGEABSLOCUS(locus);
+	CHECKRANGESUBPOP(subPop);
+
+	size_t ct = chromType(chromLocusPair(locus).first);
+	if (hasActivatedVirtualSubPop() || !indOrdered()
+	    || (ct != AUTOSOME && ct != CUSTOMIZED && ct != MITOCHONDRIAL) || isHaplodiploid())
+		return IndAlleleIterator(locus, indIterator(subPop, threadID));
+	// use the same blocks of individuals as indIterator(subPop, threadID)
+	size_t blockSize = m_subPopSize[subPop] / numThreads();
+	size_t first = m_subPopIndex[subPop] + blockSize * threadID;
+	size_t last = threadID + 1 == numThreads() ? m_subPopIndex[subPop + 1] : first + blockSize;
+	return IndAlleleIterator(locus, indIterator(subPop, threadID),
+		m_genotype.begin() + first * genoSize(),
+		m_genotype.begin() + last * genoSize(),
+		totNumLoci());
+}
+
+
+#endif
+
 ConstIndAlleleIterator Population::alleleIterator(size_t locus) const
 {
 	CHECKRANGEABSLOCUS(locus);
@@ -723,6 +802,74 @@ PyObject * Population::genotype(vspID subPopID)
 }
 
 
+PyObject * Population::genotypeView(vspID subPopID)
+{
+#if defined(BINARYALLELE) || defined(MUTANTALLELE)
+	(void)subPopID;
+	throw ValueError("Function genotypeView is not available for binary and mutant modules "
+		"because genotypes are not stored as arrays of alleles. Please use function genotype() instead.");
+#else
+	vspID vsp = subPopID.resolve(*this);
+
+	DBG_FAILIF(vsp.isVirtual(), ValueError,
+		"Function genotypeView currently does not support virtual subpopulation");
+	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+		"This operation is not allowed when there is an activated virtual subpopulation");
+
+	syncIndPointers();
+	size_t begin = 0;
+	size_t end = popSize();
+	if (vsp.valid()) {
+		size_t subPop = vsp.subPop();
+		CHECKRANGESUBPOP(subPop);
+		begin = m_subPopIndex[subPop];
+		end = m_subPopIndex[subPop + 1];
+	}
+	vectoru shape(3);
+	shape[0] = end - begin;
+	shape[1] = ploidy();
+	shape[2] = totNumLoci();
+	// directly expose values. Do not copy data over.
+	return Buffer_As_MemoryView(m_genotype.empty() ? NULL : &m_genotype[0] + begin * genoSize(),
+		ALLELE_BUFFER_FORMAT, sizeof(Allele), shape);
+#endif
+}
+
+
+PyObject * Population::lineageView(vspID subPopID)
+{
+#ifdef LINEAGE
+	vspID vsp = subPopID.resolve(*this);
+
+	DBG_FAILIF(vsp.isVirtual(), ValueError,
+		"Function lineageView currently does not support virtual subpopulation");
+	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+		"This operation is not allowed when there is an activated virtual subpopulation");
+
+	syncIndPointers();
+	size_t begin = 0;
+	size_t end = popSize();
+	if (vsp.valid()) {
+		size_t subPop = vsp.subPop();
+		CHECKRANGESUBPOP(subPop);
+		begin = m_subPopIndex[subPop];
+		end = m_subPopIndex[subPop + 1];
+	}
+	vectoru shape(3);
+	shape[0] = end - begin;
+	shape[1] = ploidy();
+	shape[2] = totNumLoci();
+	// directly expose values. Do not copy data over.
+	return Buffer_As_MemoryView(m_lineage.empty() ? NULL : &m_lineage[0] + begin * genoSize(),
+		LINEAGE_BUFFER_FORMAT, sizeof(long), shape);
+#else
+	(void)subPopID;
+	Py_INCREF(Py_None);
+	return Py_None;
+#endif
+}
+
+
 pyMutantIterator Population::mutants(vspID subPopID)
 {
 	vspID vsp = subPopID.resolve(*this);
@@ -746,6 +893,7 @@ pyMutantIterator Population::mutants(vspID subPopID)
 
 void Population::setGenotype(const uintList & genoList, vspID subPopID)
 {
+	m_alleleTracker.invalidate();
 	const vectoru & geno = genoList.elems();
 
 	vspID subPop = subPopID.resolve(*this);
@@ -887,6 +1035,21 @@ void Population::fitSubPopStru(const vectoru & newSubPopSizes,
 		try {
 			if (step != 0 && m_popSize > MaxIndexSize / step)
 				throw RuntimeError("Population size times number of loci exceed maximum index size.");
+			// A population that grows beyond the capacity of its storage (e.g.
+			// the scratch population of an expanding population) reserves some
+			// room so that it does not have to be reallocated every generation.
+			// Storage is never released when a population shrinks.
+			if (!m_inds.empty() && m_popSize > m_inds.capacity()) {
+				size_t capacity = m_popSize + m_popSize / 4;
+				if (step != 0 && capacity > MaxIndexSize / step)
+					capacity = m_popSize;
+#ifndef MUTANTALLELE
+				m_genotype.reserve(capacity * step);
+#endif
+				LINEAGE_EXPR(m_lineage.reserve(capacity * step));
+				m_info.reserve(capacity * is);
+				m_inds.reserve(capacity);
+			}
 			m_genotype.resize(m_popSize * step);
 			LINEAGE_EXPR(m_lineage.resize(m_popSize * step));
 			m_info.resize(m_popSize * is);
@@ -1282,6 +1445,7 @@ vectoru Population::splitSubPop(size_t subPop, const vectorf & sizes, const vect
 
 void Population::removeSubPops(const subPopList & subPops)
 {
+	m_alleleTracker.invalidate();
 	syncIndPointers();
 	vectoru new_size;
 	vectorstr new_spNames;
@@ -1516,6 +1680,7 @@ void Population::removeIndividuals(const uintList & indexList, const floatList &
 
 	if (IDs.empty() && indexes.empty() && filter == NULL)
 		return;
+	m_alleleTracker.invalidate();
 
 	DBG_FAILIF(IDs.empty() + indexes.empty() + (filter == NULL) != 2, ValueError,
 		"Please specify only one of parameters indexes, IDs and filter");
@@ -1816,6 +1981,7 @@ void Population::addChromFrom(const Population & pop)
 
 void Population::addIndFrom(const Population & pop)
 {
+	m_alleleTracker.invalidate();
 	DBG_FAILIF(genoStruIdx() != pop.genoStruIdx(), ValueError,
 		"Cannot add Individual from a population with different genotypic structure.");
 	DBG_FAILIF(ancestralGens() != pop.ancestralGens(), ValueError,
@@ -2106,6 +2272,7 @@ vectoru Population::addLoci(const uintList & chromList, const floatList & posLis
 
 void Population::resize(const uintList & sizeList, bool propagate)
 {
+	m_alleleTracker.invalidate();
 	const vectoru & newSubPopSizes = sizeList.elems();
 
 	DBG_FAILIF(newSubPopSizes.size() != numSubPop(), ValueError,
@@ -2945,6 +3112,7 @@ void Population::recodeAlleles(const uintListFunc & newAlleles, const lociList &
 	const matrixstr & alleleNames = alleleNamesMatrix.elems();
 
 	const vectoru & loci = loci_.elems(this);
+	m_alleleTracker.invalidate();
 	if (!loci_.allAvail() && loci.empty())
 		return;
 
@@ -3106,11 +3274,17 @@ void Population::push(Population & rhs)
 	DBG_FAILIF(this == &rhs, ValueError,
 		"Passed population is a reference of current population, population.push failed.");
 
+#ifdef MUTANTALLELE
+	// genotype pointers of individuals are reset by their positions after
+	// genotypes are swapped, so individuals have to be in order
+	syncIndPointers();
+	rhs.syncIndPointers();
+#endif
+
 	// front -1 pop, -2 pop, .... end
 	//
-	if (m_ancestralGens > 0
-	    && ancestralGens() == m_ancestralGens)
-		m_ancestralPops.pop_back();
+	// the oldest ancestral generation will be discarded
+	bool discardOldest = m_ancestralGens > 0 && ancestralGens() == m_ancestralGens;
 
 	// save current population
 	if (m_ancestralGens != 0) {
@@ -3135,6 +3309,9 @@ void Population::push(Population & rhs)
 	m_info.swap(rhs.m_info);
 	m_inds.swap(rhs.m_inds);
 	std::swap(m_indOrdered, rhs.m_indOrdered);
+	// allele counts go with genotypes, rhs no longer holds the same individuals
+	m_alleleTracker.swap(rhs.m_alleleTracker);
+	rhs.m_alleleTracker.invalidate();
 
 #ifdef MUTANTALLELE
 	// vectorm must be setGenoPtr after swap
@@ -3146,16 +3323,22 @@ void Population::push(Population & rhs)
 		rhs.m_inds[i].setGenoPtr(ptr);
 #endif
 
+	// rhs reuses the storage of the discarded generation so that it does
+	// not have to be allocated again if rhs is used as a scratch population
+	if (discardOldest) {
+		m_ancestralPops.back().swap(rhs);
+		m_ancestralPops.pop_back();
+	}
+
 	// current population should be working well
 	// (with all datamember copied form rhs
 	// rhs may not be working well since m_genotype etc
 	// may be from ancestral pops
-	if (rhs.m_popSize != rhs.m_inds.size()) {
-		// keep size if pop size is OK.
-		// remove all supopulation structure of rhs
-		rhs.m_popSize = rhs.m_inds.size();
-		rhs.setSubPopStru(rhs.m_subPopSize, rhs.m_subPopNames);
-	}
+	// rhs holds the subpopulation sizes of the discarded generation, or no
+	// individual at all, but still the subpopulation index of the current
+	// generation, so its subpopulation structure is always rebuilt.
+	rhs.m_popSize = rhs.m_inds.size();
+	rhs.setSubPopStru(rhs.m_subPopSize, rhs.m_subPopNames);
 	validate("Current population after push and discard:");
 	rhs.validate("Outside Population after push and discard:");
 }
@@ -3177,6 +3360,33 @@ vectorf Population::indInfo(const uintString & field, vspID subPopID)
 }
 
 
+PyObject * Population::infoView(vspID subPopID)
+{
+	vspID vsp = subPopID.resolve(*this);
+
+	DBG_FAILIF(vsp.isVirtual(), ValueError,
+		"Function infoView currently does not support virtual subpopulation");
+	DBG_FAILIF(hasActivatedVirtualSubPop(), ValueError,
+		"This operation is not allowed when there is an activated virtual subpopulation");
+
+	syncIndPointers();
+	size_t begin = 0;
+	size_t end = popSize();
+	if (vsp.valid()) {
+		size_t subPop = vsp.subPop();
+		CHECKRANGESUBPOP(subPop);
+		begin = m_subPopIndex[subPop];
+		end = m_subPopIndex[subPop + 1];
+	}
+	vectoru shape(2);
+	shape[0] = end - begin;
+	shape[1] = infoSize();
+	// directly expose values. Do not copy data over.
+	return Buffer_As_MemoryView(m_info.empty() ? NULL : &m_info[0] + begin * infoSize(),
+		INFO_BUFFER_FORMAT, sizeof(double), shape);
+}
+
+
 void Population::addInfoFields(const stringList & fieldList, double init)
 {
 	const vectorstr & fields = fieldList.elems();
@@ -3433,7 +3643,7 @@ void Population::keepAncestralGens(const uintList & ancGens)
 			}
 		}
 	}
-	for (size_t genIdx = gens.size(); genIdx <= m_ancestralPops.size(); ++genIdx)
+	while (!m_ancestralPops.empty() && m_ancestralPops.size() >= gens.size())
 		m_ancestralPops.pop_back();
 	m_curAncestralGen = 0;
 }
@@ -3442,6 +3652,7 @@ void Population::keepAncestralGens(const uintList & ancGens)
 void Population::useAncestralGen(ssize_t idx)
 {
 	DBG_FAILIF(hasActivatedVirtualSubPop(), RuntimeError, "Can not switch ancestral generation with an activated virtual subpopulation");
+	DBG_FAILIF(hasActivatedSample(), RuntimeError, "Can not switch ancestral generation with an activated sample");
 
 	if (idx == m_curAncestralGen)
 		return;
@@ -3864,8 +4075,10 @@ void Population::load(boost::archive::text_iarchive & ar, const unsigned int ver
 		}                                                                                   // if ma == 1
 		else {                                                                              // for non-binary types, ...
 			DBG_DO(DBG_POPULATION, cerr << "Load long from long. " << endl);
-			// long from long
-			ar & m_genotype;
+			// long from long, genotypes were saved as std::vector<Allele>
+			vector<Allele> data;
+			ar & data;
+			m_genotype.assign(data.begin(), data.end());
 		}
 #endif
 	}
@@ -4082,8 +4295,10 @@ void Population::load(boost::archive::text_iarchive & ar, const unsigned int ver
 				}
 			} else {
 				DBG_DO(DBG_POPULATION, cerr << "Load long from long. " << endl);
-				// long type from long type.
-				ar & pd.m_genotype;
+				// long type from long type, saved as std::vector<Allele>
+				vector<Allele> data;
+				ar & data;
+				pd.m_genotype.assign(data.begin(), data.end());
 			}
 #endif
 		}
@@ -4156,8 +4371,676 @@ void Population::load(boost::archive::text_iarchive & ar, const unsigned int ver
 }
 
 
-void Population::save(const string & filename) const
+// A binary population file starts with a magic string and a fixed-size
+// header, followed by blocks of data that are compressed independently.
+// Genotype, lineage and information fields of each generation are split
+// into blocks of whole individuals.
+static const char POP_BINARY_MAGIC[] = "simuPOPb";
+static const size_t POP_BINARY_MAGIC_SIZE = 8;
+static const uint32_t POP_BINARY_VERSION = 1;
+// used to detect files created on platforms with a different byte order
+static const uint32_t POP_BINARY_BYTE_ORDER = 0x01020304;
+// approximate size of uncompressed genotype blocks
+static const size_t POP_BINARY_BLOCK_SIZE = 1 << 22;
+
+// how alleles are stored in genotype blocks
+enum PopBinaryGenoEncoding {
+	// one allele of alleleSize bytes for each position (short and long modules)
+	DENSE_GENOTYPE = 1,
+	// one bit for each position (binary modules)
+	BIT_GENOTYPE = 2,
+	// (position, allele) pairs of non-zero alleles (mutant modules)
+	SPARSE_GENOTYPE = 3
+};
+
+template<class T>
+static void writeBinaryValue(std::ostream & out, T value)
+{
+	out.write(reinterpret_cast<const char *>(&value), sizeof(T));
+}
+
+
+template<class T>
+static T readBinaryValue(std::istream & in)
+{
+	T value = 0;
+
+	in.read(reinterpret_cast<char *>(&value), sizeof(T));
+	if (!in)
+		throw ValueError("Unexpected end of binary population file.");
+	return value;
+}
+
+
+// write a block as uncompressed size, compressed size and compressed data
+static void writeBinaryBlock(std::ostream & out, const char * data, size_t size)
+{
+	string compressed;
+
+	if (size > 0) {
+		boost::iostreams::filtering_ostream zout;
+		zout.push(boost::iostreams::zlib_compressor(boost::iostreams::zlib::best_speed));
+		zout.push(boost::iostreams::back_inserter(compressed));
+		zout.write(data, size);
+		// close the compressor to flush all data
+		zout.reset();
+	}
+	writeBinaryValue<uint64_t>(out, size);
+	writeBinaryValue<uint64_t>(out, compressed.size());
+	out.write(compressed.data(), compressed.size());
+}
+
+
+static void writeBinaryBlock(std::ostream & out, const string & data)
+{
+	writeBinaryBlock(out, data.data(), data.size());
+}
+
+
+static void readBinaryBlock(std::istream & in, string & data)
+{
+	size_t size = static_cast<size_t>(readBinaryValue<uint64_t>(in));
+	size_t compressedSize = static_cast<size_t>(readBinaryValue<uint64_t>(in));
+
+	data.clear();
+	if (size == 0)
+		return;
+	string compressed(compressedSize, '\0');
+	in.read(&compressed[0], compressedSize);
+	if (!in)
+		throw ValueError("Unexpected end of binary population file.");
+
+	data.resize(size);
+	boost::iostreams::filtering_istream zin;
+	zin.push(boost::iostreams::zlib_decompressor());
+	zin.push(boost::iostreams::array_source(compressed.data(), compressed.size()));
+	zin.read(&data[0], size);
+	if (static_cast<size_t>(zin.gcount()) != size)
+		throw ValueError("Corrupted data block in binary population file.");
+}
+
+
+// skip a block without reading its content
+static void skipBinaryBlock(std::istream & in)
+{
+	readBinaryValue<uint64_t>(in);
+	uint64_t compressedSize = readBinaryValue<uint64_t>(in);
+
+	in.seekg(static_cast<std::streamoff>(compressedSize), std::ios::cur);
+	if (!in)
+		throw ValueError("Unexpected end of binary population file.");
+}
+
+
+// encode alleles at positions [begin, end) of genotype
+#ifdef MUTANTALLELE
+static void encodeGenotypeBlock(const vectorm & geno, size_t begin, size_t end, string & data)
+{
+	data.clear();
+	vectorm::const_val_iterator it = geno.data().lower_bound(begin);
+	vectorm::const_val_iterator it_end = geno.data().lower_bound(end);
+	for (; it != it_end; ++it) {
+		uint64_t rec[2] = { it->first - begin, it->second };
+		data.append(reinterpret_cast<const char *>(rec), sizeof(rec));
+	}
+}
+
+
+#else
+static void encodeGenotypeBlock(const vectora & geno, size_t begin, size_t end, string & data)
+{
+#  ifdef BINARYALLELE
+	data.assign((end - begin + 7) / 8, '\0');
+	ConstGenoIterator it = geno.begin() + begin;
+	for (size_t i = 0; i < end - begin; ++i, ++it)
+		if (*it)
+			data[i / 8] |= static_cast<char>(1 << (i % 8));
+#  else
+	if (end > begin)
+		data.assign(reinterpret_cast<const char *>(&geno[begin]), (end - begin) * sizeof(Allele));
+	else
+		data.clear();
+#  endif
+}
+
+
+#endif
+
+static size_t readBinaryAllele(const char * ptr, size_t alleleSize)
+{
+	switch (alleleSize) {
+	case 1:
+		return *reinterpret_cast<const unsigned char *>(ptr);
+	case 2: {
+		uint16_t v;
+		memcpy(&v, ptr, 2);
+		return v;
+	}
+	case 4: {
+		uint32_t v;
+		memcpy(&v, ptr, 4);
+		return v;
+	}
+	case 8: {
+		uint64_t v;
+		memcpy(&v, ptr, 8);
+		return static_cast<size_t>(v);
+	}
+	default:
+		throw ValueError((boost::format("Unsupported allele size %1% in binary population file.") % alleleSize).str());
+	}
+	return 0;
+}
+
+
+// decode a genotype block to positions starting from begin of geno,
+// which should have been resized and zero-initialized.
+#ifdef MUTANTALLELE
+static void decodeGenotypeBlock(const string & data, uint32_t encoding, size_t alleleSize,
+                                vectorm & geno, size_t begin, size_t count, size_t & maxAllele)
+#else
+static void decodeGenotypeBlock(const string & data, uint32_t encoding, size_t alleleSize,
+                                vectora & geno, size_t begin, size_t count, size_t & maxAllele)
+#endif
+{
+	if (encoding == DENSE_GENOTYPE) {
+		if (data.size() != count * alleleSize)
+			throw ValueError("Corrupted genotype block in binary population file.");
+#if !defined(BINARYALLELE) && !defined(MUTANTALLELE)
+		// no conversion is needed
+		if (alleleSize == sizeof(Allele)) {
+			if (count > 0)
+				memcpy(&geno[begin], data.data(), data.size());
+			return;
+		}
+#endif
+		const char * ptr = data.data();
+		for (size_t i = 0; i < count; ++i, ptr += alleleSize) {
+			size_t value = readBinaryAllele(ptr, alleleSize);
+			if (value == 0)
+				continue;
+			maxAllele = max(maxAllele, value);
+#ifdef MUTANTALLELE
+			if (TO_ALLELE(value) != 0)
+				geno.push_back(begin + i, TO_ALLELE(value));
+#else
+			geno[begin + i] = TO_ALLELE(value);
+#endif
+		}
+	} else if (encoding == BIT_GENOTYPE) {
+		if (data.size() != (count + 7) / 8)
+			throw ValueError("Corrupted genotype block in binary population file.");
+		maxAllele = max(maxAllele, size_t(1));
+		for (size_t i = 0; i < count; ++i) {
+			if ((data[i / 8] & (1 << (i % 8))) == 0)
+				continue;
+#ifdef MUTANTALLELE
+			geno.push_back(begin + i, 1);
+#else
+			geno[begin + i] = TO_ALLELE(1);
+#endif
+		}
+	} else if (encoding == SPARSE_GENOTYPE) {
+		if (data.size() % (2 * sizeof(uint64_t)) != 0)
+			throw ValueError("Corrupted genotype block in binary population file.");
+		size_t numMutants = data.size() / (2 * sizeof(uint64_t));
+		for (size_t i = 0; i < numMutants; ++i) {
+			uint64_t rec[2];
+			memcpy(rec, data.data() + i * sizeof(rec), sizeof(rec));
+			size_t pos = static_cast<size_t>(rec[0]);
+			size_t value = static_cast<size_t>(rec[1]);
+			if (pos >= count)
+				throw ValueError("Corrupted genotype block in binary population file.");
+			maxAllele = max(maxAllele, value);
+#ifdef MUTANTALLELE
+			if (TO_ALLELE(value) != 0)
+				geno.push_back(begin + pos, TO_ALLELE(value));
+#else
+			geno[begin + pos] = TO_ALLELE(value);
+#endif
+		}
+	} else
+		throw ValueError((boost::format("Unsupported genotype encoding %1% in binary population file.") % encoding).str());
+}
+
+
+// copy genotypes of selected individuals (newIdx[i] != InvalidValue) at
+// selected loci (locusMap[l] != InvalidValue) from a decoded block
+#ifdef MUTANTALLELE
+static void copySelectedGenotype(const vectorm & block, const size_t * newIdx, size_t numInds,
+                                 size_t ploidy, size_t fullLoci, const vectoru & locusMap, size_t numLoci, vectorm & geno)
+{
+	size_t fullStep = ploidy * fullLoci;
+	size_t step = ploidy * numLoci;
+
+	vectorm::const_val_iterator it = block.data().begin();
+	vectorm::const_val_iterator it_end = block.data().end();
+	for (; it != it_end; ++it) {
+		size_t ind = it->first / fullStep;
+		size_t p = (it->first % fullStep) / fullLoci;
+		size_t loc = it->first % fullLoci;
+		if (ind >= numInds || newIdx[ind] == InvalidValue || locusMap[loc] == InvalidValue)
+			continue;
+		geno.push_back(newIdx[ind] * step + p * numLoci + locusMap[loc], it->second);
+	}
+}
+
+
+#else
+static void copySelectedGenotype(const vectora & block, const size_t * newIdx, size_t numInds,
+                                 size_t ploidy, size_t fullLoci, const vectoru & locusMap, size_t numLoci, vectora & geno)
+{
+	size_t fullStep = ploidy * fullLoci;
+	size_t step = ploidy * numLoci;
+
+	for (size_t i = 0; i < numInds; ++i) {
+		if (newIdx[i] == InvalidValue)
+			continue;
+		ConstGenoIterator src = block.begin() + i * fullStep;
+		GenoIterator dest = geno.begin() + newIdx[i] * step;
+		if (step == fullStep) {
+			std::copy(src, src + fullStep, dest);
+			continue;
+		}
+		for (size_t p = 0; p < ploidy; ++p)
+			for (size_t l = 0; l < fullLoci; ++l)
+				if (locusMap[l] != InvalidValue)
+					*(dest + p * numLoci + locusMap[l]) = *(src + p * fullLoci + l);
+	}
+}
+
+
+#endif
+
+// number of individuals in each block of a binary population file
+static size_t binaryBlockInds(size_t genoSize)
+{
+	return max(size_t(1), POP_BINARY_BLOCK_SIZE / max(size_t(1), genoSize * sizeof(Allele)));
+}
+
+
+void Population::saveBinary(const string & filename) const
+{
+	std::ofstream ofs(filename.c_str(), std::ios::binary);
+
+	if (!ofs)
+		throw ValueError("Cannot write to file " + filename);
+
+	ofs.write(POP_BINARY_MAGIC, POP_BINARY_MAGIC_SIZE);
+	writeBinaryValue(ofs, POP_BINARY_VERSION);
+	writeBinaryValue(ofs, POP_BINARY_BYTE_ORDER);
+#if defined(BINARYALLELE)
+	writeBinaryValue<uint32_t>(ofs, BIT_GENOTYPE);
+#elif defined(MUTANTALLELE)
+	writeBinaryValue<uint32_t>(ofs, SPARSE_GENOTYPE);
+#else
+	writeBinaryValue<uint32_t>(ofs, DENSE_GENOTYPE);
+#endif
+	writeBinaryValue<uint32_t>(ofs, sizeof(Allele));
+#ifdef LINEAGE
+	writeBinaryValue<uint32_t>(ofs, 1);
+#else
+	writeBinaryValue<uint32_t>(ofs, 0);
+#endif
+
+	// genotypic structure, number of generations and shared variables
+	DBG_DO(DBG_POPULATION, cerr << "Handling geno structure" << endl);
+	size_t numAncestralPops = m_ancestralPops.size();
+	{
+		std::ostringstream header;
+		boost::archive::text_oarchive oa(header);
+		oa << genoStru();
+		oa << m_ancestralGens;
+		oa << numAncestralPops;
+		string vars = varsAsString(true);
+		oa << vars;
+		writeBinaryBlock(ofs, header.str());
+	}
+
+	int curGen = m_curAncestralGen;
+	size_t step = genoSize();
+	size_t infoStep = infoSize();
+	size_t blockInds = binaryBlockInds(step);
+	string data;
+	for (size_t gen = 0; gen <= numAncestralPops; ++gen) {
+		const_cast<Population *>(this)->useAncestralGen(static_cast<int>(gen));
+		const_cast<Population *>(this)->syncIndPointers();
+		DBG_DO(DBG_POPULATION, cerr << "Handling generation " << gen << endl);
+		{
+			std::ostringstream stru;
+			boost::archive::text_oarchive oa(stru);
+			oa << m_subPopSize;
+			oa << m_subPopNames;
+			oa << blockInds;
+			writeBinaryBlock(ofs, stru.str());
+		}
+		// sex and affection status
+		data.assign(m_popSize, '\0');
+		for (size_t i = 0; i < m_popSize; ++i)
+			data[i] = static_cast<char>((m_inds[i].sex() == FEMALE ? 1 : 0) | (m_inds[i].affected() ? 2 : 0));
+		writeBinaryBlock(ofs, data);
+		//
+		for (size_t b = 0; b < m_popSize; b += blockInds) {
+			size_t e = min(b + blockInds, m_popSize);
+			encodeGenotypeBlock(m_genotype, b * step, e * step, data);
+			writeBinaryBlock(ofs, data);
+		}
+#ifdef LINEAGE
+		for (size_t b = 0; b < m_popSize; b += blockInds) {
+			size_t e = min(b + blockInds, m_popSize);
+			vector<int64_t> lineage(m_lineage.begin() + b * step, m_lineage.begin() + e * step);
+			writeBinaryBlock(ofs, reinterpret_cast<const char *>(lineage.empty() ? NULL : &lineage[0]),
+				lineage.size() * sizeof(int64_t));
+		}
+#endif
+		for (size_t b = 0; b < m_popSize; b += blockInds) {
+			size_t e = min(b + blockInds, m_popSize);
+			writeBinaryBlock(ofs, reinterpret_cast<const char *>(infoStep == 0 ? NULL : &m_info[b * infoStep]),
+				(e - b) * infoStep * sizeof(double));
+		}
+	}
+	const_cast<Population *>(this)->useAncestralGen(curGen);
+	if (!ofs)
+		throw ValueError("Cannot save population to file " + filename);
+}
+
+
+void Population::loadBinary(const string & filename, const subPopList & subPops,
+                             const lociList & loci, const stringList & infoFields, const uintList & ancGens)
+{
+	std::ifstream ifs(filename.c_str(), std::ios::binary);
+
+	if (!ifs)
+		throw ValueError("Can not open file " + filename);
+
+	char magic[POP_BINARY_MAGIC_SIZE];
+	ifs.read(magic, POP_BINARY_MAGIC_SIZE);
+	if (!ifs || strncmp(magic, POP_BINARY_MAGIC, POP_BINARY_MAGIC_SIZE) != 0)
+		throw ValueError("File " + filename + " is not a binary population file.");
+	uint32_t version = readBinaryValue<uint32_t>(ifs);
+	if (version > POP_BINARY_VERSION)
+		throw ValueError((boost::format("File %1% is saved in binary format version %2%, which is not supported "
+			                            "by this version of simuPOP.") % filename % version).str());
+	if (readBinaryValue<uint32_t>(ifs) != POP_BINARY_BYTE_ORDER)
+		throw ValueError("File " + filename + " was saved on a platform with a different byte order.");
+	uint32_t encoding = readBinaryValue<uint32_t>(ifs);
+	size_t alleleSize = readBinaryValue<uint32_t>(ifs);
+	bool hasLineage = readBinaryValue<uint32_t>(ifs) != 0;
+
+	DBG_DO(DBG_POPULATION, cerr << "Handling geno structure" << endl);
+	GenoStructure stru;
+	int ancestralGens = 0;
+	size_t numAncestralPops = 0;
+	string vars;
+	string data;
+	readBinaryBlock(ifs, data);
+	{
+		std::istringstream header(data);
+		boost::archive::text_iarchive ia(header);
+		ia >> stru;
+		ia >> ancestralGens;
+		ia >> numAncestralPops;
+		ia >> vars;
+	}
+	m_ancestralPops.clear();
+	this->setGenoStructure(stru);
+
+	// genotype structure of the file, used to locate loci and information fields
+	size_t fullLoci = totNumLoci();
+	size_t fullStep = genoSize();
+	size_t fullInfoStep = infoSize();
+	bool removeInd = !subPops.allAvail();
+	bool removeLoci = !loci.allAvail();
+	// map loci in the file to loci in the loaded population
+	vectoru locusMap(fullLoci);
+	if (removeLoci) {
+		vectoru kept = loci.elems(this);
+		std::sort(kept.begin(), kept.end());
+		kept.erase(std::unique(kept.begin(), kept.end()), kept.end());
+		std::fill(locusMap.begin(), locusMap.end(), InvalidValue);
+		for (size_t i = 0; i < kept.size(); ++i) {
+			if (kept[i] >= fullLoci)
+				throw IndexError((boost::format("Locus index %1% out of range.") % kept[i]).str());
+			locusMap[kept[i]] = i;
+		}
+		setGenoStructure(gsRemoveLoci(kept));
+	} else {
+		for (size_t i = 0; i < fullLoci; ++i)
+			locusMap[i] = i;
+	}
+	// information fields to be loaded
+	vectoru keptInfo;
+	if (!infoFields.allAvail()) {
+		const vectorstr & fields = infoFields.elems();
+		for (size_t i = 0; i < fields.size(); ++i)
+			keptInfo.push_back(infoIdx(fields[i]));
+		setGenoStructure(gsSetInfoFields(fields));
+	} else {
+		for (size_t i = 0; i < fullInfoStep; ++i)
+			keptInfo.push_back(i);
+	}
+	size_t numLoci = totNumLoci();
+	size_t step = genoSize();
+	size_t infoStep = infoSize();
+
+	// generations to be loaded
+	vector<bool> loadGen(numAncestralPops + 1, ancGens.allAvail());
+	if (ancGens.unspecified())
+		loadGen[0] = true;
+	else if (!ancGens.allAvail()) {
+		const vectoru & gens = ancGens.elems();
+		for (size_t i = 0; i < gens.size(); ++i) {
+			if (gens[i] > numAncestralPops)
+				throw ValueError((boost::format("Ancestral generation %1% does not exist in file %2%.")
+						          % gens[i] % filename).str());
+			loadGen[gens[i]] = true;
+		}
+	}
+
+	vector<bool> spSelected;
+	size_t maxAllele = 0;
+	popData curPop;
+	bool curLoaded = false;
+	// new index of individuals in each block, InvalidValue for unselected individuals
+	vectoru newIdx;
+	for (size_t gen = 0; gen <= numAncestralPops; ++gen) {
+		DBG_DO(DBG_POPULATION, cerr << "Handling generation " << gen << endl);
+		vectoru subPopSize;
+		vectorstr subPopNames;
+		size_t blockInds = 0;
+		readBinaryBlock(ifs, data);
+		{
+			std::istringstream stru(data);
+			boost::archive::text_iarchive ia(stru);
+			ia >> subPopSize;
+			ia >> subPopNames;
+			ia >> blockInds;
+		}
+		size_t popSize = accumulate(subPopSize.begin(), subPopSize.end(), size_t(0));
+		if (popSize > 0 && blockInds == 0)
+			throw ValueError("Corrupted binary population file " + filename);
+		size_t numBlocks = popSize == 0 ? 0 : (popSize - 1) / blockInds + 1;
+
+		// subpopulations are resolved from the present generation
+		if (gen == 0) {
+			spSelected.resize(subPopSize.size(), !removeInd);
+			subPopList::const_iterator sp = subPops.begin();
+			subPopList::const_iterator spEnd = subPops.end();
+			for (; removeInd && sp != spEnd; ++sp) {
+				if (sp->isVirtual() || sp->allAvailSP())
+					throw ValueError("Only non-virtual subpopulations can be specified when loading a population.");
+				size_t spIdx = sp->spName().empty() ? sp->subPop() : InvalidValue;
+				if (!sp->spName().empty()) {
+					vectorstr::const_iterator it = find(subPopNames.begin(), subPopNames.end(), sp->spName());
+					if (it == subPopNames.end())
+						throw ValueError("Subpopulation name " + sp->spName() + " does not exist in file " + filename);
+					spIdx = it - subPopNames.begin();
+				}
+				if (spIdx >= subPopSize.size())
+					throw IndexError((boost::format("Subpopulation index %1% out of range") % spIdx).str());
+				spSelected[spIdx] = true;
+			}
+		}
+
+		if (!loadGen[gen]) {
+			// skip individual status, genotype, lineage and information blocks
+			skipBinaryBlock(ifs);
+			for (size_t b = 0; b < numBlocks * (hasLineage ? 3 : 2); ++b)
+				skipBinaryBlock(ifs);
+			continue;
+		}
+
+		if (curLoaded)
+			m_ancestralPops.push_back(popData());
+		popData & pd = curLoaded ? m_ancestralPops.back() : curPop;
+
+		// select individuals, unselected subpopulations are removed
+		newIdx.resize(popSize);
+		size_t size = 0;
+		for (size_t sp = 0, idx = 0; sp < subPopSize.size(); ++sp) {
+			bool selected = sp < spSelected.size() && spSelected[sp];
+			if (selected) {
+				pd.m_subPopSize.push_back(subPopSize[sp]);
+				if (!subPopNames.empty())
+					pd.m_subPopNames.push_back(subPopNames[sp]);
+			}
+			for (size_t i = 0; i < subPopSize[sp]; ++i, ++idx)
+				newIdx[idx] = selected ? size++ : InvalidValue;
+		}
+
+		readBinaryBlock(ifs, data);
+		if (data.size() != popSize)
+			throw ValueError("Number of individuals does not match population size.");
+		pd.m_inds.resize(size);
+		for (size_t i = 0; i < popSize; ++i) {
+			if (newIdx[i] == InvalidValue)
+				continue;
+			Individual & ind = pd.m_inds[newIdx[i]];
+			ind.setSex((data[i] & 1) ? FEMALE : MALE);
+			ind.setAffected((data[i] & 2) != 0);
+		}
+
+		pd.m_genotype.resize(size * step);
+		for (size_t b = 0; b < popSize; b += blockInds) {
+			size_t e = min(b + blockInds, popSize);
+			size_t count = 0;
+			for (size_t i = b; i < e; ++i)
+				count += newIdx[i] != InvalidValue;
+			if (count == 0) {
+				skipBinaryBlock(ifs);
+				continue;
+			}
+			readBinaryBlock(ifs, data);
+			if (!removeLoci && count == e - b)
+				decodeGenotypeBlock(data, encoding, alleleSize, pd.m_genotype, newIdx[b] * step,
+					(e - b) * step, maxAllele);
+			else {
+#ifdef MUTANTALLELE
+				vectorm block((e - b) * fullStep);
+#else
+				vectora block((e - b) * fullStep);
+#endif
+				decodeGenotypeBlock(data, encoding, alleleSize, block, 0, (e - b) * fullStep, maxAllele);
+				copySelectedGenotype(block, &newIdx[b], e - b, ploidy(), fullLoci, locusMap, numLoci, pd.m_genotype);
+			}
+		}
+
+		LINEAGE_EXPR(pd.m_lineage.resize(size * step, 0));
+		for (size_t b = 0; hasLineage && b < popSize; b += blockInds) {
+			size_t e = min(b + blockInds, popSize);
+#ifdef LINEAGE
+			size_t count = 0;
+			for (size_t i = b; i < e; ++i)
+				count += newIdx[i] != InvalidValue;
+			if (count == 0) {
+				skipBinaryBlock(ifs);
+				continue;
+			}
+			readBinaryBlock(ifs, data);
+			if (data.size() != (e - b) * fullStep * sizeof(int64_t))
+				throw ValueError("Corrupted lineage block in binary population file " + filename);
+			const int64_t * lineage = reinterpret_cast<const int64_t *>(data.data());
+			for (size_t i = 0; i < e - b; ++i) {
+				if (newIdx[b + i] == InvalidValue)
+					continue;
+				for (size_t p = 0; p < ploidy(); ++p)
+					for (size_t l = 0; l < fullLoci; ++l)
+						if (locusMap[l] != InvalidValue)
+							pd.m_lineage[newIdx[b + i] * step + p * numLoci + locusMap[l]] =
+								static_cast<long>(lineage[i * fullStep + p * fullLoci + l]);
+			}
+#else
+			(void)e;
+			skipBinaryBlock(ifs);
+#endif
+		}
+
+		pd.m_info.resize(size * infoStep);
+		for (size_t b = 0; b < popSize; b += blockInds) {
+			size_t e = min(b + blockInds, popSize);
+			size_t count = 0;
+			for (size_t i = b; i < e; ++i)
+				count += newIdx[i] != InvalidValue;
+			if (count == 0 || infoStep == 0) {
+				skipBinaryBlock(ifs);
+				continue;
+			}
+			readBinaryBlock(ifs, data);
+			if (data.size() != (e - b) * fullInfoStep * sizeof(double))
+				throw ValueError("Corrupted information block in binary population file " + filename);
+			const double * info = reinterpret_cast<const double *>(data.data());
+			for (size_t i = 0; i < e - b; ++i) {
+				if (newIdx[b + i] == InvalidValue)
+					continue;
+				for (size_t k = 0; k < infoStep; ++k)
+					pd.m_info[newIdx[b + i] * infoStep + k] = info[i * fullInfoStep + keptInfo[k]];
+			}
+		}
+		pd.m_indOrdered = true;
+
+		if (!curLoaded) {
+			curPop.swap(*this);
+			m_popSize = m_inds.size();
+			setSubPopStru(m_subPopSize, m_subPopNames);
+		}
+
+		// set genotype, lineage and information pointers of individuals
+		vector<Individual> & inds = curLoaded ? pd.m_inds : m_inds;
+		GenoIterator ptr = curLoaded ? pd.m_genotype.begin() : m_genotype.begin();
+		InfoIterator infoPtr = curLoaded ? pd.m_info.begin() : m_info.begin();
+		for (size_t i = 0; i < size; ++i, ptr += step, infoPtr += infoStep) {
+			inds[i].setGenoStruIdx(genoStruIdx());
+			inds[i].setGenoPtr(ptr);
+			inds[i].setInfoPtr(infoPtr);
+		}
+#ifdef LINEAGE
+		LineageIterator lineagePtr = curLoaded ? pd.m_lineage.begin() : m_lineage.begin();
+		for (size_t i = 0; i < size; ++i, lineagePtr += step)
+			inds[i].setLineagePtr(lineagePtr);
+#endif
+		curLoaded = true;
+	}
+	m_ancestralGens = ancestralGens;
+	m_curAncestralGen = 0;
+
+	DBG_DO(DBG_POPULATION, cerr << "Handling shared variables" << endl);
+	varsFromString(vars, true);
+	setIndOrdered(true);
+	DBG_WARNIF(maxAllele > ModuleMaxAllele, (boost::format("Warning: the maximum allele of the loaded population is %1%"
+											               " which is larger than the maximum allowed allele of this module. "
+											               "These alleles have been truncated.") % maxAllele).str());
+}
+
+
+void Population::save(const string & filename, const string & format) const
 {
+	if (format == "binary") {
+		saveBinary(filename);
+		return;
+	}
+	if (format != "text")
+		throw ValueError("Unsupported population file format " + format + ". Please use 'text' or 'binary'.");
+
 	boost::iostreams::filtering_ostream ofs;
 
 	// compress output
@@ -4176,8 +5059,27 @@ void Population::save(const string & filename) const
 }
 
 
-void Population::load(const string & filename)
+void Population::load(const string & filename, const subPopList & subPops,
+                       const lociList & loci, const stringList & infoFields, const uintList & ancGens)
 {
+	// binary files are identified by a magic string
+	{
+		std::ifstream bfs(filename.c_str(), std::ios::binary);
+		if (!bfs)
+			throw ValueError("Can not open file " + filename);
+		char magic[POP_BINARY_MAGIC_SIZE];
+		bfs.read(magic, POP_BINARY_MAGIC_SIZE);
+		if (bfs && strncmp(magic, POP_BINARY_MAGIC, POP_BINARY_MAGIC_SIZE) == 0) {
+			bfs.close();
+			try {
+				loadBinary(filename, subPops, loci, infoFields, ancGens);
+			} catch (const std::exception & e) {
+				throw ValueError("Failed to load Population " + filename + " (" + e.what() + ")\n");
+			}
+			return;
+		}
+	}
+
 	boost::iostreams::filtering_istream ifs;
 
 	ifs.push(boost::iostreams::gzip_decompressor());
@@ -4195,6 +5097,63 @@ void Population::load(const string & filename)
 	} catch (...) {
 		throw ValueError("Failed to load Population " + filename + ".\n");
 	}
+	// text files have to be loaded completely before unused parts are removed
+	if (!subPops.allAvail()) {
+		// subpopulations are resolved from the present generation
+		subPopList selected = subPops.expandFrom(*this);
+		subPopList::const_iterator sp = selected.begin();
+		for (; sp != selected.end(); ++sp)
+			if (sp->isVirtual())
+				throw ValueError("Only non-virtual subpopulations can be specified when loading a population.");
+		for (int gen = ancestralGens(); gen >= 0; --gen) {
+			useAncestralGen(gen);
+			subPopList removed;
+			for (size_t sp = 0; sp < numSubPop(); ++sp)
+				if (!selected.overlap(sp))
+					removed.push_back(vspID(sp));
+			if (!removed.empty())
+				removeSubPops(removed);
+		}
+		useAncestralGen(0);
+	}
+	if (!ancGens.allAvail()) {
+		vectoru gens = ancGens.unspecified() ? vectoru(1, 0) : ancGens.elems();
+		for (size_t i = 0; i < gens.size(); ++i)
+			if (gens[i] > static_cast<size_t>(ancestralGens()))
+				throw ValueError((boost::format("Ancestral generation %1% does not exist in file %2%.")
+						          % gens[i] % filename).str());
+		keepAncestralGens(uintList(gens));
+	}
+	if (!loci.allAvail()) {
+		vectoru kept = loci.elems(this);
+		std::sort(kept.begin(), kept.end());
+		kept.erase(std::unique(kept.begin(), kept.end()), kept.end());
+		if (!kept.empty() && kept.back() >= totNumLoci())
+			throw IndexError((boost::format("Locus index %1% out of range.") % kept.back()).str());
+		removeLoci(lociList(NULL), lociList(kept));
+	}
+	if (!infoFields.allAvail()) {
+		const vectorstr & fields = infoFields.elems();
+		vectoru kept;
+		for (size_t i = 0; i < fields.size(); ++i)
+			kept.push_back(infoIdx(fields[i]));
+		setGenoStructure(gsSetInfoFields(fields));
+		size_t infoStep = infoSize();
+		for (int gen = ancestralGens(); gen >= 0; --gen) {
+			useAncestralGen(gen);
+			vectorf newInfo(infoStep * m_popSize);
+			InfoIterator ptr = newInfo.begin();
+			for (size_t i = 0; i < m_popSize; ++i, ptr += infoStep) {
+				InfoIterator oldPtr = m_inds[i].infoBegin();
+				for (size_t k = 0; k < infoStep; ++k)
+					*(ptr + k) = *(oldPtr + kept[k]);
+				m_inds[i].setInfoPtr(ptr);
+				m_inds[i].setGenoStruIdx(genoStruIdx());
+			}
+			m_info.swap(newInfo);
+		}
+		useAncestralGen(0);
+	}
 }
 
 
@@ -4262,11 +5221,389 @@ PyObject * Population::dict(vspID vsp)
 }
 
 
+// number of bytes used by a vector
+template<class T>
+static size_t vectorMemory(const std::vector<T> & vec)
+{
+	return sizeof(vec) + vec.capacity() * sizeof(T);
+}
+
+
+// number of bytes used by genotypes
+#ifdef MUTANTALLELE
+static size_t genotypeMemory(const vectorm & geno)
+{
+	// each mutant is saved in a node of a red-black tree with three
+	// pointers and a color
+	return sizeof(geno) + geno.data().size() *
+	       (sizeof(vectorm::storage::value_type) + 4 * sizeof(void *));
+}
+
+
+#else
+static size_t genotypeMemory(const vectora & geno)
+{
+#  ifdef BINARYALLELE
+	return sizeof(geno) + geno.capacity() / 8;
+#  else
+	return sizeof(geno) + geno.capacity() * sizeof(Allele);
+#  endif
+}
+
+
+#endif
+
+// number of bytes used by subpopulation sizes and names
+static size_t structureMemory(const vectoru & sizes, const vectorstr & names)
+{
+	size_t bytes = vectorMemory(sizes) + vectorMemory(names);
+
+	for (size_t i = 0; i < names.size(); ++i)
+		bytes += names[i].capacity();
+	return bytes;
+}
+
+
+// number of bytes used by a Python object and the objects it contains,
+// estimated using sys.getsizeof
+static size_t pyObjectMemory(PyObject * obj, PyObject * getsizeof, std::set<PyObject *> & visited)
+{
+	if (!visited.insert(obj).second)
+		return 0;
+
+	size_t bytes = 0;
+	PyObject * res = PyObject_CallFunctionObjArgs(getsizeof, obj, NULL);
+	if (res == NULL)
+		PyErr_Clear();
+	else {
+		bytes = static_cast<size_t>(PyNumber_AsSsize_t(res, NULL));
+		Py_DECREF(res);
+	}
+	if (PyDict_Check(obj)) {
+		PyObject * key = NULL;
+		PyObject * value = NULL;
+		Py_ssize_t pos = 0;
+		while (PyDict_Next(obj, &pos, &key, &value))
+			bytes += pyObjectMemory(key, getsizeof, visited) + pyObjectMemory(value, getsizeof, visited);
+	} else if (PyList_Check(obj) || PyTuple_Check(obj)) {
+		for (Py_ssize_t i = 0; i < PySequence_Fast_GET_SIZE(obj); ++i)
+			bytes += pyObjectMemory(PySequence_Fast_GET_ITEM(obj, i), getsizeof, visited);
+	}
+	return bytes;
+}
+
+
+vectoru Population::memoryUsageByPart(bool withVars) const
+{
+	vectoru bytes(8, 0);
+
+	bytes[0] = genotypeMemory(m_genotype);
+#ifdef LINEAGE
+	bytes[1] = vectorMemory(m_lineage);
+#endif
+	bytes[2] = vectorMemory(m_info);
+	bytes[3] = vectorMemory(m_inds);
+	bytes[4] = structureMemory(m_subPopSize, m_subPopNames) + vectorMemory(m_subPopIndex);
+	for (size_t i = 0; i < m_ancestralPops.size(); ++i) {
+		const popData & pd = m_ancestralPops[i];
+		bytes[5] += genotypeMemory(pd.m_genotype) + vectorMemory(pd.m_info)
+		            + vectorMemory(pd.m_inds) + structureMemory(pd.m_subPopSize, pd.m_subPopNames);
+#ifdef LINEAGE
+		bytes[5] += vectorMemory(pd.m_lineage);
+#endif
+	}
+	if (withVars) {
+		PyObject * sys = PyImport_ImportModule("sys");
+		PyObject * getsizeof = sys == NULL ? NULL : PyObject_GetAttrString(sys, "getsizeof");
+		if (getsizeof != NULL) {
+			std::set<PyObject *> visited;
+			bytes[6] = pyObjectMemory(m_vars.dict(), getsizeof, visited);
+		} else
+			PyErr_Clear();
+		Py_XDECREF(getsizeof);
+		Py_XDECREF(sys);
+	}
+	if (m_vspSplitter != NULL)
+		bytes[7] = m_vspSplitter->memoryUsage();
+	return bytes;
+}
+
+
+size_t Population::totalMemoryUsage(bool withVars) const
+{
+	vectoru bytes = memoryUsageByPart(withVars);
+
+	return std::accumulate(bytes.begin(), bytes.end(), size_t(0));
+}
+
+
+PyObject * Population::memoryUsage(bool detailed) const
+{
+	vectoru bytes = memoryUsageByPart(true);
+	size_t total = std::accumulate(bytes.begin(), bytes.end(), size_t(0));
+
+	if (!detailed)
+		return PyLong_FromSize_t(total);
+
+	const char * parts[] = {
+		"genotype", "lineage", "info", "individuals", "structure",
+		"ancestralGens", "vars", "vspSplitter"
+	};
+	PyObject * dict = PyDict_New();
+	for (size_t i = 0; i < bytes.size(); ++i) {
+		PyObject * val = PyLong_FromSize_t(bytes[i]);
+		PyDict_SetItemString(dict, parts[i], val);
+		Py_DECREF(val);
+	}
+	PyObject * val = PyLong_FromSize_t(total);
+	PyDict_SetItemString(dict, "total", val);
+	Py_DECREF(val);
+	return dict;
+}
+
+
+void Population::trackAlleles(const lociList & loci)
+{
+	DBG_FAILIF(m_curAncestralGen != 0, ValueError,
+		"Alleles can only be tracked for the present generation.");
+	m_alleleTracker.track(loci);
+	if (m_alleleTracker.tracking())
+		m_alleleTracker.recount(*this);
+}
+
+
+/* if the p-th copy of a chromosome of type chromType of an individual is
+   counted, following the rules of Population::alleleIterator */
+static inline bool countedCopy(size_t chromType, bool male, size_t p)
+{
+	if (chromType == CHROMOSOME_X)
+		return p == 0 || !male;
+	else if (chromType == CHROMOSOME_Y)
+		return male && p == 1;
+	return true;
+}
+
+
+void AlleleTracker::track(const lociList & loci)
+{
+	m_loci = loci;
+	m_tracking = !loci.empty();
+	m_valid = false;
+	m_locusIndex.clear();
+	m_trackedLoci.clear();
+	m_chromTypes.clear();
+	m_counts.clear();
+	m_totals.clear();
+	m_numInds = 0;
+}
+
+
+bool AlleleTracker::valid(const Population & pop) const
+{
+	return m_tracking && m_valid && m_genoStruIdx == pop.genoStruIdx()
+	       && m_numInds == pop.popSize() && pop.curAncestralGen() == 0;
+}
+
+
+void AlleleTracker::reset(const Population & pop)
+{
+	const vectoru & loci = m_loci.elems(&pop);
+
+	m_locusIndex.assign(pop.totNumLoci(), NOT_FOUND);
+	m_trackedLoci.clear();
+	m_chromTypes.clear();
+	for (size_t i = 0; i < loci.size(); ++i) {
+		size_t loc = loci[i];
+		DBG_FAILIF(loc >= pop.totNumLoci(), IndexError,
+			(boost::format("Locus index %1% out of range.") % loc).str());
+		size_t chromType = pop.chromType(pop.chromLocusPair(loc).first);
+		if (chromType == MITOCHONDRIAL || m_locusIndex[loc] != NOT_FOUND)
+			continue;
+		m_locusIndex[loc] = m_trackedLoci.size();
+		m_trackedLoci.push_back(loc);
+		m_chromTypes.push_back(chromType);
+	}
+	m_genoStruIdx = pop.genoStruIdx();
+	m_valid = true;
+	clearCounts();
+}
+
+
+void AlleleTracker::recount(Population & pop)
+{
+	reset(pop);
+	addIndividuals(pop.rawIndBegin(), pop.rawIndEnd());
+}
+
+
+void AlleleTracker::clearCounts()
+{
+	m_counts.assign(m_trackedLoci.size(), AlleleCounts());
+	m_totals.assign(m_trackedLoci.size(), 0);
+	m_numInds = 0;
+}
+
+
+void AlleleTracker::addIndividuals(RawIndIterator begin, RawIndIterator end)
+{
+	for (RawIndIterator ind = begin; ind != end; ++ind)
+		addIndividual(*ind);
+}
+
+
+void AlleleTracker::addIndividual(Individual & ind)
+{
+	bool male = ind.sex() == MALE;
+	size_t ploidy = ind.ploidy();
+
+#ifdef MUTANTALLELE
+	for (size_t idx = 0; idx < m_trackedLoci.size(); ++idx)
+		for (size_t p = 0; p < ploidy; ++p)
+			if (countedCopy(m_chromTypes[idx], male, p))
+				++m_totals[idx];
+	// only non-zero alleles are stored and counted
+	size_t totNumLoci = m_locusIndex.size();
+	GenoIterator it = ind.genoBegin();
+	GenoIterator it_end = ind.genoEnd();
+	vectorm::val_iterator index_it = it.get_val_iterator();
+	vectorm::val_iterator index_it_end = it_end.get_val_iterator();
+	size_t indIndex = it.index();
+	for (; index_it != index_it_end; ++index_it) {
+		size_t pos = index_it->first - indIndex;
+		size_t idx = m_locusIndex[pos % totNumLoci];
+		if (idx == NOT_FOUND || !countedCopy(m_chromTypes[idx], male, pos / totNumLoci))
+			continue;
+		++m_counts[idx][index_it->second];
+	}
+#else
+	for (size_t p = 0; p < ploidy; ++p) {
+		GenoIterator geno = ind.genoBegin(p);
+		for (size_t idx = 0; idx < m_trackedLoci.size(); ++idx) {
+			if (!countedCopy(m_chromTypes[idx], male, p))
+				continue;
+			size_t allele = static_cast<size_t>(DEREF_ALLELE(geno + m_trackedLoci[idx]));
+#  ifdef LONGALLELE
+			++m_counts[idx][allele];
+#  else
+			AlleleCounts & cnt = m_counts[idx];
+			if (allele >= cnt.size())
+				cnt.resize(allele + 1, 0);
+			++cnt[allele];
+#  endif
+			++m_totals[idx];
+		}
+	}
+#endif
+	++m_numInds;
+}
+
+
+void AlleleTracker::addCounts(const AlleleTracker & rhs)
+{
+	DBG_ASSERT(rhs.m_trackedLoci.size() == m_trackedLoci.size(), SystemError,
+		"Allele counts of different loci cannot be added.");
+	for (size_t idx = 0; idx < m_counts.size(); ++idx) {
+		const AlleleCounts & counts = rhs.m_counts[idx];
+		AlleleCounts & cnt = m_counts[idx];
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+		AlleleCounts::const_iterator it = counts.begin();
+		AlleleCounts::const_iterator itEnd = counts.end();
+		for (; it != itEnd; ++it)
+			cnt[it->first] += it->second;
+#else
+		if (counts.size() > cnt.size())
+			cnt.resize(counts.size(), 0);
+		for (size_t i = 0; i < counts.size(); ++i)
+			cnt[i] += counts[i];
+#endif
+		m_totals[idx] += rhs.m_totals[idx];
+	}
+	m_numInds += rhs.m_numInds;
+}
+
+
+void AlleleTracker::changeAllele(size_t locus, Allele from, Allele to)
+{
+	if (!tracks(locus))
+		return;
+
+	AlleleCounts & cnt = m_counts[m_locusIndex[locus]];
+	size_t oldAllele = static_cast<size_t>(from);
+	size_t newAllele = static_cast<size_t>(to);
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+	AlleleCounts::iterator it = cnt.find(oldAllele);
+	if (it != cnt.end() && --(it->second) == 0)
+		cnt.erase(it);
+#  ifdef MUTANTALLELE
+	// wildtype alleles are not counted for the mutant module
+	if (newAllele == 0)
+		return;
+#  endif
+	++cnt[newAllele];
+#else
+	if (oldAllele < cnt.size() && cnt[oldAllele] > 0)
+		--cnt[oldAllele];
+	if (newAllele >= cnt.size())
+		cnt.resize(newAllele + 1, 0);
+	++cnt[newAllele];
+#endif
+}
+
+
+void AlleleTracker::alleleCounts(size_t locus, uintDict & counts, size_t & total) const
+{
+	DBG_ASSERT(tracks(locus), ValueError,
+		(boost::format("Alleles at locus %1% are not tracked.") % locus).str());
+	size_t idx = m_locusIndex[locus];
+	const AlleleCounts & cnt = m_counts[idx];
+	size_t nonZero = 0;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+	AlleleCounts::const_iterator it = cnt.begin();
+	AlleleCounts::const_iterator itEnd = cnt.end();
+	for (; it != itEnd; ++it) {
+		if (it->second == 0)
+			continue;
+		counts[it->first] += static_cast<double>(it->second);
+		nonZero += it->second;
+	}
+#else
+	for (size_t i = 0; i < cnt.size(); ++i) {
+		if (cnt[i] == 0)
+			continue;
+		counts[i] += static_cast<double>(cnt[i]);
+		nonZero += cnt[i];
+	}
+#endif
+	// the rest of the alleles are wildtype alleles that are not counted
+	// for the mutant module
+	if (m_totals[idx] > nonZero)
+		counts[0] += static_cast<double>(m_totals[idx] - nonZero);
+	total += m_totals[idx];
+}
+
+
+void AlleleTracker::swap(AlleleTracker & rhs)
+{
+	std::swap(m_loci, rhs.m_loci);
+	std::swap(m_tracking, rhs.m_tracking);
+	std::swap(m_valid, rhs.m_valid);
+	std::swap(m_genoStruIdx, rhs.m_genoStruIdx);
+	m_locusIndex.swap(rhs.m_locusIndex);
+	m_trackedLoci.swap(rhs.m_trackedLoci);
+	m_chromTypes.swap(rhs.m_chromTypes);
+	m_counts.swap(rhs.m_counts);
+	m_totals.swap(rhs.m_totals);
+	std::swap(m_numInds, rhs.m_numInds);
+}
+
+
 void Population::syncIndPointers(bool infoOnly) const
 {
 	if (indOrdered())
 		return;
 
+	DBG_FAILIF(hasActivatedSample(), RuntimeError, "Can not reorder individuals with an activated sample");
+
 	if (infoOnly) {
 		DBG_DO(DBG_POPULATION, cerr << "Adjust info position " << endl);
 		size_t is = infoSize();
@@ -4333,11 +5670,12 @@ void Population::syncIndPointers(bool infoOnly) const
 }
 
 
-Population & loadPopulation(const string & file)
+Population & loadPopulation(const string & file, const subPopList & subPops,
+                            const lociList & loci, const stringList & infoFields, const uintList & ancGens)
 {
 	Population * p = new Population();
 
-	p->load(file);
+	p->load(file, subPops, loci, infoFields, ancGens);
 	return *p;
 }
 
@@ -139,6 +139,128 @@ private:
 
 
 class Pedigree;
+class Population;
+
+/** CPPONLY
+ *  This class keeps counts of alleles at specified loci of a population.
+ *  Counts are accumulated by mating schemes as offspring are produced and
+ *  are updated by mutators when alleles are changed, so that operator \c Stat
+ *  can report allele frequencies of the whole population without going
+ *  through all individuals. Alleles on sex chromosomes are counted in the
+ *  same way as \c Stat (males have one copy of chromosome X, females have
+ *  no chromosome Y). Loci on mitochondrial chromosomes are not tracked.
+ */
+class AlleleTracker
+{
+public:
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+	/// counts of alleles at a locus (non-zero alleles for the mutant module)
+	typedef std::map<size_t, size_t> AlleleCounts;
+#else
+	typedef vectoru AlleleCounts;
+#endif
+
+	AlleleTracker() : m_loci(vectoru()), m_tracking(false), m_valid(false),
+		m_genoStruIdx(MaxTraitIndex), m_locusIndex(), m_trackedLoci(), m_chromTypes(), m_counts(),
+		m_totals(), m_numInds(0)
+	{
+	}
+
+
+	/// track alleles at \e loci, stop tracking if \e loci is empty
+	void track(const lociList & loci);
+
+	/// loci being tracked
+	const lociList & loci() const
+	{
+		return m_loci;
+	}
+
+
+	/// if alleles of a population are being tracked
+	bool tracking() const
+	{
+		return m_tracking;
+	}
+
+
+	/// if counts are being accumulated or updated
+	bool counting() const
+	{
+		return m_tracking && m_valid;
+	}
+
+
+	/// if counts reflect the present generation of population \e pop
+	bool valid(const Population & pop) const;
+
+	/// discard counts after genotypes are changed in an unknown way
+	void invalidate()
+	{
+		m_valid = false;
+	}
+
+
+	/// start counting alleles of individuals of population \e pop
+	void reset(const Population & pop);
+
+	/// reset and count alleles of all individuals of population \e pop
+	void recount(Population & pop);
+
+	/// clear counts but keep tracked loci, used for partial counts
+	void clearCounts();
+
+	/// count alleles of individuals in a range
+	void addIndividuals(RawIndIterator begin, RawIndIterator end);
+
+	/// add counts of another tracker of the same loci
+	void addCounts(const AlleleTracker & rhs);
+
+	/// replace an allele \e from with \e to at \e locus
+	void changeAllele(size_t locus, Allele from, Allele to);
+
+	/// if \e locus is tracked
+	bool tracks(size_t locus) const
+	{
+		return locus < m_locusIndex.size() && m_locusIndex[locus] != NOT_FOUND;
+	}
+
+
+	/// add counts of alleles at a tracked \e locus to \e counts and the
+	/// number of counted alleles to \e total.
+	void alleleCounts(size_t locus, uintDict & counts, size_t & total) const;
+
+	void swap(AlleleTracker & rhs);
+
+private:
+	void addIndividual(Individual & ind);
+
+	lociList m_loci;
+
+	bool m_tracking;
+
+	bool m_valid;
+
+	/// genotypic structure of the population when counting starts
+	size_t m_genoStruIdx;
+
+	/// index of each locus in the tracked loci, NOT_FOUND if not tracked
+	vectoru m_locusIndex;
+
+	/// tracked loci, excluding loci on mitochondrial chromosomes
+	vectoru m_trackedLoci;
+
+	/// chromosome types of tracked loci
+	vectoru m_chromTypes;
+
+	vector<AlleleCounts> m_counts;
+
+	/// number of counted alleles at each tracked locus
+	vectoru m_totals;
+
+	/// number of counted individuals
+	size_t m_numInds;
+};
 
 
 /**
@@ -292,6 +414,7 @@ public:
 		std::swap(m_vspSplitter, rhs.m_vspSplitter);
 		std::swap(rhs.m_gen, m_gen);
 		std::swap(rhs.m_rep, m_rep);
+		m_alleleTracker.swap(rhs.m_alleleTracker);
 #ifdef MUTANTALLELE
 		// vectorm must be setGenoPtr after swap
 		GenoIterator ptr = m_genotype.begin();
@@ -366,6 +489,30 @@ public:
 	 */
 	void deactivateVirtualSubPop(size_t subPop) const;
 
+	/** CPPONLY
+	 *  Replace individuals of the present generation with individuals at
+	 *  \e indexes (in ascending order), until \c deactivateSample() is
+	 *  called. Sampled individuals share genotypes and information fields
+	 *  with the population, and (virtual) subpopulation sizes and iterators
+	 *  refer to the sample.
+	 */
+	void activateSample(const vectoru & indexes);
+
+	/** CPPONLY
+	 *  Restore all individuals of the present generation after a call to
+	 *  \c activateSample().
+	 */
+	void deactivateSample();
+
+	/** CPPONLY
+	 *  Return True if individuals of the present generation are replaced
+	 *  by a sample.
+	 */
+	bool hasActivatedSample() const
+	{
+		return m_sampledGen >= 0 && m_sampledGen == m_curAncestralGen;
+	}
+
 	// allow compaison of populations in python
 	// only equal or unequal, no greater or less than
 	/// a python function used to compare the population objects
@@ -835,6 +982,14 @@ public:
 	/// CPPONLY allele begin, for given subPop
 	ConstIndAlleleIterator alleleIterator(size_t locus, size_t subPop) const;
 
+#ifdef _OPENMP
+	/** CPPONLY allele begin, for the block of individuals of \e subPop that
+	 *  is handled by thread \e threadID (see \c indIterator(subPop, threadID)).
+	 */
+	IndAlleleIterator alleleIterator(size_t locus, size_t subPop, size_t threadID);
+
+#endif
+
 #ifdef LINEAGE
 	/// CPPONLY lineage begin
 	IndLineageIterator lineageIterator(size_t locus);
@@ -1075,6 +1230,30 @@ public:
 	 */
 	PyObject * lineage(vspID subPop = vspID());
 
+	/** Return a writable view of the genotype of all individuals in a
+	 *  population (if <tt>subPop=[]</tt>, default), or individuals in a
+	 *  subpopulation \e subPop as a Python \c memoryview of shape
+	 *  <tt>(N, ploidy(), totNumLoci())</tt>, where \c N is the number of
+	 *  individuals. The view shares memory with the population so that
+	 *  <tt>numpy.asarray(pop.genotypeView())</tt> reads and modifies
+	 *  genotypes without copying them. Similar to \c genotype(), the view
+	 *  becomes invalid once the population changes. A \c ValueError will be
+	 *  raised for binary and mutant modules because their genotypes are not
+	 *  stored as arrays of alleles. Virtual subpopulation is unsupported.
+	 *  <group>5-genotype</group>
+	 */
+	PyObject * genotypeView(vspID subPop = vspID());
+
+	/** Return a writable view of the lineage of alleles of all individuals
+	 *  in a population (if <tt>subPop=[]</tt>, default), or individuals in a
+	 *  subpopulation \e subPop as a Python \c memoryview of shape
+	 *  <tt>(N, ploidy(), totNumLoci())</tt>. Please refer to function
+	 *  \c genotypeView for details. <bf>This function returns \c None for
+	 *  modules without lineage information.</bf>
+	 *  <group>5-genotype</group>
+	 */
+	PyObject * lineageView(vspID subPop = vspID());
+
 	/** Fill the genotype of all individuals in a population (if
 	 *  <tt>subPop=[]</tt>) or in a (virtual) subpopulation \e subPop (if
 	 *  <tt>subPop=sp</tt> or <tt>(sp, vsp)</tt>) using a list of alleles
@@ -1483,6 +1662,17 @@ public:
 	 */
 	vectorf indInfo(const uintString & field, vspID subPop = vspID());
 
+	/** Return a writable view of the information fields of all individuals
+	 *  in a population (if <tt>subPop=[]</tt>, default), or individuals in a
+	 *  subpopulation \e subPop as a Python \c memoryview of shape
+	 *  <tt>(N, infoSize())</tt> so that column \c i of the view holds
+	 *  values of information field <tt>infoField(i)</tt>. The view shares
+	 *  memory with the population and becomes invalid once the population
+	 *  changes. Virtual subpopulation is unsupported.
+	 *  <group>8-info</group>
+	 */
+	PyObject * infoView(vspID subPop = vspID());
+
 
 	/** Add a list of information fields \e fields to a population and
 	 *  initialize their values to \e init. If an information field alreay
@@ -1549,15 +1739,26 @@ public:
 	void syncIndPointers(bool infoOnly = false) const;
 
 	/** Save population to a file \e filename, which can be loaded by a global
-	 *  function <tt>loadPopulation(filename)</tt>.
+	 *  function <tt>loadPopulation(filename)</tt>. By default (<tt>format=
+	 *  'text'</tt>), the population is saved in a portable compressed text
+	 *  format that can be read by all versions of simuPOP. If \e format is
+	 *  set to \c 'binary', genotype, lineage and information fields are
+	 *  saved as raw blocks of binary data that are compressed independently,
+	 *  which is much faster to save and load for large populations. Files in
+	 *  this format can only be loaded by this and later versions of simuPOP,
+	 *  on platforms with the same byte order.
 	 *  <group>8-pop</group>
 	 */
-	void save(const string & filename) const;
+	void save(const string & filename, const string & format = "text") const;
 
-	/** CPPONLY load Population from file \e filename
+	/** CPPONLY load Population from file \e filename, optionally only
+	 *  specified subpopulations, loci, information fields and ancestral
+	 *  generations.
 	 *  <group>8-pop</group>
 	 */
-	void load(const string & filename);
+	void load(const string & filename, const subPopList & subPops = subPopList(),
+		const lociList & loci = lociList(), const stringList & infoFields = stringList(),
+		const uintList & ancGens = uintList());
 
 public:
 	/** return variables of a population as a Python dictionary. If a valid
@@ -1573,6 +1774,62 @@ public:
 	/// CPPONLY The same as vars(), but without increasing reference count.
 	PyObject * dict(vspID subPop = vspID());
 
+	/** Return the number of bytes used by the population. If \e detailed is
+	 *  set to \c True, a dictionary with the number of bytes used by
+	 *  \c genotype, \c lineage, \c info (information fields),
+	 *  \c individuals, \c structure (sizes and names of subpopulations),
+	 *  \c ancestralGens (all parts of ancestral generations), \c vars (the
+	 *  local namespace, estimated with \c sys.getsizeof), \c vspSplitter,
+	 *  and their \c total is returned. Memory used by shared genotypic
+	 *  structures is not counted.
+	 *  <group>9-var</group>
+	 */
+	PyObject * memoryUsage(bool detailed = false) const;
+
+	/** CPPONLY return the number of bytes used by the population, optionally
+	 *  without the local namespace, which is relatively slow to estimate.
+	 */
+	size_t totalMemoryUsage(bool withVars = true) const;
+
+	/** Track the number of alleles at \e loci (default to all loci) of the
+	 *  present generation. Allele counts are counted when this function is
+	 *  called, accumulated by mating schemes as offspring are produced, and
+	 *  updated by mutators derived from \c BaseMutator when alleles are
+	 *  changed. Operator \c Stat uses these counts to calculate allele
+	 *  frequencies of the whole population (<tt>alleleFreq</tt> without
+	 *  subpopulation-specific variables) without counting alleles of all
+	 *  individuals. Counts are discarded and recounted after mating if
+	 *  genotypes are changed by member functions of this population,
+	 *  initializers, other mutators, or Python operators, but not if
+	 *  genotypes are changed directly from Python (e.g. through
+	 *  <tt>Individual.setAllele</tt>), in which case this function should be
+	 *  called again. Loci on mitochondrial chromosomes are not tracked.
+	 *  Tracking stops if an empty list of loci is given.
+	 *  <group>9-var</group>
+	 */
+	void trackAlleles(const lociList & loci = lociList());
+
+	/// CPPONLY
+	AlleleTracker & alleleTracker()
+	{
+		return m_alleleTracker;
+	}
+
+
+	/// CPPONLY
+	const AlleleTracker & alleleTracker() const
+	{
+		return m_alleleTracker;
+	}
+
+
+private:
+	/// number of bytes used by each part of the population, in the order
+	/// listed in memoryUsage
+	vectoru memoryUsageByPart(bool withVars) const;
+
+public:
+
 	/// CPPONLY
 	SharedVariables & getVars() const
 	{
@@ -1638,6 +1895,13 @@ private:
 
 	BOOST_SERIALIZATION_SPLIT_MEMBER();
 
+	/// save population in the block-compressed binary format
+	void saveBinary(const string & filename) const;
+
+	/// load population saved in the block-compressed binary format
+	void loadBinary(const string & filename, const subPopList & subPops,
+		const lociList & loci, const stringList & infoFields, const uintList & ancGens);
+
 private:
 	/// population size: number of individual
 	size_t m_popSize;
@@ -1715,6 +1979,18 @@ private:
 	mutable size_t m_gen;
 	mutable size_t m_rep;
 
+	/// counts of alleles at tracked loci
+	AlleleTracker m_alleleTracker;
+
+	/// generation at which a sample of individuals is activated
+	int m_sampledGen;
+
+	/// individuals, subpopulation sizes and order of the present generation
+	/// while a sample is activated
+	vector<Individual> m_unsampledInds;
+	vectoru m_unsampledSubPopSize;
+	bool m_unsampledIndOrdered;
+
 public:
 	/** CPPONLY
 	 *  current replicate in a simulator which is not meaningful for a stand-alone population
@@ -1756,8 +2032,22 @@ public:
 };
 
 /** load a population from a file saved by <tt>Population::save()</tt>.
+ *  The format of the file (\c 'text' or \c 'binary') is detected
+ *  automatically. By default, the whole population is loaded. If a list of
+ *  (non-virtual) subpopulations (indexes or names) is given in \e subPops,
+ *  only individuals in these subpopulations are loaded and other
+ *  subpopulations are removed. If a list of \e loci or \e infoFields is
+ *  specified, only genotypes at these loci and values of these information
+ *  fields are loaded. If \e ancGens is not \c ALL_AVAIL (default), only
+ *  specified ancestral generations are loaded (e.g. <tt>ancGens=0</tt> for
+ *  the present generation). Unused parts of files saved in \c 'binary'
+ *  format are skipped without being read or decompressed, whereas files
+ *  saved in \c 'text' format are loaded completely before the requested
+ *  parts are extracted.
  */
-Population & loadPopulation(const string & file);
+Population & loadPopulation(const string & file, const subPopList & subPops = subPopList(),
+	const lociList & loci = lociList(), const stringList & infoFields = stringList(),
+	const uintList & ancGens = uintList());
 
 }
 
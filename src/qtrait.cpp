@@ -114,6 +114,7 @@ void PyQuanTrait::qtrait(Individual * ind, size_t gen, vectorf & traits) const
 		}
 	}
 
+	countPyCall();
 	PyObject * res = PyEval_CallObject(m_func.func(), args);
 	Py_XDECREF(args);
 
@@ -136,6 +136,9 @@ using std::string;
 #include <vector>
 using std::vector;
 
+// allocator for genotype storage backed by memory-mapped files
+#include "mapped_allocator.h"
+
 
 /// UINT should not be changed to unsigned long
 /// since python extension use it as int.
@@ -173,6 +176,8 @@ typedef const unsigned long & ConstAlleleRef;
 #  define TO_ALLELE(a)    static_cast<Allele>(a)
 #  define DEREF_ALLELE(a)   (*(a))
 #  define REF_ASSIGN_ALLELE(a, b)  *(a) = (b)
+// format character of alleles in the Python buffer protocol
+#  define ALLELE_BUFFER_FORMAT "L"
 
 #else
 
@@ -208,6 +213,10 @@ typedef const unsigned char & ConstAlleleRef;
 #    else
 #      define DEREF_ALLELE(a)   (*(a))
 #      define REF_ASSIGN_ALLELE(a, b)  (*(a) = (b))
+// format character of alleles in the Python buffer protocol, not
+// defined for binary and mutant modules because their genotypes are
+// not stored as contiguous arrays of alleles.
+#      define ALLELE_BUFFER_FORMAT "B"
 #    endif
 #  endif
 #endif
@@ -367,6 +376,9 @@ typedef std::vector<double>::iterator InfoIterator;
 typedef std::vector<double>::const_iterator ConstInfoIterator;
 typedef std::vector<long>::iterator LineageIterator;
 typedef std::vector<long>::const_iterator ConstLineageIterator;
+// format characters of info and lineage in the Python buffer protocol
+#define INFO_BUFFER_FORMAT "d"
+#define LINEAGE_BUFFER_FORMAT "l"
 extern const size_t InvalidValue;
 
 // FIXME: I need a type that is 32 or 64 bit long depending on platform
@@ -376,7 +388,13 @@ typedef long LONG;
 
 typedef std::vector<long>                                vectori;
 typedef std::vector<double>                              vectorf;
+// genotypes of the short, long and lineage modules are stored in vectors
+// that can be backed by memory-mapped files (see setOptions(genoStorage))
+#if defined(BINARYALLELE) || defined(MUTANTALLELE)
 typedef std::vector<Allele>                              vectora;
+#else
+typedef std::vector<Allele, simuPOP::MappedAllocator<Allele> > vectora;
+#endif
 #ifdef MUTANTALLELE
 //typedef simuPOP::vectorm         vectorm;
 #endif
@@ -612,8 +630,8 @@ namespace simuPOP {
 typedef simuPOP::vectorm::iterator GenoIterator;
 typedef simuPOP::vectorm::const_iterator ConstGenoIterator;
 #else
-typedef std::vector<Allele>::iterator GenoIterator;
-typedef std::vector<Allele>::const_iterator ConstGenoIterator;
+typedef vectora::iterator GenoIterator;
+typedef vectora::const_iterator ConstGenoIterator;
 #endif
 
 #endif
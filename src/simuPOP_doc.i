@@ -55,6 +55,193 @@ Usage:
 
 %ignore simuPOP::AffectionSplitter::size(const Population &pop, size_t subPop, size_t virtualSubPop) const;
 
+%ignore simuPOP::AlleleTracker;
+
+%feature("docstring") simuPOP::AlleleTracker::AlleleTracker "
+
+Usage:
+
+    AlleleTracker()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::addCounts "
+
+Description:
+
+    add counts of another tracker of the same loci
+
+Usage:
+
+    x.addCounts(rhs)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::addIndividuals "
+
+Description:
+
+    count alleles of individuals in a range
+
+Usage:
+
+    x.addIndividuals(begin, end)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::alleleCounts "
+
+Description:
+
+    add counts of alleles at a tracked locus to counts and the number
+    of counted alleles to total.
+
+Usage:
+
+    x.alleleCounts(locus, counts, total)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::changeAllele "
+
+Description:
+
+    replace an allele from with to at locus
+
+Usage:
+
+    x.changeAllele(locus, from, to)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::clearCounts "
+
+Description:
+
+    clear counts but keep tracked loci, used for partial counts
+
+Usage:
+
+    x.clearCounts()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::counting "
+
+Description:
+
+    if counts are being accumulated or updated
+
+Usage:
+
+    x.counting()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::invalidate "
+
+Description:
+
+    discard counts after genotypes are changed in an unknown way
+
+Usage:
+
+    x.invalidate()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::loci "
+
+Description:
+
+    loci being tracked
+
+Usage:
+
+    x.loci()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::recount "
+
+Description:
+
+    reset and count alleles of all individuals of population pop
+
+Usage:
+
+    x.recount(pop)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::reset "
+
+Description:
+
+    start counting alleles of individuals of population pop
+
+Usage:
+
+    x.reset(pop)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::swap "
+
+Usage:
+
+    x.swap(rhs)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::track "
+
+Description:
+
+    track alleles at loci, stop tracking if loci is empty
+
+Usage:
+
+    x.track(loci)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::tracking "
+
+Description:
+
+    if alleles of a population are being tracked
+
+Usage:
+
+    x.tracking()
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::tracks "
+
+Description:
+
+    if locus is tracked
+
+Usage:
+
+    x.tracks(locus)
+
+"; 
+
+%feature("docstring") simuPOP::AlleleTracker::valid "
+
+Description:
+
+    if counts reflect the present generation of population pop
+
+Usage:
+
+    x.valid(pop)
+
+"; 
+
 %ignore simuPOP::AlleleVecAsNumArray(GenoIterator begin, GenoIterator end);
 
 %feature("docstring") simuPOP::BackwardMigrator "
@@ -783,6 +970,8 @@ Details:
 
 %ignore simuPOP::BaseVspSplitter::deactivate(size_t subPop);
 
+%ignore simuPOP::BaseVspSplitter::memoryUsage() const;
+
 %feature("docstring") simuPOP::BaseVspSplitter::name "
 
 Usage:
@@ -1341,6 +1530,8 @@ Details:
 
 %ignore simuPOP::CombinedSplitter::contains(const Population &pop, size_t ind, vspID vsp) const;
 
+%ignore simuPOP::CombinedSplitter::memoryUsage() const;
+
 %feature("docstring") simuPOP::CombinedSplitter::name "
 
 Usage:
@@ -2766,7 +2957,14 @@ Details:
     applied to the same subpopulation, offspring produced by these
     mating schemes are shuffled randomly. If this is not desired, you
     can turn off offspring shuffling by setting parameter
-    shuffleOffspring to False.
+    shuffleOffspring to False.  If simuPOP is running with multiple
+    threads and there are at least as many subpopulations as threads,
+    subpopulations are mated concurrently, each by copies of its mating
+    schemes that populate disjoint ranges of the offspring
+    subpopulation. Because only one virtual subpopulation can be
+    activated at a time, subpopulations with mating schemes that are
+    applied to virtual subpopulations, or that cannot be used in
+    parallel, are mated one by one.
 
 "; 
 
@@ -2824,7 +3022,18 @@ Details:
     weight are used to determine which (virtual) subpopulations this
     mating scheme will be applied to, and how many offspring this
     mating scheme will produce. Please refer to mating scheme
-    HeteroMating for the use of these two parameters.
+    HeteroMating for the use of these two parameters.  If simuPOP is
+    running with multiple threads and there are at least as many
+    subpopulations as threads, subpopulations are mated concurrently
+    by copies of this mating scheme, each populating its own offspring
+    subpopulation. Otherwise, offspring of a subpopulation are
+    generated by multiple threads, each taking small chunks of
+    families as it becomes available. Neither is possible if the
+    offspring generator cannot be used in parallel. If the parent
+    chooser cannot be used in parallel (e.g. a Python parents
+    chooser), subpopulations are mated one by one and parents of all
+    families of a subpopulation are chosen before offspring are
+    generated.
 
 "; 
 
@@ -2834,8 +3043,14 @@ Details:
 
 %feature("docstring") simuPOP::HomoMating::describe "Obsolete or undocumented function."
 
+%ignore simuPOP::HomoMating::mate(Population &pop, Population &scratch);
+
 %ignore simuPOP::HomoMating::mateSubPop(Population &pop, Population &offPop, size_t subPop, RawIndIterator offBegin, RawIndIterator offEnd);
 
+%ignore simuPOP::HomoMating::mateSubPop(Population &pop, Population &offPop, size_t subPop, RawIndIterator offBegin, RawIndIterator offEnd, ULONG streamKey);
+
+%ignore simuPOP::HomoMating::parallelizable() const;
+
 %ignore simuPOP::HomoMating::subPops() const;
 
 %ignore simuPOP::HomoMating::weight() const;
@@ -5320,6 +5535,8 @@ Details:
 
 "; 
 
+%ignore simuPOP::Pedigree::fatherIdx() const;
+
 %ignore simuPOP::Pedigree::fatherOf(size_t id) const;
 
 %ignore simuPOP::Pedigree::idIdx() const;
@@ -5467,6 +5684,8 @@ Details:
 
 %feature("docstring") simuPOP::Pedigree::mergeSubPops "Obsolete or undocumented function."
 
+%ignore simuPOP::Pedigree::motherIdx() const;
+
 %ignore simuPOP::Pedigree::motherOf(size_t id) const;
 
 %feature("docstring") simuPOP::Pedigree::numParents "Obsolete or undocumented function."
@@ -5566,7 +5785,9 @@ Details:
     the parents of each offspring using their IDs in the pedigree
     object. A list of during mating operators are then used to
     transmit parental genotype to the offspring. The population being
-    evolved must have an information field 'ind_id'.
+    evolved must have an information field 'ind_id'. Offspring are
+    generated by multiple threads if all operators can be applied in
+    parallel.
 
 "; 
 
@@ -5971,6 +6192,8 @@ Details:
 
 "; 
 
+%ignore simuPOP::Population::activateSample(const vectoru &indexes);
+
 %feature("docstring") simuPOP::Population::activateVirtualSubPop "Obsolete or undocumented function."
 
 %feature("docstring") simuPOP::Population::addChrom "
@@ -6091,6 +6314,12 @@ Details:
 
 %ignore simuPOP::Population::alleleIterator(size_t locus) const;
 
+%ignore simuPOP::Population::alleleIterator(size_t locus, size_t subPop, size_t threadID);
+
+%ignore simuPOP::Population::alleleTracker();
+
+%ignore simuPOP::Population::alleleTracker() const;
+
 %feature("docstring") simuPOP::Population::ancestor "
 
 Usage:
@@ -6153,6 +6382,8 @@ Usage:
 
 %feature("docstring") simuPOP::Population::curAncestralGen "Obsolete or undocumented function."
 
+%ignore simuPOP::Population::deactivateSample();
+
 %feature("docstring") simuPOP::Population::deactivateVirtualSubPop "Obsolete or undocumented function."
 
 %ignore simuPOP::Population::dict(vspID subPop=vspID());
@@ -6261,8 +6492,31 @@ Details:
 
 "; 
 
+%feature("docstring") simuPOP::Population::genotypeView "
+
+Usage:
+
+    x.genotypeView(subPop=[])
+
+Details:
+
+    Return a writable view of the genotype of all individuals in a
+    population (if subPop=[], default), or individuals in a
+    subpopulation subPop as a Python memoryview of shape (N, ploidy(),
+    totNumLoci()), where N is the number of individuals. The view
+    shares memory with the population so that
+    numpy.asarray(pop.genotypeView()) reads and modifies genotypes
+    without copying them. Similar to genotype(), the view becomes
+    invalid once the population changes. A ValueError will be raised
+    for binary and mutant modules because their genotypes are not
+    stored as arrays of alleles. Virtual subpopulation is unsupported.
+
+"; 
+
 %ignore simuPOP::Population::getVars() const;
 
+%ignore simuPOP::Population::hasActivatedSample() const;
+
 %ignore simuPOP::Population::hasActivatedVirtualSubPop() const;
 
 %ignore simuPOP::Population::hasActivatedVirtualSubPop(size_t subPop) const;
@@ -6311,6 +6565,24 @@ Details:
 
 "; 
 
+%feature("docstring") simuPOP::Population::infoView "
+
+Usage:
+
+    x.infoView(subPop=[])
+
+Details:
+
+    Return a writable view of the information fields of all
+    individuals in a population (if subPop=[], default), or
+    individuals in a subpopulation subPop as a Python memoryview of
+    shape (N, infoSize()) so that column i of the view holds values of
+    information field infoField(i). The view shares memory with the
+    population and becomes invalid once the population changes.
+    Virtual subpopulation is unsupported.
+
+"; 
+
 %ignore simuPOP::Population::indIterator();
 
 %ignore simuPOP::Population::indIterator(size_t subPop);
@@ -6377,10 +6649,46 @@ Details:
 
 "; 
 
+%feature("docstring") simuPOP::Population::lineageView "
+
+Usage:
+
+    x.lineageView(subPop=[])
+
+Details:
+
+    Return a writable view of the lineage of alleles of all
+    individuals in a population (if subPop=[], default), or
+    individuals in a subpopulation subPop as a Python memoryview of
+    shape (N, ploidy(), totNumLoci()). Please refer to function
+    genotypeView for details. This function returns None for modules
+    without lineage information.
+
+"; 
+
 %ignore simuPOP::Population::load(const string &filename);
 
 %ignore simuPOP::Population::markIndividuals(vspID subPop, bool mark) const;
 
+%feature("docstring") simuPOP::Population::memoryUsage "
+
+Usage:
+
+    x.memoryUsage(detailed=False)
+
+Details:
+
+    Return the number of bytes used by the population. If detailed is
+    set to True, a dictionary with the number of bytes used by
+    genotype, lineage, info (information fields), individuals,
+    structure (sizes and names of subpopulations), ancestralGens (all
+    parts of ancestral generations), vars (the local namespace,
+    estimated with sys.getsizeof), vspSplitter, and their total is
+    returned. Memory used by shared genotypic structures is not
+    counted.
+
+"; 
+
 %feature("docstring") simuPOP::Population::mergeSubPops "
 
 Usage:
@@ -6626,12 +6934,19 @@ Details:
 
 Usage:
 
-    x.save(filename)
+    x.save(filename, format=\"text\")
 
 Details:
 
     Save population to a file filename, which can be loaded by a
-    global function loadPopulation(filename).
+    global function loadPopulation(filename). By default
+    (format='text'), the population is saved in a portable compressed
+    text format that can be read by all versions of simuPOP. If
+    format is set to 'binary', genotype, lineage and information
+    fields are saved as raw blocks of binary data that are compressed
+    independently, which is much faster to save and load for large
+    populations. Files in this format can only be loaded by this and
+    later versions of simuPOP, on platforms with the same byte order.
 
 "; 
 
@@ -6935,6 +7250,33 @@ Details:
 
 %ignore simuPOP::Population::syncIndPointers(bool infoOnly=false) const;
 
+%ignore simuPOP::Population::totalMemoryUsage(bool withVars=true) const;
+
+%feature("docstring") simuPOP::Population::trackAlleles "
+
+Usage:
+
+    x.trackAlleles(loci=ALL_AVAIL)
+
+Details:
+
+    Track the number of alleles at loci (default to all loci) of the
+    present generation. Allele counts are counted when this function
+    is called, accumulated by mating schemes as offspring are
+    produced, and updated by mutators derived from BaseMutator when
+    alleles are changed. Operator Stat uses these counts to calculate
+    allele frequencies of the whole population (alleleFreq without
+    subpopulation-specific variables) without counting alleles of all
+    individuals. Counts are discarded and recounted after mating if
+    genotypes are changed by member functions of this population,
+    initializers, other mutators, or Python operators, but not if
+    genotypes are changed directly from Python (e.g. through
+    Individual.setAllele), in which case this function should be
+    called again. Loci on mitochondrial chromosomes are not tracked.
+    Tracking stops if an empty list of loci is given.
+
+"; 
+
 %feature("docstring") simuPOP::Population::updateInfoFieldsFrom "
 
 Usage:
@@ -7086,6 +7428,8 @@ Details:
 
 %ignore simuPOP::ProductSplitter::contains(const Population &pop, size_t ind, vspID vsp) const;
 
+%ignore simuPOP::ProductSplitter::memoryUsage() const;
+
 %feature("docstring") simuPOP::ProductSplitter::name "
 
 Usage:
@@ -7611,7 +7955,13 @@ Details:
     parameters pop (the parental population) and subPop (index of
     subpopulation) and return the reference or index (relative to
     subpopulation) of a parent or a pair of parents repeatedly using
-    the iterator interface of the generator function.
+    the iterator interface of the generator function. To avoid calling
+    the generator for each offspring, it can also return parents of
+    many families at once as an array of integer indexes (e.g. a numpy
+    array, an array.array or a memoryview), with one dimension for
+    single parents or of shape (n, 2) for pairs of parents. Parents in
+    such a batch that are not used when the subpopulation is populated
+    are discarded.
 
 "; 
 
@@ -7864,10 +8214,27 @@ Details:
     number generators from GNU Scientific Library. You can obtain and
     change the RNG used by the current simuPOP module through the
     getRNG() function, or create a separate random number generator
-    and use it in your script.
+    and use it in your script. In addition to GSL generators, a
+    counter-based generator philox (Philox4x32-10) is provided. When
+    this generator is used, offspring generated during mating draw
+    random numbers from streams keyed by seed, generation and index of
+    offspring so that results of parallel mating and other parallel
+    operations do not depend on the number of threads. This generator
+    should be set for all threads using function
+    setOptions(name='philox').
 
 "; 
 
+%ignore simuPOP::RNG::counterBased() const;
+
+%ignore simuPOP::RNG::setStreamSeed(unsigned long seed);
+
+%ignore simuPOP::RNG::newStreamKey();
+
+%ignore simuPOP::RNG::setStream(ULONG key, ULONG gen, ULONG index);
+
+%ignore simuPOP::RNG::resetStream();
+
 %feature("docstring") simuPOP::RNG::RNG "
 
 Usage:
@@ -8688,8 +9055,8 @@ Details:
 
 Usage:
 
-    SavePopulation(output=\"\", begin=0, end=-1, step=1, at=[],
-      reps=ALL_AVAIL, subPops=ALL_AVAIL, infoFields=[])
+    SavePopulation(output=\"\", format=\"text\", begin=0, end=-1,
+      step=1, at=[], reps=ALL_AVAIL, subPops=ALL_AVAIL, infoFields=[])
 
 Details:
 
@@ -8698,9 +9065,11 @@ Details:
     specifications ('', 'filename', 'filename' prefixed by one or more
     '>' characters, and '!expr') but output from different operators
     will always replace existing files (effectively ignore '>'
-    specification). Parameter subPops is ignored. Please refer to
-    class BaseOperator for a detailed description about common
-    operator parameters such as stage and begin.
+    specification). Parameter format can be 'text' (default) or
+    'binary' (see Population.save() for details). Parameter subPops
+    is ignored. Please refer to class BaseOperator for a detailed
+    description about common operator parameters such as stage and
+    begin.
 
 "; 
 
@@ -9085,7 +9454,7 @@ Details:
 
 "; 
 
-%ignore simuPOP::Simulator::apply(const opList &ops);
+%ignore simuPOP::Simulator::apply(const opList &ops, const vector< bool > &selectedReps, vector< EvolProfile > *profiles=NULL, int stage=0);
 
 %feature("docstring") simuPOP::Simulator::clone "
 
@@ -9134,7 +9503,8 @@ Details:
 Usage:
 
     x.evolve(initOps=[], preOps=[], matingScheme=MatingScheme,
-      postOps=[], finalOps=[], gen=-1, dryrun=False)
+      postOps=[], finalOps=[], gen=-1, dryrun=False, reps=ALL_AVAIL,
+      profile=False)
 
 Details:
 
@@ -9180,7 +9550,28 @@ Details:
     population, including those that have stopped before others.  If
     parameter dryrun is set to True, this function will print a
     description of the evolutionary process generated by function
-    describeEvolProcess() and exits.
+    describeEvolProcess() and exits.  If a list of replicates is given
+    to parameter reps, only these replicates will be evolved and the
+    rest of the populations are left untouched, although they are
+    still considered active when the last replicate (REP_LAST) of an
+    operator is determined. The number of evolved generations of
+    untouched replicates are returned as 0.  If parameter profile is
+    set to True, the wall time, number of individuals in the (virtual)
+    subpopulations to which an operator is applied (offspring for the
+    mating scheme), and number of calls to Python functions are
+    recorded each time an operator or the mating scheme is applied.
+    These records are saved to variable profile in the local namespace
+    of each evolved population as a dictionary with keys stage
+    (initOps, preOps, matingScheme, postOps or finalOps), index (index
+    of the operator in its list), operator (description of the
+    operator), gen, time, individuals, pyCalls and memory, each of
+    which is a list with one item for each application. Time spent by
+    during-mating operators is counted as part of the mating scheme.
+    Column memory records the number of bytes used by the population
+    (see Population.memoryUsage) after each application, including the
+    parental generation kept during mating but excluding population
+    variables, so the peak memory usage of a generation is the largest
+    value of its records.
 
 "; 
 
@@ -9357,9 +9748,11 @@ Usage:
       haploHomoFreq=[], sumOfInfo=[], meanOfInfo=[], varOfInfo=[],
       maxOfInfo=[], minOfInfo=[], LD=[], association=[],
       neutrality=[], structure=[], HWE=[], inbreeding=[],
-      effectiveSize=[], vars=ALL_AVAIL, suffix=\"\", output=\"\", begin=0,
-      end=-1, step=1, at=[], reps=ALL_AVAIL, subPops=ALL_AVAIL,
-      infoFields=[])
+      effectiveSize=[], vars=ALL_AVAIL, suffix=\"\", output=\"\",
+      begin=0, end=-1, step=1, at=[], reps=ALL_AVAIL,
+      subPops=ALL_AVAIL, infoFields=[], asArray=False, LD_window=[],
+      sampleSize=[], sampleFraction=0, stdError=0,
+      neutrality_window=[], SFS=[], GRM=[], GRM_file=\"\")
 
 Details:
 
@@ -9405,8 +9798,47 @@ Details:
     allele count. An optional suffix (parameter suffix) can be used to
     append a suffix to default parameter names. This parameter can be
     used, for example, to calculate and store the same statistics for
-    different subpopulations (e.g. pairwise Fst).  Operator Stat
-    supports the following statistics:  popSize: If popSize=True,
+    different subpopulations (e.g. pairwise Fst).  Statistics
+    alleleFreq, heteroFreq, homoFreq, association and structure can be
+    calculated for a large number of loci, in which case it can be
+    expensive to create and access their results as nested
+    dictionaries. If asArray is set to True, these statistics are
+    outputted as Python arrays of type 'd' (array.array), which can be
+    used directly, or converted to numpy arrays without copying,
+    through the buffer interface. More specifically, heteroFreq,
+    homoFreq, heteroNum and homoNum (and their subpopulation versions)
+    are arrays with one element for each specified locus, so are the
+    statistics and p-values of association tests and locus level
+    structure statistics, and alleleFreq and alleleNum (and their
+    subpopulation versions) are flattened len(loci) by n arrays, where
+    n is one plus the largest allele observed in all (virtual)
+    subpopulations, so that
+    numpy.frombuffer(alleleFreq).reshape(len(loci), -1)[i][a] is the
+    frequency of allele a at the i-th specified locus. Loci are ordered
+    as they are specified (all loci for ALL_AVAIL). Because such arrays
+    can be huge if there are large alleles (e.g. in the long and mutant
+    modules), a ValueError will be raised if the largest allele is far
+    larger than the number of distinct alleles.  Statistics of a
+    very large population can be estimated from a random sample of
+    individuals. If parameter sampleSize is given, statistics are
+    calculated from sampleSize individuals drawn randomly (without
+    replacement) from the whole population, or from sampleSize[sp]
+    individuals from each subpopulation sp if a list of sizes is given.
+    Alternatively, parameter sampleFraction draws the given proportion
+    of individuals from each subpopulation. A new sample is drawn each
+    time this operator is applied. Sampled individuals share genotypes
+    and information fields with the population so the cost of drawing a
+    sample and calculating most statistics is proportional to the size
+    of the sample instead of the population. All statistics, including
+    population and (virtual) subpopulation sizes, are calculated from
+    sampled individuals, except for demographic effective size, which
+    follows lineages of all individuals. If stdError is set to a number of groups g (e.g. 10),
+    sampled individuals are divided randomly into g groups and standard
+    errors of all numeric statistics are estimated by a delete-a-group
+    jackknife, which calculates the statistics g more times, each time
+    without one of the groups. Standard errors are saved in variables
+    with the same structure as the statistics and names with suffix _se
+    (e.g. alleleFreq_se and subPop[sp]['alleleFreq_se']).  Operator Stat supports the following statistics:  popSize: If popSize=True,
     number of individuals in all or specified subpopulations
     (parameter subPops) will be set to the following variables:
     *   popSize (default): Number of individuals in all or specified
@@ -9478,10 +9910,13 @@ Details:
     *   numOfMutants_sp: Number of mutants in each (virtual)
     subpopulations.alleleFreq: This parameter accepts a list of loci
     (loci indexes, names, or ALL_AVAIL), at which allele frequencies
-    will be calculated. This statistic outputs the following
-    variables, all of which are dictionary (with loci indexes as keys)
-    of default dictionaries (with alleles as keys). For example,
-    alleleFreq[loc][a] returns 0 if allele a does not exist.
+    will be calculated. If alleles of the population are tracked (see
+    Population.trackAlleles), counts of alleles in the whole
+    population are read from tracked counts instead of being counted.
+    This statistic outputs the following variables, all of which are
+    dictionary (with loci indexes as keys) of default dictionaries
+    (with alleles as keys). For example, alleleFreq[loc][a] returns 0
+    if allele a does not exist.
     *   alleleFreq (default): alleleFreq[loc][a] is the frequency of
     allele a at locus for all or specified (virtual) subpopulations.
     *   alleleNum (default): alleleNum[loc][a] is the number of allele
@@ -9643,6 +10078,24 @@ Details:
     *   LD_ChiSq_p_sp p value for the ChiSq statistics for each
     (virtual) subpopulation.
     *   CramerV_sp Cramer V statistics for each (virtual)
+    subpopulation.LD_window: Parameter LD_window accepts a maximum
+    distance d and an optional maximum number of pairs m (e.g.
+    LD_window=(0.5, 100)), and calculates linkage disequilibrium
+    between all pairs of loci on the same autosome (or customized
+    chromosome) that are at most d apart (measured by locus
+    positions). If m is specified, each locus is paired with at most m
+    closest loci after it. Alleles are treated as wildtype (0) or
+    mutant (non zero), which is exact for the binary module, and
+    signed LD between mutant alleles are calculated from bitsets of
+    haplotypes so that LD among tens of thousands of loci can be
+    calculated efficiently. This statistic sets the following
+    variables:
+    *   LD_window (default) A dictionary with keys loc1 and loc2
+    (indexes of loci), dist (distance between loci), LD, LD_prime and
+    R2 (LD measures of haplotypes in all or specified (virtual)
+    subpopulations), each value being an array of type 'd' with one
+    element for each pair of loci.
+    *   LD_window_sp Such a dictionary for each (virtual)
     subpopulation.association: Parameter association accepts a list of
     loci, which can be a list of indexes, names, or ALL_AVAIL. At each
     locus, one or more statistical tests will be performed to test
@@ -9685,15 +10138,63 @@ Details:
     subpopulation.
     *   Armitage_p_sp A dictionary of p-values of the Cochran-
     Armitage tests, using cases and controls from each
-    subpopulation.neutrality: This parameter performs neutrality tests
+    subpopulation.For genome-wide association scans, alleles and
+    genotypes of all loci are counted in dense tables in a single pass
+    through the population, and blocks of loci are processed in
+    parallel if multiple threads are used. If asArray is set to True,
+    test statistics and p-values are outputted as arrays with one
+    element for each specified locus, instead of dictionaries keyed by
+    loci.neutrality: This parameter performs neutrality tests
     (detection of natural selection) on specified loci, which can be a
-    list of loci indexes, names or ALL_AVAIL. It currently only
-    outputs Pi, which is the average number of pairwise difference
-    between loci. This statistic outputs the following variables:
-    *   Pi Mean pairwise difference between all sequences from all or
-    specified (virtual) subpopulations.
+    list of loci indexes, names or ALL_AVAIL. All statistics are
+    calculated from allele counts at each locus so that the cost is
+    linear to the number of sequences. This statistic outputs the
+    following variables:
+    *   Pi (default) Mean pairwise difference between all sequences
+    from all or specified (virtual) subpopulations.
     *   Pi_sp Mean paiewise difference between all sequences in each
-    (virtual) subpopulation.structure: Parameter structure accepts a
+    (virtual) subpopulation.
+    *   Theta_W (default) Watterson's estimator of theta, namely the
+    number of segregating sites divided by sum(1/i for i in range(1,
+    n)) for n sequences.
+    *   Theta_W_sp Watterson's theta in each (virtual) subpopulation.
+    *   Tajima_D (default) Tajima's D statistic (Tajima 1989), which is
+    0 if there is no segregating site.
+    *   Tajima_D_sp Tajima's D in each (virtual) subpopulation.If a
+    window width (and an optional step, which is default to width) is
+    specified through parameter neutrality_window, these statistics
+    are also calculated for loci in windows [k*step, k*step+width)
+    along each chromosome, using positions of loci. Windows without any
+    specified locus are ignored. The following variables are
+    outputted:
+    *   neutrality_window (default) A dictionary with keys chrom,
+    start, end, numSites, Pi, Theta_W and Tajima_D, each of which is an
+    array with one element for each window. Pi and Theta_W are summed
+    over loci in each window.
+    *   neutrality_window_sp Such a dictionary for each (virtual)
+    subpopulation.SFS: Parameter SFS accepts a list of loci (indexes,
+    names or ALL_AVAIL) and calculates the site frequency spectrum of
+    these loci, treating allele 0 as the ancestral allele and all other
+    alleles as derived alleles. Alleles are counted in one pass through
+    each (virtual) subpopulation and the spectra are returned as Python
+    arrays of type 'd'. This statistic outputs the following variables:
+    *   SFS (default) An array of length n+1 where n is the number of
+    alleles at each locus in all or specified (virtual)
+    subpopulations. Its k-th element is the number of loci with k
+    derived alleles.
+    *   SFS_folded Folded site frequency spectrum, an array of length
+    n/2+1 with the number of loci by the count of minor (ancestral or
+    derived) alleles.
+    *   SFS_sp Unfolded site frequency spectrum in each (virtual)
+    subpopulation.
+    *   SFS_folded_sp Folded site frequency spectrum in each (virtual)
+    subpopulation.
+    *   SFS_joint A dictionary of joint site frequency spectra with keys
+    (sp1, sp2) for each pair of (virtual) subpopulations. Each spectrum
+    is a flattened n1+1 by n2+1 array so that
+    numpy.frombuffer(SFS_joint[(sp1, sp2)]).reshape(n1+1, -1)[i][j] is
+    the number of loci with i and j derived alleles in sp1 and sp2
+    respectively.structure: Parameter structure accepts a
     list of loci at which statistics that measure population structure
     are calculated. structure accepts a list of loci indexes, names or
     ALL_AVAIL. This parameter currently supports the following
@@ -9723,7 +10224,12 @@ Details:
     *   f_it A dictionary of locus level WC84 Fit values.
     *   G_st Nei's Gst statistic estimated for all specified loci.
     *   g_st A dictionary of Nei's Gst statistic estimated for each
-    locus.HWE: Parameter HWE accepts a list of loci at which exact
+    locus.For diploid populations and loci on autosomes, allele and
+    heterozygote counts of all (virtual) subpopulations are collected
+    in dense tables and components of these statistics are calculated
+    for blocks of loci in parallel if multiple threads are used. If
+    asArray is set to True, f_st, f_is, f_it and g_st are outputted as
+    arrays with one element for each specified locus.HWE: Parameter HWE accepts a list of loci at which exact
     two-side tests for Hardy-Weinberg equilibrium will be performed.
     This statistic is only available for diallelic loci in diploid
     populations. HWE can be a list of loci indexes, names or
@@ -9748,7 +10254,25 @@ Details:
     allele pairs.
     *   IBD_freq_sp frequency of IBD in each (virtual) subpopulations.
     *   IBS_freq_sp frequency of IBS in each (virtual)
-    subpopulations.effectiveSize: Parameter effectiveSize accepts a
+    subpopulations.GRM: Parameter GRM accepts a list of loci (indexes,
+    names or ALL_AVAIL) and calculates matrices of pairwise
+    relationship between all individuals in all or specified (virtual)
+    subpopulations, in the order of individuals in these
+    subpopulations. Genotypes of a diploid population are coded as the
+    number (0, 1 or 2) of non-zero alleles at each locus, packed into
+    bitsets, and processed by cache-blocked kernels in multiple
+    threads. Because these matrices can be large, they are saved as
+    flattened n by n arrays of type 'd' for n individuals, or written
+    to a binary file (in the same row-major order, GRM before IBS,
+    which can be read by numpy.fromfile) if a filename is given by
+    parameter GRM_file, in which case no variable is set. This
+    statistic outputs the following variables:
+    *   GRM (default) Genomic relationship matrix (VanRaden 2008),
+    namely the mean of (x_i-2p)(x_j-2p)/(2p(1-p)) over polymorphic
+    loci, where p is the frequency of non-zero alleles among specified
+    individuals.
+    *   IBS Proportion of alleles shared identical by state, namely the
+    mean of 1-|x_i-x_j|/2 over all loci.effectiveSize: Parameter effectiveSize accepts a
     list of loci at which the effective population size for the whole
     or specified (virtual) subpopulations is calculated. effectiveSize
     can be a list of loci indexes, names or ALL_AVAIL. Parameter
@@ -10322,6 +10846,8 @@ Details:
 
 %ignore simuPOP::cnull();
 
+%ignore simuPOP::countPyCall();
+
 %ignore simuPOP::debug(DBG_CODE code);
 
 %feature("docstring") simuPOP::describeEvolProcess "
@@ -10330,7 +10856,7 @@ Usage:
 
     describeEvolProcess(initOps=[], preOps=[],
       matingScheme=MatingScheme, postOps=[], finalOps=[], gen=-1,
-      numRep=1)
+      numRep=1, profile=False)
 
 Details:
 
@@ -10532,11 +11058,24 @@ Details:
 
 Usage:
 
-    loadPopulation(file)
+    loadPopulation(file, subPops=ALL_AVAIL, loci=ALL_AVAIL,
+      infoFields=ALL_AVAIL, ancGens=ALL_AVAIL)
 
 Details:
 
-    load a population from a file saved by Population::save().
+    load a population from a file saved by Population::save(). The
+    format of the file ('text' or 'binary') is detected
+    automatically. By default, the whole population is loaded. If a
+    list of (non-virtual) subpopulations (indexes or names) is given
+    in subPops, only individuals in these subpopulations are loaded
+    and other subpopulations are removed. If a list of loci or
+    infoFields is specified, only genotypes at these loci and values
+    of these information fields are loaded. If ancGens is not
+    ALL_AVAIL (default), only specified ancestral generations are
+    loaded (e.g. ancGens=0 for the present generation). Unused parts
+    of files saved in 'binary' format are skipped without being read
+    or decompressed, whereas files saved in 'text' format are loaded
+    completely before the requested parts are extracted.
 
 "; 
 
@@ -10656,6 +11195,8 @@ Usage:
 
 %ignore simuPOP::propToCount(IT first, IT last, size_t N, vectoru &count);
 
+%ignore simuPOP::pyCallCount();
+
 %ignore simuPOP::pyFunc;
 
 %feature("docstring") simuPOP::pyFunc::arg "
@@ -10966,7 +11507,7 @@ Usage:
 
 Usage:
 
-    setOptions(numThreads=-1, name=None, seed=0)
+    setOptions(numThreads=-1, name=None, seed=0, genoStorage=None)
 
 Details:
 
@@ -10976,7 +11517,15 @@ Details:
     environmental variable OMP_NUM_THREADS. Second and third argument
     is to set the type or seed of existing random number generator
     using RNGname with seed. If using openMP, it sets the type or seed
-    of random number generator of each thread.
+    of random number generator of each thread. Threads use the type of
+    the random number generator of the calling thread if name is not
+    given. If a directory is specified by parameter genoStorage, large
+    genotype arrays (1MB or more) created afterwards will be stored in
+    memory-mapped temporary files under this directory so that
+    populations larger than available memory can be simulated. These
+    files are removed automatically and genotypes will be stored in
+    memory again if an empty string is given. This feature is not
+    available under windows, and for the binary and mutant modules.
 
 "; 
 
@@ -11080,7 +11629,7 @@ Usage:
 
 Usage:
 
-    statAssociation(loci, subPops, vars, suffix)
+    statAssociation(loci, subPops, vars, suffix, asArray=False)
 
 "; 
 
@@ -11102,6 +11651,14 @@ Usage:
 
 "; 
 
+%feature("docstring") simuPOP::statEffectiveSize::applyDemographic "
+
+Usage:
+
+    x.applyDemographic(pop)
+
+"; 
+
 %feature("docstring") simuPOP::statEffectiveSize::demographicEffectiveSize "
 
 Usage:
@@ -11160,6 +11717,32 @@ Usage:
 
 "; 
 
+%ignore simuPOP::statGRM;
+
+%feature("docstring") simuPOP::statGRM::apply "
+
+Usage:
+
+    x.apply(pop)
+
+"; 
+
+%feature("docstring") simuPOP::statGRM::describe "
+
+Usage:
+
+    x.describe(format=True)
+
+"; 
+
+%feature("docstring") simuPOP::statGRM::statGRM "
+
+Usage:
+
+    statGRM(loci, filename, subPops, vars, suffix)
+
+"; 
+
 %ignore simuPOP::statHWE;
 
 %feature("docstring") simuPOP::statHWE::apply "
@@ -11368,6 +11951,32 @@ Usage:
 
 "; 
 
+%ignore simuPOP::statLDWindow;
+
+%feature("docstring") simuPOP::statLDWindow::apply "
+
+Usage:
+
+    x.apply(pop)
+
+"; 
+
+%feature("docstring") simuPOP::statLDWindow::describe "
+
+Usage:
+
+    x.describe(format=True)
+
+"; 
+
+%feature("docstring") simuPOP::statLDWindow::statLDWindow "
+
+Usage:
+
+    statLDWindow(window, subPops, vars, suffix)
+
+"; 
+
 %ignore simuPOP::statNeutrality;
 
 %feature("docstring") simuPOP::statNeutrality::apply "
@@ -11390,7 +11999,7 @@ Usage:
 
 Usage:
 
-    statNeutrality(loci, subPops, vars, suffix)
+    statNeutrality(loci, window, subPops, vars, suffix)
 
 "; 
 
@@ -11524,6 +12133,32 @@ Usage:
 
 "; 
 
+%ignore simuPOP::statSFS;
+
+%feature("docstring") simuPOP::statSFS::apply "
+
+Usage:
+
+    x.apply(pop)
+
+"; 
+
+%feature("docstring") simuPOP::statSFS::describe "
+
+Usage:
+
+    x.describe(format=True)
+
+"; 
+
+%feature("docstring") simuPOP::statSFS::statSFS "
+
+Usage:
+
+    statSFS(loci, subPops, vars, suffix)
+
+"; 
+
 %ignore simuPOP::statStructure;
 
 %feature("docstring") simuPOP::statStructure::apply "
@@ -11546,7 +12181,7 @@ Usage:
 
 Usage:
 
-    statStructure(Fst, subPops, vars, suffix)
+    statStructure(Fst, subPops, vars, suffix, asArray=False)
 
 "; 
 
@@ -11831,5 +12466,7 @@ Usage:
 
 "; 
 
+%ignore simuPOP::wallTime();
+
 %ignore std::powthree(unsigned n);
 
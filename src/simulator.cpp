@@ -28,6 +28,11 @@
 #include <sstream>
 using std::ostringstream;
 
+#if PY_VERSION_HEX >= 0x03000000
+#  define PyInt_FromLong(x) PyLong_FromLong(x)
+#  define PyString_FromString PyUnicode_FromString
+#endif
+
 namespace simuPOP {
 
 Population & pyPopIterator::next()
@@ -188,16 +193,171 @@ string Simulator::describe(bool /* format */) const
 }
 
 
+// names of stages of an evolutionary process, indexed by EvolProfile stages
+static const char * g_evolStageNames[] = {
+	"initOps", "preOps", "matingScheme", "postOps", "finalOps"
+};
+
+/* Applications of operators to a population during an evolutionary process,
+ * recorded if Simulator.evolve is called with profile=True.
+ */
+class EvolProfile
+{
+public:
+	enum Stage {
+		INIT_OPS = 0,
+		PRE_OPS = 1,
+		MATING_SCHEME = 2,
+		POST_OPS = 3,
+		FINAL_OPS = 4
+	};
+
+	struct Record
+	{
+		int stage;
+		size_t index;
+		long gen;
+		double time;
+		size_t individuals;
+		ULONG pyCalls;
+		size_t memory;
+	};
+
+	void add(const Record & rec)
+	{
+		m_records.push_back(rec);
+	}
+
+
+	/* Save records to variable "profile" of population pop as a dictionary
+	 * of columns. The descriptions of operators are looked up from the
+	 * operators passed to Simulator.evolve.
+	 */
+	void save(Population & pop, const opList * ops[], const MatingScheme & matingScheme) const
+	{
+		const char * columns[] = {
+			"stage", "index", "operator", "gen", "time", "individuals", "pyCalls", "memory"
+		};
+		const size_t numColumns = sizeof(columns) / sizeof(columns[0]);
+		PyObject * lists[numColumns];
+
+		for (size_t c = 0; c < numColumns; ++c)
+			lists[c] = PyList_New(m_records.size());
+		// describe each operator only once, using the first line of
+		// possibly multi-line descriptions
+		string matingDesc = firstLine(matingScheme.describe(false));
+		vectorstr opDesc[5];
+		for (int st = 0; st < 5; ++st)
+			if (ops[st] != NULL)
+				for (size_t i = 0; i < ops[st]->size(); ++i)
+					opDesc[st].push_back(firstLine((*ops[st])[i]->describe(false)));
+
+		for (size_t r = 0; r < m_records.size(); ++r) {
+			const Record & rec = m_records[r];
+			const string & desc = rec.stage == MATING_SCHEME ? matingDesc : opDesc[rec.stage][rec.index];
+			PyList_SET_ITEM(lists[0], r, PyString_FromString(g_evolStageNames[rec.stage]));
+			PyList_SET_ITEM(lists[1], r, PyInt_FromLong(static_cast<long>(rec.index)));
+			PyList_SET_ITEM(lists[2], r, PyString_FromString(desc.c_str()));
+			PyList_SET_ITEM(lists[3], r, PyInt_FromLong(rec.gen));
+			PyList_SET_ITEM(lists[4], r, PyFloat_FromDouble(rec.time));
+			PyList_SET_ITEM(lists[5], r, PyInt_FromLong(static_cast<long>(rec.individuals)));
+			PyList_SET_ITEM(lists[6], r, PyInt_FromLong(static_cast<long>(rec.pyCalls)));
+			PyList_SET_ITEM(lists[7], r, PyLong_FromSize_t(rec.memory));
+		}
+		PyObject * dict = PyDict_New();
+		for (size_t c = 0; c < numColumns; ++c) {
+			PyDict_SetItemString(dict, columns[c], lists[c]);
+			Py_DECREF(lists[c]);
+		}
+		// setVar steals the reference
+		pop.getVars().setVar("profile", dict);
+	}
+
+
+private:
+	static string firstLine(const string & desc)
+	{
+		return desc.substr(0, desc.find('\n'));
+	}
+
+
+	vector<Record> m_records;
+};
+
+
+/* Time the application of an operator and add a record to a profile when
+ * the object goes out of scope, which happens even if the application of
+ * the operator stops or reverts the evolution. Memory used by the population,
+ * and by the scratch population that holds the parental generation after
+ * mating, is recorded after the application without population variables.
+ * Nothing is done if profile is NULL.
+ */
+class ProfileTimer
+{
+public:
+	ProfileTimer(EvolProfile * profile, int stage, size_t index, long gen,
+		const BaseOperator * op, const Population & pop, const Population * scratch = NULL)
+		: m_profile(profile), m_pop(pop), m_scratch(scratch)
+	{
+		if (m_profile == NULL)
+			return;
+		m_record.stage = stage;
+		m_record.index = index;
+		m_record.gen = gen;
+		m_record.individuals = 0;
+		if (op != NULL) {
+			subPopList subPops = op->applicableSubPops(pop);
+			for (subPopList::const_iterator sp = subPops.begin(); sp != subPops.end(); ++sp)
+				m_record.individuals += pop.subPopSize(*sp);
+		}
+		m_record.pyCalls = pyCallCount();
+		m_record.time = wallTime();
+	}
+
+
+	/// set number of individuals, for operators that create new individuals
+	void setIndividuals(size_t individuals)
+	{
+		if (m_profile != NULL)
+			m_record.individuals = individuals;
+	}
+
+
+	~ProfileTimer()
+	{
+		if (m_profile == NULL)
+			return;
+		m_record.time = wallTime() - m_record.time;
+		m_record.pyCalls = pyCallCount() - m_record.pyCalls;
+		// variables are not counted because they are slow to estimate
+		m_record.memory = m_pop.totalMemoryUsage(false);
+		if (m_scratch != NULL)
+			m_record.memory += m_scratch->totalMemoryUsage(false);
+		m_profile->add(m_record);
+	}
+
+
+private:
+	EvolProfile * m_profile;
+
+	const Population & m_pop;
+
+	const Population * m_scratch;
+
+	EvolProfile::Record m_record;
+};
+
+
 vectoru Simulator::evolve(
                           const opList & initOps,
                           const opList & preOps,
                           const MatingScheme & matingScheme,
                           const opList & postOps,
                           const opList & finalOps,
-                          int gens, bool dryrun)
+                          int gens, bool dryrun, const uintList & reps, bool profile)
 {
 	if (dryrun) {
-		cerr << describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gens, numRep()) << endl;
+		cerr << describeEvolProcess(initOps, preOps, matingScheme, postOps, finalOps, gens, numRep(), profile) << endl;
 		return vectoru(numRep());
 	}
 
@@ -208,6 +368,21 @@ vectoru Simulator::evolve(
 	fill(activeReps.begin(), activeReps.end(), true);
 	size_t numStopped = 0;
 
+	// replicates that will be evolved, unselected replicates are considered
+	// stopped but remain active for the determination of REP_LAST.
+	vector<bool> selectedReps(m_pops.size(), reps.allAvail());
+	if (!reps.allAvail()) {
+		const vectoru & repList = reps.elems();
+		for (size_t i = 0; i < repList.size(); ++i) {
+			PARAM_FAILIF(repList[i] >= m_pops.size(), IndexError,
+				(boost::format("Replicate index %1% out of range of 0 ~ %2%") % repList[i] % (m_pops.size() - 1)).str());
+			selectedReps[repList[i]] = true;
+		}
+		numStopped = std::count(selectedReps.begin(), selectedReps.end(), false);
+		if (numStopped == m_pops.size())
+			return vectoru(m_pops.size(), 0U);
+	}
+
 	// evolved generations, which will be returned.
 	vectoru evolvedGens(m_pops.size(), 0U);
 
@@ -222,12 +397,15 @@ vectoru Simulator::evolve(
 		m_pops[curRep]->setRep(curRep);
 	}
 
+	// profiles of replicates, if requested.
+	vector<EvolProfile> profiles(profile ? m_pops.size() : 0);
+
 	initClock();
 
 	// appy pre-op, most likely initializer. Do not check if they are active
 	// or if they are successful
 	if (!initOps.empty())
-		apply(initOps);
+		apply(initOps, selectedReps, profile ? &profiles : NULL, EvolProfile::INIT_OPS);
 
 	elapsedTime("Start evolution.");
 
@@ -239,6 +417,7 @@ vectoru Simulator::evolve(
 
 		for (size_t curRep = 0; curRep < m_pops.size(); curRep++) {
 			Population & curPop = *m_pops[curRep];
+			EvolProfile * curProfile = profile ? &profiles[curRep] : NULL;
 			// sync population variable gen with gen(). This allows
 			// users to set population variable to change generation number.
 			long curGen = curPop.getVars().getVarAsInt("gen");
@@ -254,7 +433,7 @@ vectoru Simulator::evolve(
 			DBG_ASSERT(curRep == curPop.rep(), SystemError,
 				"Replicate number does not match");
 
-			if (!activeReps[curRep])
+			if (!activeReps[curRep] || !selectedReps[curRep])
 				continue;
 
 			size_t it = 0;                                            // asign a value to reduce compiler warning
@@ -270,6 +449,7 @@ vectoru Simulator::evolve(
 					if (!preOps[it]->isActive(curRep, curGen, end, activeReps))
 						continue;
 
+					ProfileTimer timer(curProfile, EvolProfile::PRE_OPS, it, curGen, preOps[it], curPop);
 					try {
 						if (!preOps[it]->apply(curPop)) {
 							DBG_DO(DBG_SIMULATOR, cerr << "Pre-mating Operator " << preOps[it]->describe() <<
@@ -311,6 +491,8 @@ vectoru Simulator::evolve(
 			elapsedTime((boost::format("Start mating at generation %1%") % curGen).str());
 			// start mating:
 			try {
+				ProfileTimer timer(curProfile, EvolProfile::MATING_SCHEME, 0, curGen, NULL, curPop,
+					&scratchPopulation());
 				if (!const_cast<MatingScheme &>(matingScheme).mate(curPop, scratchPopulation())) {
 					DBG_DO(DBG_SIMULATOR, cerr << "Mating stops at replicate " << curRep << endl);
 
@@ -319,6 +501,7 @@ vectoru Simulator::evolve(
 					// does not execute post-mating operator
 					continue;
 				}
+				timer.setIndividuals(curPop.popSize());
 				if (PyErr_CheckSignals())
 					throw StopEvolution("Evolution stopped due to keyboard interruption.");
 			} catch (StopEvolution e) {
@@ -347,6 +530,7 @@ vectoru Simulator::evolve(
 					if (!postOps[it]->isActive(curRep, curGen, end, activeReps))
 						continue;
 
+					ProfileTimer timer(curProfile, EvolProfile::POST_OPS, it, curGen, postOps[it], curPop);
 					try {
 						if (!postOps[it]->apply(curPop)) {
 							DBG_DO(DBG_SIMULATOR, cerr << "Post-mating Operator " + postOps[it]->describe() +
@@ -403,7 +587,14 @@ vectoru Simulator::evolve(
 	}                                                                                         // the big loop
 
 	if (!finalOps.empty())
-		apply(finalOps);
+		apply(finalOps, selectedReps, profile ? &profiles : NULL, EvolProfile::FINAL_OPS);
+
+	if (profile) {
+		const opList * ops[] = { &initOps, &preOps, NULL, &postOps, &finalOps };
+		for (size_t curRep = 0; curRep < m_pops.size(); curRep++)
+			if (selectedReps[curRep])
+				profiles[curRep].save(*m_pops[curRep], ops, matingScheme);
+	}
 
 	// close every opened file (including append-cross-evolution ones)
 	ostreamManager().closeAll();
@@ -412,10 +603,13 @@ vectoru Simulator::evolve(
 }
 
 
-bool Simulator::apply(const opList & ops)
+bool Simulator::apply(const opList & ops, const vector<bool> & selectedReps,
+                      vector<EvolProfile> * profiles, int stage)
 {
 	// really apply
 	for (UINT curRep = 0; curRep < m_pops.size(); curRep++) {
+		if (!selectedReps[curRep])
+			continue;
 		Population & curPop = *m_pops[curRep];
 		size_t it;
 		// apply pre-mating ops to current gen
@@ -425,6 +619,8 @@ bool Simulator::apply(const opList & ops)
 			if (!ops[it]->isActive(curRep, 0, 0, activeReps, true))
 				continue;
 
+			ProfileTimer timer(profiles ? &(*profiles)[curRep] : NULL, stage, it,
+				static_cast<long>(curPop.gen()), ops[it], curPop);
 			try {
 				ops[it]->apply(curPop);
 			} catch (RevertEvolution e) {
@@ -455,7 +651,7 @@ string describeEvolProcess(const opList & initOps,
                            const MatingScheme & matingScheme,
                            const opList & postOps,
                            const opList & finalOps,
-                           int gen, size_t numRep)
+                           int gen, size_t numRep, bool profile)
 {
 	vectorstr allDesc(numRep, "");
 
@@ -508,6 +704,9 @@ string describeEvolProcess(const opList & initOps,
 				desc << "<li>" << finalOps[it]->describe(false) << " " << finalOps[it]->applicability(true, false) << endl;
 			desc << "</ul>\n";
 		}
+		if (profile)
+			desc << "\nRecord wall time, number of individuals and calls to Python functions of each operator "
+			     << "and the mating scheme in variable profile of the population." << endl;
 		allDesc[curRep] = desc.str();
 	}
 	ostringstream desc;
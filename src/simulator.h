@@ -90,6 +90,8 @@ private:
 };
 
 
+class EvolProfile;
+
 /** A simuPOP simulator is responsible for evolving one or more populations
  *  forward in time, subject to various \e operators. Populations in a
  *  simulator are created from one or more replicates of specified populations.
@@ -215,6 +217,30 @@ public:
 	 *  If parameter \e dryrun is set to \c True, this function will print a
 	 *  description of the evolutionary process generated by function
 	 *  \c describeEvolProcess() and exits.
+	 *
+	 *  If a list of replicates is given to parameter \e reps, only these
+	 *  replicates will be evolved and the rest of the populations are left
+	 *  untouched, although they are still considered active when the last
+	 *  replicate (\c REP_LAST) of an operator is determined. The number of
+	 *  evolved generations of untouched replicates are returned as \c 0.
+	 *
+	 *  If parameter \e profile is set to \c True, the wall time, number of
+	 *  individuals in the (virtual) subpopulations to which an operator is
+	 *  applied (offspring for the mating scheme), and number of calls to
+	 *  Python functions are recorded each time an operator or the mating
+	 *  scheme is applied. These records are saved to variable \c profile in
+	 *  the local namespace of each evolved population as a dictionary with
+	 *  keys \c stage (\c initOps, \c preOps, \c matingScheme, \c postOps or
+	 *  \c finalOps), \c index (index of the operator in its list),
+	 *  \c operator (description of the operator), \c gen, \c time,
+	 *  \c individuals, \c pyCalls and \c memory, each of which is a list
+	 *  with one item for each application. Time spent by during-mating
+	 *  operators is counted as part of the mating scheme. Column \c memory
+	 *  records the number of bytes used by the population (see
+	 *  \c Population.memoryUsage) after each application, including the
+	 *  parental generation kept during mating but excluding population
+	 *  variables, so the peak memory usage of a generation is the largest
+	 *  value of its records.
 	 *  <group>2-evolve</group>
 	 */
 	vectoru evolve(
@@ -223,11 +249,16 @@ public:
 		const MatingScheme & matingScheme = MatingScheme(),
 		const opList & postOps = opList(),
 		const opList & finalOps = opList(),
-		int gen = -1, bool dryrun = false);
+		int gen = -1, bool dryrun = false,
+		const uintList & reps = uintList(), bool profile = false);
 
 
-	/// CPPONLY apply a list of operators to all populations
-	bool apply(const opList & ops);
+	/** CPPONLY apply a list of operators to selected populations, and record
+	 *  their applications in \e profiles as \e stage if \e profiles is not
+	 *  \c NULL.
+	 */
+	bool apply(const opList & ops, const vector<bool> & selectedReps,
+		vector<EvolProfile> * profiles = NULL, int stage = 0);
 
 
 	/** Return the local namespace of the \e rep-th population, equivalent to
@@ -276,7 +307,8 @@ string describeEvolProcess(
 	const opList & postOps = opList(),
 	const opList & finalOps = opList(),
 	int gen = -1,
-	size_t numRep = 1);
+	size_t numRep = 1,
+	bool profile = false);
 
 }
 
@@ -33,16 +33,20 @@ using std::set;
 
 #include <vector>
 #include <algorithm>
+#include <fstream>
 
 #if TR1_SUPPORT == 0
 #  include <map>
 typedef std::map<ULONG, pair<ULONG, ULONG> > IndexMap;
+typedef std::map<uint64_t, size_t> HaploKeyMap;
 #elif TR1_SUPPORT == 1
 #  include <unordered_map>
 typedef std::tr1::unordered_map<size_t, pair<size_t, size_t> > IndexMap;
+typedef std::tr1::unordered_map<uint64_t, size_t> HaploKeyMap;
 #else
 #  include <tr1/unordered_map>
 typedef std::tr1::unordered_map<size_t, pair<size_t, size_t> > IndexMap;
+typedef std::tr1::unordered_map<uint64_t, size_t> HaploKeyMap;
 #endif
 
 namespace simuPOP {
@@ -63,6 +67,8 @@ string PyEval::evaluate(Population & pop) const
 
 	if (subPops.empty()) {
 		if (!m_exposePop.empty()) {
+			// the exposed population could be changed in any way
+			pop.alleleTracker().invalidate();
 			PyObject * popObj = pyPopObj(static_cast<void *>(&pop));
 			if (popObj == NULL)
 				throw SystemError("Could not expose population pointer. Compiled with the wrong version of SWIG? ");
@@ -389,7 +395,16 @@ Stat::Stat(
 	// regular parameters
 	const stringFunc & output,
 	int begin, int end, int step, const intList & at,
-	const intList & reps, const subPopList & subPops, const stringList & infoFields)
+	const intList & reps, const subPopList & subPops, const stringList & infoFields,
+	bool asArray,
+	const floatList & LD_window,
+	const uintList & sampleSize,
+	double sampleFraction,
+	size_t stdError,
+	const floatList & neutrality_window,
+	const lociList & SFS,
+	const lociList & GRM,
+	const string & GRM_file)
 	: BaseOperator("", begin, end, step, at, reps, subPops, infoFields),
 	// the order of initialization is meaningful since they may depend on each other
 	m_popSize(popSize, subPops, vars, suffix),
@@ -397,21 +412,33 @@ Stat::Stat(
 	m_numOfAffected(numOfAffected, subPops, vars, suffix),
 	m_numOfSegSites(numOfSegSites, subPops, vars, suffix),
 	m_numOfMutants(numOfMutants, subPops, vars, suffix),
-	m_alleleFreq(alleleFreq, subPops, vars, suffix),
-	m_heteroFreq(heteroFreq, homoFreq, subPops, vars, suffix),
+	m_alleleFreq(alleleFreq, subPops, vars, suffix, asArray),
+	m_heteroFreq(heteroFreq, homoFreq, subPops, vars, suffix, asArray),
 	m_genoFreq(genoFreq, subPops, vars, suffix),
 	m_haploFreq(haploFreq, subPops, vars, suffix),
 	m_haploHomoFreq(haploHeteroFreq, haploHomoFreq, subPops, vars, suffix),
 	m_info(sumOfInfo.elems(), meanOfInfo.elems(), varOfInfo.elems(), maxOfInfo.elems(), minOfInfo.elems(), subPops, vars, suffix),
 	m_LD(LD, subPops, vars, suffix),
-	m_association(association, subPops, vars, suffix),
-	m_neutrality(neutrality, subPops, vars, suffix),
-	m_structure(structure, subPops, vars, suffix),
+	m_LDWindow(LD_window, subPops, vars, suffix),
+	m_association(association, subPops, vars, suffix, asArray),
+	m_neutrality(neutrality, neutrality_window, subPops, vars, suffix),
+	m_SFS(SFS, subPops, vars, suffix),
+	m_structure(structure, subPops, vars, suffix, asArray),
 	m_HWE(HWE, subPops, vars, suffix),
 	m_Inbreeding(Inbreeding, subPops, vars, suffix),
-	m_effectiveSize(effectiveSize, subPops, vars, suffix)
+	m_GRM(GRM, GRM_file, subPops, vars, suffix),
+	m_effectiveSize(effectiveSize, subPops, vars, suffix),
+	m_sampleSize(sampleSize.elems()), m_sampleFraction(sampleFraction), m_stdError(stdError)
 {
 	(void)output;  // avoid warning about unused parameter
+	PARAM_FAILIF(!m_sampleSize.empty() && m_sampleFraction != 0., ValueError,
+		"Only one of parameters sampleSize and sampleFraction can be specified.");
+	PARAM_FAILIF(m_sampleFraction < 0. || m_sampleFraction > 1., ValueError,
+		"Parameter sampleFraction should be between 0 and 1.");
+	PARAM_FAILIF(m_stdError > 0 && m_sampleSize.empty() && m_sampleFraction == 0., ValueError,
+		"Standard errors can only be estimated from a sample of individuals.");
+	PARAM_FAILIF(m_stdError == 1, ValueError,
+		"At least two groups of individuals are needed to estimate standard errors.");
 }
 
 
@@ -431,22 +458,346 @@ string Stat::describe(bool /* format */) const
 	descs.push_back(m_haploFreq.describe(false));
 	descs.push_back(m_info.describe(false));
 	descs.push_back(m_LD.describe(false));
+	descs.push_back(m_LDWindow.describe(false));
 	descs.push_back(m_association.describe(false));
 	descs.push_back(m_neutrality.describe(false));
+	descs.push_back(m_SFS.describe(false));
 	descs.push_back(m_structure.describe(false));
 	descs.push_back(m_HWE.describe(false));
 	descs.push_back(m_Inbreeding.describe(false));
+	descs.push_back(m_GRM.describe(false));
 	descs.push_back(m_effectiveSize.describe(false));
 	for (size_t i = 0; i < descs.size(); ++i) {
 		if (!descs[i].empty())
 			desc += "<li>" + descs[i] + "\n";
 	}
 	desc += "</ul>";
+	if (!m_sampleSize.empty() || m_sampleFraction != 0.) {
+		ostringstream sampleDesc;
+		if (!m_sampleSize.empty())
+			sampleDesc << "\nfrom a random sample of " << m_sampleSize << " individuals";
+		else
+			sampleDesc << "\nfrom a random sample of " << m_sampleFraction << " of individuals";
+		if (m_stdError > 0)
+			sampleDesc << " with jackknife standard errors from " << m_stdError << " groups";
+		desc += sampleDesc.str();
+	}
 	return desc;
 }
 
 
+/* Append n distinct indexes drawn randomly from offset, ..., offset + N - 1
+ * to sample, in ascending order. Floyd's algorithm takes O(n log(n)) time
+ * regardless of N.
+ */
+static void sampleIndexes(size_t offset, size_t N, size_t n, vectoru & sample)
+{
+	std::set<size_t> chosen;
+
+	for (size_t j = N - n; j < N; ++j) {
+		size_t t = getRNG().randInt(static_cast<ULONG>(j + 1));
+		if (!chosen.insert(t).second)
+			chosen.insert(j);
+	}
+	std::set<size_t>::const_iterator it = chosen.begin();
+	std::set<size_t>::const_iterator it_end = chosen.end();
+	for (; it != it_end; ++it)
+		sample.push_back(offset + *it);
+}
+
+
+vectoru Stat::drawSample(const Population & pop) const
+{
+	vectoru sample;
+
+	if (m_sampleSize.size() == 1) {
+		// from the whole population
+		size_t N = pop.popSize();
+		size_t n = m_sampleSize[0];
+		PARAM_FAILIF(n > N, ValueError,
+			(boost::format("Sample size %1% is larger than population size %2%") % n % N).str());
+		sample.reserve(n);
+		sampleIndexes(0, N, n, sample);
+		return sample;
+	}
+	PARAM_FAILIF(!m_sampleSize.empty() && m_sampleSize.size() != pop.numSubPop(), ValueError,
+		"Please specify a sample size for each subpopulation.");
+	for (size_t sp = 0; sp < pop.numSubPop(); ++sp) {
+		size_t N = pop.subPopSize(sp);
+		size_t n = m_sampleSize.empty() ? static_cast<size_t>(m_sampleFraction * N + 0.5) : m_sampleSize[sp];
+		PARAM_FAILIF(n > N, ValueError,
+			(boost::format("Sample size %1% is larger than the size of subpopulation %2% (%3%)") % n % sp % N).str());
+		sampleIndexes(pop.subPopBegin(sp), N, n, sample);
+	}
+	return sample;
+}
+
+
+bool Stat::applyToSample(Population & pop, const vectoru & sample,
+                         const vectoru & groups, size_t group) const
+{
+	if (groups.empty())
+		pop.activateSample(sample);
+	else {
+		// sampled individuals, excluding those in the deleted group
+		vectoru indexes;
+		indexes.reserve(sample.size());
+		for (size_t i = 0; i < sample.size(); ++i)
+			if (groups[i] != group)
+				indexes.push_back(sample[i]);
+		pop.activateSample(indexes);
+	}
+	bool res = true;
+	try {
+		res = applyStats(pop);
+	} catch (...) {
+		pop.deactivateSample();
+		throw;
+	}
+	pop.deactivateSample();
+	return res;
+}
+
+
+/* Copy a dictionary of population variables, with separate copies of
+ * the dictionaries of subpopulation variables that are changed in place.
+ */
+static PyObject * copyVars(PyObject * vars)
+{
+	PyObject * res = PyDict_Copy(vars);
+	PyObject * spVars = PyDict_GetItemString(vars, "subPop");
+
+	if (spVars != NULL && PyDict_Check(spVars)) {
+		PyObject * spCopy = PyDict_New();
+		PyObject * key, * value;
+		Py_ssize_t pos = 0;
+		while (PyDict_Next(spVars, &pos, &key, &value)) {
+			if (PyDict_Check(value)) {
+				PyObject * valueCopy = PyDict_Copy(value);
+				PyDict_SetItem(spCopy, key, valueCopy);
+				Py_DECREF(valueCopy);
+			} else
+				PyDict_SetItem(spCopy, key, value);
+		}
+		PyDict_SetItemString(res, "subPop", spCopy);
+		Py_DECREF(spCopy);
+	}
+	return res;
+}
+
+
+static void restoreVars(PyObject * vars, PyObject * saved)
+{
+	PyObject * savedCopy = copyVars(saved);
+
+	PyDict_Clear(vars);
+	PyDict_Update(vars, savedCopy);
+	Py_DECREF(savedCopy);
+}
+
+
+/* Return True if variable \e key in any of dictionaries \e runs is not
+ * the same object as the one in dictionary \e before.
+ */
+static bool varChanged(PyObject * key, PyObject * before, const vector<PyObject *> & runs)
+{
+	PyObject * orig = before == NULL ? NULL : PyDict_GetItem(before, key);
+
+	for (size_t r = 0; r < runs.size(); ++r)
+		if (runs[r] == NULL || PyDict_GetItem(runs[r], key) != orig)
+			return true;
+	return false;
+}
+
+
+/* Delete-a-group jackknife standard error of a statistic from its values
+ * \e reps calculated without each group of sampled individuals. Missing
+ * values (e.g. frequencies of alleles that are not observed) are zero. NULL
+ * is returned for statistics that are not numeric.
+ */
+static PyObject * jackknifeStdError(PyObject * value, const vector<PyObject *> & reps)
+{
+	size_t g = reps.size();
+
+	if (PyNumber_Check(value) && !PyBool_Check(value)) {
+		vectorf values(g, 0.);
+		double mean = 0.;
+		for (size_t i = 0; i < g; ++i) {
+			if (reps[i] != NULL && PyNumber_Check(reps[i]))
+				values[i] = PyFloat_AsDouble(reps[i]);
+			mean += values[i];
+		}
+		mean /= g;
+		double ss = 0.;
+		for (size_t i = 0; i < g; ++i)
+			ss += (values[i] - mean) * (values[i] - mean);
+		return PyFloat_FromDouble(sqrt(ss * (g - 1) / g));
+	}
+	if (PyDict_Check(value)) {
+		PyObject * res = PyDict_New();
+		PyObject * key, * item;
+		Py_ssize_t pos = 0;
+		vector<PyObject *> items(g);
+		while (PyDict_Next(value, &pos, &key, &item)) {
+			for (size_t i = 0; i < g; ++i)
+				items[i] = reps[i] != NULL && PyDict_Check(reps[i]) ? PyDict_GetItem(reps[i], key) : NULL;
+			PyObject * se = jackknifeStdError(item, items);
+			if (se != NULL) {
+				PyDict_SetItem(res, key, se);
+				Py_DECREF(se);
+			}
+		}
+		if (PyDict_Size(res) == 0) {
+			Py_DECREF(res);
+			return NULL;
+		}
+		return res;
+	}
+	// lists, tuples and arrays of numbers, with the same length in all replicates
+	bool isList = PyList_Check(value) || PyTuple_Check(value);
+	if (!isList && !(PySequence_Check(value) && PyObject_CheckBuffer(value) && !PyBytes_Check(value)))
+		return NULL;
+	Py_ssize_t len = PySequence_Size(value);
+	vector<vectorf> values(g, vectorf(len));
+	for (size_t i = 0; i < g; ++i) {
+		if (reps[i] == NULL || !PySequence_Check(reps[i]) || PySequence_Size(reps[i]) != len)
+			return NULL;
+		for (Py_ssize_t j = 0; j < len; ++j) {
+			PyObject * elem = PySequence_GetItem(reps[i], j);
+			bool numeric = PyNumber_Check(elem) != 0;
+			if (numeric)
+				values[i][j] = PyFloat_AsDouble(elem);
+			Py_DECREF(elem);
+			if (!numeric)
+				return NULL;
+		}
+	}
+	vectorf se(len, 0.);
+	for (Py_ssize_t j = 0; j < len; ++j) {
+		double mean = 0.;
+		for (size_t i = 0; i < g; ++i)
+			mean += values[i][j];
+		mean /= g;
+		for (size_t i = 0; i < g; ++i)
+			se[j] += (values[i][j] - mean) * (values[i][j] - mean);
+		se[j] = sqrt(se[j] * (g - 1) / g);
+	}
+	if (!isList)
+		return Double_Vec_As_Array(se);
+	PyObject * res = PyList_New(len);
+	for (Py_ssize_t j = 0; j < len; ++j)
+		PyList_SET_ITEM(res, j, PyFloat_FromDouble(se[j]));
+	return res;
+}
+
+
+/* Save standard errors of changed variables in dictionary \e vars, as
+ * variables with suffix _se.
+ */
+static void setStdErrors(PyObject * vars, PyObject * before, const vector<PyObject *> & runs)
+{
+	vector<PyObject *> reps(runs.begin() + 1, runs.end());
+	vector<PyObject *> items(reps.size());
+	PyObject * key, * value;
+	Py_ssize_t pos = 0;
+
+	while (PyDict_Next(runs[0], &pos, &key, &value)) {
+		if (!PyUnicode_Check(key) && !PyBytes_Check(key))
+			continue;
+		string name = PyObj_AsString(key);
+		if (name == "subPop" || !varChanged(key, before, runs))
+			continue;
+		for (size_t i = 0; i < reps.size(); ++i)
+			items[i] = PyDict_GetItem(reps[i], key);
+		PyObject * se = jackknifeStdError(value, items);
+		if (se != NULL) {
+			PyDict_SetItemString(vars, (name + "_se").c_str(), se);
+			Py_DECREF(se);
+		}
+	}
+	// variables of (virtual) subpopulations
+	PyObject * spVars = PyDict_GetItemString(runs[0], "subPop");
+	if (spVars == NULL || !PyDict_Check(spVars))
+		return;
+	PyObject * spBefore = PyDict_GetItemString(before, "subPop");
+	PyObject * spLive = PyDict_GetItemString(vars, "subPop");
+	PyObject * sp, * spDict;
+	pos = 0;
+	while (PyDict_Next(spVars, &pos, &sp, &spDict)) {
+		if (!PyDict_Check(spDict))
+			continue;
+		vector<PyObject *> spRuns(runs.size());
+		for (size_t r = 0; r < runs.size(); ++r) {
+			PyObject * d = PyDict_GetItemString(runs[r], "subPop");
+			spRuns[r] = d == NULL || !PyDict_Check(d) ? NULL : PyDict_GetItem(d, sp);
+		}
+		PyObject * orig = spBefore == NULL || !PyDict_Check(spBefore) ? NULL : PyDict_GetItem(spBefore, sp);
+		PyObject * live = PyDict_GetItem(spLive, sp);
+		Py_ssize_t spPos = 0;
+		while (PyDict_Next(spDict, &spPos, &key, &value)) {
+			if ((!PyUnicode_Check(key) && !PyBytes_Check(key)) || !varChanged(key, orig, spRuns))
+				continue;
+			for (size_t i = 0; i < reps.size(); ++i)
+				items[i] = spRuns[i + 1] == NULL ? NULL : PyDict_GetItem(spRuns[i + 1], key);
+			PyObject * se = jackknifeStdError(value, items);
+			if (se != NULL) {
+				PyDict_SetItemString(live, (PyObj_AsString(key) + "_se").c_str(), se);
+				Py_DECREF(se);
+			}
+		}
+	}
+}
+
+
 bool Stat::apply(Population & pop) const
+{
+	if (m_sampleSize.empty() && m_sampleFraction == 0.)
+		return applyStats(pop);
+
+	// demographic effective size follows lineages of all individuals
+	m_effectiveSize.applyDemographic(pop);
+	// a new sample is drawn each time the operator is applied
+	vectoru sample = drawSample(pop);
+	if (m_stdError == 0)
+		return applyToSample(pop, sample, vectoru(), 0);
+
+	PARAM_FAILIF(sample.size() < m_stdError, ValueError,
+		(boost::format("Sample size %1% is smaller than the number of groups %2%") % sample.size() % m_stdError).str());
+	// divide sampled individuals randomly into groups of (almost) equal sizes
+	vectoru groups(sample.size());
+	for (size_t i = 0; i < groups.size(); ++i)
+		groups[i] = i % m_stdError;
+	getRNG().randomShuffle(groups.begin(), groups.end());
+	// calculate statistics from the whole sample and then without each
+	// group of individuals, each time with the original variables.
+	PyObject * vars = pop.dict();
+	PyObject * before = copyVars(vars);
+	vector<PyObject *> runs;
+	bool res = true;
+	try {
+		for (size_t g = 0; g <= m_stdError; ++g) {
+			if (g > 0)
+				restoreVars(vars, before);
+			// m_stdError is not a group so the first run uses all individuals
+			res = applyToSample(pop, sample, groups, g == 0 ? m_stdError : g - 1) && res;
+			runs.push_back(copyVars(vars));
+		}
+		restoreVars(vars, runs[0]);
+		setStdErrors(vars, before, runs);
+	} catch (...) {
+		Py_DECREF(before);
+		for (size_t r = 0; r < runs.size(); ++r)
+			Py_DECREF(runs[r]);
+		throw;
+	}
+	Py_DECREF(before);
+	for (size_t r = 0; r < runs.size(); ++r)
+		Py_DECREF(runs[r]);
+	return res;
+}
+
+
+bool Stat::applyStats(Population & pop) const
 {
 	return m_popSize.apply(pop) &&
 	       m_numOfMales.apply(pop) &&
@@ -460,11 +811,14 @@ bool Stat::apply(Population & pop) const
 	       m_haploHomoFreq.apply(pop) &&
 	       m_info.apply(pop) &&
 	       m_LD.apply(pop) &&
+	       m_LDWindow.apply(pop) &&
 	       m_association.apply(pop) &&
 	       m_neutrality.apply(pop) &&
+	       m_SFS.apply(pop) &&
 	       m_structure.apply(pop) &&
 	       m_HWE.apply(pop) &&
 	       m_Inbreeding.apply(pop) &&
+	       m_GRM.apply(pop) &&
 	       m_effectiveSize.apply(pop);
 }
 
@@ -952,8 +1306,8 @@ bool statNumOfMutants::apply(Population & pop) const
 
 
 statAlleleFreq::statAlleleFreq(const lociList & loci, const subPopList & subPops,
-	const stringList & vars, const string & suffix)
-	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix)
+	const stringList & vars, const string & suffix, bool asArray)
+	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix), m_asArray(asArray)
 {
 	const char * allowedVars[] = {
 		AlleleNum_String,	 AlleleFreq_String,
@@ -977,6 +1331,115 @@ string statAlleleFreq::describe(bool /* format */) const
 }
 
 
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+/* Dense count tables for modules with alleles bounded by ModuleMaxAllele.
+   The tables grow to the largest observed allele so that an allele (or a
+   pair of alleles) is counted by an array increment instead of a lookup in
+   a map. */
+static inline void countAllele(vectoru & cnt, size_t a)
+{
+	if (a >= cnt.size())
+		cnt.resize(a + 1, 0);
+	++cnt[a];
+}
+
+
+static inline void countAllelePair(vector<vectoru> & cnt, size_t a, size_t b)
+{
+	if (a >= cnt.size())
+		cnt.resize(a + 1);
+	countAllele(cnt[a], b);
+}
+
+
+#endif
+
+#ifndef MUTANTALLELE
+/* Thread-local allele count tables used by statAlleleFreq. Alleles are
+   counted in a dictionary for the long allele module and in a vector
+   indexed by allele otherwise. */
+#  ifdef LONGALLELE
+typedef intDict ALLELECOUNTER;
+#  else
+typedef vectoru ALLELECOUNTER;
+#  endif
+
+static void countAlleles(IndAlleleIterator a, ALLELECOUNTER & alleles, size_t & allAlleles)
+{
+	for (; a.valid(); ++a) {
+#  ifdef LONGALLELE
+		alleles[a.value()]++;
+#  else
+		countAllele(alleles, a.value());
+#  endif
+		allAlleles++;
+	}
+}
+
+
+static void addAlleleCounts(ALLELECOUNTER & alleles, const ALLELECOUNTER & counts)
+{
+#  ifdef LONGALLELE
+	intDict::const_iterator cnt = counts.begin();
+	intDict::const_iterator cntEnd = counts.end();
+	for (; cnt != cntEnd; ++cnt)
+		alleles[cnt->first] += cnt->second;
+#  else
+	if (counts.size() > alleles.size())
+		alleles.resize(counts.size(), 0);
+	for (size_t i = 0; i < counts.size(); ++i)
+		alleles[i] += counts[i];
+#  endif
+}
+
+
+#endif
+
+// number of alleles that can always be outputted as arrays
+#define MAX_ARRAY_ALLELES 256
+
+/* Flatten allele counts of loci to a len(cnt) by nAlleles array of counts,
+   or of frequencies if the total number of alleles at each locus is given. */
+static PyObject * alleleCntAsArray(const vector<uintDict> & cnt, size_t nAlleles,
+                                   const vectoru * total)
+{
+	vectorf values(cnt.size() * nAlleles, 0.);
+
+	for (size_t idx = 0; idx < cnt.size(); ++idx) {
+		uintDict::const_iterator it = cnt[idx].begin();
+		uintDict::const_iterator itEnd = cnt[idx].end();
+		for (; it != itEnd; ++it) {
+			if (total == NULL)
+				values[idx * nAlleles + it->first] = it->second;
+			else if ((*total)[idx] != 0)
+				values[idx * nAlleles + it->first] = it->second / static_cast<double>((*total)[idx]);
+		}
+	}
+	return Double_Vec_As_Array(values);
+}
+
+
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+static void recordAlleleCounts(uintDict & cnt, const intDict & alleles)
+{
+	intDict::const_iterator it = alleles.begin();
+	intDict::const_iterator itEnd = alleles.end();
+	for (; it != itEnd; ++it)
+		cnt[it->first] += it->second;
+}
+
+
+#else
+static void recordAlleleCounts(uintDict & cnt, const vectoru & alleles)
+{
+	for (size_t i = 0; i < alleles.size(); ++i)
+		if (alleles[i] != 0)
+			cnt[i] += alleles[i];
+}
+
+
+#endif
+
 bool statAlleleFreq::apply(Population & pop) const
 {
 	if (m_loci.empty())
@@ -987,10 +1450,25 @@ bool statAlleleFreq::apply(Population & pop) const
 	// count for all specified subpopulations
 	ALLELECNTLIST alleleCnt(loci.size());
 	vectoru allAllelesCnt(loci.size(), 0);
-	// selected (virtual) subpopulatons.
+	// counts in each (virtual) subpopulation, kept for array output
+	bool spArray = m_asArray && (m_vars.contains(AlleleNum_sp_String) || m_vars.contains(AlleleFreq_sp_String));
+	vector<ALLELECNTLIST> spAlleleCnt;
+	vector<vectoru> spAllAllelesCnt;
+	// allele counts of the whole population could be tracked during evolution
+	const AlleleTracker & tracker = pop.alleleTracker();
+	bool tracked = m_subPops.allAvail() && !m_vars.contains(AlleleNum_sp_String)
+	               && !m_vars.contains(AlleleFreq_sp_String) && !pop.hasActivatedSample()
+	               && tracker.valid(pop);
+	for (size_t idx = 0; tracked && idx < loci.size(); ++idx)
+		tracked = tracker.tracks(loci[idx]);
+	if (tracked)
+		for (size_t idx = 0; idx < loci.size(); ++idx)
+			tracker.alleleCounts(loci[idx], alleleCnt[idx], allAllelesCnt[idx]);
+	// selected (virtual) subpopulatons, which are not needed if tracked
+	// allele counts are used.
 	subPopList subPops = m_subPops.expandFrom(pop);
 	subPopList::const_iterator it = subPops.begin();
-	subPopList::const_iterator itEnd = subPops.end();
+	subPopList::const_iterator itEnd = tracked ? it : subPops.end();
 	for (; it != itEnd; ++it) {
 		if (m_vars.contains(AlleleNum_sp_String))
 			pop.getVars().removeVar(subPopVar_String(*it, AlleleNum_String, m_suffix));
@@ -998,6 +1476,10 @@ bool statAlleleFreq::apply(Population & pop) const
 			pop.getVars().removeVar(subPopVar_String(*it, AlleleFreq_String, m_suffix));
 
 		pop.activateVirtualSubPop(*it);
+		if (spArray) {
+			spAlleleCnt.push_back(ALLELECNTLIST(loci.size()));
+			spAllAllelesCnt.push_back(vectoru(loci.size(), 0));
+		}
 #ifdef MUTANTALLELE
 		/* the following counts alleles for all loci all at once and tend to
 		   use more memory than other modules (which counts loci one by one). In
@@ -1029,46 +1511,61 @@ bool statAlleleFreq::apply(Population & pop) const
 
 		// for each locus, a dict of allele counts
 		std::map<size_t, intDict> loci_alleles;
-		// now we need to go through all alleles
-		IndIterator ind = pop.indIterator(it->subPop());
 		size_t totNumLoci = pop.totNumLoci();
-		for (; ind.valid(); ++ind) {
-			GenoIterator it = ind->genoBegin();
-			GenoIterator it_end = ind->genoEnd();
-			vectorm::val_iterator index_it = it.get_val_iterator();
-			vectorm::val_iterator index_it_end = it_end.get_val_iterator();
-			size_t indIndex = it.index();
-			for (; index_it != index_it_end; ++index_it) {
-				DBG_FAILIF(index_it->second == 0, RuntimeError,
-					"Non-zero allele found for mutant module.");
-				size_t lociValue = (index_it->first - indIndex) % totNumLoci;
-				// if lociValue is unspecified (not ALL_AVAIL)
-				if (m_loci.indexOf(lociValue) == NOT_FOUND)
-					continue;
-				if (!no_sex_chromosome) {
-					size_t p = (index_it->first - indIndex) / totNumLoci;
-					size_t chromType = pop.chromType(pop.chromLocusPair(lociValue).first);
-					if ((ind->sex() == FEMALE && chromType == CHROMOSOME_Y) ||
-					    (ind->sex() == MALE && (
-					                            (chromType == CHROMOSOME_X && p == 1) ||
-					                            (chromType == CHROMOSOME_Y && p == 0))))
+		// build the lookup table of m_loci before it is used by all threads
+		m_loci.indexOf(0);
+		// now we need to go through all alleles, each thread counting alleles
+		// of a block of individuals in its own table
+#  pragma omp parallel if(numThreads() > 1)
+		{
+#  ifdef _OPENMP
+			IndIterator ind = pop.indIterator(it->subPop(), omp_get_thread_num());
+			std::map<size_t, intDict> thread_alleles;
+#  else
+			IndIterator ind = pop.indIterator(it->subPop());
+			std::map<size_t, intDict> & thread_alleles = loci_alleles;
+#  endif
+			for (; ind.valid(); ++ind) {
+				GenoIterator it = ind->genoBegin();
+				GenoIterator it_end = ind->genoEnd();
+				vectorm::val_iterator index_it = it.get_val_iterator();
+				vectorm::val_iterator index_it_end = it_end.get_val_iterator();
+				size_t indIndex = it.index();
+				for (; index_it != index_it_end; ++index_it) {
+					DBG_FAILIF(index_it->second == 0, RuntimeError,
+						"Non-zero allele found for mutant module.");
+					size_t lociValue = (index_it->first - indIndex) % totNumLoci;
+					// if lociValue is unspecified (not ALL_AVAIL)
+					if (m_loci.indexOf(lociValue) == NOT_FOUND)
 						continue;
+					if (!no_sex_chromosome) {
+						size_t p = (index_it->first - indIndex) / totNumLoci;
+						size_t chromType = pop.chromType(pop.chromLocusPair(lociValue).first);
+						if ((ind->sex() == FEMALE && chromType == CHROMOSOME_Y) ||
+						    (ind->sex() == MALE && (
+						                            (chromType == CHROMOSOME_X && p == 1) ||
+						                            (chromType == CHROMOSOME_Y && p == 0))))
+							continue;
+					}
+					// record allele
+					thread_alleles[lociValue][index_it->second] += 1;
 				}
-				// record allele
-				std::map<size_t, intDict>::iterator allele_it = loci_alleles.find(lociValue);
-				if (allele_it == loci_alleles.end()) {
-					intDict a;
-					a[index_it->second] = 1;
-					loci_alleles.insert(std::map<size_t, intDict>::value_type(lociValue, a));
-				} else {
-					intDict::iterator aa = allele_it->second.find(index_it->second);
-					// a new allele
-					if (aa == allele_it->second.end())
-						allele_it->second[index_it->second] = 1;
-					else
-						aa->second += 1;
+			}
+#  ifdef _OPENMP
+			// merge counts of this thread
+#    pragma omp critical
+			{
+				std::map<size_t, intDict>::iterator allele_it = thread_alleles.begin();
+				std::map<size_t, intDict>::iterator allele_end = thread_alleles.end();
+				for (; allele_it != allele_end; ++allele_it) {
+					intDict & alleles = loci_alleles[allele_it->first];
+					intDict::iterator aa = allele_it->second.begin();
+					intDict::iterator aa_end = allele_it->second.end();
+					for (; aa != aa_end; ++aa)
+						alleles[aa->first] += aa->second;
 				}
 			}
+#  endif
 		}
 		// record results
 		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
@@ -1103,9 +1600,13 @@ bool statAlleleFreq::apply(Population & pop) const
 			for (; cnt != cntEnd; ++cnt)
 				alleleCnt[idx][cnt->first] += cnt->second;
 			allAllelesCnt[idx] += loc_maxCnt;
+			if (spArray) {
+				recordAlleleCounts(spAlleleCnt.back()[idx], alleles);
+				spAllAllelesCnt.back()[idx] = loc_maxCnt;
+			}
 
 			// output variable.
-			if (m_vars.contains(AlleleNum_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleNum_sp_String)) {
 				uintDict d;
 				intDict::iterator cnt = alleles.begin();
 				intDict::iterator cntEnd = alleles.end();
@@ -1113,7 +1614,7 @@ bool statAlleleFreq::apply(Population & pop) const
 					d[cnt->first] = static_cast<double>(cnt->second);
 				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), d);
 			}
-			if (m_vars.contains(AlleleFreq_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleFreq_sp_String)) {
 				uintDict d;
 				intDict::iterator cnt = alleles.begin();
 				intDict::iterator cntEnd = alleles.end();
@@ -1125,32 +1626,37 @@ bool statAlleleFreq::apply(Population & pop) const
 #else       // for mutant allele
 
 
-#  pragma omp parallel for if(numThreads() > 1)
+		// count loci in parallel if there are enough loci to keep all threads
+		// busy, otherwise split individuals among threads for each locus
+		bool byLoci = loci.size() >= numThreads();
+#  pragma omp parallel for if(numThreads() > 1 && byLoci)
 		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
 			size_t loc = loci[idx];
 
-#  ifdef LONGALLELE
-			intDict alleles;
-#  else
-			vectoru alleles(2, 0);
-#  endif
+			ALLELECOUNTER alleles;
 			size_t allAlleles = 0;
 
-			// go through all alleles
-			IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
-			// use allAllelel here because some marker does not have full number
-			// of alleles (e.g. markers on chromosome X and Y).
-			for (; a.valid(); ++a) {
-				Allele v = a.value();
-#  ifndef BINARYALLELE
-#    ifndef LONGALLELE
-				if (v >= alleles.size())
-					alleles.resize(v + 1, 0);
-#    endif
-#  endif
-				alleles[v]++;
-				allAlleles++;
+			// go through all alleles. use allAllelel here because some marker
+			// does not have full number of alleles (e.g. markers on chromosome
+			// X and Y).
+			if (byLoci)
+				countAlleles(pop.alleleIterator(loc, it->subPop()), alleles, allAlleles);
+#  ifdef _OPENMP
+			else {
+#    pragma omp parallel
+				{
+					ALLELECOUNTER threadAlleles;
+					size_t threadAllAlleles = 0;
+					countAlleles(pop.alleleIterator(loc, it->subPop(), omp_get_thread_num()),
+						threadAlleles, threadAllAlleles);
+#    pragma omp critical
+					{
+						addAlleleCounts(alleles, threadAlleles);
+						allAlleles += threadAllAlleles;
+					}
+				}
 			}
+#  endif
 			// total allele count
 #  ifdef LONGALLELE
 			intDict::iterator cnt = alleles.begin();
@@ -1163,13 +1669,17 @@ bool statAlleleFreq::apply(Population & pop) const
 					alleleCnt[idx][i] += alleles[i];
 #  endif
 			allAllelesCnt[idx] += allAlleles;
+			if (spArray) {
+				recordAlleleCounts(spAlleleCnt.back()[idx], alleles);
+				spAllAllelesCnt.back()[idx] = allAlleles;
+			}
 			// output variable.
 #  ifdef LONGALLELE
-			if (m_vars.contains(AlleleNum_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleNum_sp_String)) {
 #    pragma omp critical
 				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), alleles);
 			}
-			if (m_vars.contains(AlleleFreq_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleFreq_sp_String)) {
 				intDict::iterator cnt = alleles.begin();
 				intDict::iterator cntEnd = alleles.end();
 				for ( ; cnt != cntEnd; ++cnt)
@@ -1178,7 +1688,7 @@ bool statAlleleFreq::apply(Population & pop) const
 				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleFreq_String, m_suffix) % loc).str(), alleles);
 			}
 #  else
-			if (m_vars.contains(AlleleNum_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleNum_sp_String)) {
 				uintDict d;
 				for (size_t i = 0; i < alleles.size(); ++i)
 					if (alleles[i] != 0)
@@ -1186,7 +1696,7 @@ bool statAlleleFreq::apply(Population & pop) const
 #    pragma omp critical
 				pop.getVars().setVar((boost::format("%1%{%2%}") % subPopVar_String(*it, AlleleNum_String, m_suffix) % loc).str(), d);
 			}
-			if (m_vars.contains(AlleleFreq_sp_String)) {
+			if (!m_asArray && m_vars.contains(AlleleFreq_sp_String)) {
 				uintDict d;
 				for (size_t i = 0; i < alleles.size(); ++i)
 					if (alleles[i] != 0)
@@ -1200,6 +1710,34 @@ bool statAlleleFreq::apply(Population & pop) const
 		pop.deactivateVirtualSubPop(it->subPop());
 	}
 
+	if (m_asArray) {
+		// use the same number of alleles for all arrays
+		size_t nAlleles = 0;
+		size_t nDistinct = 0;
+		for (size_t idx = 0; idx < loci.size(); ++idx) {
+			if (!alleleCnt[idx].empty())
+				nAlleles = std::max(nAlleles, alleleCnt[idx].rbegin()->first + 1);
+			nDistinct = std::max(nDistinct, alleleCnt[idx].size());
+		}
+		// large alleles of the long and mutant modules would lead to huge arrays
+		if (nAlleles > std::max(static_cast<size_t>(MAX_ARRAY_ALLELES), 16 * nDistinct))
+			throw ValueError((boost::format("Cannot output allele counts as arrays because the largest allele %1% "
+				                            "is far larger than the number of distinct alleles (%2%). Please set asArray to False.")
+				              % (nAlleles - 1) % nDistinct).str());
+		if (m_vars.contains(AlleleNum_String))
+			pop.getVars().setVar(AlleleNum_String + m_suffix, alleleCntAsArray(alleleCnt, nAlleles, NULL));
+		if (m_vars.contains(AlleleFreq_String))
+			pop.getVars().setVar(AlleleFreq_String + m_suffix, alleleCntAsArray(alleleCnt, nAlleles, &allAllelesCnt));
+		for (size_t sp = 0; sp < spAlleleCnt.size(); ++sp) {
+			if (m_vars.contains(AlleleNum_sp_String))
+				pop.getVars().setVar(subPopVar_String(subPops[sp], AlleleNum_String, m_suffix),
+					alleleCntAsArray(spAlleleCnt[sp], nAlleles, NULL));
+			if (m_vars.contains(AlleleFreq_sp_String))
+				pop.getVars().setVar(subPopVar_String(subPops[sp], AlleleFreq_String, m_suffix),
+					alleleCntAsArray(spAlleleCnt[sp], nAlleles, &spAllAllelesCnt[sp]));
+		}
+		return true;
+	}
 	if (m_vars.contains(AlleleNum_String)) {
 		pop.getVars().removeVar(AlleleNum_String + m_suffix);
 		for (size_t idx = 0; idx < loci.size(); ++idx)
@@ -1224,8 +1762,8 @@ bool statAlleleFreq::apply(Population & pop) const
 
 
 statHeteroFreq::statHeteroFreq(const lociList & heteroFreq, const lociList & homoFreq,
-	const subPopList & subPops, const stringList & vars, const string & suffix)
-	: m_loci(), m_subPops(subPops), m_vars(), m_suffix(suffix)
+	const subPopList & subPops, const stringList & vars, const string & suffix, bool asArray)
+	: m_loci(), m_subPops(subPops), m_vars(), m_suffix(suffix), m_asArray(asArray)
 {
 	if (heteroFreq.allAvail() || homoFreq.allAvail())
 		m_loci = lociList();
@@ -1269,6 +1807,42 @@ string statHeteroFreq::describe(bool /* format */) const
 }
 
 
+/* count heterozygotes and homozygotes of a diploid population from the
+   alleles visited by iterator a. */
+static void countHeteroHomo(IndAlleleIterator a, size_t & hetero, size_t & homo)
+{
+	for (; a.valid(); a += 2) {
+		if (a.value() != (a + 1).value())
+			hetero += 1;
+		else
+			homo += 1;
+	}
+}
+
+
+/* Return counts at loci as an array, or proportions of these counts if the
+   counts of the other genotypes (homozygotes or heterozygotes) are given. */
+static PyObject * heteroCntAsArray(const vectoru & loci, const uintDict & cnt,
+                                   const uintDict * otherCnt)
+{
+	vectorf values(loci.size(), 0.);
+
+	for (size_t idx = 0; idx < loci.size(); ++idx) {
+		uintDict::const_iterator it = cnt.find(loci[idx]);
+		if (it == cnt.end())
+			continue;
+		if (otherCnt == NULL)
+			values[idx] = it->second;
+		else {
+			uintDict::const_iterator other = otherCnt->find(loci[idx]);
+			double all = it->second + (other == otherCnt->end() ? 0. : other->second);
+			values[idx] = all == 0. ? 0. : it->second / all;
+		}
+	}
+	return Double_Vec_As_Array(values);
+}
+
+
 bool statHeteroFreq::apply(Population & pop) const
 {
 	if (m_loci.empty())
@@ -1295,7 +1869,10 @@ bool statHeteroFreq::apply(Population & pop) const
 		uintDict heteroCnt;
 		uintDict homoCnt;
 
-#pragma omp parallel for if(numThreads() > 1)
+		// count loci in parallel if there are enough loci to keep all threads
+		// busy, otherwise split individuals among threads for each locus
+		bool byLoci = loci.size() >= numThreads();
+#pragma omp parallel for if(numThreads() > 1 && byLoci)
 		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
 			size_t loc = loci[idx];
 
@@ -1308,13 +1885,14 @@ bool statHeteroFreq::apply(Population & pop) const
 			size_t homo = 0;
 
 			// go through all alleles
-			IndAlleleIterator a = pop.alleleIterator(loc, it->subPop());
-			for (; a.valid(); a += 2) {
-				if (a.value() != (a + 1).value())
-					hetero += 1;
-				else
-					homo += 1;
+			if (byLoci)
+				countHeteroHomo(pop.alleleIterator(loc, it->subPop()), hetero, homo);
+#ifdef _OPENMP
+			else {
+#  pragma omp parallel reduction (+ : hetero, homo)
+				countHeteroHomo(pop.alleleIterator(loc, it->subPop(), omp_get_thread_num()), hetero, homo);
 			}
+#endif
 #pragma omp critical
 			{
 				heteroCnt[loc] = static_cast<double>(hetero);
@@ -1325,6 +1903,21 @@ bool statHeteroFreq::apply(Population & pop) const
 			}
 		}
 		pop.deactivateVirtualSubPop(it->subPop());
+		if (m_asArray) {
+			if (m_vars.contains(HeteroNum_sp_String))
+				pop.getVars().setVar(subPopVar_String(*it, HeteroNum_String, m_suffix),
+					heteroCntAsArray(loci, heteroCnt, NULL));
+			if (m_vars.contains(HomoNum_sp_String))
+				pop.getVars().setVar(subPopVar_String(*it, HomoNum_String, m_suffix),
+					heteroCntAsArray(loci, homoCnt, NULL));
+			if (m_vars.contains(HeteroFreq_sp_String))
+				pop.getVars().setVar(subPopVar_String(*it, HeteroFreq_String, m_suffix),
+					heteroCntAsArray(loci, heteroCnt, &homoCnt));
+			if (m_vars.contains(HomoFreq_sp_String))
+				pop.getVars().setVar(subPopVar_String(*it, HomoFreq_String, m_suffix),
+					heteroCntAsArray(loci, homoCnt, &heteroCnt));
+			continue;
+		}
 		// output subpopulation variable?
 		if (m_vars.contains(HeteroNum_sp_String)) {
 			uintDict::const_iterator ct = heteroCnt.begin();
@@ -1371,6 +1964,17 @@ bool statHeteroFreq::apply(Population & pop) const
 		}
 	}
 	// for whole population.
+	if (m_asArray) {
+		if (m_vars.contains(HeteroNum_String))
+			pop.getVars().setVar(HeteroNum_String + m_suffix, heteroCntAsArray(loci, allHeteroCnt, NULL));
+		if (m_vars.contains(HomoNum_String))
+			pop.getVars().setVar(HomoNum_String + m_suffix, heteroCntAsArray(loci, allHomoCnt, NULL));
+		if (m_vars.contains(HeteroFreq_String))
+			pop.getVars().setVar(HeteroFreq_String + m_suffix, heteroCntAsArray(loci, allHeteroCnt, &allHomoCnt));
+		if (m_vars.contains(HomoFreq_String))
+			pop.getVars().setVar(HomoFreq_String + m_suffix, heteroCntAsArray(loci, allHomoCnt, &allHeteroCnt));
+		return true;
+	}
 	if (m_vars.contains(HeteroNum_String)) {
 		uintDict::const_iterator ct = allHeteroCnt.begin();
 		uintDict::const_iterator ct_end = allHeteroCnt.end();
@@ -1440,6 +2044,64 @@ string statGenoFreq::describe(bool /* format */) const
 }
 
 
+/* count genotypes at locus loc of individuals visited by iterator ind. */
+static void countGenotypes(const Population & pop, IndIterator ind, size_t loc, size_t chromType,
+                           tupleDict & genotypes, size_t & allGenotypes)
+{
+	size_t ply = pop.ploidy();
+
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+	// the most common diploid case, count genotypes in a dense table
+	if (ply == 2 && !pop.isHaplodiploid() && (chromType == AUTOSOME || chromType == CUSTOMIZED)) {
+		vector<vectoru> cnt;
+		for (; ind.valid(); ++ind) {
+			countAllelePair(cnt, ind->allele(loc, 0), ind->allele(loc, 1));
+			allGenotypes++;
+		}
+		vectori genotype(2);
+		for (size_t a = 0; a < cnt.size(); ++a) {
+			for (size_t b = 0; b < cnt[a].size(); ++b) {
+				if (cnt[a][b] == 0)
+					continue;
+				genotype[0] = static_cast<int>(a);
+				genotype[1] = static_cast<int>(b);
+				genotypes[genotype] += cnt[a][b];
+			}
+		}
+		return;
+	}
+#endif
+	// the simple case, the speed is potentially faster
+	if (!pop.isHaplodiploid() && (chromType == AUTOSOME || chromType == CUSTOMIZED)) {
+		for (; ind.valid(); ++ind) {
+			vectori genotype(ply);
+			for (size_t p = 0; p < ply; ++p)
+				genotype[p] = ind->allele(loc, p);
+			genotypes[genotype]++;
+			allGenotypes++;
+		}
+	} else {
+		for (; ind.valid(); ++ind) {
+			vectori genotype;
+			for (size_t p = 0; p < ply; ++p) {
+				if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
+					continue;
+				if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
+					continue;
+				if (((chromType == CHROMOSOME_X && p == 1) ||
+				     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+					continue;
+				if (chromType == MITOCHONDRIAL && p > 0)
+					continue;
+				genotype.push_back(ind->allele(loc, p));
+			}
+			genotypes[genotype]++;
+			allGenotypes++;
+		}
+	}
+}
+
+
 bool statGenoFreq::apply(Population & pop) const
 {
 	if (m_loci.empty())
@@ -1460,7 +2122,6 @@ bool statGenoFreq::apply(Population & pop) const
 	subPopList subPops = m_subPops.expandFrom(pop);
 	subPopList::const_iterator it = subPops.begin();
 	subPopList::const_iterator itEnd = subPops.end();
-	size_t ply = pop.ploidy();
 	for (; it != itEnd; ++it) {
 		if (m_vars.contains(GenotypeNum_sp_String))
 			pop.getVars().removeVar(subPopVar_String(*it, GenotypeNum_String, m_suffix));
@@ -1469,43 +2130,39 @@ bool statGenoFreq::apply(Population & pop) const
 
 		pop.activateVirtualSubPop(*it);
 
-#pragma omp parallel for if(numThreads() > 1)
+		// count loci in parallel if there are enough loci to keep all threads
+		// busy, otherwise split individuals among threads for each locus
+		bool byLoci = loci.size() >= numThreads();
+#pragma omp parallel for if(numThreads() > 1 && byLoci)
 		for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
 			size_t loc = loci[idx];
 
 			tupleDict genotypes;
 			size_t allGenotypes = 0;
 
-			// go through all alleles
-			IndIterator ind = pop.indIterator(it->subPop());
-			// the simple case, the speed is potentially faster
-			if (!pop.isHaplodiploid() && (chromTypes[idx] == AUTOSOME || chromTypes[idx] == CUSTOMIZED)) {
-				for (; ind.valid(); ++ind) {
-					vectori genotype(ply);
-					for (size_t p = 0; p < ply; ++p)
-						genotype[p] = ind->allele(loc, p);
-					genotypes[genotype]++;
-					allGenotypes++;
-				}
-			} else {
-				for (; ind.valid(); ++ind) {
-					vectori genotype;
-					for (size_t p = 0; p < ply; ++p) {
-						if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-							continue;
-						if (chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
-							continue;
-						if (((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
-						     (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-							continue;
-						if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
-							continue;
-						genotype.push_back(ind->allele(loc, p));
+			// go through all individuals
+			if (byLoci)
+				countGenotypes(pop, pop.indIterator(it->subPop()), loc, chromTypes[idx],
+					genotypes, allGenotypes);
+#ifdef _OPENMP
+			else {
+#  pragma omp parallel
+				{
+					tupleDict threadGenotypes;
+					size_t threadAllGenotypes = 0;
+					countGenotypes(pop, pop.indIterator(it->subPop(), omp_get_thread_num()), loc,
+						chromTypes[idx], threadGenotypes, threadAllGenotypes);
+#  pragma omp critical
+					{
+						tupleDict::iterator dct = threadGenotypes.begin();
+						tupleDict::iterator dctEnd = threadGenotypes.end();
+						for (; dct != dctEnd; ++dct)
+							genotypes[dct->first] += dct->second;
+						allGenotypes += threadAllGenotypes;
 					}
-					genotypes[genotype]++;
-					allGenotypes++;
 				}
 			}
+#endif
 			// total allele count
 			tupleDict::iterator dct = genotypes.begin();
 			tupleDict::iterator dctEnd = genotypes.end();
@@ -1601,6 +2258,94 @@ string statHaploFreq::dictKey(const vectori & loci) const
 }
 
 
+/* Collect individuals in a (virtual) subpopulation so that they can be
+   processed in parallel without changing the activation status of the
+   population. */
+static void collectIndividuals(Population & pop, const vspID & subPop,
+                               vector<const Individual *> & inds)
+{
+	pop.activateVirtualSubPop(subPop);
+	IndIterator ind = pop.indIterator(subPop.subPop());
+	for (; ind.valid(); ++ind)
+		inds.push_back(&*ind);
+	pop.deactivateVirtualSubPop(subPop.subPop());
+}
+
+
+/* Number of bits used for each allele of a haplotype of nLoci alleles
+   that is packed into a 64-bit key, 0 if haplotypes cannot be packed. */
+static inline size_t haploKeyBits(size_t nLoci)
+{
+	return nLoci > 64 ? 0 : std::min<size_t>(64 / nLoci, 32);
+}
+
+
+/* Count haplotypes of individuals inds[begin:end] at loci. Haplotypes with
+   alleles that fit in haploKeyBits(loci.size()) bits are counted by packed
+   integer keys, others are counted by vectors of alleles. */
+static void countHaplotypes(const vector<const Individual *> & inds, size_t begin, size_t end,
+                            const vectori & loci, size_t chromType, size_t ply, bool haplodiploid,
+                            HaploKeyMap & packed, tupleDict & unpacked, size_t & numHaplotypes)
+{
+	size_t nLoci = loci.size();
+	size_t bits = haploKeyBits(nLoci);
+
+	for (size_t i = begin; i < end; ++i) {
+		const Individual * ind = inds[i];
+		for (size_t p = 0; p < ply; ++p) {
+			if (p == 1 && ind->sex() == MALE && haplodiploid)
+				continue;
+			if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
+				continue;
+			if (((chromType == CHROMOSOME_X && p == 1) ||
+			     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+				continue;
+			if (chromType == MITOCHONDRIAL && p > 0)
+				continue;
+			GenoIterator geno = ind->genoBegin(p);
+			uint64_t key = 0;
+			bool fits = bits > 0;
+			for (size_t j = 0; j < nLoci && fits; ++j) {
+				uint64_t a = static_cast<uint64_t>(DEREF_ALLELE(geno + loci[j]));
+				if (a >> bits != 0)
+					fits = false;
+				else
+					key = (key << bits) | a;
+			}
+			if (fits)
+				++packed[key];
+			else {
+				vectori haplotype(nLoci);
+				for (size_t j = 0; j < nLoci; ++j)
+					haplotype[j] = static_cast<int>(DEREF_ALLELE(geno + loci[j]));
+				unpacked[haplotype]++;
+			}
+			++numHaplotypes;
+		}
+	}
+}
+
+
+/* Add packed haplotype counts to a dictionary keyed by haplotypes. */
+static void addHaploCounts(const HaploKeyMap & packed, size_t nLoci, tupleDict & haplotypes)
+{
+	size_t bits = haploKeyBits(nLoci);
+	uint64_t mask = (uint64_t(1) << bits) - 1;
+
+	HaploKeyMap::const_iterator it = packed.begin();
+	HaploKeyMap::const_iterator itEnd = packed.end();
+	vectori haplotype(nLoci);
+	for (; it != itEnd; ++it) {
+		uint64_t key = it->first;
+		for (size_t j = nLoci; j > 0; --j) {
+			haplotype[j - 1] = static_cast<int>(key & mask);
+			key >>= bits;
+		}
+		haplotypes[haplotype] += static_cast<double>(it->second);
+	}
+}
+
+
 bool statHaploFreq::apply(Population & pop) const
 {
 	if (m_loci.empty())
@@ -1608,60 +2353,72 @@ bool statHaploFreq::apply(Population & pop) const
 
 	DBG_DO(DBG_STATOR, cerr << "Calculated haplotype frequency for loci " << m_loci << endl);
 
+	size_t nSets = m_loci.size();
+	vectoru chromTypes(nSets, AUTOSOME);
+	for (size_t idx = 0; idx < nSets; ++idx) {
+		const vectori & loci = m_loci[idx];
+		if (loci.empty())
+			continue;
+		chromTypes[idx] = pop.chromType(pop.chromLocusPair(loci[0]).first);
+#ifndef OPTIMIZED
+		for (size_t i = 1; i < loci.size(); ++i) {
+			DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) != chromTypes[idx], ValueError,
+				"Haplotype must be on the chromosomes of the same type");
+		}
+#endif
+	}
 	// count for all specified subpopulations
-	vector<tupleDict> haplotypeCnt(m_loci.size());
-	vectoru allHaplotypeCnt(m_loci.size());
+	vector<tupleDict> haplotypeCnt(nSets);
+	vectoru allHaplotypeCnt(nSets);
 	// selected (virtual) subpopulatons.
 	subPopList subPops = m_subPops.expandFrom(pop);
 	subPopList::const_iterator it = subPops.begin();
 	subPopList::const_iterator itEnd = subPops.end();
 	size_t ply = pop.ploidy();
+	bool haplodiploid = pop.isHaplodiploid();
 	for (; it != itEnd; ++it) {
 		if (m_vars.contains(HaplotypeNum_sp_String))
 			pop.getVars().removeVar(subPopVar_String(*it, HaplotypeNum_String, m_suffix));
 		if (m_vars.contains(HaplotypeFreq_sp_String))
 			pop.getVars().removeVar(subPopVar_String(*it, HaplotypeFreq_String, m_suffix));
 
-		pop.activateVirtualSubPop(*it);
+		vector<const Individual *> inds;
+		collectIndividuals(pop, *it, inds);
 
-#pragma omp parallel for if(numThreads() > 1)
-		for (ssize_t idx = 0; idx < static_cast<ssize_t>(m_loci.size()); ++idx) {
-			const vectori & loci = m_loci[idx];
-			size_t nLoci = loci.size();
-			if (nLoci == 0)
+		// If there are fewer sets of loci than threads, individuals are
+		// divided into chunks that are counted in parallel.
+		size_t nChunks = nSets < numThreads() ? numThreads() : 1;
+		size_t nItems = nSets * nChunks;
+		vector<HaploKeyMap> packed(nItems);
+		vector<tupleDict> unpacked(nItems);
+		vectoru numHaplotypes(nItems, 0);
+#ifndef MUTANTALLELE
+#  pragma omp parallel for if(numThreads() > 1)
+#endif
+		for (ssize_t item = 0; item < static_cast<ssize_t>(nItems); ++item) {
+			size_t idx = item / nChunks;
+			size_t chunk = item % nChunks;
+			if (m_loci[idx].empty())
 				continue;
+			countHaplotypes(inds, inds.size() * chunk / nChunks, inds.size() * (chunk + 1) / nChunks,
+				m_loci[idx], chromTypes[idx], ply, haplodiploid,
+				packed[item], unpacked[item], numHaplotypes[item]);
+		}
 
-			size_t chromType = pop.chromType(pop.chromLocusPair(loci[0]).first);
-#ifndef OPTIMIZED
-			for (size_t i = 1; i < nLoci; ++i) {
-				DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) != chromType, ValueError,
-					"Haplotype must be on the chromosomes of the same type");
-			}
-#endif
-			string key = dictKey(loci);
+		for (size_t idx = 0; idx < nSets; ++idx) {
+			if (m_loci[idx].empty())
+				continue;
+			string key = dictKey(m_loci[idx]);
 
 			tupleDict haplotypes;
 			size_t allHaplotypes = 0;
-
-			// go through all individual
-			IndIterator ind = pop.indIterator(it->subPop());
-			for (; ind.valid(); ++ind) {
-				vectori haplotype(loci.size());
-				for (size_t p = 0; p < ply; ++p) {
-					if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-						continue;
-					if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (((chromType == CHROMOSOME_X && p == 1) ||
-					     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromType == MITOCHONDRIAL && p > 0)
-						continue;
-					for (size_t idx = 0; idx < nLoci; ++idx)
-						haplotype[idx] = ind->allele(loci[idx], p);
-					haplotypes[haplotype]++;
-					allHaplotypes++;
-				}
+			for (size_t item = idx * nChunks; item < (idx + 1) * nChunks; ++item) {
+				addHaploCounts(packed[item], m_loci[idx].size(), haplotypes);
+				tupleDict::iterator dct = unpacked[item].begin();
+				tupleDict::iterator dctEnd = unpacked[item].end();
+				for (; dct != dctEnd; ++dct)
+					haplotypes[dct->first] += dct->second;
+				allHaplotypes += numHaplotypes[item];
 			}
 			// total haplotype count
 			tupleDict::iterator dct = haplotypes.begin();
@@ -1670,11 +2427,9 @@ bool statHaploFreq::apply(Population & pop) const
 				haplotypeCnt[idx][dct->first] += dct->second;
 			allHaplotypeCnt[idx] += allHaplotypes;
 			// output variable.
-			if (m_vars.contains(HaplotypeNum_sp_String)) {
-#pragma omp critical
+			if (m_vars.contains(HaplotypeNum_sp_String))
 				pop.getVars().setVar(subPopVar_String(*it, HaplotypeNum_String, m_suffix) + "{"
 					+ key + "}", haplotypes);
-			}
 			// note that genotyeps is changed in place.
 			if (m_vars.contains(HaplotypeFreq_sp_String)) {
 				if (allHaplotypes != 0) {
@@ -1683,12 +2438,10 @@ bool statHaploFreq::apply(Population & pop) const
 					for (; dct != dctEnd; ++dct)
 						dct->second /= allHaplotypes;
 				}
-#pragma omp critical
 				pop.getVars().setVar(subPopVar_String(*it, HaplotypeFreq_String, m_suffix) + "{"
 					+ key + "}", haplotypes);
 			}
 		}
-		pop.deactivateVirtualSubPop(it->subPop());
 	}
 
 	if (m_vars.contains(HaplotypeNum_String)) {
@@ -1772,6 +2525,19 @@ bool statHaploHomoFreq::apply(Population & pop) const
 	DBG_FAILIF(pop.ploidy() != 2, ValueError,
 		"Haplotype heterozygote frequency can only be calculated for diploid populations.");
 
+	size_t nSets = m_loci.size();
+#ifndef OPTIMIZED
+	for (size_t idx = 0; idx < nSets; ++idx) {
+		const vectori & loci = m_loci[idx];
+		for (size_t i = 1; i < loci.size(); ++i) {
+			DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) !=
+				pop.chromType(pop.chromLocusPair(loci[0]).first), ValueError,
+				"Haplotype must be on the chromosomes of the same type");
+			DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) != AUTOSOME, ValueError,
+				"Haplotype homozygosity count current only support autosome.");
+		}
+	}
+#endif
 	// count for all specified subpopulations
 	tupleDict allHeteroCnt;
 	tupleDict allHomoCnt;
@@ -1781,56 +2547,52 @@ bool statHaploHomoFreq::apply(Population & pop) const
 	subPopList::const_iterator it = subPops.begin();
 	subPopList::const_iterator itEnd = subPops.end();
 	for (; it != itEnd; ++it) {
-		pop.activateVirtualSubPop(*it);
-
-		tupleDict heteroCnt;
-		tupleDict homoCnt;
+		vector<const Individual *> inds;
+		collectIndividuals(pop, *it, inds);
 
-#pragma omp parallel for if(numThreads() > 1)
-		for (ssize_t idx = 0; idx < static_cast<ssize_t>(m_loci.size()); ++idx) {
+		vectoru heteroNum(nSets, 0);
+		vectoru homoNum(nSets, 0);
+#ifndef MUTANTALLELE
+#  pragma omp parallel for if(numThreads() > 1)
+#endif
+		for (ssize_t idx = 0; idx < static_cast<ssize_t>(nSets); ++idx) {
 			const vectori & loci = m_loci[idx];
 			size_t nLoci = loci.size();
 			if (nLoci == 0)
 				continue;
 
-			size_t chromType = pop.chromType(pop.chromLocusPair(loci[0]).first);
-#ifdef OPTIMIZED
-			(void)chromType;  // avoid a warning message of unused variable
-#else
-			for (size_t i = 1; i < nLoci; ++i) {
-				DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) != chromType, ValueError,
-					"Haplotype must be on the chromosomes of the same type");
-				DBG_FAILIF(pop.chromType(pop.chromLocusPair(loci[i]).first) != AUTOSOME, ValueError,
-					"Haplotype homozygosity count current only support autosome.");
-			}
-#endif
-			size_t hetero = 0;
-			size_t homo = 0;
 			// go through all individual
-			IndIterator ind = pop.indIterator(it->subPop());
-			for (; ind.valid(); ++ind) {
+			vector<const Individual *>::const_iterator ind = inds.begin();
+			vector<const Individual *>::const_iterator indEnd = inds.end();
+			for (; ind != indEnd; ++ind) {
 				// FIXME: does not consider sex chromosomes
+				GenoIterator geno1 = (*ind)->genoBegin(0);
+				GenoIterator geno2 = (*ind)->genoBegin(1);
 				bool h = false;
-				for (size_t idx = 0; idx < nLoci; ++idx)
-					if (ind->allele(loci[idx], 0) != ind->allele(loci[idx], 1)) {
+				for (size_t i = 0; i < nLoci; ++i)
+					if (DEREF_ALLELE(geno1 + loci[i]) != DEREF_ALLELE(geno2 + loci[i])) {
 						h = true;
 						break;
 					}
 				if (h)
-					++hetero;
+					++heteroNum[idx];
 				else
-					++homo;
+					++homoNum[idx];
 			}
-#pragma omp critical
-			{
-				heteroCnt[loci] = static_cast<double>(hetero);
-				homoCnt[loci] = static_cast<double>(homo);
+		}
 
-				allHeteroCnt[loci] += hetero;
-				allHomoCnt[loci] += homo;
-			}
+		tupleDict heteroCnt;
+		tupleDict homoCnt;
+		for (size_t idx = 0; idx < nSets; ++idx) {
+			const vectori & loci = m_loci[idx];
+			if (loci.empty())
+				continue;
+			heteroCnt[loci] = static_cast<double>(heteroNum[idx]);
+			homoCnt[loci] = static_cast<double>(homoNum[idx]);
+
+			allHeteroCnt[loci] += heteroNum[idx];
+			allHomoCnt[loci] += homoNum[idx];
 		}
-		pop.deactivateVirtualSubPop(it->subPop());
 		// output subpopulation variable?
 		if (m_vars.contains(HaploHeteroNum_sp_String))
 			pop.getVars().setVar(subPopVar_String(*it, HaploHeteroNum_String, m_suffix), heteroCnt);
@@ -2470,35 +3232,88 @@ bool statLD::apply(Population & pop) const
 		ALLELECNTLIST alleleCnt(loci.size());
 		HAPLOCNTLIST haploCnt(m_LD.size());
 
-		// count allele and genotype
-		IndIterator ind = pop.indIterator(it->subPop());
-		for (; ind.valid(); ++ind) {
-			for (size_t p = 0; p < ply; ++p) {
-				if (ply == 2 && p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
-					continue;
-				GenoIterator geno = ind->genoBegin(p);
-				// allele frequency
-				for (size_t idx = 0; idx < nLoci; ++idx) {
-					if (ply == 2 && chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (ply == 2 && ((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
-					                 (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
+		// count allele and genotype, each thread counting a block of
+		// individuals in its own tables
+#pragma omp parallel if(numThreads() > 1)
+		{
+#ifdef _OPENMP
+			IndIterator ind = pop.indIterator(it->subPop(), omp_get_thread_num());
+#else
+			IndIterator ind = pop.indIterator(it->subPop());
+#endif
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+			ALLELECNTLIST threadAlleleCnt(loci.size());
+			HAPLOCNTLIST threadHaploCnt(m_LD.size());
+#else
+			vector<vectoru> threadAlleleCnt(loci.size());
+			vector<vector<vectoru> > threadHaploCnt(m_LD.size());
+#endif
+			for (; ind.valid(); ++ind) {
+				for (size_t p = 0; p < ply; ++p) {
+					if (ply == 2 && p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
 						continue;
-					alleleCnt[idx][DEREF_ALLELE(geno + loci[idx])]++;
+					GenoIterator geno = ind->genoBegin(p);
+					// allele frequency
+					for (size_t idx = 0; idx < nLoci; ++idx) {
+						if (ply == 2 && chromTypes[idx] == CHROMOSOME_Y && ind->sex() == FEMALE)
+							continue;
+						if (ply == 2 && ((chromTypes[idx] == CHROMOSOME_X && p == 1) ||
+						                 (chromTypes[idx] == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+							continue;
+						if (chromTypes[idx] == MITOCHONDRIAL && p > 0)
+							continue;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+						threadAlleleCnt[idx][DEREF_ALLELE(geno + loci[idx])]++;
+#else
+						countAllele(threadAlleleCnt[idx], DEREF_ALLELE(geno + loci[idx]));
+#endif
+					}
+					// haplotype frequency
+					for (size_t idx = 0; idx < nLD; ++idx) {
+						size_t chromType = chromTypes[lociMap[m_LD[idx][0]]];
+						if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
+							continue;
+						if (((chromType == CHROMOSOME_X && p == 1) ||
+						     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
+							continue;
+						if (chromType == MITOCHONDRIAL && p > 0)
+							continue;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+						threadHaploCnt[idx][HAPLOCNT::key_type(DEREF_ALLELE(geno + m_LD[idx][0]), DEREF_ALLELE(geno + m_LD[idx][1]))]++;
+#else
+						countAllelePair(threadHaploCnt[idx], DEREF_ALLELE(geno + m_LD[idx][0]), DEREF_ALLELE(geno + m_LD[idx][1]));
+#endif
+					}
+				}
+			}
+			// merge counts of this thread
+#pragma omp critical
+			{
+				for (size_t idx = 0; idx < nLoci; ++idx) {
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+					ALLELECNT::iterator cnt = threadAlleleCnt[idx].begin();
+					ALLELECNT::iterator cntEnd = threadAlleleCnt[idx].end();
+					for (; cnt != cntEnd; ++cnt)
+						alleleCnt[idx][cnt->first] += cnt->second;
+#else
+					for (size_t a = 0; a < threadAlleleCnt[idx].size(); ++a)
+						if (threadAlleleCnt[idx][a] != 0)
+							alleleCnt[idx][a] += threadAlleleCnt[idx][a];
+#endif
 				}
-				// haplotype frequency
 				for (size_t idx = 0; idx < nLD; ++idx) {
-					size_t chromType = chromTypes[lociMap[m_LD[idx][0]]];
-					if (chromType == CHROMOSOME_Y && ind->sex() == FEMALE)
-						continue;
-					if (((chromType == CHROMOSOME_X && p == 1) ||
-					     (chromType == CHROMOSOME_Y && p == 0)) && ind->sex() == MALE)
-						continue;
-					if (chromType == MITOCHONDRIAL && p > 0)
-						continue;
-					haploCnt[idx][HAPLOCNT::key_type(DEREF_ALLELE(geno + m_LD[idx][0]), DEREF_ALLELE(geno + m_LD[idx][1]))]++;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+					HAPLOCNT::iterator cnt = threadHaploCnt[idx].begin();
+					HAPLOCNT::iterator cntEnd = threadHaploCnt[idx].end();
+					for (; cnt != cntEnd; ++cnt)
+						haploCnt[idx][cnt->first] += cnt->second;
+#else
+					const vector<vectoru> & cnt = threadHaploCnt[idx];
+					for (size_t a = 0; a < cnt.size(); ++a)
+						for (size_t b = 0; b < cnt[a].size(); ++b)
+							if (cnt[a][b] != 0)
+								haploCnt[idx][HAPLOCNT::key_type(a, b)] += cnt[a][b];
+#endif
 				}
 			}
 		}
@@ -2581,9 +3396,204 @@ bool statLD::apply(Population & pop) const
 }
 
 
+/* number of set bits in a 64-bit word */
+static inline size_t popCount(uint64_t x)
+{
+#if defined(__GNUC__)
+	return static_cast<size_t>(__builtin_popcountll(x));
+#else
+	x = x - ((x >> 1) & 0x5555555555555555ULL);
+	x = (x & 0x3333333333333333ULL) + ((x >> 2) & 0x3333333333333333ULL);
+	x = (x + (x >> 4)) & 0x0F0F0F0F0F0F0F0FULL;
+	return static_cast<size_t>((x * 0x0101010101010101ULL) >> 56);
+#endif
+}
+
+
+statLDWindow::statLDWindow(const floatList & window, const subPopList & subPops,
+	const stringList & vars, const string & suffix)
+	: m_distance(-1), m_maxPairs(0), m_subPops(subPops), m_vars(), m_suffix(suffix)
+{
+	const vectorf & win = window.elems();
+
+	if (win.empty())
+		return;
+	PARAM_FAILIF(win.size() > 2 || win[0] < 0 || (win.size() == 2 && win[1] < 0), ValueError,
+		"Parameter LD_window should be a non-negative distance and an optional number of pairs.");
+	m_distance = win[0];
+	if (win.size() == 2)
+		m_maxPairs = static_cast<size_t>(win[1]);
+
+	const char * allowedVars[] = { LD_window_String, LD_window_sp_String, "" };
+	const char * defaultVars[] = { LD_window_String, "" };
+
+	m_vars.obtainFrom(vars, allowedVars, defaultVars);
+}
+
+
+string statLDWindow::describe(bool /* format */) const
+{
+	if (m_distance < 0)
+		return "";
+	return (boost::format("calculate linkage disequilibrium between loci within distance %1%") % m_distance).str();
+}
+
+
+void statLDWindow::windowPairs(const Population & pop, vector<pairu> & pairs, vectorf & dist) const
+{
+	for (size_t ch = 0; ch < pop.numChrom(); ++ch) {
+		if (pop.chromType(ch) != AUTOSOME && pop.chromType(ch) != CUSTOMIZED)
+			continue;
+		size_t end = pop.chromEnd(ch);
+		for (size_t i = pop.chromBegin(ch); i < end; ++i) {
+			// loci are ordered by position on each chromosome
+			for (size_t j = i + 1; j < end; ++j) {
+				double d = pop.locusPos(j) - pop.locusPos(i);
+				if (d > m_distance || (m_maxPairs > 0 && j - i > m_maxPairs))
+					break;
+				pairs.push_back(pairu(i, j));
+				dist.push_back(d);
+			}
+		}
+	}
+}
+
+
+size_t statLDWindow::packLoci(Population & pop, size_t subPop, const vectoru & loci,
+                              vector<uint64_t> & bits) const
+{
+	// starting positions of all haplotypes
+	vector<GenoIterator> haplotypes;
+	IndIterator ind = pop.indIterator(subPop);
+
+	for (; ind.valid(); ++ind) {
+		for (size_t p = 0; p < pop.ploidy(); ++p) {
+			if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
+				continue;
+			haplotypes.push_back(ind->genoBegin(p));
+		}
+	}
+	size_t numHaplotypes = haplotypes.size();
+	size_t numWords = (numHaplotypes + 63) / 64;
+	bits.assign(loci.size() * numWords, 0);
+
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
+		uint64_t * word = &bits[0] + idx * numWords;
+		size_t loc = loci[idx];
+		for (size_t h = 0; h < numHaplotypes; ++h)
+			if (DEREF_ALLELE(haplotypes[h] + loc) != 0)
+				word[h / 64] |= uint64_t(1) << (h % 64);
+	}
+	return numHaplotypes;
+}
+
+
+PyObject * statLDWindow::LDDict(const vector<pairu> & pairs, const vectorf & dist, const vectoru & n1,
+                                const vectoru & n11, size_t numHaplotypes) const
+{
+	vectorf loc1(pairs.size());
+	vectorf loc2(pairs.size());
+	vectorf LD(pairs.size(), 0.);
+	vectorf D_prime(pairs.size(), 0.);
+	vectorf R2(pairs.size(), 0.);
+
+	for (size_t i = 0; i < pairs.size(); ++i) {
+		loc1[i] = static_cast<double>(pairs[i].first);
+		loc2[i] = static_cast<double>(pairs[i].second);
+		if (numHaplotypes == 0)
+			continue;
+		double P_A = n1[pairs[i].first] / static_cast<double>(numHaplotypes);
+		double P_B = n1[pairs[i].second] / static_cast<double>(numHaplotypes);
+		double P_AB = n11[i] / static_cast<double>(numHaplotypes);
+		// the same measures as LD with primary alleles
+		double D = P_AB - P_A * P_B;
+		double D_max = D > 0 ? std::min(P_A * (1 - P_B), (1 - P_A) * P_B) : std::min(P_A * P_B, (1 - P_A) * (1 - P_B));
+		LD[i] = D;
+		D_prime[i] = fcmp_eq(D_max, 0.) ? 0. : D / D_max;
+		R2[i] = (fcmp_eq(P_A, 0) || fcmp_eq(P_B, 0) || fcmp_eq(P_A, 1) || fcmp_eq(P_B, 1)) ? 0. : D * D / P_A / (1 - P_A) / P_B / (1 - P_B);
+	}
+	PyObject * res = PyDict_New();
+	const char * keys[] = { "loc1", "loc2", "dist", "LD", "LD_prime", "R2" };
+	const vectorf * values[] = { &loc1, &loc2, &dist, &LD, &D_prime, &R2 };
+	for (size_t i = 0; i < 6; ++i) {
+		PyObject * arr = Double_Vec_As_Array(*values[i]);
+		PyDict_SetItemString(res, keys[i], arr);
+		Py_DECREF(arr);
+	}
+	return res;
+}
+
+
+bool statLDWindow::apply(Population & pop) const
+{
+	if (m_distance < 0)
+		return true;
+
+	vector<pairu> pairs;
+	vectorf dist;
+	windowPairs(pop, pairs, dist);
+	// all loci on autosomes are packed, n1 and bitsets are indexed by locus
+	// index so a locus maps to its row of bits
+	vectoru loci(pop.totNumLoci());
+	for (size_t i = 0; i < loci.size(); ++i)
+		loci[i] = i;
+
+	vectoru allN1(loci.size(), 0);
+	vectoru allN11(pairs.size(), 0);
+	size_t allHaplotypes = 0;
+
+	subPopList subPops = m_subPops.expandFrom(pop);
+	subPopList::const_iterator it = subPops.begin();
+	subPopList::const_iterator itEnd = subPops.end();
+	for (; it != itEnd; ++it) {
+		pop.activateVirtualSubPop(*it);
+		vector<uint64_t> bits;
+		size_t numHaplotypes = packLoci(pop, it->subPop(), loci, bits);
+		pop.deactivateVirtualSubPop(it->subPop());
+
+		size_t numWords = (numHaplotypes + 63) / 64;
+		vectoru n1(loci.size(), 0);
+		vectoru n11(pairs.size(), 0);
+		if (numWords > 0) {
+			const uint64_t * base = &bits[0];
+#pragma omp parallel for if(numThreads() > 1)
+			for (ssize_t idx = 0; idx < static_cast<ssize_t>(loci.size()); ++idx) {
+				const uint64_t * a = base + idx * numWords;
+				size_t cnt = 0;
+				for (size_t w = 0; w < numWords; ++w)
+					cnt += popCount(a[w]);
+				n1[idx] = cnt;
+			}
+#pragma omp parallel for if(numThreads() > 1)
+			for (ssize_t idx = 0; idx < static_cast<ssize_t>(pairs.size()); ++idx) {
+				const uint64_t * a = base + pairs[idx].first * numWords;
+				const uint64_t * b = base + pairs[idx].second * numWords;
+				size_t cnt = 0;
+				for (size_t w = 0; w < numWords; ++w)
+					cnt += popCount(a[w] & b[w]);
+				n11[idx] = cnt;
+			}
+		}
+		if (m_vars.contains(LD_window_sp_String))
+			pop.getVars().setVar(subPopVar_String(*it, LD_window_String, m_suffix),
+				LDDict(pairs, dist, n1, n11, numHaplotypes));
+		for (size_t i = 0; i < loci.size(); ++i)
+			allN1[i] += n1[i];
+		for (size_t i = 0; i < pairs.size(); ++i)
+			allN11[i] += n11[i];
+		allHaplotypes += numHaplotypes;
+	}
+	if (m_vars.contains(LD_window_String))
+		pop.getVars().setVar(LD_window_String + m_suffix,
+			LDDict(pairs, dist, allN1, allN11, allHaplotypes));
+	return true;
+}
+
+
 statAssociation::statAssociation(const lociList & loci,
-	const subPopList & subPops, const stringList & vars, const string & suffix)
-	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix)
+	const subPopList & subPops, const stringList & vars, const string & suffix, bool asArray)
+	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix), m_asArray(asArray)
 {
 	const char * allowedVars[] = {
 		Allele_ChiSq_String,	Allele_ChiSq_p_String,
@@ -2747,47 +3757,48 @@ double statAssociation::armitageTest(const GENOCNT & caseCnt,
 }
 
 
-bool statAssociation::apply(Population & pop) const
+void statAssociation::setTestVar(Population & pop, const string & name,
+                                 const vectoru & loci, const vectorf & values) const
 {
-	if (m_loci.empty())
-		return true;
+	if (m_asArray) {
+		pop.getVars().setVar(name, Double_Vec_As_Array(values));
+		return;
+	}
+	uintDict res;
+	for (size_t i = 0; i < loci.size(); ++i)
+		res[loci[i]] = values[i];
+	pop.getVars().setVar(name, res);
+}
 
-	const vectoru & loci = m_loci.elems(&pop);
 
+void statAssociation::mapTests(Population & pop, const vectoru & loci,
+                               const subPopList & subPops, const vector<bool> & testSp,
+                               const vector<bool> & testAll, vector<TESTRESULTS> & results) const
+{
 	vectoru chromTypes;
+
 	for (size_t i = 0; i < loci.size(); ++i)
 		chromTypes.push_back(pop.chromType(pop.chromLocusPair(loci[i]).first));
 
 	size_t ply = pop.ploidy();
-	bool hasAlleleTest = false;
-	bool hasGenoTest = false;
-	for (size_t i = 0; i < m_vars.elems().size(); ++i) {
-		if (m_vars.elems()[i].compare(0, 6, "Allele") == 0)
-			hasAlleleTest = true;
-		if (m_vars.elems()[i].compare(0, 4, "Geno") == 0 || m_vars.elems()[i].compare(0, 8, "Armitage") == 0) {
-			DBG_FAILIF(ply != 2, ValueError, "Genotype test can only be performed for diploid populations.");
-			hasGenoTest = true;
-		}
-	}
+	bool hasAlleleTest = testSp[ALLELE_CHISQ] || testAll[ALLELE_CHISQ];
+	bool hasGenoTest = testSp[GENO_CHISQ] || testAll[GENO_CHISQ] ||
+	                   testSp[ARMITAGE_P] || testAll[ARMITAGE_P];
 	// count for all specified subpopulations
 	size_t nLoci = loci.size();
 	ALLELECNTLIST allCaseAlleleCnt(nLoci);
 	ALLELECNTLIST allCtrlAlleleCnt(nLoci);
 	GENOCNTLIST allCaseGenoCnt(nLoci);
 	GENOCNTLIST allCtrlGenoCnt(nLoci);
-	// selected (virtual) subpopulatons.
-	subPopList subPops = m_subPops.expandFrom(pop);
-	subPopList::const_iterator it = subPops.begin();
-	subPopList::const_iterator itEnd = subPops.end();
-	for (; it != itEnd; ++it) {
+	for (size_t sp = 0; sp < subPops.size(); ++sp) {
 		ALLELECNTLIST caseAlleleCnt(nLoci);
 		ALLELECNTLIST ctrlAlleleCnt(nLoci);
 		GENOCNTLIST caseGenoCnt(nLoci);
 		GENOCNTLIST ctrlGenoCnt(nLoci);
 
-		pop.activateVirtualSubPop(*it);
+		pop.activateVirtualSubPop(subPops[sp]);
 
-		IndIterator ind = pop.indIterator(it->subPop());
+		IndIterator ind = pop.indIterator(subPops[sp].subPop());
 		for (; ind.valid(); ++ind) {
 			if (hasAlleleTest) {
 				for (size_t p = 0; p < ply; ++p) {
@@ -2828,34 +3839,18 @@ bool statAssociation::apply(Population & pop) const
 				}
 			}
 		}
-		pop.deactivateVirtualSubPop(it->subPop());
+		pop.deactivateVirtualSubPop(subPops[sp].subPop());
 		//
-		// output variable.
-		if (m_vars.contains(Allele_ChiSq_sp_String) || m_vars.contains(Allele_ChiSq_p_sp_String)) {
-			uintDict chisq;
-			uintDict chisq_p;
-			for (size_t i = 0; i < loci.size(); ++i)
-				alleleChiSqTest(caseAlleleCnt[i], ctrlAlleleCnt[i], chisq[loci[i]], chisq_p[loci[i]]);
-			if (m_vars.contains(Allele_ChiSq_sp_String))
-				pop.getVars().setVar(subPopVar_String(*it, Allele_ChiSq_String, m_suffix), chisq);
-			if (m_vars.contains(Allele_ChiSq_p_sp_String))
-				pop.getVars().setVar(subPopVar_String(*it, Allele_ChiSq_p_String, m_suffix), chisq_p);
-		}
-		if (m_vars.contains(Geno_ChiSq_sp_String) || m_vars.contains(Geno_ChiSq_p_sp_String)) {
-			uintDict chisq;
-			uintDict chisq_p;
-			for (size_t i = 0; i < loci.size(); ++i)
-				genoChiSqTest(caseGenoCnt[i], ctrlGenoCnt[i], chisq[loci[i]], chisq_p[loci[i]]);
-			if (m_vars.contains(Geno_ChiSq_sp_String))
-				pop.getVars().setVar(subPopVar_String(*it, Geno_ChiSq_String, m_suffix), chisq);
-			if (m_vars.contains(Geno_ChiSq_p_sp_String))
-				pop.getVars().setVar(subPopVar_String(*it, Geno_ChiSq_p_String, m_suffix), chisq_p);
-		}
-		if (m_vars.contains(Armitage_p_sp_String)) {
-			uintDict pvalues;
-			for (size_t i = 0; i < loci.size(); ++i)
-				pvalues[loci[i]] = armitageTest(caseGenoCnt[i], ctrlGenoCnt[i]);
-			pop.getVars().setVar(subPopVar_String(*it, Armitage_p_String, m_suffix), pvalues);
+		TESTRESULTS & res = results[sp];
+		for (size_t i = 0; i < nLoci; ++i) {
+			if (testSp[ALLELE_CHISQ])
+				alleleChiSqTest(caseAlleleCnt[i], ctrlAlleleCnt[i],
+					res[ALLELE_CHISQ][i], res[ALLELE_CHISQ_P][i]);
+			if (testSp[GENO_CHISQ])
+				genoChiSqTest(caseGenoCnt[i], ctrlGenoCnt[i],
+					res[GENO_CHISQ][i], res[GENO_CHISQ_P][i]);
+			if (testSp[ARMITAGE_P])
+				res[ARMITAGE_P][i] = armitageTest(caseGenoCnt[i], ctrlGenoCnt[i]);
 		}
 		// total allele count
 		if (hasAlleleTest) {
@@ -2884,47 +3879,358 @@ bool statAssociation::apply(Population & pop) const
 		}
 	}
 	//
-	if (m_vars.contains(Allele_ChiSq_String) || m_vars.contains(Allele_ChiSq_p_String)) {
-		uintDict chisq;
-		uintDict chisq_p;
-		for (size_t i = 0; i < loci.size(); ++i)
+	TESTRESULTS & res = results.back();
+	for (size_t i = 0; i < nLoci; ++i) {
+		if (testAll[ALLELE_CHISQ])
 			alleleChiSqTest(allCaseAlleleCnt[i], allCtrlAlleleCnt[i],
-				chisq[loci[i]], chisq_p[loci[i]]);
-		// output variable.
-		if (m_vars.contains(Allele_ChiSq_String))
-			pop.getVars().setVar(Allele_ChiSq_String + m_suffix, chisq);
-		if (m_vars.contains(Allele_ChiSq_p_String))
-			pop.getVars().setVar(Allele_ChiSq_p_String + m_suffix, chisq_p);
-	}
-	if (m_vars.contains(Geno_ChiSq_String) || m_vars.contains(Geno_ChiSq_p_String)) {
-		uintDict chisq;
-		uintDict chisq_p;
-		for (size_t i = 0; i < loci.size(); ++i)
+				res[ALLELE_CHISQ][i], res[ALLELE_CHISQ_P][i]);
+		if (testAll[GENO_CHISQ])
 			genoChiSqTest(allCaseGenoCnt[i], allCtrlGenoCnt[i],
-				chisq[loci[i]], chisq_p[loci[i]]);
-		if (m_vars.contains(Geno_ChiSq_String))
-			pop.getVars().setVar(Geno_ChiSq_String + m_suffix, chisq);
-		if (m_vars.contains(Geno_ChiSq_p_String))
-			pop.getVars().setVar(Geno_ChiSq_p_String + m_suffix, chisq_p);
-	}
-	if (m_vars.contains(Armitage_p_String)) {
-		uintDict pvalues;
-		for (size_t i = 0; i < loci.size(); ++i)
-			pvalues[loci[i]] = armitageTest(allCaseGenoCnt[i], allCtrlGenoCnt[i]);
-		pop.getVars().setVar(Armitage_p_String + m_suffix, pvalues);
+				res[GENO_CHISQ][i], res[GENO_CHISQ_P][i]);
+		if (testAll[ARMITAGE_P])
+			res[ARMITAGE_P][i] = armitageTest(allCaseGenoCnt[i], allCtrlGenoCnt[i]);
+	}
+}
+
+
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+
+#define ASSOCIATION_BLOCK 256
+
+/* Chi-square test of cases and controls from dense count tables. Alleles
+   (or genotypes) that are observed in neither cases nor controls are
+   excluded from the contingency table. */
+static void denseChiSqTest(const vectoru & caseCnt, const vectoru & ctrlCnt,
+                           double & chisq, double & chisq_p)
+{
+	vector<vectoru> table(2);
+	size_t n = std::max(caseCnt.size(), ctrlCnt.size());
+
+	for (size_t a = 0; a < n; ++a) {
+		size_t caseNum = a < caseCnt.size() ? caseCnt[a] : 0;
+		size_t ctrlNum = a < ctrlCnt.size() ? ctrlCnt[a] : 0;
+		if (caseNum + ctrlNum == 0)
+			continue;
+		table[0].push_back(caseNum);
+		table[1].push_back(ctrlNum);
+	}
+	chisqTest(table, chisq, chisq_p);
+}
+
+
+static inline size_t genoCount(const vector<vectoru> & cnt, size_t a, size_t b)
+{
+	return a < cnt.size() && b < cnt[a].size() ? cnt[a][b] : 0;
+}
+
+
+/* Flatten dense genotype tables of cases and controls so that genotypes
+   are listed in the same order. */
+static void flattenGenoCnt(const vector<vectoru> & caseCnt, const vector<vectoru> & ctrlCnt,
+                           vectoru & caseFlat, vectoru & ctrlFlat)
+{
+	size_t n = std::max(caseCnt.size(), ctrlCnt.size());
+
+	for (size_t a = 0; a < n; ++a) {
+		size_t m = std::max(a < caseCnt.size() ? caseCnt[a].size() : 0,
+			a < ctrlCnt.size() ? ctrlCnt[a].size() : 0);
+		for (size_t b = 0; b < m; ++b) {
+			caseFlat.push_back(genoCount(caseCnt, a, b));
+			ctrlFlat.push_back(genoCount(ctrlCnt, a, b));
+		}
+	}
+}
+
+
+/* Cochran-Armitage trend test from dense genotype tables. Set multiAllelic
+   instead of raising an exception because this function is called from
+   within a parallel region. */
+static double denseArmitageTest(const vector<vectoru> & caseCnt,
+                                const vector<vectoru> & ctrlCnt, bool & multiAllelic)
+{
+	vectoru alleles;
+
+	for (size_t t = 0; t < 2; ++t) {
+		const vector<vectoru> & cnt = t == 0 ? caseCnt : ctrlCnt;
+		for (size_t a = 0; a < cnt.size(); ++a)
+			for (size_t b = 0; b < cnt[a].size(); ++b) {
+				if (cnt[a][b] == 0)
+					continue;
+				if (b >= alleles.size())
+					alleles.resize(b + 1, 0);
+				alleles[a] += cnt[a][b];
+				alleles[b] += cnt[a][b];
+			}
+	}
+	vectoru observed;
+	for (size_t a = 0; a < alleles.size(); ++a)
+		if (alleles[a] > 0)
+			observed.push_back(a);
+	if (observed.size() > 2)
+		multiAllelic = true;
+	if (observed.size() != 2)
+		return 1.;
+	// observed[0] < observed[1], the larger allele is major if tied.
+	size_t major = alleles[observed[0]] > alleles[observed[1]] ? observed[0] : observed[1];
+	size_t minor = major == observed[0] ? observed[1] : observed[0];
+	vector<vectoru> table(2);
+	for (size_t i = 0; i < 2; ++i)
+		table[i].resize(3, 0);
+	table[1][0] = genoCount(caseCnt, major, major);
+	table[1][1] = genoCount(caseCnt, observed[0], observed[1]);
+	table[1][2] = genoCount(caseCnt, minor, minor);
+	table[0][0] = genoCount(ctrlCnt, major, major);
+	table[0][1] = genoCount(ctrlCnt, observed[0], observed[1]);
+	table[0][2] = genoCount(ctrlCnt, minor, minor);
+	vectorf weight(3);
+	for (size_t i = 0; i < 3; ++i)
+		weight[i] = static_cast<double>(i);
+	return armitageTrendTest(table, weight);
+}
+
+
+/* Count alleles and (unordered) genotypes of individuals at loci[first:last]. */
+static void countAssociation(const vector<const Individual *> & inds, const vectoru & loci,
+                             size_t first, size_t last, size_t ply, bool alleleTest, bool genoTest,
+                             vector<vectoru> & alleleCnt, vector<vector<vectoru> > & genoCnt)
+{
+	vector<const Individual *>::const_iterator it = inds.begin();
+	vector<const Individual *>::const_iterator itEnd = inds.end();
+
+	for (; it != itEnd; ++it) {
+		if (alleleTest) {
+			for (size_t p = 0; p < ply; ++p) {
+				GenoIterator geno = (*it)->genoBegin(p);
+				for (size_t idx = first; idx < last; ++idx)
+					countAllele(alleleCnt[idx - first], DEREF_ALLELE(geno + loci[idx]));
+			}
+		}
+		if (genoTest) {
+			GenoIterator geno1 = (*it)->genoBegin(0);
+			GenoIterator geno2 = (*it)->genoBegin(1);
+			for (size_t idx = first; idx < last; ++idx) {
+				size_t a1 = DEREF_ALLELE(geno1 + loci[idx]);
+				size_t a2 = DEREF_ALLELE(geno2 + loci[idx]);
+				if (a1 > a2)
+					std::swap(a1, a2);
+				countAllelePair(genoCnt[idx - first], a1, a2);
+			}
+		}
+	}
+}
+
+
+static void addCounts(vectoru & cnt, const vectoru & other)
+{
+	if (other.size() > cnt.size())
+		cnt.resize(other.size(), 0);
+	for (size_t a = 0; a < other.size(); ++a)
+		cnt[a] += other[a];
+}
+
+
+void statAssociation::denseTests(Population & pop, const vectoru & loci,
+                                 const subPopList & subPops, const vector<bool> & testSp,
+                                 const vector<bool> & testAll, vector<TESTRESULTS> & results) const
+{
+	size_t nLoci = loci.size();
+	size_t nSP = subPops.size();
+	size_t ply = pop.ploidy();
+	bool hasAlleleTest = testSp[ALLELE_CHISQ] || testAll[ALLELE_CHISQ];
+	bool hasGenoTest = testSp[GENO_CHISQ] || testAll[GENO_CHISQ] ||
+	                   testSp[ARMITAGE_P] || testAll[ARMITAGE_P];
+
+	// Collect cases and controls of each (virtual) subpopulation so that
+	// blocks of loci can be counted in parallel without changing the
+	// activation status of the population.
+	vector<vector<const Individual *> > cases(nSP);
+	vector<vector<const Individual *> > ctrls(nSP);
+	for (size_t sp = 0; sp < nSP; ++sp) {
+		pop.activateVirtualSubPop(subPops[sp]);
+		IndIterator ind = pop.indIterator(subPops[sp].subPop());
+		for (; ind.valid(); ++ind) {
+			if (ind->affected())
+				cases[sp].push_back(&*ind);
+			else
+				ctrls[sp].push_back(&*ind);
+		}
+		pop.deactivateVirtualSubPop(subPops[sp].subPop());
+	}
+
+	size_t nBlocks = (nLoci + ASSOCIATION_BLOCK - 1) / ASSOCIATION_BLOCK;
+	bool multiAllelic = false;
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t blk = 0; blk < static_cast<ssize_t>(nBlocks); ++blk) {
+		size_t first = static_cast<size_t>(blk) * ASSOCIATION_BLOCK;
+		size_t last = std::min(first + ASSOCIATION_BLOCK, nLoci);
+		size_t n = last - first;
+		bool blockMultiAllelic = false;
+		vector<vectoru> allCaseAlleleCnt(n);
+		vector<vectoru> allCtrlAlleleCnt(n);
+		vector<vector<vectoru> > allCaseGenoCnt(n);
+		vector<vector<vectoru> > allCtrlGenoCnt(n);
+		for (size_t sp = 0; sp < nSP; ++sp) {
+			vector<vectoru> caseAlleleCnt(n);
+			vector<vectoru> ctrlAlleleCnt(n);
+			vector<vector<vectoru> > caseGenoCnt(n);
+			vector<vector<vectoru> > ctrlGenoCnt(n);
+			countAssociation(cases[sp], loci, first, last, ply, hasAlleleTest, hasGenoTest,
+				caseAlleleCnt, caseGenoCnt);
+			countAssociation(ctrls[sp], loci, first, last, ply, hasAlleleTest, hasGenoTest,
+				ctrlAlleleCnt, ctrlGenoCnt);
+			TESTRESULTS & res = results[sp];
+			for (size_t i = 0; i < n; ++i) {
+				if (testSp[ALLELE_CHISQ])
+					denseChiSqTest(caseAlleleCnt[i], ctrlAlleleCnt[i],
+						res[ALLELE_CHISQ][first + i], res[ALLELE_CHISQ_P][first + i]);
+				if (testSp[GENO_CHISQ]) {
+					vectoru caseFlat;
+					vectoru ctrlFlat;
+					flattenGenoCnt(caseGenoCnt[i], ctrlGenoCnt[i], caseFlat, ctrlFlat);
+					denseChiSqTest(caseFlat, ctrlFlat,
+						res[GENO_CHISQ][first + i], res[GENO_CHISQ_P][first + i]);
+				}
+				if (testSp[ARMITAGE_P])
+					res[ARMITAGE_P][first + i] = denseArmitageTest(caseGenoCnt[i],
+						ctrlGenoCnt[i], blockMultiAllelic);
+				// total counts
+				addCounts(allCaseAlleleCnt[i], caseAlleleCnt[i]);
+				addCounts(allCtrlAlleleCnt[i], ctrlAlleleCnt[i]);
+				if (hasGenoTest) {
+					for (size_t a = 0; a < caseGenoCnt[i].size(); ++a) {
+						if (a >= allCaseGenoCnt[i].size())
+							allCaseGenoCnt[i].resize(a + 1);
+						addCounts(allCaseGenoCnt[i][a], caseGenoCnt[i][a]);
+					}
+					for (size_t a = 0; a < ctrlGenoCnt[i].size(); ++a) {
+						if (a >= allCtrlGenoCnt[i].size())
+							allCtrlGenoCnt[i].resize(a + 1);
+						addCounts(allCtrlGenoCnt[i][a], ctrlGenoCnt[i][a]);
+					}
+				}
+			}
+		}
+		TESTRESULTS & res = results.back();
+		for (size_t i = 0; i < n; ++i) {
+			if (testAll[ALLELE_CHISQ])
+				denseChiSqTest(allCaseAlleleCnt[i], allCtrlAlleleCnt[i],
+					res[ALLELE_CHISQ][first + i], res[ALLELE_CHISQ_P][first + i]);
+			if (testAll[GENO_CHISQ]) {
+				vectoru caseFlat;
+				vectoru ctrlFlat;
+				flattenGenoCnt(allCaseGenoCnt[i], allCtrlGenoCnt[i], caseFlat, ctrlFlat);
+				denseChiSqTest(caseFlat, ctrlFlat,
+					res[GENO_CHISQ][first + i], res[GENO_CHISQ_P][first + i]);
+			}
+			if (testAll[ARMITAGE_P])
+				res[ARMITAGE_P][first + i] = denseArmitageTest(allCaseGenoCnt[i],
+					allCtrlGenoCnt[i], blockMultiAllelic);
+		}
+		if (blockMultiAllelic) {
+#pragma omp critical
+			multiAllelic = true;
+		}
+	}
+	DBG_FAILIF(multiAllelic, ValueError,
+		"Armitage trend test can only be applied to diallelic markers.");
+}
+
+
+#endif
+
+bool statAssociation::apply(Population & pop) const
+{
+	if (m_loci.empty())
+		return true;
+
+	const vectoru & loci = m_loci.elems(&pop);
+
+	size_t ply = pop.ploidy();
+	// tests for each (virtual) subpopulation and for all subpopulations
+	vector<bool> testSp(NUM_ASSOCIATION_TESTS, false);
+	vector<bool> testAll(NUM_ASSOCIATION_TESTS, false);
+	testSp[ALLELE_CHISQ] = m_vars.contains(Allele_ChiSq_sp_String) || m_vars.contains(Allele_ChiSq_p_sp_String);
+	testSp[GENO_CHISQ] = m_vars.contains(Geno_ChiSq_sp_String) || m_vars.contains(Geno_ChiSq_p_sp_String);
+	testSp[ARMITAGE_P] = m_vars.contains(Armitage_p_sp_String);
+	testAll[ALLELE_CHISQ] = m_vars.contains(Allele_ChiSq_String) || m_vars.contains(Allele_ChiSq_p_String);
+	testAll[GENO_CHISQ] = m_vars.contains(Geno_ChiSq_String) || m_vars.contains(Geno_ChiSq_p_String);
+	testAll[ARMITAGE_P] = m_vars.contains(Armitage_p_String);
+	bool hasGenoTest = testSp[GENO_CHISQ] || testAll[GENO_CHISQ] ||
+	                   testSp[ARMITAGE_P] || testAll[ARMITAGE_P];
+	DBG_FAILIF(hasGenoTest && ply != 2, ValueError,
+		"Genotype test can only be performed for diploid populations.");
+
+	// selected (virtual) subpopulatons.
+	subPopList subPops = m_subPops.expandFrom(pop);
+	// results for each subpopulation, and for all subpopulations
+	vector<TESTRESULTS> results(subPops.size() + 1,
+		TESTRESULTS(NUM_ASSOCIATION_TESTS, vectorf(loci.size(), 0.)));
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+	// dense tables apply if all loci are on autosomes or customized
+	// chromosomes and all individuals have the same number of alleles.
+	bool dense = !pop.isHaplodiploid() && (ply == 2 || !hasGenoTest);
+	for (size_t i = 0; i < loci.size() && dense; ++i) {
+		size_t chromType = pop.chromType(pop.chromLocusPair(loci[i]).first);
+		dense = chromType == AUTOSOME || chromType == CUSTOMIZED;
+	}
+	if (dense)
+		denseTests(pop, loci, subPops, testSp, testAll, results);
+	else
+		mapTests(pop, loci, subPops, testSp, testAll, results);
+#else
+	mapTests(pop, loci, subPops, testSp, testAll, results);
+#endif
+	//
+	// output variables.
+	for (size_t sp = 0; sp < subPops.size(); ++sp) {
+		const TESTRESULTS & res = results[sp];
+		if (m_vars.contains(Allele_ChiSq_sp_String))
+			setTestVar(pop, subPopVar_String(subPops[sp], Allele_ChiSq_String, m_suffix), loci, res[ALLELE_CHISQ]);
+		if (m_vars.contains(Allele_ChiSq_p_sp_String))
+			setTestVar(pop, subPopVar_String(subPops[sp], Allele_ChiSq_p_String, m_suffix), loci, res[ALLELE_CHISQ_P]);
+		if (m_vars.contains(Geno_ChiSq_sp_String))
+			setTestVar(pop, subPopVar_String(subPops[sp], Geno_ChiSq_String, m_suffix), loci, res[GENO_CHISQ]);
+		if (m_vars.contains(Geno_ChiSq_p_sp_String))
+			setTestVar(pop, subPopVar_String(subPops[sp], Geno_ChiSq_p_String, m_suffix), loci, res[GENO_CHISQ_P]);
+		if (m_vars.contains(Armitage_p_sp_String))
+			setTestVar(pop, subPopVar_String(subPops[sp], Armitage_p_String, m_suffix), loci, res[ARMITAGE_P]);
 	}
+	const TESTRESULTS & res = results.back();
+	if (m_vars.contains(Allele_ChiSq_String))
+		setTestVar(pop, Allele_ChiSq_String + m_suffix, loci, res[ALLELE_CHISQ]);
+	if (m_vars.contains(Allele_ChiSq_p_String))
+		setTestVar(pop, Allele_ChiSq_p_String + m_suffix, loci, res[ALLELE_CHISQ_P]);
+	if (m_vars.contains(Geno_ChiSq_String))
+		setTestVar(pop, Geno_ChiSq_String + m_suffix, loci, res[GENO_CHISQ]);
+	if (m_vars.contains(Geno_ChiSq_p_String))
+		setTestVar(pop, Geno_ChiSq_p_String + m_suffix, loci, res[GENO_CHISQ_P]);
+	if (m_vars.contains(Armitage_p_String))
+		setTestVar(pop, Armitage_p_String + m_suffix, loci, res[ARMITAGE_P]);
 	return true;
 }
 
 
-statNeutrality::statNeutrality(const lociList & loci, const subPopList & subPops,
-	const stringList & vars, const string & suffix) :
-	m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix)
+statNeutrality::statNeutrality(const lociList & loci, const floatList & window,
+	const subPopList & subPops, const stringList & vars, const string & suffix) :
+	m_loci(loci), m_width(-1), m_step(-1), m_subPops(subPops), m_vars(), m_suffix(suffix)
 {
+	const vectorf & win = window.elems();
+
+	if (!win.empty()) {
+		PARAM_FAILIF(win.size() > 2 || win[0] <= 0 || (win.size() == 2 && win[1] <= 0), ValueError,
+			"Parameter neutrality_window should be a positive window width and an optional step.");
+		m_width = win[0];
+		m_step = win.size() == 2 ? win[1] : win[0];
+	}
+
 	const char * allowedVars[] = {
-		Neutra_Pi_String, Neutra_Pi_sp_String, ""
+		Neutra_Pi_String,	  Neutra_Pi_sp_String,
+		Theta_W_String,		  Theta_W_sp_String,
+		Tajima_D_String,	  Tajima_D_sp_String,
+		Neutra_window_String, Neutra_window_sp_String,""
 	};
-	const char * defaultVars[] = { Neutra_Pi_String, "" };
+	const char * defaultVars[] = { Neutra_Pi_String, Theta_W_String, Tajima_D_String,
+		                           Neutra_window_String, "" };
 
 	m_vars.obtainFrom(vars, allowedVars, defaultVars);
 }
@@ -2934,54 +4240,169 @@ string statNeutrality::describe(bool /* format */) const
 {
 	string desc;
 
-	if (!m_loci.empty())
+	if (!m_loci.empty()) {
 		desc += "perform neutrality tests";
+		if (m_width > 0)
+			desc += (boost::format(" in windows of width %1% and step %2%") % m_width % m_step).str();
+	}
 	return desc;
 }
 
 
-double statNeutrality::calcPi(HAPLOLIST::const_iterator begin, HAPLOLIST::const_iterator end) const
+void statNeutrality::siteDiversity(const SITECNTLIST & cnt, size_t numSeq,
+                                   vectorf & diff, vectoru & seg) const
 {
-	double diffCnt = 0;
-	int numComparison = 0;
-
-	if (numThreads() > 1) {
-#ifdef _OPENMP
-		size_t size = end - begin;
-#  pragma omp parallel reduction(+ : diffCnt, numComparison)
-		{
-			size_t id = omp_get_thread_num();
-			HAPLOLIST::const_iterator it = begin + id * (size / numThreads());
-			HAPLOLIST::const_iterator itEnd = id == numThreads() - 1 ? end : it + (size / numThreads());
-			for (; it != itEnd; ++it) {
-				HAPLOLIST::const_iterator it1 = it;
-				for (++it1; it1 != end; ++it1) {
-					const vectora & seq1 = *it;
-					const vectora & seq2 = *it1;
-					size_t sz = seq1.size();
-					for (size_t i = 0; i < sz; ++i)
-						diffCnt += seq1[i] != seq2[i];
-					++numComparison;
-				}
-			}
+	diff.resize(cnt.size());
+	seg.resize(cnt.size());
+	for (size_t idx = 0; idx < cnt.size(); ++idx) {
+		// number of pairs of sequences with different alleles is
+		// (n^2 - sum c_a^2) / 2 for allele counts c_a
+		size_t sumSq = 0;
+		size_t numAlleles = 0;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+		SITECNT::const_iterator it = cnt[idx].begin();
+		SITECNT::const_iterator itEnd = cnt[idx].end();
+		for (; it != itEnd; ++it) {
+			sumSq += it->second * it->second;
+			numAlleles += it->second > 0;
+		}
+#else
+		for (size_t a = 0; a < cnt[idx].size(); ++a) {
+			sumSq += cnt[idx][a] * cnt[idx][a];
+			numAlleles += cnt[idx][a] > 0;
 		}
 #endif
-	}   else{
-		HAPLOLIST::const_iterator it = begin;
-		for (; it != end; ++it) {
-			HAPLOLIST::const_iterator it1 = it;
-			for (++it1; it1 != end; ++it1) {
-				const vectora & seq1 = *it;
-				const vectora & seq2 = *it1;
-				size_t sz = seq1.size();
-				for (size_t i = 0; i < sz; ++i)
-					diffCnt += seq1[i] != seq2[i];
-				++numComparison;
+		diff[idx] = static_cast<double>((numSeq * numSeq - sumSq) / 2);
+		seg[idx] = numAlleles > 1;
+	}
+}
+
+
+void statNeutrality::neutralityStats(double diff, size_t numSegSites, size_t numSeq,
+                                     double & pi, double & thetaW, double & tajimaD) const
+{
+	pi = 0;
+	thetaW = 0;
+	tajimaD = 0;
+	// return 0 if there is only one sequence
+	if (numSeq < 2)
+		return;
+
+	double n = static_cast<double>(numSeq);
+	double S = static_cast<double>(numSegSites);
+	pi = diff / (n * (n - 1) / 2);
+	// Watterson's theta and Tajima's D (Tajima 1989)
+	double a1 = 0;
+	double a2 = 0;
+	for (size_t i = 1; i < numSeq; ++i) {
+		a1 += 1. / i;
+		a2 += 1. / (static_cast<double>(i) * i);
+	}
+	thetaW = S / a1;
+	double b1 = (n + 1) / (3 * (n - 1));
+	double b2 = 2 * (n * n + n + 3) / (9 * n * (n - 1));
+	double c1 = b1 - 1 / a1;
+	double c2 = b2 - (n + 2) / (a1 * n) + a2 / (a1 * a1);
+	double var = c1 / a1 * S + c2 / (a1 * a1 + a2) * S * (S - 1);
+	if (numSegSites > 0 && var > 0)
+		tajimaD = (pi - thetaW) / sqrt(var);
+}
+
+
+PyObject * statNeutrality::windowDict(const vectoru & loci, const Population & pop,
+                                      const vectorf & diff, const vectoru & seg, size_t numSeq) const
+{
+	// loci sorted by chromosome and position
+	vector<std::pair<std::pair<size_t, double>, size_t> > sorted(loci.size());
+	for (size_t idx = 0; idx < loci.size(); ++idx)
+		sorted[idx] = std::make_pair(std::make_pair(pop.chromLocusPair(loci[idx]).first,
+				pop.locusPos(loci[idx])), idx);
+	std::sort(sorted.begin(), sorted.end());
+
+	vectorf chrom, start, end, numSites, Pi, thetaW, tajimaD;
+	size_t first = 0;
+	while (first < sorted.size()) {
+		size_t ch = sorted[first].first.first;
+		size_t last = first;
+		while (last < sorted.size() && sorted[last].first.first == ch)
+			++last;
+		// windows [k * step, k * step + width) that contain loci on this chromosome
+		double minPos = sorted[first].first.second;
+		double maxPos = sorted[last - 1].first.second;
+		double k = floor((minPos - m_width) / m_step) + 1;
+		size_t lo = first;
+		for (; k * m_step <= maxPos; ++k) {
+			double winStart = k * m_step;
+			double winEnd = winStart + m_width;
+			while (lo < last && sorted[lo].first.second < winStart)
+				++lo;
+			double winDiff = 0;
+			size_t winSeg = 0;
+			size_t winSites = 0;
+			for (size_t i = lo; i < last && sorted[i].first.second < winEnd; ++i) {
+				winDiff += diff[sorted[i].second];
+				winSeg += seg[sorted[i].second];
+				++winSites;
 			}
+			if (winSites == 0)
+				continue;
+			double pi, tw, td;
+			neutralityStats(winDiff, winSeg, numSeq, pi, tw, td);
+			chrom.push_back(static_cast<double>(ch));
+			start.push_back(winStart);
+			end.push_back(winEnd);
+			numSites.push_back(static_cast<double>(winSites));
+			Pi.push_back(pi);
+			thetaW.push_back(tw);
+			tajimaD.push_back(td);
 		}
+		first = last;
+	}
+	PyObject * res = PyDict_New();
+	const char * keys[] = { "chrom", "start", "end", "numSites", "Pi", "Theta_W", "Tajima_D" };
+	const vectorf * values[] = { &chrom, &start, &end, &numSites, &Pi, &thetaW, &tajimaD };
+	for (size_t i = 0; i < 7; ++i) {
+		PyObject * arr = Double_Vec_As_Array(*values[i]);
+		PyDict_SetItemString(res, keys[i], arr);
+		Py_DECREF(arr);
+	}
+	return res;
+}
+
+
+void statNeutrality::outputVars(Population & pop, const vectoru & loci, const SITECNTLIST & cnt,
+                                size_t numSeq, const vspID & subPop) const
+{
+	vectorf diff;
+	vectoru seg;
+
+	siteDiversity(cnt, numSeq, diff, seg);
+	double totalDiff = std::accumulate(diff.begin(), diff.end(), 0.);
+	size_t numSegSites = std::accumulate(seg.begin(), seg.end(), size_t(0));
+	double pi, thetaW, tajimaD;
+	neutralityStats(totalDiff, numSegSites, numSeq, pi, thetaW, tajimaD);
+
+	if (subPop.valid()) {
+		if (m_vars.contains(Neutra_Pi_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPop, Neutra_Pi_String, m_suffix), pi);
+		if (m_vars.contains(Theta_W_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPop, Theta_W_String, m_suffix), thetaW);
+		if (m_vars.contains(Tajima_D_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPop, Tajima_D_String, m_suffix), tajimaD);
+		if (m_width > 0 && m_vars.contains(Neutra_window_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPop, Neutra_window_String, m_suffix),
+				windowDict(loci, pop, diff, seg, numSeq));
+	} else {
+		if (m_vars.contains(Neutra_Pi_String))
+			pop.getVars().setVar(Neutra_Pi_String + m_suffix, pi);
+		if (m_vars.contains(Theta_W_String))
+			pop.getVars().setVar(Theta_W_String + m_suffix, thetaW);
+		if (m_vars.contains(Tajima_D_String))
+			pop.getVars().setVar(Tajima_D_String + m_suffix, tajimaD);
+		if (m_width > 0 && m_vars.contains(Neutra_window_String))
+			pop.getVars().setVar(Neutra_window_String + m_suffix,
+				windowDict(loci, pop, diff, seg, numSeq));
 	}
-	// return 0 if there is only one sequence
-	return numComparison == 0 ? 0 : diffCnt / numComparison;
 }
 
 
@@ -3000,8 +4421,12 @@ bool statNeutrality::apply(Population & pop) const
 			ValueError, "All loci must be from chromosomes of the same type.");
 	}
 #endif
-	// count for all specified subpopulations
-	HAPLOLIST allHaplotypes;
+	bool spVars = m_vars.contains(Neutra_Pi_sp_String) || m_vars.contains(Theta_W_sp_String)
+	              || m_vars.contains(Tajima_D_sp_String) || (m_width > 0 && m_vars.contains(Neutra_window_sp_String));
+	// allele counts at each locus, which are sufficient to calculate the
+	// number of pairwise differences and segregating sites
+	SITECNTLIST allCnt(nLoci);
+	size_t allSeq = 0;
 	// selected (virtual) subpopulatons.
 	subPopList subPops = m_subPops.expandFrom(pop);
 	subPopList::const_iterator it = subPops.begin();
@@ -3010,11 +4435,11 @@ bool statNeutrality::apply(Population & pop) const
 	for (; it != itEnd; ++it) {
 		pop.activateVirtualSubPop(*it);
 
-		size_t spBegin = allHaplotypes.size();
+		SITECNTLIST cnt(nLoci);
+		size_t numSeq = 0;
 		// go through all individual
 		IndIterator ind = pop.indIterator(it->subPop());
 		for (; ind.valid(); ++ind) {
-			vectora haplotype(nLoci);
 			for (size_t p = 0; p < ply; ++p) {
 				if (p == 1 && ind->sex() == MALE && pop.isHaplodiploid())
 					continue;
@@ -3025,26 +4450,166 @@ bool statNeutrality::apply(Population & pop) const
 					continue;
 				if (chromType == MITOCHONDRIAL && p > 0)
 					continue;
-				for (size_t idx = 0; idx < nLoci; ++idx)
-					haplotype[idx] = TO_ALLELE(ind->allele(loci[idx], p));
-				allHaplotypes.push_back(haplotype);
+				for (size_t idx = 0; idx < nLoci; ++idx) {
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+					++cnt[idx][TO_ALLELE(ind->allele(loci[idx], p))];
+#else
+					countAllele(cnt[idx], TO_ALLELE(ind->allele(loci[idx], p)));
+#endif
+				}
+				++numSeq;
 			}
 		}
-		// output variable.
-		if (m_vars.contains(Neutra_Pi_sp_String))
-			pop.getVars().setVar(subPopVar_String(*it, Neutra_Pi_String, m_suffix),
-				calcPi(allHaplotypes.begin() + spBegin, allHaplotypes.end()));
 		pop.deactivateVirtualSubPop(it->subPop());
+		// output variable.
+		if (spVars)
+			outputVars(pop, loci, cnt, numSeq, *it);
+		// merge counts
+		for (size_t idx = 0; idx < nLoci; ++idx) {
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+			SITECNT::const_iterator cIt = cnt[idx].begin();
+			SITECNT::const_iterator cEnd = cnt[idx].end();
+			for (; cIt != cEnd; ++cIt)
+				allCnt[idx][cIt->first] += cIt->second;
+#else
+			if (allCnt[idx].size() < cnt[idx].size())
+				allCnt[idx].resize(cnt[idx].size(), 0);
+			for (size_t a = 0; a < cnt[idx].size(); ++a)
+				allCnt[idx][a] += cnt[idx][a];
+#endif
+		}
+		allSeq += numSeq;
 	}
+	outputVars(pop, loci, allCnt, allSeq, vspID());
+	return true;
+}
+
+
+statSFS::statSFS(const lociList & loci, const subPopList & subPops,
+	const stringList & vars, const string & suffix)
+	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix)
+{
+	const char * allowedVars[] = {
+		SFS_String,		   SFS_sp_String,
+		SFS_folded_String, SFS_folded_sp_String,
+		SFS_joint_String,  ""
+	};
+	const char * defaultVars[] = { SFS_String, "" };
 
-	if (m_vars.contains(Neutra_Pi_String))
-		pop.getVars().setVar(Neutra_Pi_String + m_suffix, calcPi(allHaplotypes.begin(), allHaplotypes.end()));
+	m_vars.obtainFrom(vars, allowedVars, defaultVars);
+}
+
+
+string statSFS::describe(bool /* format */) const
+{
+	if (m_loci.empty())
+		return "";
+	return "calculate site frequency spectrum";
+}
+
+
+PyObject * statSFS::SFSArray(const vectoru & derived, const vectoru & total, bool folded) const
+{
+	size_t n = total.empty() ? 0 : *std::max_element(total.begin(), total.end());
+	vectorf sfs(folded ? n / 2 + 1 : n + 1, 0.);
+
+	for (size_t idx = 0; idx < derived.size(); ++idx)
+		sfs[folded ? std::min(derived[idx], total[idx] - derived[idx]) : derived[idx]] += 1;
+	return Double_Vec_As_Array(sfs);
+}
+
+
+bool statSFS::apply(Population & pop) const
+{
+	if (m_loci.empty())
+		return true;
+
+	const vectoru & loci = m_loci.elems(&pop);
+	subPopList subPops = m_subPops.expandFrom(pop);
+	size_t nLoci = loci.size();
+	if (nLoci == 0)
+		return true;
+
+	// number of derived (non-zero) alleles and of all alleles at each
+	// locus in each (virtual) subpopulation
+	vector<vectoru> derived(subPops.size(), vectoru(nLoci, 0));
+	vector<vectoru> total(subPops.size(), vectoru(nLoci, 0));
+	for (size_t s = 0; s < subPops.size(); ++s) {
+		pop.activateVirtualSubPop(subPops[s]);
+		size_t sp = subPops[s].subPop();
+#ifndef MUTANTALLELE
+#  pragma omp parallel for if(numThreads() > 1)
+#endif
+		for (ssize_t idx = 0; idx < static_cast<ssize_t>(nLoci); ++idx) {
+			size_t d = 0;
+			size_t t = 0;
+			IndAlleleIterator a = pop.alleleIterator(loci[idx], sp);
+			for (; a.valid(); ++a) {
+				d += a.value() != 0;
+				++t;
+			}
+			derived[s][idx] = d;
+			total[s][idx] = t;
+		}
+		pop.deactivateVirtualSubPop(sp);
+
+		if (m_vars.contains(SFS_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPops[s], SFS_String, m_suffix),
+				SFSArray(derived[s], total[s], false));
+		if (m_vars.contains(SFS_folded_sp_String))
+			pop.getVars().setVar(subPopVar_String(subPops[s], SFS_folded_String, m_suffix),
+				SFSArray(derived[s], total[s], true));
+	}
+
+	if (m_vars.contains(SFS_String) || m_vars.contains(SFS_folded_String)) {
+		vectoru allDerived(nLoci, 0);
+		vectoru allTotal(nLoci, 0);
+		for (size_t s = 0; s < subPops.size(); ++s) {
+			for (size_t idx = 0; idx < nLoci; ++idx) {
+				allDerived[idx] += derived[s][idx];
+				allTotal[idx] += total[s][idx];
+			}
+		}
+		if (m_vars.contains(SFS_String))
+			pop.getVars().setVar(SFS_String + m_suffix, SFSArray(allDerived, allTotal, false));
+		if (m_vars.contains(SFS_folded_String))
+			pop.getVars().setVar(SFS_folded_String + m_suffix, SFSArray(allDerived, allTotal, true));
+	}
+
+	if (m_vars.contains(SFS_joint_String)) {
+		// keys of (virtual) subpopulations as in subPop[sp]
+		vector<PyObject *> keys(subPops.size());
+		for (size_t s = 0; s < subPops.size(); ++s)
+			keys[s] = subPops[s].isVirtual() ?
+			          Py_BuildValue("(nn)", static_cast<Py_ssize_t>(subPops[s].subPop()),
+				static_cast<Py_ssize_t>(subPops[s].virtualSubPop())) :
+			          PyLong_FromSize_t(subPops[s].subPop());
+		PyObject * joint = PyDict_New();
+		for (size_t s1 = 0; s1 < subPops.size(); ++s1) {
+			size_t n1 = *std::max_element(total[s1].begin(), total[s1].end());
+			for (size_t s2 = s1 + 1; s2 < subPops.size(); ++s2) {
+				size_t n2 = *std::max_element(total[s2].begin(), total[s2].end());
+				vectorf sfs((n1 + 1) * (n2 + 1), 0.);
+				for (size_t idx = 0; idx < nLoci; ++idx)
+					sfs[derived[s1][idx] * (n2 + 1) + derived[s2][idx]] += 1;
+				PyObject * key = PyTuple_Pack(2, keys[s1], keys[s2]);
+				PyObject * arr = Double_Vec_As_Array(sfs);
+				PyDict_SetItem(joint, key, arr);
+				Py_DECREF(key);
+				Py_DECREF(arr);
+			}
+		}
+		for (size_t s = 0; s < subPops.size(); ++s)
+			Py_DECREF(keys[s]);
+		pop.getVars().setVar(SFS_joint_String + m_suffix, joint);
+	}
 	return true;
 }
 
 
-statStructure::statStructure(const lociList & Fst, const subPopList & subPops, const stringList & vars, const string & suffix)
-	: m_loci(Fst), m_subPops(subPops), m_vars(), m_suffix(suffix)
+statStructure::statStructure(const lociList & Fst, const subPopList & subPops, const stringList & vars,
+	const string & suffix, bool asArray)
+	: m_loci(Fst), m_subPops(subPops), m_vars(), m_suffix(suffix), m_asArray(asArray)
 {
 	const char * allowedVars[] = {
 		fst_String, fis_String, fit_String,
@@ -3067,173 +4632,113 @@ string statStructure::describe(bool /* format */) const
 }
 
 
-void statStructure::calcGst_Nei73(const vectoru & loci, const vectoru & n_i, LOCIFREQLIST & alleleFreq,
-                                  const ALLELELIST & alleles, double & Gst, uintDict & gst) const
+void statStructure::calcGst_Nei73(const vectoru & n_i, const vector<vectorf> & alleleFreq,
+                                  double & D_st, double & J_t) const
 {
-	double H_t_all = 0.;
-	double D_st_all = 0.;
-
 	size_t numSP = n_i.size();
+	size_t numAlleles = alleleFreq.empty() ? 0 : alleleFreq[0].size();
 	double n = static_cast<double>(accumulate(n_i.begin(), n_i.end(), size_t(0)));
 
-	// for each locus
-	for (size_t st = 0; st < loci.size(); ++st) {
-		size_t loc = loci[st];
-		// D_st = Sum_i,j D_ij / s^2
-		double D_st = 0;
-		// i, j for subpopulation
-		for (size_t i = 0; i < numSP; ++i) {
-			for (size_t j = 0; j < numSP; ++j) {
-				// D_ij = Sum_k (x_ik - x_jk)^2 /2 (i,j are subpops, k is allele)
-				double D_ij = 0;
-				// for each allele
-				ALLELES::const_iterator aIt = alleles[st].begin();
-				ALLELES::const_iterator aEnd = alleles[st].end();
-				for (; aIt != aEnd; ++aIt) {
-					Allele allele = aIt->first;
-					D_ij += pow(alleleFreq[i][loc][allele] - alleleFreq[j][loc][allele], 2);
-				}
-				D_ij /= 2.;
-				D_st += D_ij;
-			}
+	// D_st = Sum_i,j D_ij / s^2
+	D_st = 0;
+	// i, j for subpopulation
+	for (size_t i = 0; i < numSP; ++i) {
+		for (size_t j = 0; j < numSP; ++j) {
+			// D_ij = Sum_k (x_ik - x_jk)^2 /2 (i,j are subpops, k is allele)
+			double D_ij = 0;
+			// for each allele
+			for (size_t k = 0; k < numAlleles; ++k)
+				D_ij += pow(alleleFreq[i][k] - alleleFreq[j][k], 2);
+			D_ij /= 2.;
+			D_st += D_ij;
 		}
-		D_st /= (numSP * numSP);
-		//
-		// J_t = Sum_k (x_dot_k^2)
-		//
-		// NOTE: w_i is chosen as n_i/n instead of 1/numSP as
-		// used in the paper.
-		double J_t = 0;
-		ALLELES::const_iterator aIt = alleles[st].begin();
-		ALLELES::const_iterator aEnd = alleles[st].end();
-		for (; aIt != aEnd; ++aIt) {
-			Allele allele = aIt->first;
-			double x_dotk = 0;
-			for (size_t i = 0; i < numSP; ++i)
-				x_dotk += n_i[i] * alleleFreq[i][loc][allele];
-			x_dotk /= n;
-			J_t += pow(x_dotk, 2);
-		}
-		gst[loc] = fcmp_eq(J_t, 1.0) ? 0 : D_st / (1.0 - J_t);
-		H_t_all += 1 - J_t;
-		D_st_all += D_st;
 	}
-	Gst = fcmp_eq(H_t_all, 0.) ? 0 : D_st_all / H_t_all;
+	D_st /= (numSP * numSP);
+	//
+	// J_t = Sum_k (x_dot_k^2)
+	//
+	// NOTE: w_i is chosen as n_i/n instead of 1/numSP as
+	// used in the paper.
+	J_t = 0;
+	for (size_t k = 0; k < numAlleles; ++k) {
+		double x_dotk = 0;
+		for (size_t i = 0; i < numSP; ++i)
+			x_dotk += n_i[i] * alleleFreq[i][k];
+		x_dotk /= n;
+		J_t += pow(x_dotk, 2);
+	}
 }
 
 
-void statStructure::calcFst_WC84(const vectoru & loci, const vectoru & n_i, LOCIFREQLIST & alleleFreq, LOCIFREQLIST & heteroFreq,
-                                 const ALLELELIST & alleles, double & Fst, double & Fis, double & Fit,
-                                 uintDict & fst, uintDict & fis, uintDict & fit) const
+void statStructure::calcFst_WC84(const vectoru & n_i, const vector<vectorf> & alleleFreq,
+                                 const vector<vectorf> & heteroFreq, double & a, double & b, double & c) const
 {
-	double aa = 0.;
-	double bb = 0.;
-	double cc = 0.;
-
+	size_t numAlleles = alleleFreq.empty() ? 0 : alleleFreq[0].size();
 	// vector to store p[i]
 	vectorf p_i = vectorf(n_i.size());
 	double n = static_cast<double>(accumulate(n_i.begin(), n_i.end(), size_t(0)));
 
-	// calculate Fst for each locus
-	for (size_t st = 0; st < loci.size(); ++st) {
-		// m_loci should been expanded ...
-		size_t loc = loci[st];
-
-		// n_bar
-		double r = static_cast<double>(n_i.size());
-		double n_bar = n / r;
-
-		// n_c
-		double n_c = n;
-		for (int i = 0; i < r; ++i)
-			n_c -= n_i[i] * n_i[i] / n;
-		n_c /= (r - 1);
-
-		double a = 0.0, b = 0.0, c = 0.0;
-
-		ALLELES::const_iterator aIt = alleles[st].begin();
-		ALLELES::const_iterator aEnd = alleles[st].end();
-		for (; aIt != aEnd; ++aIt) {
-			Allele allele = aIt->first;
-			// p_i
-			for (int sp = 0; sp < r; ++sp)
-				p_i[sp] = alleleFreq[sp][loc][allele];
-
-			// p_bar (there are 2n alleles, but this does not affect the result)
-			double p_bar = 0;
-			for (int sp = 0; sp < r; ++sp)
-				p_bar += n_i[sp] * p_i[sp];
-			p_bar /= n;
-
-			// s^2
-			double s_2 = 0;
-			for (int sp = 0; sp < r; ++sp)
-				s_2 += n_i[sp] * (p_i[sp] - p_bar) * (p_i[sp] - p_bar);
-			s_2 /= (r - 1) * n_bar;
-
-			// h_bar
-			double h_bar = 0;
-			for (int sp = 0; sp < r; ++sp)
-				h_bar += heteroFreq[sp][loc][allele] * n_i[sp];
-			h_bar /= n;
-
-			// a, b, c
-			a += n_bar / n_c * (s_2 - (p_bar * (1 - p_bar) - (r - 1.) / r * s_2 - h_bar / 4.) / (n_bar - 1.));
-			b += n_bar / (n_bar - 1) * (p_bar * (1 - p_bar) - (r - 1) / r * s_2 - (2 * n_bar - 1) / (4. * n_bar) * h_bar);
-			c += h_bar / 2.;
-
-			DBG_DO(DBG_STATOR, cerr << "allele " << allele << "\tn_c: " << n_c
-				                    << "\tp_i: " << p_i << "\tp_bar: " << p_bar << "\ts^2: " << s_2 << "\th_bar:"
-				                    << h_bar << "\ta: " << a << "\tb: " << b << "\tc: " << c << endl);
-		}                                                                                 // each allele
-
-		DBG_DO(DBG_STATOR, cerr << "Fst= " << a / (a + b + c) << endl);
-
-		fst[loc] = fcmp_eq(a + b + c, 0.) ? 0. : (a / (a + b + c));
-		fit[loc] = fcmp_eq(a + b + c, 0.) ? 1. : (1 - c / (a + b + c));
-		fis[loc] = fcmp_eq(b + c, 0.) ? 1. : (1 - c / (b + c));
-
-		aa += a;
-		bb += b;
-		cc += c;
-	}
-	Fst = fcmp_eq(aa + bb + cc, 0.) ? 0 : (aa / (aa + bb + cc));
-	Fit = fcmp_eq(aa + bb + cc, 0.) ? 1. : (1 - cc / (aa + bb + cc));
-	Fis = fcmp_eq(aa + bb + cc, 0) ? 1. : (1 - cc / (bb + cc));
+	// n_bar
+	double r = static_cast<double>(n_i.size());
+	double n_bar = n / r;
+
+	// n_c
+	double n_c = n;
+	for (int i = 0; i < r; ++i)
+		n_c -= n_i[i] * n_i[i] / n;
+	n_c /= (r - 1);
+
+	a = 0.0;
+	b = 0.0;
+	c = 0.0;
+
+	for (size_t k = 0; k < numAlleles; ++k) {
+		// p_i
+		for (int sp = 0; sp < r; ++sp)
+			p_i[sp] = alleleFreq[sp][k];
+
+		// p_bar (there are 2n alleles, but this does not affect the result)
+		double p_bar = 0;
+		for (int sp = 0; sp < r; ++sp)
+			p_bar += n_i[sp] * p_i[sp];
+		p_bar /= n;
+
+		// s^2
+		double s_2 = 0;
+		for (int sp = 0; sp < r; ++sp)
+			s_2 += n_i[sp] * (p_i[sp] - p_bar) * (p_i[sp] - p_bar);
+		s_2 /= (r - 1) * n_bar;
+
+		// h_bar
+		double h_bar = 0;
+		for (int sp = 0; sp < r; ++sp)
+			h_bar += heteroFreq[sp][k] * n_i[sp];
+		h_bar /= n;
+
+		// a, b, c
+		a += n_bar / n_c * (s_2 - (p_bar * (1 - p_bar) - (r - 1.) / r * s_2 - h_bar / 4.) / (n_bar - 1.));
+		b += n_bar / (n_bar - 1) * (p_bar * (1 - p_bar) - (r - 1) / r * s_2 - (2 * n_bar - 1) / (4. * n_bar) * h_bar);
+		c += h_bar / 2.;
+
+		DBG_DO(DBG_STATOR, cerr << "allele " << k << "\tn_c: " << n_c
+			                    << "\tp_i: " << p_i << "\tp_bar: " << p_bar << "\ts^2: " << s_2 << "\th_bar:"
+			                    << h_bar << "\ta: " << a << "\tb: " << b << "\tc: " << c << endl);
+	}                                                                                 // each allele
+
+	DBG_DO(DBG_STATOR, cerr << "Fst= " << a / (a + b + c) << endl);
 }
 
 
-bool statStructure::apply(Population & pop) const
+void statStructure::mapComponents(Population & pop, const vectoru & loci, const subPopList & subPops,
+                                  bool use_observed_het, vectoru & n_i, vector<vectorf> & comps) const
 {
-	if (m_loci.empty())
-		return true;
-
-	const vectoru & loci = m_loci.elems(&pop);
-
-	bool use_observed_het = true;
-	for (size_t idx = 0; idx < loci.size(); ++idx) {
-		size_t chromType = pop.chromType(pop.chromLocusPair(loci[idx]).first);
-		if (idx == 0)
-			use_observed_het = pop.ploidy() == 2 && (chromType == AUTOSOME || chromType == CUSTOMIZED);
-		else if ((pop.ploidy() == 2 && (chromType == AUTOSOME || chromType == CUSTOMIZED)) != use_observed_het)
-			throw ValueError("Structure statistics can only be estimated from loci on chromosomes of the same type, because other wise the observed number of alleles will be different.");
-	}
-
-	// selected (virtual) subpopulatons.
-	subPopList subPops = m_subPops.expandFrom(pop);
 	subPopList::const_iterator it = subPops.begin();
 	subPopList::const_iterator itEnd = subPops.end();
 	// count for all specified subpopulations
-	vectoru n_i(0);
 	ALLELELIST allAlleles(loci.size());
 	LOCIFREQLIST alleleFreq(subPops.size());
 	LOCIFREQLIST heteroFreq(subPops.size());
 	for (size_t spIdx = 0; it != itEnd; ++it, ++spIdx) {
-		if (m_vars.contains(AlleleNum_sp_String))
-			pop.getVars().removeVar(subPopVar_String(*it, AlleleNum_String, m_suffix));
-		if (m_vars.contains(AlleleFreq_sp_String))
-			pop.getVars().removeVar(subPopVar_String(*it, AlleleFreq_String, m_suffix));
-
 		pop.activateVirtualSubPop(*it);
 
 		size_t spSize = 0;
@@ -3300,37 +4805,186 @@ bool statStructure::apply(Population & pop) const
 		n_i.push_back(spSize);
 		pop.deactivateVirtualSubPop(it->subPop());
 	}
+	// frequencies of observed alleles
+	for (size_t idx = 0; idx < loci.size(); ++idx) {
+		size_t loc = loci[idx];
+		vector<vectorf> af(subPops.size());
+		vector<vectorf> hf(subPops.size());
+		ALLELES::const_iterator aIt = allAlleles[idx].begin();
+		ALLELES::const_iterator aEnd = allAlleles[idx].end();
+		for (; aIt != aEnd; ++aIt) {
+			for (size_t sp = 0; sp < subPops.size(); ++sp) {
+				af[sp].push_back(alleleFreq[sp][loc][aIt->first]);
+				hf[sp].push_back(heteroFreq[sp][loc][aIt->first]);
+			}
+		}
+		calcGst_Nei73(n_i, af, comps[NEI73_D_ST][idx], comps[NEI73_J_T][idx]);
+		calcFst_WC84(n_i, af, hf, comps[WC84_A][idx], comps[WC84_B][idx], comps[WC84_C][idx]);
+	}
+}
 
-	// Nei's Gst
-	double Gst = 0;
-	uintDict gst;
-	calcGst_Nei73(loci, n_i, alleleFreq, allAlleles, Gst, gst);
-	if (m_vars.contains(Gst_String))
-		pop.getVars().setVar(Gst_String + m_suffix, Gst);
-	if (m_vars.contains(gst_String))
-		pop.getVars().setVar(gst_String + m_suffix, gst);
 
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+
+#define STRUCTURE_BLOCK 256
+
+void statStructure::denseComponents(Population & pop, const vectoru & loci, const subPopList & subPops,
+                                    vectoru & n_i, vector<vectorf> & comps) const
+{
+	size_t nLoci = loci.size();
+	size_t nSP = subPops.size();
+
+	vector<vector<const Individual *> > inds(nSP);
+	for (size_t sp = 0; sp < nSP; ++sp) {
+		collectIndividuals(pop, subPops[sp], inds[sp]);
+		n_i.push_back(inds[sp].size());
+	}
+
+	size_t nBlocks = (nLoci + STRUCTURE_BLOCK - 1) / STRUCTURE_BLOCK;
+#pragma omp parallel for if(numThreads() > 1)
+	for (ssize_t blk = 0; blk < static_cast<ssize_t>(nBlocks); ++blk) {
+		size_t first = static_cast<size_t>(blk) * STRUCTURE_BLOCK;
+		size_t last = std::min(first + STRUCTURE_BLOCK, nLoci);
+		// allele and heterozygote counts, indexed by locus, subpopulation and allele
+		vector<vector<vectoru> > alleleCnt(last - first, vector<vectoru>(nSP));
+		vector<vector<vectoru> > heteroCnt(last - first, vector<vectoru>(nSP));
+		for (size_t sp = 0; sp < nSP; ++sp) {
+			vector<const Individual *>::const_iterator ind = inds[sp].begin();
+			vector<const Individual *>::const_iterator indEnd = inds[sp].end();
+			for (; ind != indEnd; ++ind) {
+				GenoIterator geno1 = (*ind)->genoBegin(0);
+				GenoIterator geno2 = (*ind)->genoBegin(1);
+				for (size_t idx = first; idx < last; ++idx) {
+					size_t a1 = DEREF_ALLELE(geno1 + loci[idx]);
+					size_t a2 = DEREF_ALLELE(geno2 + loci[idx]);
+					countAllele(alleleCnt[idx - first][sp], a1);
+					countAllele(alleleCnt[idx - first][sp], a2);
+					if (a1 != a2) {
+						countAllele(heteroCnt[idx - first][sp], a1);
+						countAllele(heteroCnt[idx - first][sp], a2);
+					}
+				}
+			}
+		}
+		for (size_t idx = first; idx < last; ++idx) {
+			const vector<vectoru> & ac = alleleCnt[idx - first];
+			const vector<vectoru> & hc = heteroCnt[idx - first];
+			size_t numAlleles = 0;
+			for (size_t sp = 0; sp < nSP; ++sp)
+				numAlleles = std::max(numAlleles, ac[sp].size());
+			// frequencies of observed alleles
+			vector<vectorf> af(nSP);
+			vector<vectorf> hf(nSP);
+			for (size_t a = 0; a < numAlleles; ++a) {
+				bool observed = false;
+				for (size_t sp = 0; sp < nSP && !observed; ++sp)
+					observed = a < ac[sp].size() && ac[sp][a] > 0;
+				if (!observed)
+					continue;
+				for (size_t sp = 0; sp < nSP; ++sp) {
+					if (n_i[sp] == 0) {
+						af[sp].push_back(0.);
+						hf[sp].push_back(0.);
+						continue;
+					}
+					af[sp].push_back(a < ac[sp].size() ? ac[sp][a] / (2. * n_i[sp]) : 0.);
+					hf[sp].push_back(a < hc[sp].size() ? hc[sp][a] / static_cast<double>(n_i[sp]) : 0.);
+				}
+			}
+			calcGst_Nei73(n_i, af, comps[NEI73_D_ST][idx], comps[NEI73_J_T][idx]);
+			calcFst_WC84(n_i, af, hf, comps[WC84_A][idx], comps[WC84_B][idx], comps[WC84_C][idx]);
+		}
+	}
+}
+
+
+#endif
+
+bool statStructure::apply(Population & pop) const
+{
+	if (m_loci.empty())
+		return true;
+
+	const vectoru & loci = m_loci.elems(&pop);
+
+	bool use_observed_het = true;
+	for (size_t idx = 0; idx < loci.size(); ++idx) {
+		size_t chromType = pop.chromType(pop.chromLocusPair(loci[idx]).first);
+		if (idx == 0)
+			use_observed_het = pop.ploidy() == 2 && (chromType == AUTOSOME || chromType == CUSTOMIZED);
+		else if ((pop.ploidy() == 2 && (chromType == AUTOSOME || chromType == CUSTOMIZED)) != use_observed_het)
+			throw ValueError("Structure statistics can only be estimated from loci on chromosomes of the same type, because other wise the observed number of alleles will be different.");
+	}
+
+	// selected (virtual) subpopulatons.
+	subPopList subPops = m_subPops.expandFrom(pop);
+	// size of (virtual) subpopulations
+	vectoru n_i(0);
+	vector<vectorf> comps(NUM_STRUCTURE_COMPONENTS, vectorf(loci.size(), 0.));
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+	if (use_observed_het && !pop.isHaplodiploid())
+		denseComponents(pop, loci, subPops, n_i, comps);
+	else
+		mapComponents(pop, loci, subPops, use_observed_het, n_i, comps);
+#else
+	mapComponents(pop, loci, subPops, use_observed_het, n_i, comps);
+#endif
+
+	// Nei's Gst
+	double H_t_all = 0.;
+	double D_st_all = 0.;
+	vectorf gst(loci.size());
 	// Weir and Cockerham 1984 Fst
-	double Fst = 0;
-	double Fis = 0;
-	double Fit = 0;
-	uintDict fst;
-	uintDict fis;
-	uintDict fit;
-	calcFst_WC84(loci, n_i, alleleFreq, heteroFreq, allAlleles, Fst, Fis, Fit, fst, fis, fit);
+	double aa = 0.;
+	double bb = 0.;
+	double cc = 0.;
+	vectorf fst(loci.size());
+	vectorf fis(loci.size());
+	vectorf fit(loci.size());
+	for (size_t idx = 0; idx < loci.size(); ++idx) {
+		double D_st = comps[NEI73_D_ST][idx];
+		double J_t = comps[NEI73_J_T][idx];
+		gst[idx] = fcmp_eq(J_t, 1.0) ? 0 : D_st / (1.0 - J_t);
+		H_t_all += 1 - J_t;
+		D_st_all += D_st;
+		//
+		double a = comps[WC84_A][idx];
+		double b = comps[WC84_B][idx];
+		double c = comps[WC84_C][idx];
+		fst[idx] = fcmp_eq(a + b + c, 0.) ? 0. : (a / (a + b + c));
+		fit[idx] = fcmp_eq(a + b + c, 0.) ? 1. : (1 - c / (a + b + c));
+		fis[idx] = fcmp_eq(b + c, 0.) ? 1. : (1 - c / (b + c));
+		aa += a;
+		bb += b;
+		cc += c;
+	}
+	double Gst = fcmp_eq(H_t_all, 0.) ? 0 : D_st_all / H_t_all;
+	double Fst = fcmp_eq(aa + bb + cc, 0.) ? 0 : (aa / (aa + bb + cc));
+	double Fit = fcmp_eq(aa + bb + cc, 0.) ? 1. : (1 - cc / (aa + bb + cc));
+	double Fis = fcmp_eq(aa + bb + cc, 0) ? 1. : (1 - cc / (bb + cc));
 	// post results
+	if (m_vars.contains(Gst_String))
+		pop.getVars().setVar(Gst_String + m_suffix, Gst);
 	if (m_vars.contains(Fst_String))
 		pop.getVars().setVar(Fst_String + m_suffix, Fst);
 	if (m_vars.contains(Fis_String))
 		pop.getVars().setVar(Fis_String + m_suffix, Fis);
 	if (m_vars.contains(Fit_String))
 		pop.getVars().setVar(Fit_String + m_suffix, Fit);
-	if (m_vars.contains(fst_String))
-		pop.getVars().setVar(fst_String + m_suffix, fst);
-	if (m_vars.contains(fis_String))
-		pop.getVars().setVar(fis_String + m_suffix, fis);
-	if (m_vars.contains(fit_String))
-		pop.getVars().setVar(fit_String + m_suffix, fit);
+	const char * locusVars[] = { gst_String, fst_String, fis_String, fit_String };
+	const vectorf * locusValues[] = { &gst, &fst, &fis, &fit };
+	for (size_t v = 0; v < 4; ++v) {
+		if (!m_vars.contains(locusVars[v]))
+			continue;
+		if (m_asArray)
+			pop.getVars().setVar(locusVars[v] + m_suffix, Double_Vec_As_Array(*locusValues[v]));
+		else {
+			uintDict values;
+			for (size_t idx = 0; idx < loci.size(); ++idx)
+				values[loci[idx]] = (*locusValues[v])[idx];
+			pop.getVars().setVar(locusVars[v] + m_suffix, values);
+		}
+	}
 	return true;
 }
 
@@ -3594,6 +5248,198 @@ bool statInbreeding::apply(Population & pop) const
 }
 
 
+statGRM::statGRM(const lociList & loci, const string & filename, const subPopList & subPops,
+	const stringList & vars, const string & suffix)
+	: m_loci(loci), m_filename(filename), m_subPops(subPops), m_vars(), m_suffix(suffix)
+{
+	const char * allowedVars[] = { GRM_String, IBS_String, "" };
+	const char * defaultVars[] = { GRM_String, "" };
+
+	m_vars.obtainFrom(vars, allowedVars, defaultVars);
+}
+
+
+string statGRM::describe(bool /* format */) const
+{
+	if (m_loci.empty())
+		return "";
+	string desc = "calculate genomic relationship matrix";
+	if (!m_filename.empty())
+		desc += " and write it to file " + m_filename;
+	return desc;
+}
+
+
+void statGRM::packGenotypes(const vector<Individual *> & inds, const vectoru & loci,
+                            size_t words, vector<uint64_t> & one, vector<uint64_t> & two) const
+{
+	one.assign(inds.size() * words, 0);
+	two.assign(inds.size() * words, 0);
+#ifndef MUTANTALLELE
+#  pragma omp parallel for if(numThreads() > 1)
+#endif
+	for (ssize_t i = 0; i < static_cast<ssize_t>(inds.size()); ++i) {
+		uint64_t * o = &one[i * words];
+		uint64_t * t = &two[i * words];
+		for (size_t idx = 0; idx < loci.size(); ++idx) {
+			size_t x = (inds[i]->allele(loci[idx], 0) != 0) + (inds[i]->allele(loci[idx], 1) != 0);
+			uint64_t bit = uint64_t(1) << (idx % 64);
+			if (x > 0)
+				o[idx / 64] |= bit;
+			if (x == 2)
+				t[idx / 64] |= bit;
+		}
+	}
+}
+
+
+// number of individuals in a block of the relationship matrices
+#define GRM_BLOCK 64
+
+void statGRM::IBSMatrix(size_t numInds, size_t numLoci, size_t words,
+                        const vector<uint64_t> & one, const vector<uint64_t> & two, vectorf & ibs) const
+{
+	ibs.assign(numInds * numInds, 0.);
+	if (numLoci == 0)
+		return;
+	size_t numBlocks = (numInds + GRM_BLOCK - 1) / GRM_BLOCK;
+	// because genotype x equals one + two with two implying one, the
+	// difference |x_i - x_j| equals the number of differing bits
+#pragma omp parallel for schedule(dynamic) if(numThreads() > 1)
+	for (ssize_t bi = 0; bi < static_cast<ssize_t>(numBlocks); ++bi) {
+		size_t iEnd = std::min(static_cast<size_t>(bi + 1) * GRM_BLOCK, numInds);
+		for (size_t bj = bi; bj < numBlocks; ++bj) {
+			size_t jEnd = std::min((bj + 1) * GRM_BLOCK, numInds);
+			for (size_t i = bi * GRM_BLOCK; i < iEnd; ++i) {
+				const uint64_t * oi = &one[i * words];
+				const uint64_t * ti = &two[i * words];
+				for (size_t j = std::max(i, bj * GRM_BLOCK); j < jEnd; ++j) {
+					const uint64_t * oj = &one[j * words];
+					const uint64_t * tj = &two[j * words];
+					size_t diff = 0;
+					for (size_t w = 0; w < words; ++w)
+						diff += popCount(oi[w] ^ oj[w]) + popCount(ti[w] ^ tj[w]);
+					ibs[i * numInds + j] = ibs[j * numInds + i] = 1. - diff / (2. * numLoci);
+				}
+			}
+		}
+	}
+}
+
+
+void statGRM::GRMMatrix(size_t numInds, size_t numLoci, size_t words,
+                        const vector<uint64_t> & one, const vector<uint64_t> & two, vectorf & grm) const
+{
+	grm.assign(numInds * numInds, 0.);
+	if (numInds == 0)
+		return;
+	// genotypes at a chunk of loci, standardized by the frequency of
+	// non-zero alleles, and stored for each individual
+	const size_t chunk = 256;
+	vectorf z(numInds * chunk);
+	size_t numBlocks = (numInds + GRM_BLOCK - 1) / GRM_BLOCK;
+	size_t polymorphic = 0;
+	for (size_t first = 0; first < numLoci; first += chunk) {
+		size_t last = std::min(first + chunk, numLoci);
+		size_t width = 0;
+		for (size_t idx = first; idx < last; ++idx) {
+			uint64_t bit = uint64_t(1) << (idx % 64);
+			size_t cnt = 0;
+			for (size_t i = 0; i < numInds; ++i)
+				cnt += ((one[i * words + idx / 64] & bit) != 0) + ((two[i * words + idx / 64] & bit) != 0);
+			double p = cnt / (2. * numInds);
+			if (fcmp_eq(p, 0.) || fcmp_eq(p, 1.))
+				continue;
+			double scale = 1. / sqrt(2. * p * (1. - p));
+			for (size_t i = 0; i < numInds; ++i) {
+				size_t x = ((one[i * words + idx / 64] & bit) != 0) + ((two[i * words + idx / 64] & bit) != 0);
+				z[i * chunk + width] = (x - 2. * p) * scale;
+			}
+			++width;
+		}
+		polymorphic += width;
+		// grm += z * z' in blocks of individuals
+#pragma omp parallel for schedule(dynamic) if(numThreads() > 1)
+		for (ssize_t bi = 0; bi < static_cast<ssize_t>(numBlocks); ++bi) {
+			size_t iEnd = std::min(static_cast<size_t>(bi + 1) * GRM_BLOCK, numInds);
+			for (size_t bj = bi; bj < numBlocks; ++bj) {
+				size_t jEnd = std::min((bj + 1) * GRM_BLOCK, numInds);
+				for (size_t i = bi * GRM_BLOCK; i < iEnd; ++i) {
+					const double * zi = &z[i * chunk];
+					for (size_t j = std::max(i, bj * GRM_BLOCK); j < jEnd; ++j) {
+						const double * zj = &z[j * chunk];
+						double sum = 0.;
+						for (size_t k = 0; k < width; ++k)
+							sum += zi[k] * zj[k];
+						grm[i * numInds + j] += sum;
+					}
+				}
+			}
+		}
+	}
+	for (size_t i = 0; i < numInds; ++i) {
+		for (size_t j = i; j < numInds; ++j) {
+			if (polymorphic > 0)
+				grm[i * numInds + j] /= polymorphic;
+			grm[j * numInds + i] = grm[i * numInds + j];
+		}
+	}
+}
+
+
+bool statGRM::apply(Population & pop) const
+{
+	if (m_loci.empty())
+		return true;
+
+	PARAM_FAILIF(pop.ploidy() != 2, ValueError,
+		"Genomic relationship matrices can only be calculated for diploid populations.");
+
+	const vectoru & loci = m_loci.elems(&pop);
+	// individuals in all specified (virtual) subpopulations
+	vector<Individual *> inds;
+	subPopList subPops = m_subPops.expandFrom(pop);
+	subPopList::const_iterator it = subPops.begin();
+	subPopList::const_iterator itEnd = subPops.end();
+	for (; it != itEnd; ++it) {
+		pop.activateVirtualSubPop(*it);
+		IndIterator ind = pop.indIterator(it->subPop());
+		for (; ind.valid(); ++ind)
+			inds.push_back(&*ind);
+		pop.deactivateVirtualSubPop(it->subPop());
+	}
+
+	size_t words = (loci.size() + 63) / 64;
+	vector<uint64_t> one;
+	vector<uint64_t> two;
+	packGenotypes(inds, loci, words, one, two);
+
+	std::ofstream out;
+	if (!m_filename.empty()) {
+		out.open(m_filename.c_str(), std::ios::out | std::ios::binary);
+		PARAM_FAILIF(!out, RuntimeError, "Failed to open file " + m_filename);
+	}
+	vectorf matrix;
+	if (m_vars.contains(GRM_String)) {
+		GRMMatrix(inds.size(), loci.size(), words, one, two, matrix);
+		if (!m_filename.empty())
+			out.write(reinterpret_cast<const char *>(matrix.empty() ? NULL : &matrix[0]),
+				matrix.size() * sizeof(double));
+		else
+			pop.getVars().setVar(GRM_String + m_suffix, Double_Vec_As_Array(matrix));
+	}
+	if (m_vars.contains(IBS_String)) {
+		IBSMatrix(inds.size(), loci.size(), words, one, two, matrix);
+		if (!m_filename.empty())
+			out.write(reinterpret_cast<const char *>(matrix.empty() ? NULL : &matrix[0]),
+				matrix.size() * sizeof(double));
+		else
+			pop.getVars().setVar(IBS_String + m_suffix, Double_Vec_As_Array(matrix));
+	}
+	return true;
+}
+
+
 statEffectiveSize::statEffectiveSize(const lociList & loci,  const subPopList & subPops,
 	const stringList & vars, const string & suffix)
 	: m_loci(loci), m_subPops(subPops), m_vars(), m_suffix(suffix)
@@ -3856,9 +5702,10 @@ bool statEffectiveSize::apply(Population & pop) const
 	if (m_loci.empty())
 		return true;
 
-	if (m_vars.contains(Ne_demo_base_String) || m_vars.contains(Ne_demo_base_sp_String)
-	    || m_vars.contains(Ne_demo_String) || m_vars.contains(Ne_demo_sp_String))
-		demographicEffectiveSize(pop);
+	// demographic effective size is calculated from all individuals before
+	// a sample is activated
+	if (!pop.hasActivatedSample())
+		applyDemographic(pop);
 
 	if (m_vars.contains(Ne_temporal_base_String) || m_vars.contains(Ne_temporal_base_sp_String)
 	    || m_vars.contains(Ne_waples89_String) || m_vars.contains(Ne_waples89_sp_String)
@@ -3877,6 +5724,20 @@ bool statEffectiveSize::apply(Population & pop) const
 }
 
 
+bool statEffectiveSize::applyDemographic(Population & pop) const
+{
+	if (m_loci.empty())
+		return true;
+
+	// lineages of all individuals are followed so demographic effective size
+	// is not calculated from a sample of individuals.
+	if (m_vars.contains(Ne_demo_base_String) || m_vars.contains(Ne_demo_base_sp_String)
+	    || m_vars.contains(Ne_demo_String) || m_vars.contains(Ne_demo_sp_String))
+		demographicEffectiveSize(pop);
+	return true;
+}
+
+
 bool statEffectiveSize::demographicEffectiveSize(Population & pop) const
 {
 	if (m_vars.contains(Ne_demo_base_String) || m_vars.contains(Ne_demo_base_sp_String)) {
@@ -462,7 +462,7 @@ private:
 
 public:
 	statAlleleFreq(const lociList & loci, const subPopList & subPops,
-		const stringList & vars, const string & suffix);
+		const stringList & vars, const string & suffix, bool asArray = false);
 
 	string describe(bool format = true) const;
 
@@ -482,6 +482,9 @@ private:
 
 	stringList m_vars;
 	string m_suffix;
+
+	/// output locus by allele arrays instead of dictionaries
+	bool m_asArray;
 };
 
 /// CPPONLY
@@ -499,7 +502,8 @@ private:
 
 public:
 	statHeteroFreq(const lociList & heteroFreq, const lociList & homoFreq,
-		const subPopList & subPops, const stringList & vars, const string & suffix);
+		const subPopList & subPops, const stringList & vars, const string & suffix,
+		bool asArray = false);
 
 	string describe(bool format = true) const;
 
@@ -512,6 +516,9 @@ private:
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
+
+	/// output arrays (one element per locus) instead of dictionaries
+	bool m_asArray;
 };
 
 
@@ -717,6 +724,46 @@ private:
 	string m_suffix;
 };
 
+/// CPPONLY
+class statLDWindow
+{
+private:
+#define   LD_window_String      "LD_window"
+#define   LD_window_sp_String   "LD_window_sp"
+
+public:
+	statLDWindow(const floatList & window, const subPopList & subPops,
+		const stringList & vars, const string & suffix);
+
+	string describe(bool format = true) const;
+
+	bool apply(Population & pop) const;
+
+private:
+	/// pairs of loci within the window, and their distances
+	void windowPairs(const Population & pop, vector<pairu> & pairs, vectorf & dist) const;
+
+	/// pack alleles at loci to bitsets across haplotypes of a (virtual)
+	/// subpopulation, return the number of haplotypes
+	size_t packLoci(Population & pop, size_t subPop, const vectoru & loci,
+		vector<uint64_t> & bits) const;
+
+	/// D, D' and r2 from counts of non-zero alleles and haplotypes
+	PyObject * LDDict(const vector<pairu> & pairs, const vectorf & dist, const vectoru & n1,
+		const vectoru & n11, size_t numHaplotypes) const;
+
+private:
+	/// maximum distance between loci
+	double m_distance;
+
+	/// maximum number of pairs for each locus, 0 for unlimited
+	size_t m_maxPairs;
+
+	subPopList m_subPops;
+	stringList m_vars;
+	string m_suffix;
+};
+
 /// CPPONLY
 class statAssociation
 {
@@ -739,9 +786,20 @@ private:
 	typedef map<std::pair<Allele, Allele>, size_t>  GENOCNT;
 	typedef vector<GENOCNT> GENOCNTLIST;
 
+	/// test results of all loci, indexed by test and then by locus
+	enum AssociationTest {
+		ALLELE_CHISQ = 0,
+		ALLELE_CHISQ_P = 1,
+		GENO_CHISQ = 2,
+		GENO_CHISQ_P = 3,
+		ARMITAGE_P = 4,
+		NUM_ASSOCIATION_TESTS = 5
+	};
+	typedef vector<vectorf> TESTRESULTS;
+
 public:
 	statAssociation(const lociList & loci, const subPopList & subPops,
-		const stringList & vars, const string & suffix);
+		const stringList & vars, const string & suffix, bool asArray = false);
 
 
 	string describe(bool format = true) const;
@@ -750,6 +808,22 @@ public:
 	bool apply(Population & pop) const;
 
 private:
+	/// count alleles and genotypes in a dictionary for each locus and
+	/// subpopulation, and perform tests for selected tests.
+	void mapTests(Population & pop, const vectoru & loci, const subPopList & subPops,
+		const vector<bool> & testSp, const vector<bool> & testAll, vector<TESTRESULTS> & results) const;
+
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+	/// count alleles and genotypes of all loci in dense tables, in blocks
+	/// of loci that are processed in parallel.
+	void denseTests(Population & pop, const vectoru & loci, const subPopList & subPops,
+		const vector<bool> & testSp, const vector<bool> & testAll, vector<TESTRESULTS> & results) const;
+#endif
+
+	/// set test results as dictionaries keyed by loci or as arrays
+	void setTestVar(Population & pop, const string & name, const vectoru & loci,
+		const vectorf & values) const;
+
 	void alleleChiSqTest(const ALLELECNT & caseCnt,
 		const ALLELECNT & controlCnt, double & chisq,
 		double & chisq_p) const;
@@ -768,17 +842,24 @@ private:
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
+	bool m_asArray;
 };
 
 /// CPPONLY
 class statNeutrality
 {
 private:
-#define Neutra_Pi_String      "Pi"
-#define Neutra_Pi_sp_String   "Pi_sp"
+#define Neutra_Pi_String         "Pi"
+#define Neutra_Pi_sp_String      "Pi_sp"
+#define Theta_W_String           "Theta_W"
+#define Theta_W_sp_String        "Theta_W_sp"
+#define Tajima_D_String          "Tajima_D"
+#define Tajima_D_sp_String       "Tajima_D_sp"
+#define Neutra_window_String     "neutrality_window"
+#define Neutra_window_sp_String  "neutrality_window_sp"
 
 public:
-	statNeutrality(const lociList & loci, const subPopList & subPops,
+	statNeutrality(const lociList & loci, const floatList & window, const subPopList & subPops,
 		const stringList & vars, const string & suffix);
 
 	string describe(bool format = true) const;
@@ -787,13 +868,71 @@ public:
 	bool apply(Population & pop) const;
 
 private:
-	typedef vector<vectora> HAPLOLIST;
-	double calcPi(HAPLOLIST::const_iterator begin, HAPLOLIST::const_iterator end) const;
+#if defined(LONGALLELE) || defined(MUTANTALLELE)
+	typedef std::map<size_t, size_t> SITECNT;
+#else
+	typedef vectoru SITECNT;
+#endif
+	typedef vector<SITECNT> SITECNTLIST;
+
+	/// count alleles of \e numSeq sequences at each locus, and set the
+	/// number of pairwise differences and whether or not the site is
+	/// segregating.
+	void siteDiversity(const SITECNTLIST & cnt, size_t numSeq,
+		vectorf & diff, vectoru & seg) const;
+
+	/// set Pi, Theta_W and Tajima_D from total pairwise differences and
+	/// number of segregating sites of \e numSeq sequences.
+	void neutralityStats(double diff, size_t numSegSites, size_t numSeq,
+		double & pi, double & thetaW, double & tajimaD) const;
+
+	/// output windowed statistics as a dictionary of arrays
+	PyObject * windowDict(const vectoru & loci, const Population & pop,
+		const vectorf & diff, const vectoru & seg, size_t numSeq) const;
+
+	void outputVars(Population & pop, const vectoru & loci, const SITECNTLIST & cnt,
+		size_t numSeq, const vspID & subPop) const;
 
 private:
 	/// Neutrality
 	lociList m_loci;
 
+	/// window width and step (along chromosomes), window is not used if
+	/// width is negative
+	double m_width;
+	double m_step;
+
+	subPopList m_subPops;
+	stringList m_vars;
+	string m_suffix;
+};
+
+/// CPPONLY
+class statSFS
+{
+private:
+#define SFS_String            "SFS"
+#define SFS_sp_String         "SFS_sp"
+#define SFS_folded_String     "SFS_folded"
+#define SFS_folded_sp_String  "SFS_folded_sp"
+#define SFS_joint_String      "SFS_joint"
+
+public:
+	statSFS(const lociList & loci, const subPopList & subPops,
+		const stringList & vars, const string & suffix);
+
+	string describe(bool format = true) const;
+
+	bool apply(Population & pop) const;
+
+private:
+	/// unfolded or folded site frequency spectrum from the number of
+	/// derived alleles and all alleles at each locus
+	PyObject * SFSArray(const vectoru & derived, const vectoru & total, bool folded) const;
+
+private:
+	lociList m_loci;
+
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
@@ -816,7 +955,7 @@ private:
 
 public:
 	statStructure(const lociList & Fst, const subPopList & subPops,
-		const stringList & vars, const string & suffix);
+		const stringList & vars, const string & suffix, bool asArray = false);
 
 	string describe(bool format = true) const;
 
@@ -829,12 +968,37 @@ private:
 	typedef map<Allele, bool> ALLELES;
 	typedef vector<ALLELES> ALLELELIST;
 
-	void calcGst_Nei73(const vectoru & loci, const vectoru & n_i, LOCIFREQLIST & alleleFreq,
-		const ALLELELIST & alleles, double & Gst, uintDict & gst) const;
-
-	void calcFst_WC84(const vectoru & loci, const vectoru & n_i, LOCIFREQLIST & alleleFreq, LOCIFREQLIST & heteroFreq,
-		const ALLELELIST & alleles, double & Fst, double & Fis, double & Fit,
-		uintDict & fst, uintDict & fis, uintDict & fit) const;
+	/// per-locus components of the statistics, indexed by component and
+	/// then by locus
+	enum StructureComponent {
+		WC84_A = 0,
+		WC84_B = 1,
+		WC84_C = 2,
+		NEI73_D_ST = 3,
+		NEI73_J_T = 4,
+		NUM_STRUCTURE_COMPONENTS = 5
+	};
+
+	/// calculate D_st and J_t of a locus from frequencies (\e alleleFreq[sp][k])
+	/// of observed alleles in each subpopulation.
+	void calcGst_Nei73(const vectoru & n_i, const vector<vectorf> & alleleFreq,
+		double & D_st, double & J_t) const;
+
+	/// calculate variance components a, b, and c of a locus from allele and
+	/// heterozygote frequencies of observed alleles in each subpopulation.
+	void calcFst_WC84(const vectoru & n_i, const vector<vectorf> & alleleFreq,
+		const vector<vectorf> & heteroFreq, double & a, double & b, double & c) const;
+
+	/// count alleles in dictionaries and calculate per-locus components
+	void mapComponents(Population & pop, const vectoru & loci, const subPopList & subPops,
+		bool use_observed_het, vectoru & n_i, vector<vectorf> & comps) const;
+
+#if !defined(LONGALLELE) && !defined(MUTANTALLELE)
+	/// count alleles in dense tables and calculate per-locus components for
+	/// blocks of loci in parallel
+	void denseComponents(Population & pop, const vectoru & loci, const subPopList & subPops,
+		vectoru & n_i, vector<vectorf> & comps) const;
+#endif
 
 private:
 	/// Fst
@@ -843,6 +1007,7 @@ private:
 	subPopList m_subPops;
 	stringList m_vars;
 	string m_suffix;
+	bool m_asArray;
 };
 
 
@@ -902,6 +1067,44 @@ private:
 };
 
 
+/// CPPONLY
+class statGRM
+{
+private:
+#define  GRM_String     "GRM"
+#define  IBS_String     "IBS"
+
+public:
+	statGRM(const lociList & loci, const string & filename, const subPopList & subPops,
+		const stringList & vars, const string & suffix);
+
+	string describe(bool format = true) const;
+
+	bool apply(Population & pop) const;
+
+private:
+	/// pack genotypes of individuals as two bitsets (one or more, and two
+	/// non-zero alleles) with \e words 64-bit words per individual.
+	void packGenotypes(const vector<Individual *> & inds, const vectoru & loci,
+		size_t words, vector<uint64_t> & one, vector<uint64_t> & two) const;
+
+	/// proportion of alleles shared identical by state between all pairs
+	/// of individuals
+	void IBSMatrix(size_t numInds, size_t numLoci, size_t words,
+		const vector<uint64_t> & one, const vector<uint64_t> & two, vectorf & ibs) const;
+
+	/// genomic relationship matrix from standardized genotypes
+	void GRMMatrix(size_t numInds, size_t numLoci, size_t words,
+		const vector<uint64_t> & one, const vector<uint64_t> & two, vectorf & grm) const;
+
+private:
+	lociList m_loci;
+	string m_filename;
+	subPopList m_subPops;
+	stringList m_vars;
+	string m_suffix;
+};
+
 /// CPPONLY
 class statEffectiveSize
 {
@@ -975,6 +1178,8 @@ public:
 
 	bool apply(Population & pop) const;
 
+	bool applyDemographic(Population & pop) const;
+
 	bool demographicEffectiveSize(Population & pop) const;
 
 	bool temporalEffectiveSize(Population & pop) const;
@@ -1044,6 +1249,50 @@ public:
 	 *  used, for example, to calculate and store the same statistics for
 	 *  different subpopulations (e.g. pairwise \c Fst).
 	 *
+	 *  Statistics \e alleleFreq, \e heteroFreq, \e homoFreq, \e association
+	 *  and \e structure can be calculated for a large number of loci, in
+	 *  which case it can be expensive to create and access their results as
+	 *  nested dictionaries.
+	 *  If \e asArray is set to \c True, these statistics are outputted as
+	 *  Python arrays of type \c 'd' (\c array.array), which can be used
+	 *  directly, or converted to \c numpy arrays without copying, through
+	 *  the buffer interface. More specifically, \c heteroFreq, \c homoFreq,
+	 *  \c heteroNum and \c homoNum (and their subpopulation versions) are
+	 *  arrays with one element for each specified locus, so are the
+	 *  statistics and \e p-values of association tests and locus level
+	 *  structure statistics, and \c alleleFreq
+	 *  and \c alleleNum (and their subpopulation versions) are flattened
+	 *  <tt>len(loci)</tt> by \c n arrays, where \c n is one plus the
+	 *  largest allele observed in all (virtual) subpopulations, so that
+	 *  <tt>numpy.frombuffer(alleleFreq).reshape(len(loci), -1)[i][a]</tt>
+	 *  is the frequency of allele \c a at the \c i-th specified locus. Loci
+	 *  are ordered as they are specified (all loci for \c ALL_AVAIL). Because
+	 *  such arrays can be huge if there are large alleles (e.g. in the long
+	 *  and mutant modules), a \c ValueError will be raised if the largest
+	 *  allele is far larger than the number of distinct alleles.
+	 *
+	 *  Statistics of a very large population can be estimated from a random
+	 *  sample of individuals. If parameter \e sampleSize is given, statistics
+	 *  are calculated from \c sampleSize individuals drawn randomly (without
+	 *  replacement) from the whole population, or from \c sampleSize[sp]
+	 *  individuals from each subpopulation \c sp if a list of sizes is given.
+	 *  Alternatively, parameter \e sampleFraction draws the given proportion
+	 *  of individuals from each subpopulation. A new sample is drawn each
+	 *  time this operator is applied. Sampled individuals share genotypes
+	 *  and information fields with the population so the cost of drawing a
+	 *  sample and calculating most statistics is proportional to the size
+	 *  of the sample instead of the population. All statistics, including
+	 *  population and (virtual) subpopulation sizes, are calculated from
+	 *  sampled individuals, except for demographic effective size, which
+	 *  follows lineages of all individuals. If \e stdError is set to a number of groups \c g (e.g.
+	 *  \c 10), sampled individuals are divided randomly into \c g groups and
+	 *  standard errors of all numeric statistics are estimated by a
+	 *  delete-a-group jackknife, which calculates the statistics \c g more
+	 *  times, each time without one of the groups. Standard errors are saved
+	 *  in variables with the same structure as the statistics and names with
+	 *  suffix \c _se (e.g. \c alleleFreq_se and
+	 *  <tt>subPop[sp]['alleleFreq_se']</tt>).
+	 *
 	 *  Operator \c Stat supports the following statistics:
 	 *
 	 *  <b>popSize</b>: If \e popSize=True, number of individuals in all or
@@ -1126,6 +1375,9 @@ public:
 	 *
 	 *  <b>alleleFreq</b>: This parameter accepts a list of loci (loci indexes,
 	 *  names, or \c ALL_AVAIL), at which allele frequencies will be calculated.
+	 *  If alleles of the population are tracked (see
+	 *  <tt>Population.trackAlleles</tt>), counts of alleles in the whole
+	 *  population are read from tracked counts instead of being counted.
 	 *  This statistic outputs the following variables, all of which are
 	 *  dictionary (with loci indexes as keys) of default dictionaries (with
 	 *  alleles as keys). For example, <tt>alleleFreq[loc][a]</tt> returns 0
@@ -1302,6 +1554,25 @@ public:
 	 *       (virtual) subpopulation.
 	 *  \li \c CramerV_sp Cramer V statistics for each (virtual) subpopulation.
 	 *
+	 *  <b>LD_window</b>: Parameter \c LD_window accepts a maximum distance
+	 *  \c d and an optional maximum number of pairs \c m (e.g.
+	 *  <tt>LD_window=(0.5, 100)</tt>), and calculates linkage disequilibrium
+	 *  between all pairs of loci on the same autosome (or customized
+	 *  chromosome) that are at most \c d apart (measured by locus positions).
+	 *  If \c m is specified, each locus is paired with at most \c m closest
+	 *  loci after it. Alleles are treated as wildtype (\c 0) or mutant (non
+	 *  zero), which is exact for the binary module, and signed LD between
+	 *  mutant alleles are calculated from bitsets of haplotypes so that LD
+	 *  among tens of thousands of loci can be calculated efficiently. This
+	 *  statistic sets the following variables:
+	 *  \li \c LD_window (default) A dictionary with keys \c loc1 and
+	 *       \c loc2 (indexes of loci), \c dist (distance between loci),
+	 *       \c LD, \c LD_prime and \c R2 (LD measures of haplotypes in all
+	 *       or specified (virtual) subpopulations), each value being an array
+	 *       of type \c 'd' with one element for each pair of loci.
+	 *  \li \c LD_window_sp Such a dictionary for each (virtual)
+	 *       subpopulation.
+	 *
 	 *  <b>association</b>: Parameter \c association accepts a list of loci,
 	 *  which can be a list of indexes, names, or \c ALL_AVAIL. At each locus,
 	 *  one or more statistical tests will be performed to test association
@@ -1346,15 +1617,66 @@ public:
 	 *  \li \c Armitage_p_sp A dictionary of \e p-values of the Cochran-
 	 *       Armitage tests, using cases and controls from each subpopulation.
 	 *
+	 *  For genome-wide association scans, alleles and genotypes of all loci
+	 *  are counted in dense tables in a single pass through the population,
+	 *  and blocks of loci are processed in parallel if multiple threads are
+	 *  used. If \e asArray is set to \c True, test statistics and \e p-values
+	 *  are outputted as arrays with one element for each specified locus,
+	 *  instead of dictionaries keyed by loci.
+	 *
 	 *  <b>neutrality</b>: This parameter performs neutrality tests (detection
 	 *  of natural selection) on specified loci, which can be a list of loci
-	 *  indexes, names or \c ALL_AVAIL. It currently only outputs \e Pi, which
-	 *  is the average number of pairwise difference between loci. This
-	 *  statistic outputs the following variables:
-	 *  \li \c Pi Mean pairwise difference between all sequences from all or
-	 *       specified (virtual) subpopulations.
+	 *  indexes, names or \c ALL_AVAIL. All statistics are calculated from
+	 *  allele counts at each locus so that the cost is linear to the number
+	 *  of sequences. This statistic outputs the following variables:
+	 *  \li \c Pi (default) Mean pairwise difference between all sequences
+	 *       from all or specified (virtual) subpopulations.
 	 *  \li \c Pi_sp Mean paiewise difference between all sequences in each
 	 *       (virtual) subpopulation.
+	 *  \li \c Theta_W (default) Watterson's estimator of theta, namely the
+	 *       number of segregating sites divided by
+	 *       <tt>sum(1/i for i in range(1, n))</tt> for \c n sequences.
+	 *  \li \c Theta_W_sp Watterson's theta in each (virtual) subpopulation.
+	 *  \li \c Tajima_D (default) Tajima's D statistic (Tajima 1989), which
+	 *       is \c 0 if there is no segregating site.
+	 *  \li \c Tajima_D_sp Tajima's D in each (virtual) subpopulation.
+	 *
+	 *  If a window width (and an optional step, which is default to width)
+	 *  is specified through parameter \e neutrality_window, these statistics
+	 *  are also calculated for loci in windows <tt>[k*step, k*step+width)</tt>
+	 *  along each chromosome, using positions of loci. Windows without any
+	 *  specified locus are ignored. The following variables are outputted:
+	 *  \li \c neutrality_window (default) A dictionary with keys \c chrom,
+	 *       \c start, \c end, \c numSites, \c Pi, \c Theta_W and
+	 *       \c Tajima_D, each of which is an array with one element for each
+	 *       window. \c Pi and \c Theta_W are summed over loci in each window.
+	 *  \li \c neutrality_window_sp Such a dictionary for each (virtual)
+	 *       subpopulation.
+	 *
+	 *  <b>SFS</b>: Parameter \c SFS accepts a list of loci (indexes, names
+	 *  or \c ALL_AVAIL) and calculates the site frequency spectrum of
+	 *  these loci, treating allele \c 0 as the ancestral allele and all
+	 *  other alleles as derived alleles. Alleles are counted in one pass
+	 *  through each (virtual) subpopulation and the spectra are returned
+	 *  as Python arrays of type \c 'd'. This statistic outputs the
+	 *  following variables:
+	 *  \li \c SFS (default) An array of length <tt>n+1</tt> where \c n is
+	 *       the number of alleles at each locus in all or specified
+	 *       (virtual) subpopulations. Its \c k-th element is the number of
+	 *       loci with \c k derived alleles.
+	 *  \li \c SFS_folded Folded site frequency spectrum, an array of
+	 *       length <tt>n/2+1</tt> with the number of loci by the count of
+	 *       minor (ancestral or derived) alleles.
+	 *  \li \c SFS_sp Unfolded site frequency spectrum in each (virtual)
+	 *       subpopulation.
+	 *  \li \c SFS_folded_sp Folded site frequency spectrum in each (virtual)
+	 *       subpopulation.
+	 *  \li \c SFS_joint A dictionary of joint site frequency spectra with
+	 *       keys <tt>(sp1, sp2)</tt> for each pair of (virtual) subpopulations.
+	 *       Each spectrum is a flattened <tt>n1+1</tt> by <tt>n2+1</tt> array
+	 *       so that <tt>numpy.frombuffer(SFS_joint[(sp1, sp2)]).reshape(n1+1,
+	 *       -1)[i][j]</tt> is the number of loci with \c i and \c j derived
+	 *       alleles in \c sp1 and \c sp2 respectively.
 	 *
 	 *  <b>structure</b>: Parameter \c structure accepts a list of loci at
 	 *  which statistics that measure population structure are calculated.
@@ -1388,6 +1710,13 @@ public:
 	 *  \li \c g_st A dictionary of Nei's Gst statistic estimated for each
 	 *	     locus.
 	 *
+	 *  For diploid populations and loci on autosomes, allele and heterozygote
+	 *  counts of all (virtual) subpopulations are collected in dense tables
+	 *  and components of these statistics are calculated for blocks of loci
+	 *  in parallel if multiple threads are used. If \e asArray is set to
+	 *  \c True, \c f_st, \c f_is, \c f_it and \c g_st are outputted as
+	 *  arrays with one element for each specified locus.
+	 *
 	 *  <b>HWE</b>: Parameter \c HWE accepts a list of loci at which exact
 	 *  two-side tests for Hardy-Weinberg equilibrium will be performed. This
 	 *  statistic is only available for diallelic loci in diploid populations.
@@ -1414,6 +1743,26 @@ public:
 	 *  \li \c IBD_freq_sp frequency of IBD in each (virtual) subpopulations.
 	 *  \li \c IBS_freq_sp frequency of IBS in each (virtual) subpopulations.
 	 *
+	 *  <b>GRM</b>: Parameter \c GRM accepts a list of loci (indexes, names
+	 *  or \c ALL_AVAIL) and calculates matrices of pairwise relationship
+	 *  between all individuals in all or specified (virtual) subpopulations,
+	 *  in the order of individuals in these subpopulations. Genotypes of a
+	 *  diploid population are coded as the number (\c 0, \c 1 or \c 2) of
+	 *  non-zero alleles at each locus, packed into bitsets, and processed by
+	 *  cache-blocked kernels in multiple threads. Because these matrices can
+	 *  be large, they are saved as flattened <tt>n</tt> by <tt>n</tt> arrays
+	 *  of type \c 'd' for \c n individuals, or written to a binary file (in
+	 *  the same row-major order, \c GRM before \c IBS, which can be read by
+	 *  <tt>numpy.fromfile</tt>) if a filename is given by parameter
+	 *  \e GRM_file, in which case no variable is set. This statistic outputs
+	 *  the following variables:
+	 *  \li \c GRM (default) Genomic relationship matrix (VanRaden 2008),
+	 *       namely the mean of <tt>(x_i-2p)(x_j-2p)/(2p(1-p))</tt> over
+	 *       polymorphic loci, where \c p is the frequency of non-zero alleles
+	 *       among specified individuals.
+	 *  \li \c IBS Proportion of alleles shared identical by state, namely
+	 *       the mean of <tt>1-|x_i-x_j|/2</tt> over all loci.
+	 *
 	 *  <b>effectiveSize</b>: Parameter \c effectiveSize accepts a list of loci
 	 *  at which the effective population size for the whole or specified
 	 *  (virtual) subpopulations is calculated. \e effectiveSize can be a list
@@ -1563,7 +1912,16 @@ public:
 		const stringFunc & output = "",
 		int begin = 0, int end = -1, int step = 1, const intList & at = vectori(),
 		const intList & reps = intList(), const subPopList & subPops = subPopList(),
-		const stringList & infoFields = vectorstr());
+		const stringList & infoFields = vectorstr(),
+		bool asArray = false,
+		const floatList & LD_window = vectorf(),
+		const uintList & sampleSize = vectoru(),
+		double sampleFraction = 0,
+		size_t stdError = 0,
+		const floatList & neutrality_window = vectorf(),
+		const lociList & SFS = vectoru(),
+		const lociList & GRM = vectoru(),
+		const string & GRM_file = string());
 
 	~Stat()
 	{
@@ -1588,6 +1946,17 @@ public:
 	virtual bool apply(Population & pop) const;
 
 private:
+	/// calculate all statistics
+	bool applyStats(Population & pop) const;
+
+	/// indexes of a new random sample of individuals, in ascending order
+	vectoru drawSample(const Population & pop) const;
+
+	/// calculate statistics from sampled individuals, excluding those in
+	/// jackknife \e group if \e groups of sampled individuals are given.
+	bool applyToSample(Population & pop, const vectoru & sample,
+		const vectoru & groups, size_t group) const;
+
 	const statPopSize m_popSize;
 	const statNumOfMales m_numOfMales;
 	const statNumOfAffected m_numOfAffected;
@@ -1600,12 +1969,19 @@ private:
 	const statHaploHomoFreq m_haploHomoFreq;
 	const statInfo m_info;
 	const statLD m_LD;
+	const statLDWindow m_LDWindow;
 	const statAssociation m_association;
 	const statNeutrality m_neutrality;
+	const statSFS m_SFS;
 	const statStructure m_structure;
 	const statHWE m_HWE;
 	const statInbreeding m_Inbreeding;
+	const statGRM m_GRM;
 	const statEffectiveSize m_effectiveSize;
+
+	const vectoru m_sampleSize;
+	const double m_sampleFraction;
+	const size_t m_stdError;
 };
 
 }
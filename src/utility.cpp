@@ -102,6 +102,18 @@ using std::ofstream;
 #  include <windows.h>
 #endif
 
+// for memory-mapped genotype storage
+#if !defined (_WIN32) && !defined (__WIN32__)
+#  include <unistd.h>
+#  include <sys/mman.h>
+#  include <sys/stat.h>
+#endif
+
+// for wall-clock time used to profile evolutionary processes
+#if !defined (_WIN32) && !defined (__WIN32__)
+#  include <sys/time.h>
+#endif
+
 #include "boost/pending/lowest_bit.hpp"
 using boost::lowest_bit;
 
@@ -426,8 +438,94 @@ RNG * g_RNG;
 RNG g_RNG;
 #endif
 
-void setOptions(const int numThreads, const char * name, unsigned long seed)
+// directory for memory-mapped genotype storage, genotypes are stored in
+// memory if it is empty
+string g_genoStorageDir;
+
+// blocks smaller than this size are always allocated from the heap
+const size_t MappedStorageMinSize = 1 << 20;
+
+// blocks that are currently allocated from memory-mapped files
+std::set<void *> g_mappedBlocks;
+
+// if any block has been allocated from a memory-mapped file
+bool g_mappedUsed = false;
+
+void * mappedAllocate(size_t bytes)
 {
+	if (g_genoStorageDir.empty() || bytes < MappedStorageMinSize)
+		return NULL;
+#if defined (_WIN32) || defined (__WIN32__)
+	return NULL;
+#else
+	string name = g_genoStorageDir + "/simuPOP_geno_XXXXXX";
+	vector<char> path(name.begin(), name.end());
+	path.push_back('\0');
+	int fd = mkstemp(&path[0]);
+	if (fd == -1)
+		throw RuntimeError("Failed to create genotype storage file in directory " + g_genoStorageDir);
+	// the file will be removed after the block is unmapped
+	unlink(&path[0]);
+	if (ftruncate(fd, static_cast<off_t>(bytes)) != 0) {
+		close(fd);
+		throw RuntimeError((boost::format("Failed to allocate %1% bytes of genotype storage in directory %2%")
+			                % bytes % g_genoStorageDir).str());
+	}
+	void * ptr = mmap(NULL, bytes, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+	close(fd);
+	if (ptr == MAP_FAILED)
+		throw RuntimeError((boost::format("Failed to map %1% bytes of genotype storage in directory %2%")
+			                % bytes % g_genoStorageDir).str());
+#  pragma omp critical (mappedStorage)
+	{
+		g_mappedBlocks.insert(ptr);
+		g_mappedUsed = true;
+	}
+	return ptr;
+#endif
+}
+
+
+bool mappedDeallocate(void * ptr, size_t bytes)
+{
+	if (!g_mappedUsed || bytes < MappedStorageMinSize)
+		return false;
+#if defined (_WIN32) || defined (__WIN32__)
+	(void)ptr;
+	return false;
+#else
+	bool mapped = false;
+#  pragma omp critical (mappedStorage)
+	{
+		mapped = g_mappedBlocks.erase(ptr) > 0;
+	}
+	if (mapped)
+		munmap(ptr, bytes);
+	return mapped;
+#endif
+}
+
+
+void setOptions(const int numThreads, const char * name, unsigned long seed,
+                const char * genoStorage)
+{
+	if (genoStorage != NULL) {
+		string dir = genoStorage;
+#if defined (_WIN32) || defined (__WIN32__)
+		if (!dir.empty())
+			throw ValueError("Memory-mapped genotype storage is not supported under windows.");
+#elif defined (BINARYALLELE) || defined (MUTANTALLELE)
+		if (!dir.empty())
+			throw ValueError("Memory-mapped genotype storage is not supported by the binary and mutant modules.");
+#else
+		if (!dir.empty()) {
+			struct stat st;
+			if (stat(dir.c_str(), &st) != 0 || !S_ISDIR(st.st_mode) || access(dir.c_str(), W_OK) != 0)
+				throw ValueError("Genotype storage " + dir + " is not a writable directory.");
+		}
+#endif
+		g_genoStorageDir = dir;
+	}
 #ifdef _OPENMP
 	// if numThreads is zero, all threads will be used.
 	if (numThreads == 0) {
@@ -437,6 +535,10 @@ void setOptions(const int numThreads, const char * name, unsigned long seed)
 		g_numThreads = numThreads;
 	}
 #  if THREADPRIVATE_SUPPORT == 0
+	// threads use the same type of RNG as the calling thread unless a name
+	// is given, so that a counter-based RNG is used by all threads.
+	if ((name == NULL || name[0] == '\0') && !g_RNGs.empty() && g_RNGs[0] != NULL)
+		name = g_RNGs[0]->name();
 	g_RNGs.resize(g_numThreads);
 	if (seed == 0)
 		seed = g_RNGs[0] == NULL ? RNG::generateRandomSeed() : g_RNGs[0]->seed();
@@ -446,8 +548,14 @@ void setOptions(const int numThreads, const char * name, unsigned long seed)
 		} else {
 			g_RNGs[i]->set(name, seed + i);
 		}
+		// keyed streams of counter-based RNGs do not depend on thread
+		g_RNGs[i]->setStreamSeed(seed);
 	}
 #  else
+	// threads use the same type of RNG as the calling thread unless a name
+	// is given, so that a counter-based RNG is used by all threads.
+	if ((name == NULL || name[0] == '\0') && g_RNG != NULL)
+		name = g_RNG->name();
 	if (seed == 0)
 		seed = g_RNG == NULL ? RNG::generateRandomSeed() : g_RNG->seed();
 #    pragma omp parallel
@@ -457,6 +565,8 @@ void setOptions(const int numThreads, const char * name, unsigned long seed)
 		} else {
 			g_RNG->set(name, seed + omp_get_thread_num());
 		}
+		// keyed streams of counter-based RNGs do not depend on thread
+		g_RNG->setStreamSeed(seed);
 	}
 #  endif
 #else
@@ -906,6 +1016,38 @@ void cleanupCircularRefs()
 }
 
 
+// number of calls to Python functions, which are always made with the GIL
+// held so no lock is needed.
+ULONG g_pyCallCount = 0;
+
+void countPyCall()
+{
+	++g_pyCallCount;
+}
+
+
+ULONG pyCallCount()
+{
+	return g_pyCallCount;
+}
+
+
+double wallTime()
+{
+#if defined (_WIN32) || defined (__WIN32__)
+	LARGE_INTEGER freq;
+	LARGE_INTEGER counter;
+	QueryPerformanceFrequency(&freq);
+	QueryPerformanceCounter(&counter);
+	return static_cast<double>(counter.QuadPart) / static_cast<double>(freq.QuadPart);
+#else
+	struct timeval tv;
+	gettimeofday(&tv, NULL);
+	return tv.tv_sec + tv.tv_usec / 1000000.;
+#endif
+}
+
+
 pyFunc::pyFunc(PyObject * func) : m_func(func), m_numArgs(0), m_circular_self(NULL)
 {
 	if (!m_func.isValid())
@@ -1483,6 +1625,55 @@ PyObject * Lineage_Vec_As_NumArray(LineageIterator begin, LineageIterator end)
 }
 
 
+PyObject * Buffer_As_MemoryView(void * buf, const char * format, size_t itemSize,
+                                const vectoru & shape)
+{
+	DBG_FAILIF(shape.empty() || shape.size() > PyBUF_MAX_NDIM, ValueError,
+		"Invalid number of dimensions for a memory view.");
+
+	// shape is copied by PyMemoryView_FromBuffer, format is not (static strings only)
+	vector<Py_ssize_t> dims(shape.begin(), shape.end());
+	Py_ssize_t len = static_cast<Py_ssize_t>(itemSize);
+	for (size_t i = 0; i < dims.size(); ++i)
+		len *= dims[i];
+
+	Py_buffer view;
+	view.buf = buf;
+	view.obj = NULL;
+	view.len = len;
+	view.itemsize = static_cast<Py_ssize_t>(itemSize);
+	view.readonly = 0;
+	view.ndim = static_cast<int>(dims.size());
+	view.format = const_cast<char *>(format);
+	view.shape = &dims[0];
+	view.strides = NULL;
+	view.suboffsets = NULL;
+	view.internal = NULL;
+
+	PyObject * res = PyMemoryView_FromBuffer(&view);
+	DBG_FAILIF(res == NULL, ValueError, "Can not create a memory view of the buffer");
+	return res;
+}
+
+
+PyObject * Double_Vec_As_Array(const vectorf & values)
+{
+	PyObject * arrayModule = PyImport_ImportModule("array");
+
+	DBG_FAILIF(arrayModule == NULL, SystemError, "Failed to import module array");
+	PyObject * bytes = PyBytes_FromStringAndSize(values.empty() ? NULL : reinterpret_cast<const char *>(&values[0]),
+		static_cast<Py_ssize_t>(values.size() * sizeof(double)));
+	char array[] = "array";
+	char sO[] = "sO";
+	char d[] = "d";
+	PyObject * res = PyObject_CallMethod(arrayModule, array, sO, d, bytes);
+	Py_DECREF(bytes);
+	Py_DECREF(arrayModule);
+	DBG_FAILIF(res == NULL, ValueError, "Can not create an array of doubles");
+	return res;
+}
+
+
 string PyObj_AsString(PyObject * str)
 {
 #if PY_VERSION_HEX >= 0x03000000
@@ -3175,6 +3366,7 @@ void StreamProvider::closeOstream()
 			DBG_ASSERT(m_func.isValid(), SystemError,
 				"Passed function object is invalid");
 			string str = dynamic_cast<ostringstream *>(m_filePtr)->str();
+			countPyCall();
 			// in swingpyrun.h, the PyString_Check is defined to PyBytes_Check
 #if PY_VERSION_HEX >= 0x03000000
 			PyObject * arglist = NULL;
@@ -3385,6 +3577,113 @@ unsigned long RNG::generateRandomSeed()
 #endif
 
 
+// A counter-based random number generator (Philox4x32-10, Salmon et al. 2011)
+// that is registered as a GSL random number generator so that all GSL
+// distributions can be used. In addition to a regular sequence, the generator
+// can draw from independent streams keyed by seed, a key drawn from the
+// regular sequence, generation and index (e.g. index of offspring), which
+// makes parallel sections reproducible regardless of the number of threads.
+typedef struct
+{
+	// key of the regular sequence, derived from seed
+	uint32_t key[2];
+	// key of keyed streams, which is shared by RNGs of all threads
+	uint32_t streamKey[2];
+	// counter, random numbers in the last block and index of the next one
+	uint32_t ctr[4];
+	uint32_t out[4];
+	uint32_t idx;
+	// position of the regular sequence when drawing from a keyed stream
+	uint32_t savedCtr[4];
+	uint32_t savedOut[4];
+	uint32_t savedIdx;
+	uint32_t keyed;
+} philox_state_t;
+
+
+static inline uint32_t mulhilo32(uint32_t a, uint32_t b, uint32_t * hi)
+{
+	uint64_t product = static_cast<uint64_t>(a) * static_cast<uint64_t>(b);
+
+	*hi = static_cast<uint32_t>(product >> 32);
+	return static_cast<uint32_t>(product);
+}
+
+
+static void philox4x32_10(const uint32_t * ctr, const uint32_t * key, uint32_t * out)
+{
+	uint32_t c0 = ctr[0], c1 = ctr[1], c2 = ctr[2], c3 = ctr[3];
+	uint32_t k0 = key[0], k1 = key[1];
+
+	for (int round = 0; round < 10; ++round) {
+		if (round > 0) {
+			k0 += 0x9E3779B9U;
+			k1 += 0xBB67AE85U;
+		}
+		uint32_t hi0, hi1;
+		uint32_t lo0 = mulhilo32(0xD2511F53U, c0, &hi0);
+		uint32_t lo1 = mulhilo32(0xCD9E8D57U, c2, &hi1);
+		c0 = hi1 ^ c1 ^ k0;
+		c1 = lo1;
+		c2 = hi0 ^ c3 ^ k1;
+		c3 = lo0;
+	}
+	out[0] = c0;
+	out[1] = c1;
+	out[2] = c2;
+	out[3] = c3;
+}
+
+
+static void philox_set(void * vstate, unsigned long int seed)
+{
+	philox_state_t * state = static_cast<philox_state_t *>(vstate);
+
+	state->key[0] = static_cast<uint32_t>(seed & 0xFFFFFFFFUL);
+	// shift in two steps because unsigned long can be 32 bit
+	state->key[1] = static_cast<uint32_t>((seed >> 16) >> 16);
+	state->streamKey[0] = state->key[0];
+	state->streamKey[1] = state->key[1];
+	std::fill(state->ctr, state->ctr + 4, 0U);
+	state->idx = 4;
+	state->keyed = 0;
+}
+
+
+static unsigned long int philox_get(void * vstate)
+{
+	philox_state_t * state = static_cast<philox_state_t *>(vstate);
+
+	if (state->idx == 4) {
+		philox4x32_10(state->ctr, state->keyed ? state->streamKey : state->key, state->out);
+		// a keyed stream only uses the first word of the counter
+		if (++state->ctr[0] == 0 && !state->keyed && ++state->ctr[1] == 0)
+			++state->ctr[2];
+		state->idx = 0;
+	}
+	return state->out[state->idx++];
+}
+
+
+static double philox_get_double(void * vstate)
+{
+	return philox_get(vstate) / 4294967296.0;
+}
+
+
+static const gsl_rng_type philox_type = {
+	"philox",                               // name
+	0xFFFFFFFFUL,                           // RAND_MAX
+	0,                                      // RAND_MIN
+	sizeof(philox_state_t),
+	&philox_set,
+	&philox_get,
+	&philox_get_double
+};
+
+// random number generators that are not part of GSL
+static const gsl_rng_type * g_extraRNGTypes[] = { &philox_type, 0 };
+
 // choose an random number generator.
 void RNG::set(const char * rng, unsigned long seed)
 {
@@ -3401,9 +3700,16 @@ void RNG::set(const char * rng, unsigned long seed)
 
 		gsl_rng_default = 0;
 
+		// check non-GSL generators before GSL ones
+		for (t = g_extraRNGTypes; *t != 0; t++)
+			if (strcmp(rng_name, (*t)->name) == 0)
+				break;
+		if (*t == 0)
+			t = t0;
+
 		// check GSL_RNG_TYPE against the names of all the generators
 
-		for (t = t0; *t != 0; t++) {
+		for (; *t != 0; t++) {
 			// require that a RNG can generate full range of integer from 0 to the max of unsigned long int
 			if (strcmp(rng_name, (*t)->name) == 0) {
 				// free current RNG
@@ -3439,6 +3745,66 @@ void RNG::set(const char * rng, unsigned long seed)
 }
 
 
+bool RNG::counterBased() const
+{
+	return m_RNG->type == &philox_type;
+}
+
+
+void RNG::setStreamSeed(unsigned long seed)
+{
+	if (!counterBased())
+		return;
+	philox_state_t * state = static_cast<philox_state_t *>(m_RNG->state);
+	state->streamKey[0] = static_cast<uint32_t>(seed & 0xFFFFFFFFUL);
+	state->streamKey[1] = static_cast<uint32_t>((seed >> 16) >> 16);
+}
+
+
+ULONG RNG::newStreamKey()
+{
+	if (!counterBased())
+		return 0;
+	return gsl_rng_get(m_RNG);
+}
+
+
+void RNG::setStream(ULONG key, ULONG gen, ULONG index)
+{
+	if (!counterBased())
+		return;
+	philox_state_t * state = static_cast<philox_state_t *>(m_RNG->state);
+	if (!state->keyed) {
+		std::copy(state->ctr, state->ctr + 4, state->savedCtr);
+		std::copy(state->out, state->out + 4, state->savedOut);
+		state->savedIdx = state->idx;
+		state->keyed = 1;
+	}
+	// the highest bit separates keyed streams from the regular sequence
+	state->ctr[0] = 0;
+	state->ctr[1] = static_cast<uint32_t>(index);
+	state->ctr[2] = static_cast<uint32_t>(key);
+	state->ctr[3] = 0x80000000U | static_cast<uint32_t>(gen & 0x7FFFFFFFUL);
+	state->idx = 4;
+	m_bitIndex = 0;
+}
+
+
+void RNG::resetStream()
+{
+	if (!counterBased())
+		return;
+	philox_state_t * state = static_cast<philox_state_t *>(m_RNG->state);
+	if (!state->keyed)
+		return;
+	std::copy(state->savedCtr, state->savedCtr + 4, state->ctr);
+	std::copy(state->savedOut, state->savedOut + 4, state->out);
+	state->idx = state->savedIdx;
+	state->keyed = 0;
+	m_bitIndex = 0;
+}
+
+
 bool RNG::randBit()
 {
 	if (m_bitIndex == 16)
@@ -4210,13 +4576,13 @@ double Bernullitrials::probSuccRate() const
 // ###############################################
 
 Bernullitrials_T::Bernullitrials_T(RNG & /* rng */)
-	: m_N(1024), m_prob(0), m_table(0), m_pointer(0), m_cur(npos)
+	: m_N(1024), m_rows(1024), m_prob(0), m_table(0), m_pointer(0), m_cur(npos)
 {
 }
 
 
 Bernullitrials_T::Bernullitrials_T(RNG & /* rng */, const vectorf & prob, size_t N)
-	: m_N(N), m_prob(prob), m_table(N), m_pointer(N), m_cur(npos)
+	: m_N(N), m_rows(N), m_prob(prob), m_table(N), m_pointer(N), m_cur(npos)
 {
 	//DBG_FAILIF(trials_T <= 0, ValueError, "trial number can not be zero.");
 	DBG_FAILIF(prob.empty(), ValueError, "probability table can not be empty.");
@@ -4252,18 +4618,21 @@ void Bernullitrials_T::setParameter(const vectorf & prob, size_t N)
 void Bernullitrials_T::setAll(size_t idx, bool v)
 {
 	if (v)
-		for (size_t i = 0; i < m_N; ++i)
+		for (size_t i = 0; i < m_rows; ++i)
 			setBit(m_pointer[i], idx);
 	else
-		for (size_t i = 0; i < m_N; ++i)
+		for (size_t i = 0; i < m_rows; ++i)
 			unsetBit(m_pointer[i], idx);
 }
 
 
 void Bernullitrials_T::doTrial()
 {
+	// trials buffered for later offspring would not be drawn from their
+	// own keyed streams
+	m_rows = getRNG().counterBased() ? 1 : m_N;
 	// reset all values to 0
-	for (size_t i = 0; i < m_N; ++i) {
+	for (size_t i = 0; i < m_rows; ++i) {
 		m_table[i].clear();
 		m_table[i].resize(m_prob.size(), 0);
 		m_pointer[i] = const_cast<WORDTYPE *>(BITPTR(m_table[i].begin()));
@@ -4286,7 +4655,7 @@ void Bernullitrials_T::doTrial()
 					break;
 				// i moves to 6 and 9
 				i += step;
-				if (i <= m_N)
+				if (i <= m_rows)
 					// set the 5th and 8th element to 1.
 					setBit(m_pointer[i - 1], cl);
 				else
@@ -4295,7 +4664,7 @@ void Bernullitrials_T::doTrial()
 		} else if (prob == 1.) {
 			setAll(cl, true);
 		} else {                                                                  // 1 > m_proc[cl] > 0.5
-			for (size_t i = 0; i < m_N; ++i)
+			for (size_t i = 0; i < m_rows; ++i)
 				if (getRNG().randUniform() < prob)
 					setBit(m_pointer[i], cl);
 		}
@@ -4307,7 +4676,7 @@ void Bernullitrials_T::doTrial()
 // get a trial corresponding to m_prob.
 void Bernullitrials_T::trial()
 {
-	if (m_cur == npos || m_cur == m_N - 1)  // reach the last trial
+	if (m_cur == npos || m_cur + 1 >= m_rows)  // reach the last trial
 		doTrial();
 	else
 		m_cur++;
@@ -4402,9 +4771,9 @@ double Bernullitrials_T::trialSuccRate(UINT index) const
 {
 	UINT count = 0;
 
-	for (size_t cl = 0, clEnd = m_N; cl < clEnd; ++cl)
+	for (size_t cl = 0, clEnd = m_rows; cl < clEnd; ++cl)
 		count += getBit(m_pointer[cl], index) ? 1 : 0;
-	return count / static_cast<double>(m_N);
+	return count / static_cast<double>(m_rows);
 }
 
 
@@ -4672,6 +5041,8 @@ PyObject * moduleInfo()
 
 	t0 = gsl_rng_types_setup();
 
+	for (t = g_extraRNGTypes; *t != 0; t++)
+		PyList_Append(rngs, PyString_FromString((*t)->name));
 	for (t = t0; *t != 0; t++) {
 		rng = gsl_rng_alloc(*t);
 		if (gsl_rng_min(rng) == 0 && gsl_rng_max(rng) >= MaxRandomNumber)
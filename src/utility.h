@@ -153,9 +153,17 @@ void checkRefCount();
  *  a number set by environmental variable \c OMP_NUM_THREADS.
  *  Second and third argument is to set the type or seed of existing random number generator using RNG \e name
  *  with \e seed. If using openMP, it sets the type or seed of random number
- *  generator of each thread.
+ *  generator of each thread. Threads use the type of the random number
+ *  generator of the calling thread if \e name is not given. If a directory is specified by parameter
+ *  \e genoStorage, large genotype arrays (1MB or more) created afterwards
+ *  will be stored in memory-mapped temporary files under this directory so
+ *  that populations larger than available memory can be simulated. These
+ *  files are removed automatically and genotypes will be stored in memory
+ *  again if an empty string is given. This feature is not available under
+ *  windows, and for the binary and mutant modules.
  */
-void setOptions(const int numThreads = -1, const char * name = NULL, unsigned long seed = 0);
+void setOptions(const int numThreads = -1, const char * name = NULL, unsigned long seed = 0,
+	const char * genoStorage = NULL);
 
 /// CPPONLY get number of thread in openMP
 UINT numThreads();
@@ -318,6 +326,15 @@ private:
 	PyObject * m_object;
 };
 
+/// CPPONLY count a call to a Python function, used to profile evolutionary processes
+void countPyCall();
+
+/// CPPONLY return the number of calls to Python functions made by simuPOP
+ULONG pyCallCount();
+
+/// CPPONLY return wall-clock time in seconds, used to profile evolutionary processes
+double wallTime();
+
 /** A wrapper to a python function
  *  CPPONLY
  */
@@ -372,6 +389,7 @@ public:
 		va_start(argptr, format);
 		PyObject * arglist = Py_VaBuildValue(const_cast<char *>(format), argptr);
 		va_end(argptr);
+		countPyCall();
 		PyObject * pyResult = PyEval_CallObject(m_func.object(), arglist);
 
 		Py_XDECREF(arglist);
@@ -390,6 +408,7 @@ public:
 	template <typename T>
 	T operator()(void converter(PyObject *, T &), PyObject * arglist) const
 	{
+		countPyCall();
 		PyObject * pyResult = PyEval_CallObject(m_func.object(), arglist);
 
 		if (pyResult == NULL) {
@@ -411,6 +430,7 @@ public:
 		va_start(argptr, format);
 		PyObject * arglist = Py_VaBuildValue(const_cast<char *>(format), argptr);
 		va_end(argptr);
+		countPyCall();
 		PyObject * pyResult = PyEval_CallObject(m_func.object(), arglist);
 
 		Py_XDECREF(arglist);
@@ -425,6 +445,7 @@ public:
 
 	PyObject * operator()(PyObject * args) const
 	{
+		countPyCall();
 		PyObject * pyResult = PyEval_CallObject(m_func.object(), args);
 
 		if (pyResult == NULL) {
@@ -1108,6 +1129,22 @@ PyObject * Allele_Vec_As_NumArray(GenoIterator begin, GenoIterator end);
 /// CPPONLY
 PyObject * Lineage_Vec_As_NumArray(LineageIterator begin, LineageIterator end);
 
+/** CPPONLY
+ *  Expose a block of memory as a writable Python memoryview of given
+ *  \e format and \e shape, without copying the data. The memoryview does not
+ *  own the memory so it is valid only as long as the memory is not freed or
+ *  reallocated.
+ */
+PyObject * Buffer_As_MemoryView(void * buf, const char * format, size_t itemSize,
+	const vectoru & shape);
+
+/** CPPONLY
+ *  Return a copy of \e values as a Python array of type \c 'd'
+ *  (\c array.array), which supports the buffer interface and can be saved
+ *  along with the population.
+ */
+PyObject * Double_Vec_As_Array(const vectorf & values);
+
 // ///////////////////////////////////////////////////////
 /** CPPONLY shared variables.
 
@@ -1792,6 +1829,13 @@ private:
  *  generators from GNU Scientific Library. You can obtain and change the
  *  RNG used by the current simuPOP module through the \c getRNG() function,
  *  or create a separate random number generator and use it in your script.
+ *  In addition to GSL generators, a counter-based generator \c philox
+ *  (Philox4x32-10) is provided. When this generator is used, offspring
+ *  generated during mating draw random numbers from streams keyed by seed,
+ *  generation and index of offspring so that results of parallel mating
+ *  and other parallel operations do not depend on the number of threads.
+ *  This generator should be set for all threads using function
+ *  <tt>setOptions(name='philox')</tt>.
  */
 class RNG
 {
@@ -1844,6 +1888,35 @@ public:
 	/// CPPONLY
 	static unsigned long generateRandomSeed();
 
+	/** CPPONLY Return \c true if the random number generator is counter-based
+	 *  and can draw from keyed streams.
+	 */
+	bool counterBased() const;
+
+	/** CPPONLY Set the seed of keyed streams, which is by default the seed
+	 *  of the generator. This is used to share keyed streams among RNGs of
+	 *  different threads.
+	 */
+	void setStreamSeed(unsigned long seed);
+
+	/** CPPONLY Draw a key from the regular sequence of a counter-based
+	 *  generator, which should be passed to \c setStream to identify a
+	 *  parallel section. Return \c 0 and leave the generator untouched if
+	 *  the generator is not counter-based.
+	 */
+	ULONG newStreamKey();
+
+	/** CPPONLY Draw subsequent random numbers from a stream keyed by seed,
+	 *  section \e key, generation \e gen and \e index, if the generator
+	 *  is counter-based. Nothing will be done otherwise.
+	 */
+	void setStream(ULONG key, ULONG gen, ULONG index);
+
+	/** CPPONLY Return to the regular sequence of random numbers after
+	 *  drawing from a keyed stream.
+	 */
+	void resetStream();
+
 
 	/** Generate a random number following a rng_uniform [0, 1) distribution.
 	 *  <group>3-rng</group>
@@ -2464,6 +2537,11 @@ private:
 
 	size_t m_N;
 
+	/// number of rows generated by the last doTrial, which is 1 if a
+	/// counter-based RNG is used so that each trial draws from the current
+	/// keyed stream.
+	size_t m_rows;
+
 	/// vector of probabilities
 	vectorf m_prob;
 
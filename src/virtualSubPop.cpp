@@ -309,6 +309,17 @@ size_t BaseVspSplitter::countVisibleInds(const Population & pop, size_t subPop)
 }
 
 
+size_t BaseVspSplitter::memoryUsage() const
+{
+	// states of derived splitters are small and are not counted
+	size_t bytes = sizeof(BaseVspSplitter);
+
+	for (size_t i = 0; i < m_names.size(); ++i)
+		bytes += sizeof(string) + m_names[i].capacity();
+	return bytes;
+}
+
+
 size_t BaseVspSplitter::vspByName(const string & vspName) const
 {
 	if (!m_names.empty()) {
@@ -393,6 +404,18 @@ BaseVspSplitter * CombinedSplitter::clone() const
 }
 
 
+size_t CombinedSplitter::memoryUsage() const
+{
+	size_t bytes = BaseVspSplitter::memoryUsage();
+
+	for (size_t i = 0; i < m_splitters.size(); ++i)
+		bytes += m_splitters[i]->memoryUsage();
+	for (size_t i = 0; i < m_vspMap.size(); ++i)
+		bytes += sizeof(vspList) + m_vspMap[i].capacity() * sizeof(vspPair);
+	return bytes;
+}
+
+
 size_t CombinedSplitter::size(const Population & pop, size_t subPop, size_t virtualSubPop) const
 {
 	DBG_FAILIF(static_cast<UINT>(virtualSubPop) >= m_vspMap.size(), IndexError,
@@ -529,6 +552,18 @@ BaseVspSplitter * ProductSplitter::clone() const
 }
 
 
+size_t ProductSplitter::memoryUsage() const
+{
+	size_t bytes = BaseVspSplitter::memoryUsage();
+
+	for (size_t i = 0; i < m_splitters.size(); ++i)
+		bytes += m_splitters[i]->memoryUsage();
+	for (size_t i = 0; i < m_subIndexes.size(); ++i)
+		bytes += sizeof(vectoru) + m_subIndexes[i].capacity() * sizeof(size_t);
+	return bytes;
+}
+
+
 size_t ProductSplitter::size(const Population & pop, size_t subPop, size_t virtualSubPop) const
 {
 	DBG_FAILIF(virtualSubPop >= m_numVSP, IndexError, "Subpopulation index out of range.");
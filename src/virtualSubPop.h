@@ -354,6 +354,10 @@ public:
 	 */
 	virtual string name(size_t vsp) const = 0;
 
+	/// Return the number of bytes used by the splitter.
+	/// CPPONLY
+	virtual size_t memoryUsage() const;
+
 	/** Return the index of a virtual subpopulation from its name. If multiple
 	 *  virtual subpopulations share the same name, the first vsp is returned.
 	 */
@@ -460,6 +464,9 @@ public:
 	 */
 	string name(size_t vsp) const;
 
+	/// CPPONLY
+	size_t memoryUsage() const;
+
 private:
 	/// the splitters
 	vector<BaseVspSplitter *> m_splitters;
@@ -527,6 +534,9 @@ public:
 	 */
 	string name(size_t vsp) const;
 
+	/// CPPONLY
+	size_t memoryUsage() const;
+
 private:
 	/// the splitters
 	vector<BaseVspSplitter *> m_splitters;
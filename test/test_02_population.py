@@ -197,6 +197,51 @@ class TestPopulation(unittest.TestCase):
         self.assertEqual(len(arr), pop.genoSize()*pop.subPopSize(1))
         self.assertRaises(IndexError, pop.genotype, 2)
 
+    def testGenotypeView(self):
+        'Testing Population::genotypeView(), genotypeView(subPop)'
+        pop = Population(loci=[1, 2], size=[1, 2])
+        if moduleInfo()['alleleType'] in ['binary', 'mutant']:
+            self.assertRaises(ValueError, pop.genotypeView)
+            self.assertRaises(BufferError, memoryview, pop.genotype())
+            return
+        pop.setGenotype([1, 2, 3, 2, 3, 1])
+        view = pop.genotypeView()
+        self.assertEqual(view.shape, (3, 2, 3))
+        self.assertEqual(view.tolist()[1], [[1, 2, 3], [2, 3, 1]])
+        # the view shares memory with the population
+        view[2, 1, 0] = 4
+        self.assertEqual(pop.individual(2).allele(0, 1), 4)
+        view = pop.genotypeView(1)
+        self.assertEqual(view.shape, (2, 2, 3))
+        self.assertEqual(view[1, 1, 0], 4)
+        self.assertRaises(IndexError, pop.genotypeView, 2)
+        # the carray object also exposes its memory
+        arr = memoryview(pop.genotype(1))
+        self.assertEqual(arr.shape, (12,))
+        arr[0] = 5
+        self.assertEqual(pop.individual(1).allele(0), 5)
+        #
+        if moduleInfo()['alleleType'] == 'lineage':
+            initLineage(pop, range(6))
+            view = pop.lineageView()
+            self.assertEqual(view.shape, (3, 2, 3))
+            self.assertEqual(view.tolist()[0], [[0, 1, 2], [3, 4, 5]])
+        else:
+            self.assertEqual(pop.lineageView(), None)
+
+    def testInfoView(self):
+        'Testing Population::infoView(), infoView(subPop)'
+        pop = self.getPop(infoFields=['x', 'y'])
+        pop.setIndInfo(range(100), 'y')
+        view = pop.infoView()
+        self.assertEqual(view.shape, (100, 2))
+        self.assertEqual([x[1] for x in view.tolist()], list(range(100)))
+        view = pop.infoView(1)
+        self.assertEqual(view.shape, (80, 2))
+        view[0, 0] = 2.5
+        self.assertEqual(pop.individual(20).info('x'), 2.5)
+        self.assertRaises(IndexError, pop.infoView, 2)
+
 
 
     def testSetGenotype(self):
@@ -324,6 +369,42 @@ class TestPopulation(unittest.TestCase):
         pop.setAncestralDepth(3)
         self.assertEqual(pop.ancestralGens(), 3)
 
+    def testAncestralGensOfChangingSize(self):
+        'Testing ancestral generations of populations with changing sizes'
+        sizes = [100, 150, 80, 200, 300, 50, 120]
+        pop = Population(size=sizes[0], loci=[2, 3], ancGen=2,
+            infoFields=['ind_id', 'father_id', 'mother_id'])
+        initSex(pop)
+        initGenotype(pop, freq=[.2, .8])
+        tagID(pop, reset=True)
+        gens = [(pop.popSize(), list(pop.genotype()), pop.indInfo('ind_id'),
+            pop.indInfo('father_id'))]
+        for size in sizes[1:]:
+            pop.evolve(
+                matingScheme=RandomMating(subPopSize=[size],
+                    ops=[MendelianGenoTransmitter(), IdTagger(), PedigreeTagger()]),
+                gen=1)
+            gens.append((pop.popSize(), list(pop.genotype()), pop.indInfo('ind_id'),
+                pop.indInfo('father_id')))
+            self.assertEqual(pop.ancestralGens(), min(len(gens) - 1, 2))
+            for anc in range(pop.ancestralGens() + 1):
+                pop.useAncestralGen(anc)
+                self.assertEqual((pop.popSize(), list(pop.genotype()),
+                    pop.indInfo('ind_id'), pop.indInfo('father_id')), gens[-1 - anc])
+            pop.useAncestralGen(0)
+
+    def testPushDiscardOldest(self):
+        'Testing subpopulation structure of a population pushed after the oldest generation'
+        pop = Population(size=[10, 20, 30], loci=[2, 3], ancGen=1)
+        pop.push(Population(size=[30, 30], loci=[2, 3]))
+        pop1 = Population(size=[60], loci=[2, 3])
+        pop.push(pop1)
+        self.assertEqual(pop.ancestralGens(), 1)
+        # pop1 holds the discarded generation
+        self.assertEqual(pop1.subPopSizes(), (10, 20, 30))
+        for sp in range(3):
+            self.assertEqual(len(list(pop1.individuals(sp))), pop1.subPopSize(sp))
+
     def testAddChrom(self):
         'Testing Population::addChrom'
         pop = self.getPop(chromNames=['c1', 'c2'], lociPos=[1, 3, 5], lociNames = ['l1', 'l2', 'l3'], ancGen=5)
@@ -867,7 +948,7 @@ class TestPopulation(unittest.TestCase):
         pop = self.getPop(size=[0, 100, 0, 20, 30, 0, 50], subPopNames=['A', 'B', 'C', 'D', 'E', 'F', 'G'])
         initSex(pop)
         initGenotype(pop, freq=[0.5, 0.5])
-        initLineage(pop, range(10))
+        initLineage(pop, lineage=list(range(10)))
         self.assertEqual(pop.numSubPop(), 7)
         pop1 = pop.extractSubPops([x for x in range(7) if pop.subPopSize(x) != 0])
         self.assertEqual(pop1.numSubPop(), 4)
@@ -1335,6 +1416,139 @@ class TestPopulation(unittest.TestCase):
         self.assertFalse('module_os' in pop1.vars())
         os.remove('popout')
 
+    def testSaveBinary(self):
+        'Testing Population::save(filename, format="binary")'
+        pop = self.getPop(ancGen=3, infoFields=['a', 'b'])
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            initGenotype(pop, freq=[0.3, 0.7])
+            initSex(pop)
+            initInfo(pop, lambda:random.random(), infoFields=['a', 'b'])
+            for ind in pop.individuals():
+                ind.setAffected(random.random() < 0.5)
+        stat(pop, alleleFreq=list(range(pop.totNumLoci())))
+        a = pop.dvars().alleleFreq[0][1]
+        pop.save('popout', format='binary')
+        pop1 = loadPopulation('popout')
+        self.assertEqual(pop, pop1)
+        self.assertEqual(pop1.ancestralGens(), pop.ancestralGens())
+        self.assertEqual(a, pop1.dvars().alleleFreq[0][1])
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            pop1.useAncestralGen(gen)
+            self.assertEqual(pop.subPopSizes(), pop1.subPopSizes())
+            self.assertEqual(pop.subPopNames(), pop1.subPopNames())
+            self.assertEqual(pop.indInfo('a'), pop1.indInfo('a'))
+            self.assertEqual(pop.indInfo('b'), pop1.indInfo('b'))
+            self.assertEqual([ind.affected() for ind in pop.individuals()],
+                [ind.affected() for ind in pop1.individuals()])
+        # populations saved in text and binary format are the same
+        pop.useAncestralGen(0)
+        pop.save('popout', format='text')
+        self.assertEqual(pop, loadPopulation('popout'))
+        # lineage is saved
+        if moduleInfo()['alleleType'] == 'lineage':
+            pop = Population(size=[100, 200], loci=[5, 10])
+            initGenotype(pop, freq=[0.5, 0.5])
+            initLineage(pop, lineage=list(range(10)))
+            pop.save('popout', format='binary')
+            pop1 = loadPopulation('popout')
+            self.assertEqual(pop.lineage(), pop1.lineage())
+        # an empty population
+        pop = Population(0, loci=3)
+        pop.save('popout', format='binary')
+        self.assertEqual(loadPopulation('popout').popSize(), 0)
+        self.assertRaises(ValueError, pop.save, 'popout', format='unknown')
+        os.remove('popout')
+
+    def testLoadPartial(self):
+        'Testing loadPopulation(file, subPops, loci, infoFields, ancGens)'
+        pop = self.getPop(size=[20, 30, 40], loci=[3, 4], ancGen=2,
+            infoFields=['a', 'b', 'c'], subPopNames=['A', 'B', 'C'])
+        for gen in range(pop.ancestralGens(), -1, -1):
+            pop.useAncestralGen(gen)
+            initGenotype(pop, freq=[0.2, 0.3, 0.5])
+            initInfo(pop, lambda:random.random(), infoFields=['a', 'b', 'c'])
+        pop.useAncestralGen(0)
+        for format in ['text', 'binary']:
+            pop.save('popout', format=format)
+            # everything
+            self.assertEqual(loadPopulation('popout'), pop)
+            # present generation
+            pop1 = loadPopulation('popout', ancGens=0)
+            self.assertEqual(pop1.ancestralGens(), 0)
+            self.assertEqual(pop1.genotype(), pop.genotype())
+            # the oldest generation becomes the present generation
+            pop.useAncestralGen(2)
+            pop1 = loadPopulation('popout', ancGens=[2])
+            self.assertEqual(pop1.ancestralGens(), 0)
+            self.assertEqual(pop1.genotype(), pop.genotype())
+            pop1 = loadPopulation('popout', ancGens=[0, 2])
+            self.assertEqual(pop1.ancestralGens(), 1)
+            pop1.useAncestralGen(1)
+            self.assertEqual(pop1.genotype(), pop.genotype())
+            # subpopulations
+            pop1 = loadPopulation('popout', subPops=[0, 'C'])
+            self.assertEqual(pop1.subPopSizes(), (20, 40))
+            self.assertEqual(pop1.subPopNames(), ('A', 'C'))
+            self.assertEqual(pop1.ancestralGens(), 2)
+            for gen in range(3):
+                pop.useAncestralGen(gen)
+                pop1.useAncestralGen(gen)
+                self.assertEqual(pop1.genotype(0), pop.genotype(0))
+                self.assertEqual(pop1.genotype(1), pop.genotype(2))
+                self.assertEqual(pop1.indInfo('c', 1), pop.indInfo('c', 2))
+            pop.useAncestralGen(0)
+            pop1.useAncestralGen(0)
+            # loci and information fields
+            pop1 = loadPopulation('popout', loci=[5, 1, 2], infoFields=['c', 'a'],
+                subPops=1, ancGens=0)
+            self.assertEqual(pop1.numLoci(), (2, 1))
+            self.assertEqual(pop1.infoFields(), ('c', 'a'))
+            self.assertEqual(pop1.subPopSizes(), (30,))
+            for ind, ind1 in zip(pop.individuals(1), pop1.individuals()):
+                self.assertEqual(ind1.sex(), ind.sex())
+                self.assertEqual(ind1.info('a'), ind.info('a'))
+                self.assertEqual(ind1.info('c'), ind.info('c'))
+                for p in range(2):
+                    self.assertEqual(ind1.genotype(p), [ind.allele(x, p) for x in [1, 2, 5]])
+            # partial populations loaded from text and binary files are the same
+            if format == 'text':
+                pop2 = pop1
+            else:
+                self.assertEqual(pop1, pop2)
+            self.assertRaises(ValueError, loadPopulation, 'popout', ancGens=5)
+            self.assertRaises((ValueError, IndexError), loadPopulation, 'popout', subPops='D')
+        os.remove('popout')
+
+    def testGenoStorage(self):
+        'Testing memory-mapped genotype storage set by setOptions(genoStorage)'
+        if moduleInfo()['alleleType'] in ['binary', 'mutant'] or os.name == 'nt':
+            self.assertRaises(ValueError, setOptions, genoStorage='.')
+            return
+        if not os.path.isdir('genostorage'):
+            os.mkdir('genostorage')
+        setOptions(genoStorage='genostorage')
+        try:
+            pop = Population(size=[1000, 2000], loci=[500, 600], infoFields='a')
+            initSex(pop)
+            initGenotype(pop, freq=[0.3, 0.7])
+            pop1 = pop.clone()
+            self.assertEqual(pop, pop1)
+            pop.evolve(
+                matingScheme=RandomMating(ops=Recombinator(rates=0.01)),
+                gen=2)
+            stat(pop, alleleFreq=[0])
+            self.assertAlmostEqual(pop.dvars().alleleFreq[0][1], 0.7, delta=0.05)
+            pop1.removeLoci(list(range(500)))
+            self.assertEqual(pop1.totNumLoci(), 600)
+            # storage files are removed immediately after they are mapped
+            self.assertEqual(os.listdir('genostorage'), [])
+        finally:
+            setOptions(genoStorage='')
+        self.assertRaises(ValueError, setOptions, genoStorage='nonexisting_dir')
+        os.rmdir('genostorage')
+
     def testCrossPlatformLoad(self):
         'Testing loading populations created from other platform and allele types'
         localFile = 'sample_%d_%s_v3.pop' % ( \
@@ -1798,6 +2012,63 @@ class TestPopulation(unittest.TestCase):
                 matingScheme=RandomMating(), dryrun=True)
         sys.stdout = tmp
 
+    def testMemoryUsage(self):
+        'Testing Population::memoryUsage()'
+        pop = Population([400, 600], loci=[100, 200], infoFields=['a', 'b'])
+        usage = pop.memoryUsage(detailed=True)
+        self.assertEqual(usage['total'], pop.memoryUsage())
+        self.assertEqual(usage['total'], sum([y for x,y in usage.items() if x != 'total']))
+        self.assertTrue(usage['info'] >= 1000 * 2 * 8)
+        self.assertEqual(usage['ancestralGens'], 0)
+        if moduleInfo()['alleleType'] == 'binary':
+            self.assertTrue(usage['genotype'] >= 1000 * 600 // 8)
+        elif moduleInfo()['alleleType'] != 'mutant':
+            self.assertTrue(usage['genotype'] >= 1000 * 600)
+        if moduleInfo()['alleleType'] == 'lineage':
+            self.assertTrue(usage['lineage'] >= 1000 * 600 * 4)
+        else:
+            self.assertEqual(usage['lineage'], 0)
+        # ancestral generations and variables
+        pop.setAncestralDepth(1)
+        pop.vars()['data'] = list(range(10000))
+        pop.evolve(initOps=InitSex(), matingScheme=RandomMating(), gen=1)
+        usage1 = pop.memoryUsage(detailed=True)
+        self.assertTrue(usage1['ancestralGens'] >= usage['genotype'])
+        self.assertTrue(usage1['vars'] > 10000 * 8)
+
+    def testTrackAlleles(self):
+        'Testing Population::trackAlleles()'
+        def alleleNum(pop, track):
+            if not track:
+                pop = pop.clone()
+                pop.trackAlleles([])
+            stat(pop, alleleFreq=ALL_AVAIL)
+            return {x: dict(y) for x, y in pop.vars()['alleleNum'].items()}
+        pop = Population([400, 600], loci=[5, 3, 2],
+            chromTypes=[AUTOSOME, CHROMOSOME_X, CHROMOSOME_Y])
+        initSex(pop)
+        initGenotype(pop, freq=[.4, .6])
+        pop.trackAlleles()
+        self.assertEqual(alleleNum(pop, True), alleleNum(pop, False))
+        # counted during mating and updated by mutators
+        pop.evolve(matingScheme=RandomMating(),
+            postOps=KAlleleMutator(k=2, rates=0.05), gen=3)
+        self.assertEqual(alleleNum(pop, True), alleleNum(pop, False))
+        pop.evolve(matingScheme=HeteroMating([RandomMating(weight=1),
+            SelfMating(weight=1)], subPopSize=[300, 500]), gen=2)
+        self.assertEqual(alleleNum(pop, True), alleleNum(pop, False))
+        # counts are discarded by functions that change genotypes
+        initGenotype(pop, freq=[.8, .2])
+        self.assertEqual(alleleNum(pop, True), alleleNum(pop, False))
+        pop.resize([300, 300])
+        self.assertEqual(alleleNum(pop, True), alleleNum(pop, False))
+        # but not if alleles are changed directly
+        pop.trackAlleles()
+        before = alleleNum(pop, True)
+        pop.individual(0).setAllele(1 - pop.individual(0).allele(0), 0)
+        self.assertEqual(alleleNum(pop, True), before)
+        self.assertNotEqual(alleleNum(pop, False), before)
+
     def testLineage(self):
         if moduleInfo()['alleleType'] != 'lineage':
             return
@@ -66,6 +66,72 @@ class TestSimulator(unittest.TestCase):
             gen=10
         )
 
+    def testEvolveReps(self):
+        'Testing Simulator::evolve(reps)'
+        simu = Simulator(Population(size=[100, 40], loci=[5]), rep=4)
+        gens = simu.evolve(
+            initOps=[InitSex(), InitGenotype(freq=[0.3, 0.7])],
+            matingScheme=RandomMating(),
+            gen=5, reps=[1, 3])
+        self.assertEqual(gens, (0, 5, 0, 5))
+        self.assertEqual(simu.dvars(1).gen, 5)
+        self.assertEqual(simu.dvars(0).gen, 0)
+        # untouched replicates are not initialized
+        self.assertEqual(simu.population(0).genotype().count(0), 1400)
+        self.assertRaises(IndexError, simu.evolve, gen=1, reps=[4])
+
+    def testParallelEvolve(self):
+        'Testing Simulator::evolve(parallel="processes")'
+        if os.name == 'nt':
+            return
+        def evolve(**kwargs):
+            getRNG().set(seed=1234)
+            simu = Simulator(Population(size=[100, 40], loci=[5]), rep=5)
+            gens = simu.evolve(
+                initOps=[InitSex(), InitGenotype(freq=[0.3, 0.7])],
+                matingScheme=RandomMating(),
+                postOps=[Stat(alleleFreq=0),
+                    TerminateIf('gen == 3', reps=2)],
+                gen=10, **kwargs)
+            return gens, [simu.dvars(x).alleleFreq[0][0] for x in range(5)], \
+                [simu.dvars(x).rep for x in range(5)]
+        gens, freq, reps = evolve(parallel='processes', workers=2)
+        self.assertEqual(gens, (10, 10, 4, 10, 10))
+        self.assertEqual(reps, [0, 1, 2, 3, 4])
+        # results do not depend on the number of workers
+        self.assertEqual(evolve(parallel='processes', workers=3)[1], freq)
+        # replicates are evolved with different seeds
+        self.assertNotEqual(len(set(freq)), 1)
+        self.assertRaises(ValueError, evolve, parallel='threads')
+
+    def testEvolveProfile(self):
+        'Testing Simulator::evolve(profile)'
+        simu = Simulator(Population(size=[100, 40], loci=[5]), rep=2)
+        simu.evolve(
+            initOps=[InitSex(), InitGenotype(freq=[0.3, 0.7])],
+            preOps=PyOperator(lambda ind: True, subPops=1),
+            matingScheme=RandomMating(),
+            postOps=Stat(alleleFreq=0),
+            gen=3, profile=True)
+        prof = simu.dvars(1).profile
+        self.assertEqual(prof['stage'], ['initOps', 'initOps'] +
+            ['preOps', 'matingScheme', 'postOps'] * 3)
+        self.assertEqual(prof['index'], [0, 1] + [0, 0, 0] * 3)
+        self.assertEqual(prof['gen'], [0, 0, 0, 0, 0, 1, 1, 1, 2, 2, 2])
+        self.assertTrue(prof['operator'][0].startswith('<simuPOP.InitSex>'))
+        # the Python function is called for each individual in subpopulation 1
+        self.assertEqual(prof['individuals'][2::3], [40] * 3)
+        self.assertEqual(prof['pyCalls'][2::3], [40] * 3)
+        self.assertEqual(prof['individuals'][3::3], [140] * 3)
+        self.assertEqual(prof['pyCalls'][3::3], [0] * 3)
+        self.assertTrue(all([x >= 0 for x in prof['time']]))
+        # parental and offspring generations are counted during mating
+        self.assertTrue(prof['memory'][3] > prof['memory'][1])
+        # no profile by default
+        pop = Population(size=100, loci=1)
+        pop.evolve(matingScheme=CloneMating(), gen=1)
+        self.assertFalse('profile' in pop.vars())
+
     def testCreateSimulator(self):
         'Testing the construction of Simulator'
         pop = Population(size=[20, 80], loci=1)
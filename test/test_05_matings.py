@@ -275,6 +275,64 @@ class TestMatingSchemes(unittest.TestCase):
                 famSize.append(1)
         self.assertEqual(famSize, [1]*20000+[2]*10000)
          
+    def testConcurrentSubPopMating(self):
+        'Testing mating of many subpopulations (concurrently with multiple threads)'
+        def checkParents(pop, sizes):
+            # parents of offspring in each subpopulation come from the same subpopulation
+            start = 0
+            for sp, size in enumerate(sizes):
+                for ind in pop.individuals(sp):
+                    for idx in [ind.father_idx, ind.mother_idx]:
+                        # -1 for the missing parent of clones
+                        self.assertTrue(idx == -1 or start <= idx < start + size)
+                start += size
+        sizes = [100 + 10 * x for x in range(12)]
+        pop = Population(size=sizes, loci=[5, 3], infoFields=['father_idx', 'mother_idx'])
+        pop.setVirtualSplitter(SexSplitter())
+        initSex(pop)
+        initGenotype(pop, freq=[.4, .6])
+        pop.trackAlleles()
+        pop.evolve(matingScheme=RandomMating(ops=[MendelianGenoTransmitter(), ParentsTagger()]),
+            gen=1)
+        self.assertEqual(pop.subPopSizes(), tuple(sizes))
+        checkParents(pop, sizes)
+        # mating schemes on whole subpopulations and on a virtual subpopulation
+        pop.evolve(matingScheme=HeteroMating([
+            RandomMating(ops=[MendelianGenoTransmitter(), ParentsTagger()], subPops=range(1, 12), weight=1),
+            RandomMating(numOffspring=2, ops=[MendelianGenoTransmitter(), ParentsTagger()], weight=1),
+            RandomSelection(ops=[CloneGenoTransmitter(), ParentsTagger()], subPops=[(0, 0)], weight=-1)],
+            subPopSize=[x + 20 for x in sizes]), gen=1)
+        self.assertEqual(pop.subPopSizes(), tuple([x + 20 for x in sizes]))
+        checkParents(pop, sizes)
+        # allele counts tracked during mating match a recount
+        stat(pop, alleleFreq=ALL_AVAIL)
+        tracked = {x: dict(y) for x, y in pop.vars()['alleleNum'].items()}
+        pop1 = pop.clone()
+        pop1.trackAlleles([])
+        stat(pop1, alleleFreq=ALL_AVAIL)
+        self.assertEqual(tracked, {x: dict(y) for x, y in pop1.vars()['alleleNum'].items()})
+
+    def testChunkedOffspringGeneration(self):
+        'Testing generation of offspring in chunks of families'
+        pop = Population(size=[5003], loci=[4, 2], infoFields=['father_idx', 'mother_idx'])
+        initSex(pop)
+        initGenotype(pop, freq=[.3, .7])
+        pop.trackAlleles()
+        for numOff in [1, 3, 7]:
+            pop.evolve(matingScheme=RandomMating(numOffspring=numOff,
+                ops=[MendelianGenoTransmitter(), ParentsTagger()]), gen=1)
+            self.assertEqual(pop.subPopSizes(), (5003,))
+            # siblings are generated together
+            parents = list(zip(pop.indInfo('father_idx'), pop.indInfo('mother_idx')))
+            for fam in range(5003 // numOff):
+                self.assertEqual(len(set(parents[fam * numOff:(fam + 1) * numOff])), 1)
+            stat(pop, alleleFreq=ALL_AVAIL)
+            tracked = {x: dict(y) for x, y in pop.vars()['alleleNum'].items()}
+            pop1 = pop.clone()
+            pop1.trackAlleles([])
+            stat(pop1, alleleFreq=ALL_AVAIL)
+            self.assertEqual(tracked, {x: dict(y) for x, y in pop1.vars()['alleleNum'].items()})
+
     def testWeightingScheme(self):
         'Testing weighting schemes of heterogeneous mating schemes'
         pop = Population(size=[1000], loci=2, infoFields='mark')
@@ -437,6 +495,49 @@ class TestMatingSchemes(unittest.TestCase):
             gen = 20
         )
 
+    def testPedigreeReplay(self):
+        'Testing replaying a pedigree with dense and sparse individual IDs'
+        IdTagger().reset(1)
+        pop = Population(size=[300, 200], loci=[3], ancGen=-1,
+            infoFields=['ind_id', 'father_id', 'mother_id'])
+        pop.evolve(
+            initOps=[InitSex(), IdTagger()],
+            matingScheme=RandomMating(ops=[IdTagger(), PedigreeTagger()]),
+            gen=4)
+        for scale in [1, 100000]:
+            # IDs far apart are indexed differently from consecutive IDs
+            for gen in range(pop.ancestralGens() + 1):
+                pop.useAncestralGen(gen)
+                for field in ['ind_id', 'father_id', 'mother_id']:
+                    pop.setIndInfo([x * scale for x in pop.indInfo(field)], field)
+            ped = Pedigree(pop)
+            pop.useAncestralGen(pop.ancestralGens())
+            founders = Population(size=pop.subPopSizes(), loci=[3], ancGen=1,
+                infoFields='ind_id')
+            founders.setIndInfo(pop.indInfo('ind_id'), 'ind_id')
+            initGenotype(founders, freq=[.2, .3, .5])
+            founders.evolve(
+                matingScheme=PedigreeMating(ped, ops=MendelianGenoTransmitter()),
+                gen=4)
+            pop.useAncestralGen(0)
+            self.assertEqual(founders.indInfo('ind_id'), pop.indInfo('ind_id'))
+            self.assertEqual([x.sex() for x in founders.individuals()],
+                [x.sex() for x in pop.individuals()])
+            # offspring inherit one chromosome from each parent
+            founders.useAncestralGen(1)
+            chroms = {ind.ind_id: [list(ind.genotype(0)), list(ind.genotype(1))] for ind in founders.individuals()}
+            founders.useAncestralGen(0)
+            for off, ind in zip(founders.individuals(), pop.individuals()):
+                dad, mom = chroms[ind.father_id], chroms[ind.mother_id]
+                self.assertTrue((off.genotype(0) in dad and off.genotype(1) in mom) or
+                    (off.genotype(0) in mom and off.genotype(1) in dad))
+            pop.useAncestralGen(0)
+            for gen in range(pop.ancestralGens() + 1):
+                pop.useAncestralGen(gen)
+                for field in ['ind_id', 'father_id', 'mother_id']:
+                    pop.setIndInfo([x / scale for x in pop.indInfo(field)], field)
+            pop.useAncestralGen(0)
+
     def testSequentialParentsChooser(self):
         'Testing sequential parent chooser'
         pop = Population(size=[100, 200], infoFields=['parent_idx'])
@@ -513,6 +614,54 @@ class TestMatingSchemes(unittest.TestCase):
         self.assertRaises(ValueError, testPyRetValue, retWrongIndex)
         self.assertRaises(ValueError, testPyRetValue, retWrongIndexes)
 
+    def testPyParentsChooserBatch(self):
+        'Testing Python parents chooser that returns batches of parents'
+        import array
+        import numpy as np
+        def pairs(pop, subPop):
+            # pairs of parents (k, k + 1), 30 families at a time
+            k = 0
+            while True:
+                yield np.array([[(k + i) % 100, (k + i + 1) % 100] for i in range(30)])
+                k += 30
+        def parents(pop, subPop):
+            k = 0
+            while True:
+                yield array.array('i', [(k + i) % 100 for i in range(30)])
+                k += 30
+        def pairsView(pop, subPop):
+            k = 0
+            while True:
+                buf = array.array('l', sum([[(k + i) % 100, (k + i + 1) % 100] for i in range(30)], []))
+                yield memoryview(buf).cast('B').cast('l', [30, 2])
+                k += 30
+        def floats(pop, subPop):
+            while True:
+                yield np.array([1., 2.])
+        def triplets(pop, subPop):
+            while True:
+                yield np.zeros((10, 3), dtype=int)
+        def evolve(func, ops):
+            pop = Population([100, 100], infoFields=['father_idx', 'mother_idx'])
+            initSex(pop)
+            pop.evolve(
+                matingScheme=HomoMating(PyParentsChooser(func),
+                    OffspringGenerator(ops=ops + [ParentsTagger()])),
+                gen=1)
+            return pop
+        for func in [pairs, pairsView]:
+            pop = evolve(func, [MendelianGenoTransmitter()])
+            for sp in range(2):
+                self.assertEqual(pop.indInfo('father_idx', subPop=sp),
+                    tuple([sp * 100. + i % 100 for i in range(100)]))
+                self.assertEqual(pop.indInfo('mother_idx', subPop=sp),
+                    tuple([sp * 100. + (i + 1) % 100 for i in range(100)]))
+        pop = evolve(parents, [CloneGenoTransmitter()])
+        for sp in range(2):
+            self.assertEqual(pop.indInfo('father_idx', subPop=sp),
+                tuple([sp * 100. + i for i in range(100)]))
+        self.assertRaises(ValueError, evolve, floats, [CloneGenoTransmitter()])
+        self.assertRaises(ValueError, evolve, triplets, [CloneGenoTransmitter()])
   
     def testHaploidRandomMating(self):
         'Testing random mating in haploid populations'
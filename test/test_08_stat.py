@@ -9,7 +9,7 @@
 #
 
 import math
-import unittest, os, sys
+import unittest, os, sys, struct
 from simuOpt import setOptions
 from random import randint
 
@@ -430,6 +430,57 @@ class TestStat(unittest.TestCase):
         self.assertEqual(pop.dvars(2).genoFreq[0][(0, 1)], 0.6)
         self.assertEqual(pop.dvars(2).genoFreq[0][(1, 1)], 0.4)
 
+    def testCountsOfFewLoci(self):
+        'Testing counts of few loci, which are counted by blocks of individuals'
+        pop = Population(size=[1001, 503], loci=[2, 1], chromTypes=[AUTOSOME, CHROMOSOME_X])
+        initSex(pop)
+        initGenotype(pop, freq=[.3, .7])
+        pop.setVirtualSplitter(SexSplitter())
+        stat(pop, alleleFreq=[0, 2], heteroFreq=0, genoFreq=0, LD=[0, 1],
+            subPops=[0, (1, 1)], vars=['alleleNum', 'heteroNum', 'genoNum', 'LD'])
+        inds = list(pop.individuals(0)) + list(pop.individuals((1, 1)))
+        self.assertEqual(pop.dvars().alleleNum[0][1],
+            sum([ind.allele(0, 0) + ind.allele(0, 1) for ind in inds]))
+        # males have one copy of chromosome X
+        self.assertEqual(sum(pop.dvars().alleleNum[2].values()),
+            sum([1 if ind.sex() == MALE else 2 for ind in inds]))
+        self.assertEqual(pop.dvars().heteroNum[0],
+            len([ind for ind in inds if ind.allele(0, 0) != ind.allele(0, 1)]))
+        self.assertEqual(pop.dvars().genoNum[0][(1, 1)],
+            len([ind for ind in inds if ind.allele(0, 0) + ind.allele(0, 1) == 2]))
+        P = [sum([ind.allele(x, 0) + ind.allele(x, 1) for ind in inds]) / (2. * len(inds))
+            for x in range(2)]
+        P11 = sum([ind.allele(0, p) * ind.allele(1, p) for ind in inds for p in range(2)]) / (2. * len(inds))
+        self.assertAlmostEqual(pop.dvars().LD[0][1], abs(P11 - P[0] * P[1]))
+
+    def testStatAsArray(self):
+        'Testing output of allele and heterozygote frequencies as arrays'
+        pop = Population(size=[500, 300], loci=5)
+        initGenotype(pop, freq=[.2, .3, .5], loci=[0, 1, 2])
+        initGenotype(pop, freq=[.4, .6], loci=[3, 4])
+        stat(pop, alleleFreq=[4, 0, 2], heteroFreq=ALL_AVAIL,
+            vars=['alleleFreq', 'alleleNum', 'alleleNum_sp', 'heteroFreq', 'homoNum_sp'])
+        dvars = pop.vars().copy()
+        alleleNum1 = pop.vars(1)['alleleNum']
+        homoNum0 = pop.vars(0)['homoNum']
+        stat(pop, alleleFreq=[4, 0, 2], heteroFreq=ALL_AVAIL, asArray=True,
+            vars=['alleleFreq', 'alleleNum', 'alleleNum_sp', 'heteroFreq', 'homoNum_sp'])
+        self.assertEqual(pop.vars()['alleleNum'].typecode, 'd')
+        # three loci by three alleles (two for the binary module)
+        n = 2 if moduleInfo()['alleleType'] == 'binary' else 3
+        self.assertEqual(len(pop.vars()['alleleFreq']), 3 * n)
+        for i, loc in enumerate([4, 0, 2]):
+            for a in range(n):
+                self.assertAlmostEqual(pop.vars()['alleleFreq'][i * n + a], dvars['alleleFreq'][loc][a])
+                self.assertEqual(pop.vars()['alleleNum'][i * n + a], dvars['alleleNum'][loc][a])
+                self.assertEqual(pop.vars(1)['alleleNum'][i * n + a], alleleNum1[loc][a])
+        self.assertEqual(list(pop.vars()['heteroFreq']), [dvars['heteroFreq'][x] for x in range(5)])
+        self.assertEqual(list(pop.vars(0)['homoNum']), [homoNum0[x] for x in range(5)])
+        # a single large allele does not lead to a huge array
+        if moduleInfo()['alleleType'] in ['long', 'mutant']:
+            pop.individual(0).setAllele(10000000, 0)
+            self.assertRaises(ValueError, stat, pop, alleleFreq=0, asArray=True)
+
     def testInfoStat(self):
         'Testing summary statistics of information fields'
         import random
@@ -518,6 +569,43 @@ class TestStat(unittest.TestCase):
         pop.removeLoci(keep=[5,2,3])
         stat(pop, structure=ALL_AVAIL)
         self.assertAlmostEqual(pop.dvars().F_st,  0.0261665)
+        #
+        # multi-allelic loci in many subpopulations, with locus level
+        # statistics as arrays
+        def wc84(pop, loc):
+            n_i = [pop.subPopSize(sp) for sp in range(pop.numSubPop())]
+            r = len(n_i)
+            n = float(sum(n_i))
+            n_bar = n / r
+            n_c = (n - sum([x * x / n for x in n_i])) / (r - 1)
+            a = b = c = 0
+            for allele in range(3):
+                p_i = []
+                h_i = []
+                for sp in range(r):
+                    geno = [(ind.allele(loc, 0), ind.allele(loc, 1)) for ind in pop.individuals(sp)]
+                    p_i.append(sum([(x == allele) + (y == allele) for x, y in geno]) / (2. * n_i[sp]))
+                    h_i.append(sum([x != y and allele in (x, y) for x, y in geno]) / float(n_i[sp]))
+                p_bar = sum([x * y for x, y in zip(n_i, p_i)]) / n
+                s_2 = sum([x * (y - p_bar) ** 2 for x, y in zip(n_i, p_i)]) / ((r - 1) * n_bar)
+                h_bar = sum([x * y for x, y in zip(n_i, h_i)]) / n
+                a += n_bar / n_c * (s_2 - (p_bar * (1 - p_bar) - (r - 1.) / r * s_2 - h_bar / 4.) / (n_bar - 1.))
+                b += n_bar / (n_bar - 1) * (p_bar * (1 - p_bar) - (r - 1.) / r * s_2 - (2 * n_bar - 1) / (4. * n_bar) * h_bar)
+                c += h_bar / 2.
+            return a / (a + b + c)
+        pop = Population(size=[100, 150, 80, 120], loci=[300])
+        for sp, freq in enumerate([[.1, .3, .6], [.2, .3, .5], [.3, .3, .4], [.4, .3, .3]]):
+            initGenotype(pop, freq=freq, subPops=sp)
+        stat(pop, structure=ALL_AVAIL, vars=['f_st', 'f_is', 'f_it', 'g_st', 'F_st', 'G_st'])
+        for loc in [0, 255, 256, 299]:
+            self.assertAlmostEqual(pop.dvars().f_st[loc], wc84(pop, loc))
+        loci = [5, 299, 0, 256]
+        dictVars = dict([(x, pop.vars()[x]) for x in ['f_st', 'f_is', 'f_it', 'g_st']])
+        stat(pop, structure=loci, vars=['f_st', 'f_is', 'f_it', 'g_st'], asArray=True)
+        for x in dictVars:
+            self.assertEqual(len(pop.vars()[x]), len(loci))
+            for idx, loc in enumerate(loci):
+                self.assertAlmostEqual(pop.vars()[x][idx], dictVars[x][loc])
 
     def testHaploFreq(self):
         'Testing calculation of haplotype frequency'
@@ -544,6 +632,26 @@ class TestStat(unittest.TestCase):
             self.assertEqual(pop.dvars().haploFreq[(2, 5)][(1, 1)], 0.2)
             self.assertEqual(pop.dvars().haploFreq[(2, 5)][(2, 2)], 0.3)
             self.assertEqual(pop.dvars().haploFreq[(2, 5)][(3, 3)], 0.5) 
+        # haplotypes with alleles that do not fit in packed keys
+        pop = Population(size=[200, 300], ploidy=2, loci=[12])
+        initGenotype(pop, freq=[0.2, 0.3, 0.5])
+        if moduleInfo()['alleleType'] != 'binary':
+            for ind in pop.individuals():
+                if randint(0, 5) == 0:
+                    ind.setAllele(200, randint(0, 11), randint(0, 1))
+        haps = [(0, 3), tuple(range(9)), tuple(range(12))]
+        stat(pop, haploFreq=haps, vars=['haploNum', 'haploNum_sp'])
+        for hap in haps:
+            for sp in [None, 0, 1]:
+                cnt = {}
+                for ind in (pop.individuals() if sp is None else pop.individuals(sp)):
+                    for p in range(2):
+                        h = tuple([ind.allele(x, p) for x in hap])
+                        cnt[h] = cnt.get(h, 0) + 1
+                if sp is None:
+                    self.assertEqual(pop.dvars().haploNum[hap], cnt)
+                else:
+                    self.assertEqual(pop.dvars(sp).haploNum[hap], cnt)
 
 
     def testHaploHomoFreq(self):
@@ -694,6 +802,76 @@ class TestStat(unittest.TestCase):
             self.assertAlmostEqual(ChiSq(pop.dvars(sp), 2, 4), pop.dvars(sp).LD_ChiSq[2][4])
             self.assertAlmostEqual(CramerV(pop.dvars(sp), 2, 4), pop.dvars(sp).CramerV[2][4])
 
+    def testLDWindow(self):
+        'Testing LD between loci within a window'
+        pop = Population(size=[300, 200], loci=[5, 3],
+            lociPos=[1, 2, 3, 5, 8, 1, 1.5, 4])
+        initGenotype(pop, freq=[.3, .7])
+        initGenotype(pop, haplotypes=[[0]*8, [1]*8], subPops=0, prop=[.2, .8])
+        stat(pop, LD_window=[2], vars=['LD_window', 'LD_window_sp'])
+        win = pop.vars()['LD_window']
+        pairs = list(zip(win['loc1'], win['loc2']))
+        self.assertEqual(pairs, [(0, 1), (0, 2), (1, 2), (2, 3), (5, 6)])
+        self.assertEqual(list(win['dist']), [1, 2, 1, 2, .5])
+        for i, (loc1, loc2) in enumerate(pairs):
+            loc1, loc2 = int(loc1), int(loc2)
+            stat(pop, LD=[loc1, loc2, 1, 1], vars=['LD', 'LD_prime', 'R2', 'R2_sp'])
+            self.assertAlmostEqual(win['LD'][i], pop.vars()['LD'][loc1][loc2])
+            self.assertAlmostEqual(win['LD_prime'][i], pop.vars()['LD_prime'][loc1][loc2])
+            self.assertAlmostEqual(win['R2'][i], pop.vars()['R2'][loc1][loc2])
+            self.assertAlmostEqual(pop.vars(1)['LD_window']['R2'][i], pop.vars(1)['R2'][loc1][loc2])
+        # limit the number of pairs for each locus
+        stat(pop, LD_window=[10, 1])
+        self.assertEqual(list(pop.vars()['LD_window']['loc2']), [1, 2, 3, 4, 6, 7])
+
+    def testSampledStats(self):
+        'Testing statistics calculated from a random sample of individuals'
+        pop = Population(size=[3000, 2000], loci=[5], infoFields='x')
+        initSex(pop)
+        initGenotype(pop, freq=[.3, .7])
+        stat(pop, popSize=True, sampleSize=500)
+        self.assertEqual(pop.dvars().popSize, 500)
+        self.assertEqual(sum(pop.dvars().subPopSize), 500)
+        stat(pop, popSize=True, sampleSize=[100, 50])
+        self.assertEqual(pop.dvars().subPopSize, [100, 50])
+        stat(pop, popSize=True, sampleFraction=0.1)
+        self.assertEqual(pop.dvars().subPopSize, [300, 200])
+        # virtual subpopulations consist of sampled individuals
+        pop.setVirtualSplitter(SexSplitter())
+        stat(pop, popSize=True, numOfMales=True, sampleSize=[100, 50],
+            subPops=[(0, 0), (0, 1), 1], vars=['subPopSize', 'numOfMales_sp'])
+        self.assertEqual(sum(pop.dvars().subPopSize[:2]), 100)
+        self.assertEqual(pop.dvars().subPopSize[2], 50)
+        self.assertEqual(pop.dvars((0, 0)).numOfMales, pop.dvars().subPopSize[0])
+        self.assertEqual(pop.dvars((0, 1)).numOfMales, 0)
+        # a sample of all individuals
+        stat(pop, alleleFreq=[0, 1], structure=ALL_AVAIL, LD=[0, 1])
+        res = pop.vars().copy()
+        stat(pop, alleleFreq=[0, 1], structure=ALL_AVAIL, LD=[0, 1], sampleFraction=1)
+        self.assertEqual(pop.dvars().alleleFreq[0][1], res['alleleFreq'][0][1])
+        self.assertAlmostEqual(pop.dvars().F_st, res['F_st'])
+        self.assertAlmostEqual(pop.dvars().LD[0][1], res['LD'][0][1])
+        # all individuals are restored after sampling
+        geno = [list(ind.genotype()) for ind in pop.individuals()]
+        stat(pop, popSize=True, alleleFreq=[0])
+        self.assertEqual(pop.dvars().popSize, 5000)
+        self.assertEqual(pop.subPopSizes(), (3000, 2000))
+        self.assertEqual([list(ind.genotype()) for ind in pop.individuals()], geno)
+        freq = pop.dvars().alleleFreq[0][1]
+        # jackknife standard errors
+        stat(pop, alleleFreq=[0], sampleSize=2000, stdError=10,
+            vars=['alleleFreq', 'alleleFreq_sp'])
+        se = pop.dvars().alleleFreq_se[0][1]
+        expected = (freq * (1 - freq) / 4000) ** 0.5
+        self.assertTrue(expected / 3 < se < expected * 3)
+        self.assertTrue(abs(pop.dvars().alleleFreq[0][1] - freq) < 6 * expected)
+        self.assertTrue(pop.dvars(0).alleleFreq_se[0][1] > 0)
+        stat(pop, alleleFreq=[0], sampleSize=200, stdError=5, asArray=True)
+        self.assertEqual(len(pop.dvars().alleleFreq_se), 2)
+        self.assertRaises(ValueError, Stat, popSize=True, sampleSize=10, sampleFraction=0.1)
+        self.assertRaises(ValueError, Stat, popSize=True, stdError=10)
+        self.assertRaises(ValueError, stat, pop, popSize=True, sampleSize=6000)
+
 
     def testCombinedStats(self):
         '''Testing dependency of combined statistics'''
@@ -747,6 +925,86 @@ class TestStat(unittest.TestCase):
         pop1.removeSubPops(1)
         self.assertEqual(pop1.dvars(0).Pi_mt, self.pairwiseDiff(pop1, loci=[1, 3, 4]))
 
+    def tajimaD(self, sample, loci):
+        'Calculating Watterson\'s theta and Tajima\'s D'
+        seqs = [[ind.allele(loc, p) for loc in loci] for ind in sample.individuals()
+            for p in range(sample.ploidy())]
+        n = len(seqs)
+        S = len([i for i in range(len(loci)) if len(set(x[i] for x in seqs)) > 1])
+        pi = sum([sum([x != y for x, y in zip(seqs[i], seqs[j])])
+            for i in range(n) for j in range(i + 1, n)]) * 2. / (n * (n - 1))
+        a1 = sum([1. / i for i in range(1, n)])
+        a2 = sum([1. / i / i for i in range(1, n)])
+        b1 = (n + 1.) / (3 * (n - 1))
+        b2 = 2. * (n * n + n + 3) / (9 * n * (n - 1))
+        c1 = b1 - 1 / a1
+        c2 = b2 - (n + 2.) / (a1 * n) + a2 / (a1 * a1)
+        D = (pi - S / a1) / (c1 / a1 * S + c2 / (a1 * a1 + a2) * S * (S - 1)) ** 0.5
+        return S / a1, D
+
+    def testTajimaD(self):
+        '''Testing the calculation of Watterson's theta and Tajima's D'''
+        pop = Population(size=[40, 30], ploidy=2, loci=[6, 4],
+            lociPos=[1, 2, 3, 11, 12, 25, 1, 2, 3, 4])
+        initGenotype(pop, freq=[.8, .1, .1])
+        stat(pop, neutrality=ALL_AVAIL, neutrality_window=[10],
+            vars=['Pi', 'Theta_W', 'Tajima_D', 'Theta_W_sp', 'neutrality_window'])
+        thetaW, D = self.tajimaD(pop, range(10))
+        self.assertAlmostEqual(pop.dvars().Pi, self.pairwiseDiff(pop, loci=range(10)))
+        self.assertAlmostEqual(pop.dvars().Theta_W, thetaW)
+        self.assertAlmostEqual(pop.dvars().Tajima_D, D)
+        win = pop.dvars().neutrality_window
+        self.assertEqual(list(win['chrom']), [0, 0, 0, 1])
+        self.assertEqual(list(win['start']), [0, 10, 20, 0])
+        self.assertEqual(list(win['numSites']), [3, 2, 1, 4])
+        self.assertAlmostEqual(win['Pi'][3], self.pairwiseDiff(pop, loci=range(6, 10)))
+        thetaW, D = self.tajimaD(pop, range(3))
+        self.assertAlmostEqual(win['Theta_W'][0], thetaW)
+        self.assertAlmostEqual(win['Tajima_D'][0], D)
+        # overlapping windows
+        stat(pop, neutrality=range(6), neutrality_window=[10, 5])
+        win = pop.dvars().neutrality_window
+        self.assertEqual(list(win['start']), [-5, 0, 5, 10, 20, 25])
+        self.assertEqual(list(win['numSites']), [3, 3, 2, 2, 1, 1])
+        # subpopulation
+        stat(pop, neutrality=ALL_AVAIL, vars=['Theta_W_sp'])
+        pop.removeSubPops(1)
+        thetaW, D = self.tajimaD(pop, range(10))
+        self.assertAlmostEqual(pop.dvars(0).Theta_W, thetaW)
+        self.assertRaises(ValueError, Stat, neutrality=ALL_AVAIL, neutrality_window=[0])
+
+    def testSFS(self):
+        'Testing site frequency spectrum'
+        pop = Population(size=[20, 30], loci=[50], infoFields='x')
+        initSex(pop)
+        initGenotype(pop, freq=[.6, .3, .1])
+        pop.setVirtualSplitter(SexSplitter())
+        def derived(loc, inds):
+            return sum([ind.allele(loc, p) != 0 for ind in inds for p in range(2)])
+        stat(pop, SFS=ALL_AVAIL, vars=['SFS', 'SFS_folded', 'SFS_sp', 'SFS_folded_sp', 'SFS_joint'])
+        sfs = [0] * 101
+        folded = [0] * 51
+        for loc in range(50):
+            d = derived(loc, pop.individuals())
+            sfs[d] += 1
+            folded[min(d, 100 - d)] += 1
+        self.assertEqual(list(pop.dvars().SFS), sfs)
+        self.assertEqual(list(pop.dvars().SFS_folded), folded)
+        self.assertEqual(sum(pop.dvars(1).SFS), 50)
+        self.assertEqual(len(pop.dvars(1).SFS_folded), 31)
+        joint = pop.dvars().SFS_joint[(0, 1)]
+        self.assertEqual(len(joint), 41 * 61)
+        for loc in range(50):
+            d1 = derived(loc, pop.individuals(0))
+            d2 = derived(loc, pop.individuals(1))
+            self.assertTrue(joint[d1 * 61 + d2] > 0)
+        self.assertEqual(sum(joint), 50)
+        # virtual subpopulations
+        stat(pop, SFS=[0, 1], subPops=[(0, 0), (0, 1)], vars=['SFS_joint'])
+        nMale = len([x for x in pop.individuals(0) if x.sex() == MALE])
+        joint = pop.dvars().SFS_joint[((0, 0), (0, 1))]
+        self.assertEqual(len(joint), (2 * nMale + 1) * (2 * (20 - nMale) + 1))
+
     def Waples89(self, S0, St, t, P0, Pt):
         # number of loci
         K_all = 0
@@ -800,6 +1058,87 @@ class TestStat(unittest.TestCase):
         Vk = sum([(x-k)*(x-k) for x in cnt]) / (N * 1.)
         return (k * N - 1 ) / (k - 1 + Vk / k)
 
+    def testAssociation(self):
+        'Testing association tests of cases and controls'
+        def chisq(table):
+            cols = [c for c in range(len(table[0])) if table[0][c] + table[1][c] > 0]
+            N = float(sum(table[0]) + sum(table[1]))
+            res = 0
+            for r in range(2):
+                for c in cols:
+                    e = sum(table[r]) * (table[0][c] + table[1][c]) / N
+                    res += (table[r][c] - e) ** 2 / e
+            return res
+        pop = Population(size=[300, 500], loci=[20, 30, 3], chromTypes=[AUTOSOME, AUTOSOME, CHROMOSOME_X])
+        initSex(pop)
+        initGenotype(pop, freq=[.3, .7])
+        initGenotype(pop, freq=[.2, .3, .5], loci=range(20, 25))
+        for ind in pop.individuals():
+            ind.setAffected(randint(0, 3) == 0)
+        allVars = ['Allele_ChiSq', 'Allele_ChiSq_p', 'Geno_ChiSq', 'Geno_ChiSq_p',
+            'Armitage_p', 'Allele_ChiSq_sp', 'Allele_ChiSq_p_sp', 'Geno_ChiSq_sp',
+            'Geno_ChiSq_p_sp', 'Armitage_p_sp']
+        loci = list(range(25, 50)) + list(range(20))
+        stat(pop, association=loci, vars=allVars)
+        for loc in [0, 7, 19, 30, 49]:
+            alleles = [[0, 0], [0, 0]]
+            genos = [[0, 0, 0], [0, 0, 0]]
+            for ind in pop.individuals():
+                r = 0 if ind.affected() else 1
+                g = ind.allele(loc, 0) + ind.allele(loc, 1)
+                alleles[r][0] += 2 - g
+                alleles[r][1] += g
+                genos[r][g] += 1
+            self.assertAlmostEqual(pop.dvars().Allele_ChiSq[loc], chisq(alleles))
+            self.assertAlmostEqual(pop.dvars().Geno_ChiSq[loc], chisq(genos))
+            self.assertTrue(0 <= pop.dvars().Armitage_p[loc] <= 1)
+        # p-values as arrays, in the order of specified loci
+        vars = dict([(x, pop.vars()[x]) for x in allVars if not x.endswith('_sp')])
+        spVars = [dict([(x, pop.vars(sp)[x]) for x in allVars if not x.endswith('_sp')]) for sp in range(2)]
+        stat(pop, association=loci, vars=allVars, asArray=True)
+        for x in vars:
+            self.assertEqual(len(pop.vars()[x]), len(loci))
+            for idx, loc in enumerate(loci):
+                self.assertAlmostEqual(pop.vars()[x][idx], vars[x][loc])
+                for sp in range(2):
+                    self.assertAlmostEqual(pop.vars(sp)[x][idx], spVars[sp][x][loc])
+        # multi-allelic loci, counted by dictionaries with a locus on chromosome X
+        stat(pop, association=range(20, 25), vars=['Allele_ChiSq', 'Geno_ChiSq'])
+        vars = dict([(x, pop.vars()[x]) for x in ['Allele_ChiSq', 'Geno_ChiSq']])
+        stat(pop, association=list(range(20, 25)) + [50], vars=['Allele_ChiSq', 'Geno_ChiSq'])
+        for loc in range(20, 25):
+            self.assertAlmostEqual(pop.dvars().Allele_ChiSq[loc], vars['Allele_ChiSq'][loc])
+            self.assertAlmostEqual(pop.dvars().Geno_ChiSq[loc], vars['Geno_ChiSq'][loc])
+
+    def testGRM(self):
+        'Testing genomic relationship and IBS matrices'
+        pop = Population(size=[30, 40], loci=[70, 30])
+        initGenotype(pop, freq=[.6, .3, .1])
+        initGenotype(pop, freq=[1], loci=5)
+        stat(pop, GRM=ALL_AVAIL, subPops=[1, 0], vars=['GRM', 'IBS'])
+        inds = list(pop.individuals(1)) + list(pop.individuals(0))
+        geno = [[(ind.allele(loc, 0) != 0) + (ind.allele(loc, 1) != 0) for loc in range(100)]
+            for ind in inds]
+        freq = [sum([g[loc] for g in geno]) / 140. for loc in range(100)]
+        poly = [loc for loc in range(100) if 0 < freq[loc] < 1]
+        grm = pop.dvars().GRM
+        ibs = pop.dvars().IBS
+        self.assertEqual(len(grm), 70 * 70)
+        for i, j in [(0, 0), (0, 1), (5, 60), (69, 3)]:
+            g = sum([(geno[i][l] - 2 * freq[l]) * (geno[j][l] - 2 * freq[l]) /
+                (2 * freq[l] * (1 - freq[l])) for l in poly]) / len(poly)
+            self.assertAlmostEqual(grm[i * 70 + j], g)
+            s = sum([1 - abs(geno[i][l] - geno[j][l]) / 2. for l in range(100)]) / 100
+            self.assertAlmostEqual(ibs[i * 70 + j], s)
+            self.assertEqual(ibs[i * 70 + j], ibs[j * 70 + i])
+        # write to a file
+        stat(pop, GRM=ALL_AVAIL, GRM_file='grm.bin', subPops=[1, 0], vars=['GRM', 'IBS'])
+        with open('grm.bin', 'rb') as f:
+            data = f.read()
+        values = struct.unpack('%dd' % (len(data) // 8), data)
+        self.assertEqual(list(values), list(grm) + list(ibs))
+        os.remove('grm.bin')
+
     def testEffectiveSize(self):
         '''Testing the effective population size estimated from genotype data'''
         setOptions(seed=1235)
@@ -121,6 +121,44 @@ class TestUtils(unittest.TestCase):
             getRNG().set(rg)
         setRNG(name=old_rng)
 
+    def testCounterBasedRNG(self):
+        'Testing counter-based RNG philox'
+        self.assertTrue('philox' in moduleInfo()['availableRNGs'])
+        old_rng = getRNG().name()
+        old_threads = moduleInfo()['threads']
+        def evolve(numThreads):
+            # set RNG of all threads
+            setOptions(numThreads=numThreads, name='philox', seed=1234)
+            pop = Population(size=[500, 800], loci=[20, 30])
+            pop.evolve(initOps=[InitSex(), InitGenotype(freq=[0.4, 0.6])],
+                matingScheme=RandomMating(ops=Recombinator(rates=0.01)),
+                gen=3)
+            return pop.genotype()
+        geno = evolve(1)
+        self.assertEqual(geno, evolve(1))
+        # results do not depend on number of threads
+        self.assertEqual(geno, evolve(3))
+        # or on subpopulations being mated concurrently
+        self.assertEqual(geno, evolve(2))
+        self.assertTrue(abs(sum([getRNG().randUniform() for x in range(10000)]) / 10000. - 0.5) < 0.05)
+        setOptions(numThreads=old_threads)
+        setRNG(name=old_rng)
+
+    def testCounterBasedRNGRejection(self):
+        'Testing counter-based RNG with rejected families'
+        old_rng = getRNG().name()
+        setOptions(name='philox', seed=1234)
+        pop = Population(size=1000, loci=[10])
+        # controlled random mating rejects families until allele 1 at
+        # locus 5 reaches the expected frequency
+        pop.evolve(initOps=[InitSex(), InitGenotype(freq=[0.8, 0.2])],
+            matingScheme=ControlledRandomMating(loci=5, alleles=1,
+                freqFunc=lambda gen: [0.25 + 0.05 * gen]),
+            gen=3)
+        stat(pop, alleleFreq=5)
+        self.assertTrue(abs(pop.dvars().alleleFreq[5][1] - 0.35) < 0.05)
+        setRNG(name=old_rng)
+
     def testDefaultRNG(self):
         'Testing default RNG'
         rg = getRNG()